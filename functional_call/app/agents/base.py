@@ -1,9 +1,11 @@
+import asyncio
 import logging
 import json
 from typing import List, Dict, Any, Optional
 from abc import ABC, abstractmethod
 
 from app.tools.base import ToolRegistry
+from core.tracing import traced
 from memory.session_store import SessionState, ConversationMessage
 from llm.dashscope_provider import DashScopeLLMProvider
 
@@ -18,10 +20,13 @@ class ReActAgent(ABC):
     description: str = "Base agent"
     system_prompt: str = ""
     tools: List[str] = [] # List of tool names available to this agent
+    # 流式模式下，第一轮就直接给出纯文本回答（没有调用工具）时，是否把首句先送去播报
+    speak_preview: bool = False
 
     def __init__(self, llm: DashScopeLLMProvider):
         self.llm = llm
 
+    @traced("agent.run")
     async def run(self, task: str, session: SessionState, context: Dict[str, Any] = None, system_prompt_vars: Dict[str, str] = None) -> str:
         """
         执行 Agent 循环。
@@ -40,7 +45,22 @@ class ReActAgent(ABC):
             logger.info(f"[{self.name}] 步骤 {step_count}/{max_steps}")
             
             # 1. Think (思考并决定行动)
-            response = await self._think(session, system_prompt_vars)
+            # 流式模式下，工具调用的参数一完整就开始执行（按出现顺序串行），不等整段回复生成完
+            exec_context = context or {}
+            started: Dict[str, asyncio.Task] = {}
+            try:
+                response = await self._think(session, system_prompt_vars, exec_context, started,
+                                             preview=self.speak_preview and step_count == 1)
+            except asyncio.CancelledError:
+                # 被上层取消（推测执行的步骤作废 / 任务停止）：还在等待放行的工具一并取消
+                for pending in started.values():
+                    pending.cancel()
+                raise
+            except Exception:
+                # 已经开始的工具（可能在驱动机器人）必须执行完，再把异常交给上层
+                if started:
+                    await asyncio.gather(*started.values(), return_exceptions=True)
+                raise
             content = response.get("content")
             tool_calls = response.get("tool_calls")
 
@@ -55,33 +75,63 @@ class ReActAgent(ABC):
             # 2. Act (执行工具)
             for tool_call in tool_calls:
                 tool_call_id = tool_call.get("id")
-                function_name = tool_call["function"]["name"]
-                arguments_str = tool_call["function"]["arguments"]
-                
-                try:
-                    arguments = json.loads(arguments_str) if isinstance(arguments_str, str) else arguments_str
-                except json.JSONDecodeError:
-                    observation = f"错误：工具 {function_name} 的参数 JSON 格式非法。"
-                    session.push_message("tool", content=observation, tool_call_id=tool_call_id)
-                    continue
-
-                logger.info(f"[{self.name}] 执行工具: {function_name} 参数: {arguments}")
-                
-                # 注入上下文
-                exec_context = context or {}
-                result = await ToolRegistry.execute(function_name, arguments, context=exec_context)
-                
+                pending = started.pop(self._tool_call_key(tool_call), None)
+                if pending is not None:
+                    observation = await pending
+                else:
+                    observation = await self._execute_tool_call(tool_call, exec_context)
+
                 # 3. Observe (记录观察结果)
                 # 关键：每一条 tool_calls 必须对应一条 tool 消息，且带上 tool_call_id
-                observation = str(result)
                 session.push_message("tool", content=observation, tool_call_id=tool_call_id)
                 logger.info(f"[{self.name}] 观察结果: {observation}")
 
         return "已达到最大步骤数，未能完成任务。"
 
-    async def _think(self, session: SessionState, system_prompt_vars: Dict[str, str] = None) -> Dict[str, Any]:
+    @staticmethod
+    def _tool_call_key(tool_call: Dict[str, Any]) -> str:
+        return tool_call.get("id") or f'{tool_call["function"]["name"]}:{tool_call["function"]["arguments"]}'
+
+    async def _execute_tool_call(self, tool_call: Dict[str, Any], context: Dict[str, Any],
+                                 after: Optional[asyncio.Task] = None) -> str:
+        """
+        执行一个工具调用并返回观察结果；after 为前一个工具的执行任务（保证按顺序执行）。
+        context["gate"] 为放行检查（计划步骤并行/推测执行时由 PlanningFlow 注入）：依赖的步骤提交前不执行工具。
+        """
+        if after is not None:
+            await asyncio.gather(after, return_exceptions=True)
+        function_name = tool_call["function"]["name"]
+        gate = context.get("gate")
+        if gate is not None:
+            await gate(function_name)
+        arguments_str = tool_call["function"]["arguments"]
+
+        try:
+            arguments = json.loads(arguments_str) if isinstance(arguments_str, str) else arguments_str
+        except json.JSONDecodeError:
+            return f"错误：工具 {function_name} 的参数 JSON 格式非法。"
+
+        logger.info(f"[{self.name}] 执行工具: {function_name} 参数: {arguments}")
+        
+        # 注入上下文
+        result = await ToolRegistry.execute(function_name, arguments, context=context)
+        return str(result)
+
+    def _preview_answer(self, sentence: str, context: Dict[str, Any]) -> None:
+        """流式回答的首句通过 emit 先送去播报（整段回答仍按原流程返回）"""
+        logger.info(f"[{self.name}] 回答首句: {sentence}")
+        emit = context.get("emit")
+        if emit is not None:
+            emit("answer_preview", {"text": sentence, "agent": self.name})
+
+    @traced("llm.think")
+    async def _think(self, session: SessionState, system_prompt_vars: Dict[str, str] = None,
+                     context: Optional[Dict[str, Any]] = None,
+                     started: Optional[Dict[str, asyncio.Task]] = None, preview: bool = False) -> Dict[str, Any]:
         """
         调用 LLM 获取决策，并确保消息历史完整（不破坏 assistant-tool 对）。
+        流式模式下提前开始执行的工具任务写入 started（工具调用 id -> Task）；
+        preview 为 True 时纯文本回答的首句先送去播报。
         """
         # 1. 构建系统提示 (支持动态变量替换)
         current_system_prompt = self.system_prompt
@@ -99,8 +149,8 @@ class ReActAgent(ABC):
 
         messages = [{"role": "system", "content": current_system_prompt}]
         
-        # 2. 安全切片逻辑：确保不切断 assistant-tool 链路
-        raw_history = session.conversation
+        # 2. 安全切片逻辑：确保不切断 assistant-tool 链路（conversation 是 deque，先转 list 再按下标切片）
+        raw_history = list(session.conversation)
         max_history = 15
         if len(raw_history) > max_history:
             start_idx = len(raw_history) - max_history
@@ -122,7 +172,22 @@ class ReActAgent(ABC):
 
         # 4. 调用接口
         tool_schemas = ToolRegistry.get_schemas_by_names(self.tools)
-        response = self.llm.call_with_tools(messages, tool_schemas) 
-        return response
+        if not self.llm.streaming or started is None:
+            return await self.llm.acall_with_tools(messages, tool_schemas)
+
+        context = context if context is not None else {}
+        loop = asyncio.get_running_loop()
+        previous: List[Optional[asyncio.Task]] = [None]
+
+        def _on_tool_call(tool_call: Dict[str, Any]) -> None:
+            task = loop.create_task(self._execute_tool_call(dict(tool_call), context, after=previous[0]))
+            previous[0] = task
+            started[self._tool_call_key(tool_call)] = task
+
+        return await self.llm.astream_with_tools(
+            messages, tool_schemas,
+            on_tool_call=_on_tool_call,
+            on_first_sentence=(lambda sentence: self._preview_answer(sentence, context)) if preview else None,
+        )
 
 
@@ -52,6 +52,8 @@ class ManusAgent(ReActAgent):
     注意：严禁幻想！必须基于工具返回的真实数据进行规划。
     """
     tools = ["planning", "list_resources", "read_resource", "get_robot_status"]
+    # 第一轮不调用工具直接回答 = 指令无法识别时的追问，先把首句播报出去
+    speak_preview = True
 
     async def summarize_task(self, task: str, results: list) -> str:
         """
@@ -0,0 +1,196 @@
+"""
+简单指令快速通道：不经过 LLM，直接把指令编译成工具调用 + 模板回复。
+
+"去3号站"、"顶升"、"放下"、"开始充电"、"电量多少" 这类指令走 PlanningFlow 要经过 Manus 规划、
+Worker/Status 思考与 summarize_task，3~5 次 DashScope 往返、数秒延迟。这里用与计划缓存相同的文本归一
+与槽位提取（core.plan_cache.extract_intent），整句匹配一组固定说法：
+
+- 匹配且槽位合法（站点在地图中、高度在范围内）时生成 FastCommand，由 FastPathFlow 执行
+- 其余（组合指令、多个站点、无法识别、站点不存在）一律返回 None，交给 PlanningFlow
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from app.tools.base import ToolRegistry
+from core.metrics import counter
+from core.plan_cache import extract_intent
+from core.tracing import span
+from core.voice_pusher import VoicePushNotifier
+from memory.session_store import SessionState
+
+logger = logging.getLogger(__name__)
+
+
+_ROUTES = counter("intent_routes_total", "语音指令路由（fast_path: 直接执行工具，planning: 交给 LLM 规划）", ("route", "intent"))
+_FAST_PATH_RESULTS = counter("fast_path_commands_total", "快速通道指令执行结果", ("intent", "result"))
+
+# 整句匹配的说法（在 extract_intent 的模板上匹配：站点/高度已替换为 站点{station} / 高度{height}[厘米]）
+_GRAMMAR = (
+    ("move", re.compile(r"(?:去|到|前往|导航到|导航去|开到|开去|走到|移动到|回到|回)站点\{station\}")),
+    ("lift_up", re.compile(r"(?:顶升|升起|顶起|抬起|举起)(?:货物|货架)?(?:到?高度\{height\}(?:厘米)?)?")),
+    ("put_down", re.compile(r"(?:把货物?|把货架)?(?:放下|下降|降下|放货|卸货)(?:货物|货架)?")),
+    ("start_charge", re.compile(r"(?:开始|开启)充电")),
+    ("stop_charge", re.compile(r"(?:停止|结束|断开)充电")),
+    ("battery", re.compile(r"(?:查询|查看|查|看看)?(?:电池)?(?:电量|还有多少电|还剩多少电|剩多少电)(?:多少|是多少|还有多少|怎么样)?")),
+    ("status", re.compile(r"(?:查询|查看|查|看看)?(?:机器人|小车)?(?:当前|现在)?(?:状态|什么状态)")),
+)
+
+# 失败判定与 PlanningFlow 的逻辑失败判定一致
+_FAILURE_KEYWORDS = ("失败", "错误", "超时", "异常", "无法", "未能", "error")
+
+_MAX_LIFT_HEIGHT = 200
+
+
+@dataclass
+class FastCommand:
+    """一条可直接执行的指令"""
+    intent: str
+    tool: Optional[str] = None  # None 表示只读状态（不调用工具）
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    ack: str = "收到"  # 受理时的即时回复
+
+
+def parse_command(text: str, *, stations: Optional[Dict[str, str]] = None) -> Optional[FastCommand]:
+    """
+    把简单指令编译成工具调用；不是简单指令（或有任何歧义）时返回 None
+    :param stations: 当前地图站点（站点 ID -> 名称），为空时不校验站点是否存在
+    """
+    names = {name: sid for sid, name in (stations or {}).items() if name and not re.search(r"\d", name)}
+    template, slots = extract_intent(text, names)
+    intent = next((name for name, pattern in _GRAMMAR if pattern.fullmatch(template)), None)
+    command = _compile(intent, slots, stations or {}) if intent else None
+    _ROUTES.labels("fast_path" if command else "planning", command.intent if command else "-").inc()
+    return command
+
+
+def _compile(intent: str, slots: list, stations: Dict[str, str]) -> Optional[FastCommand]:
+    values = dict(slots) if len({kind for kind, _ in slots}) == len(slots) else None
+    if values is None:
+        return None  # 同类槽位出现多次（如两个站点）= 组合指令
+
+    if intent == "move":
+        station = values.get("station")
+        if station is None and "station_name" in values:
+            station = next((sid for sid, name in stations.items() if name == values["station_name"]), None)
+        if station is None or not station.isdigit() or (stations and station not in stations):
+            return None
+        return FastCommand("move", "move_to_station", {"station_no": int(station)}, ack=f"收到，正在前往站点{station}")
+    if intent == "lift_up":
+        if "height_cm" in values:
+            if "height" in values:
+                return None  # 同时说了毫米和厘米
+            height = int(values["height_cm"]) * 10  # lift_up 的高度单位为毫米
+        else:
+            height = int(values.get("height", 50))
+        if not 0 < height <= _MAX_LIFT_HEIGHT:
+            return None
+        return FastCommand("lift_up", "lift_up", {"height": height}, ack="收到，正在顶升")
+    if intent == "put_down":
+        return FastCommand("put_down", "put_down", ack="收到，正在放下")
+    if intent == "start_charge":
+        return FastCommand("start_charge", "start_charge", ack="收到，开始充电")
+    if intent == "stop_charge":
+        return FastCommand("stop_charge", "stop_charge", ack="收到，停止充电")
+    if intent in ("battery", "status"):
+        return FastCommand(intent, ack="收到，正在查询") if not slots else None
+    return None
+
+
+def _is_failure(result: str) -> bool:
+    text = str(result).lower()
+    return any(kw in text for kw in _FAILURE_KEYWORDS)
+
+
+def _battery_pct(status: dict) -> Optional[int]:
+    battery = status.get("battery") or {}
+    pct = battery.get("percentage_electricity")
+    return int(pct) if pct is not None else None
+
+
+def _describe_status(status: dict) -> str:
+    parts = []
+    pct = _battery_pct(status)
+    if pct is not None:
+        parts.append(f"电量百分之{pct}")
+    parts.append("正在充电" if status.get("is_charging") else "未在充电")
+    movement = status.get("movement") or {}
+    if "RUNNING" in str(movement.get("state", "")) and movement.get("target_station"):
+        parts.append(f"正在前往站点{movement['target_station']}")
+    elif status.get("station_no"):
+        parts.append(f"位于站点{status['station_no']}")
+    return "，".join(parts)
+
+
+class FastPathFlow:
+    """执行 FastCommand：一次工具调用（或一次状态读取）+ 模板回复，与 PlanningFlow 有相同的 execute 接口"""
+
+    _REPLIES = {
+        "move": ("已到达站点{station_no}", "前往站点{station_no}失败"),
+        "lift_up": ("顶升完成", "顶升失败"),
+        "put_down": ("已放下货物", "放下失败"),
+        "start_charge": ("已开始充电", "开始充电失败"),
+        "stop_charge": ("已停止充电", "停止充电失败"),
+    }
+
+    def __init__(self, command: FastCommand, session: SessionState, voice_pusher: Optional[VoicePushNotifier] = None,
+                 emit: Optional[Callable[[str, Optional[dict]], None]] = None):
+        self.command = command
+        self.session = session
+        self.voice_pusher = voice_pusher
+        self.emit = emit
+
+    async def execute(self, input_text: str, stop_event: Any = None) -> str:
+        from app.flows.planning_flow import acquire_session, release_session
+
+        if not acquire_session(self.session.session_id):
+            msg = f"⚠️ 会话 {self.session.session_id} 已有任务在运行中，忽略重复请求。"
+            logger.warning(msg)
+            return msg
+        command = self.command
+        logger.info(f"⚡ 快速通道: {input_text} -> {command.intent} {command.arguments}")
+        try:
+            with span("fast_path", intent=command.intent):
+                ok, reply = await self._run(command, stop_event)
+        except Exception as e:
+            logger.error(f"快速通道执行异常: {e}")
+            ok, reply = False, "执行出现异常"
+        finally:
+            release_session(self.session.session_id)
+
+        _FAST_PATH_RESULTS.labels(command.intent, "ok" if ok else "failed").inc()
+        self.session.push_message("assistant", reply)
+        if self.voice_pusher:
+            push = self.voice_pusher.push_completed if ok else self.voice_pusher.push_failed
+            push(reply, session_id=self.session.session_id, request_id=self.session.active_request_id)
+        return reply
+
+    async def _run(self, command: FastCommand, stop_event: Any) -> tuple[bool, str]:
+        if command.tool is None:
+            from app.tools.wrappers import get_robot_status_data
+            status = await asyncio.to_thread(get_robot_status_data)
+            if not status:
+                return False, "暂时无法获取机器人状态"
+            if command.intent == "battery":
+                pct = _battery_pct(status)
+                if pct is None:
+                    return False, "暂时无法获取电量"
+                return True, f"当前电量百分之{pct}" + ("，正在充电" if status.get("is_charging") else "")
+            return True, _describe_status(status)
+
+        context: Dict[str, Any] = {}
+        if stop_event is not None:
+            context["stop_event"] = stop_event
+        if self.emit is not None:
+            context["emit"] = self.emit
+        result = await ToolRegistry.execute(command.tool, dict(command.arguments), context=context)
+        if stop_event is not None and stop_event.is_set():
+            return False, "任务已被停止"
+        ok = not _is_failure(result)
+        success, failure = self._REPLIES[command.intent]
+        return ok, (success if ok else failure).format(**command.arguments)
@@ -0,0 +1,133 @@
+"""
+计划步骤的依赖图（DAG）与资源标签。
+
+PlanningFlow 原先严格逐步执行：每一步先由 Worker/Status 思考（至少一次 LLM 调用）选工具，再执行工具；
+机器人移动的几十秒里不做任何其他事。这里按步骤描述给每一步打资源标签：
+
+- motion（导航）/ lift（顶升、下降）/ charge（充电）：驱动同一台机器人，互相冲突
+- read（查询状态、电量、位置）：只读，查询之间互不冲突
+- verify（确认是否到达、检查是否完成）：只读，与 read 相同
+- other（无法识别，交给 Manus，可能改写计划）：与所有步骤冲突
+
+只读步骤依赖它之前的驱动类步骤与 other 步骤（排在驱动之后的查询读到的必须是驱动之后的状态），
+因此只有排在所有驱动步骤之前的查询才会并行执行；有副作用的步骤依赖之前的全部步骤（前面任何一步失败，
+后面都不能再驱动机器人）。执行工具前还会按工具本身的资源再检查一次：标成只读的步骤如果实际调用了
+驱动类工具，也要等前面的步骤全部提交。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+MOTION = "motion"
+LIFT = "lift"
+CHARGE = "charge"
+READ = "read"
+VERIFY = "verify"
+OTHER = "other"
+
+READ_ONLY = frozenset({READ, VERIFY})
+# 驱动机器人的步骤：输出只有成功/失败（失败时后续步骤全部取消），没有后续步骤会用到的数据
+ACTUATION = frozenset({MOTION, LIFT, CHARGE})
+
+# 关键词顺序与 PlanningFlow._select_agent 一致：先匹配驱动类，再匹配查询类
+_KEYWORDS = (
+    (CHARGE, ("充电", "charge")),
+    (LIFT, ("顶升", "下降", "放下", "降下", "lift", "put")),
+    (MOTION, ("移动", "前往", "去", "导航", "回到", "move", "nav")),
+    (VERIFY, ("确认", "核实", "是否", "到达后", "完成后", "verify", "confirm")),
+    (READ, ("查询", "状态", "电量", "检查", "有没有", "几个", "位置", "status", "check", "battery")),
+)
+
+# 工具 -> 资源（未列出的工具按 other 处理，例如 planning 会改写计划）
+TOOL_RESOURCES = {
+    "move_to_station": MOTION,
+    "lift_up": LIFT,
+    "put_down": LIFT,
+    "execute_action": LIFT,
+    "start_charge": CHARGE,
+    "stop_charge": CHARGE,
+    "get_robot_status": READ,
+    "list_resources": READ,
+    "read_resource": READ,
+}
+
+
+def classify_step(text: str) -> str:
+    """按步骤描述判断资源标签"""
+    desc = str(text).lower()
+    for resource, keywords in _KEYWORDS:
+        if any(kw in desc for kw in keywords):
+            return resource
+    return OTHER
+
+
+def is_read_only_tool(name: str) -> bool:
+    return TOOL_RESOURCES.get(name, OTHER) in READ_ONLY
+
+
+def _conflicts(a: str, b: str) -> bool:
+    # 只有查询之间可以并行；查询要读到驱动之后的状态，驱动类之间共用同一台机器人
+    return not (a in READ_ONLY and b in READ_ONLY)
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    index: int
+    text: str
+    resource: str
+    deps: Tuple[int, ...]  # 必须先提交的步骤下标
+
+    @property
+    def read_only(self) -> bool:
+        return self.resource in READ_ONLY
+
+
+def build_dag(steps: Sequence[str]) -> List[PlanStep]:
+    resources = [classify_step(s) for s in steps]
+    dag = []
+    for j, (text, resource) in enumerate(zip(steps, resources)):
+        if resource in READ_ONLY:
+            deps = tuple(i for i in range(j) if _conflicts(resources[i], resource))
+        else:
+            deps = tuple(range(j))
+        dag.append(PlanStep(index=j, text=str(text), resource=resource, deps=deps))
+    return dag
+
+
+class CommitBarrier:
+    """
+    计划按顺序提交的进度：frontier 之前的步骤都已提交。
+    wait(k) 等到前 k 个步骤都已提交；abort() 让所有等待者收到 CancelledError（步骤失败 / 任务停止）。
+    """
+
+    def __init__(self) -> None:
+        self.frontier = 0
+        self._waiters: List[Tuple[int, asyncio.Future]] = []
+
+    async def wait(self, k: int) -> None:
+        if self.frontier >= k:
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append((k, fut))
+        await fut
+
+    def advance(self, frontier: int) -> None:
+        self.frontier = max(self.frontier, frontier)
+        waiting = []
+        for k, fut in self._waiters:
+            if fut.done():
+                continue
+            if k <= self.frontier:
+                fut.set_result(None)
+            else:
+                waiting.append((k, fut))
+        self._waiters = waiting
+
+    def abort(self) -> None:
+        for _, fut in self._waiters:
+            if not fut.done():
+                fut.cancel()
+        self._waiters = []
@@ -5,27 +5,92 @@ import ast
 import re
 import threading
 import time
-from typing import Dict, Any, Optional, Set
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional, Set
 from app.agents.specific_agents import ManusAgent, WorkerAgent, StatusAgent
-from app.tools.planning import PLANS
+from app.flows.plan_dag import ACTUATION, OTHER, CommitBarrier, PlanStep, build_dag, is_read_only_tool
+from app.tools.planning import PLANS, create_plan, save_plan
+from core.metrics import counter
+from core.plan_cache import PlanCache
+from core.tracing import span
 from memory.session_store import SessionState
 from llm.dashscope_provider import DashScopeLLMProvider
 from core.voice_pusher import VoicePushNotifier
 
 logger = logging.getLogger(__name__)
 
+_STEPS_DISPATCHED = counter(
+    "plan_steps_dispatched_total",
+    "计划步骤的分发方式（sequential: 逐步 / parallel: 与其他步骤并行 / speculative: 依赖提交前先开始思考）",
+    ("mode",),
+)
+_SPECULATION = counter("plan_speculation_total", "推测执行的步骤（committed: 依赖成功后提交 / cancelled: 前序失败或任务停止时取消）", ("result",))
+
+# 等待步骤完成时检查停止信号的间隔
+_STOP_POLL_S = 0.2
+
 # 全局运行锁，防止同一 Session 重叠执行长耗时任务
 _running_sessions: Set[str] = set()
 _session_lock = threading.Lock()
 
+
+def acquire_session(session_id: str) -> bool:
+    """占用会话（同一会话同一时间只执行一个 Flow）；已被占用时返回 False"""
+    with _session_lock:
+        if session_id in _running_sessions:
+            return False
+        _running_sessions.add(session_id)
+        return True
+
+
+def release_session(session_id: str) -> None:
+    with _session_lock:
+        _running_sessions.discard(session_id)
+
+
+def describe_load(status: Optional[dict]) -> Optional[str]:
+    """
+    由最近一次动作任务判断载货状态：顶升动作（action_id=4, param1=11, 高度=param2）成功完成后，
+    寄存器里的 param0/param1 即下发时的 param1/param2。无法判断时返回 None
+    """
+    action = (status or {}).get("action") or {}
+    if "AT_FINISHED" not in str(action.get("state")) or "AT_TASK_FINISHED" not in str(action.get("result")):
+        return None
+    if action.get("id") != 4 or action.get("param0") != 11:
+        return None
+    height = action.get("param1")
+    if height is None:
+        return None
+    return f"已载货 (顶升高度 {height})" if height > 0 else "空载 (高度 0)"
+
+
+@dataclass
+class _RunningStep:
+    """已启动、结果尚未提交的计划步骤"""
+    step: PlanStep
+    executor: str
+    task: asyncio.Future
+    session: SessionState  # 该步骤的对话副本
+    statuses: List[str]  # 启动时计划的 step_statuses（计划被改写后仍写回原列表，与逐步执行一致）
+    speculative: bool = False
+    announced: bool = False  # 是否已播报并标记为进行中
+
 class PlanningFlow:
     """
     管理规划与执行的宏观循环。
     """
-    def __init__(self, llm: DashScopeLLMProvider, session: SessionState, voice_pusher: Optional[VoicePushNotifier] = None):
+    def __init__(self, llm: DashScopeLLMProvider, session: SessionState, voice_pusher: Optional[VoicePushNotifier] = None,
+                 emit: Optional[Callable[[str, Optional[dict]], None]] = None, plan_cache: Optional[PlanCache] = None,
+                 max_parallel_steps: int = 1):
         self.llm = llm
         self.session = session
         self.voice_pusher = voice_pusher
+        # 工具进度事件出口（写入 EventBus，供语音端拉取，也用于重启后接管机器人任务）
+        self.emit = emit
+        # 重复指令的计划缓存（可选，由 Orchestrator 注入）
+        self.plan_cache = plan_cache
+        # 同时进行的计划步骤数上限（1 = 逐步执行，不并行、不推测）
+        self.max_parallel_steps = max(1, int(max_parallel_steps))
         
         # 初始化 Agent
         self.manus_agent = ManusAgent(llm)
@@ -44,12 +109,10 @@ class PlanningFlow:
         执行流程：规划 -> 分发 -> 循环。
         """
         # 0. 任务互斥检查
-        with _session_lock:
-            if self.session.session_id in _running_sessions:
-                msg = f"⚠️ 会话 {self.session.session_id} 已有任务在运行中，忽略重复请求。"
-                logger.warning(msg)
-                return msg
-            _running_sessions.add(self.session.session_id)
+        if not acquire_session(self.session.session_id):
+            msg = f"⚠️ 会话 {self.session.session_id} 已有任务在运行中，忽略重复请求。"
+            logger.warning(msg)
+            return msg
 
         logger.info(f"开始 PlanningFlow，输入任务: {input_text}")
         # 记录当前的 ID 状态
@@ -65,6 +128,12 @@ class PlanningFlow:
             
             # 工具执行上下文（如停止信号）
             context = {"stop_event": stop_event} if stop_event else {}
+            if self.emit:
+                context["emit"] = self.emit
+
+            # 计划缓存：cache_state 非 None 表示计划是本次新建的且载货状态已知（可缓存），replayed_key 表示回放自缓存
+            cache_state: Optional[str] = None
+            replayed_key = None
 
             # 如果计划不存在，让 Manus 创建一个
             if plan_id not in PLANS:
@@ -73,6 +142,10 @@ class PlanningFlow:
                 # 1. 获取资源摘要 (静态)
                 from core.resource_manager import resource_manager
                 static_env = resource_manager.get_map_summary()
+                from app.tools.wrappers import describe_fleet
+                fleet_info = describe_fleet()
+                if fleet_info:
+                    static_env = f"{static_env}\n{fleet_info}"
                 
                 # 2. 获取机器人状态 (动态 - 开局一张图)
                 # 直接调用 StatusAgent 的工具（复用现有逻辑）
@@ -108,157 +181,142 @@ class PlanningFlow:
                 # 终极方案：在 PlanningFlow 初始化时，注入 robot_client，或者
                 # 使用 app.tools.wrappers 中的全局函数（如果它们是全局的）
                 # 检查 app.tools.wrappers
-                from app.tools.wrappers import get_robot_status
-                dynamic_status = get_robot_status()
-                
+                from app.tools.wrappers import format_robot_status, get_robot_status_data
+                # 一次读取（默认命中后台轮询缓存；缓存过期时的同步读取放到线程里，不占住事件循环）
+                status_data = await asyncio.to_thread(get_robot_status_data)
+                if status_data:
+                    self.session.robot_state_cache = status_data
+                    self.session.robot_state_ts = time.time()
+                    dynamic_status = format_robot_status(status_data)
+                else:
+                    dynamic_status = "错误：获取状态失败。"
+
                 # 【新增】解析载货状态，辅助 Manus 决策
-                load_status = "未知"
-                if isinstance(dynamic_status, str):
-                    if "ActionState.AT_FINISHED" in dynamic_status and "param2: 50" in dynamic_status:
-                        load_status = "已载货 (顶升高度 50)"
-                    elif "param2: 0" in dynamic_status:
-                        load_status = "空载 (高度 0)"
-
-                prompt_vars = {
-                    "static_environment_info": static_env,
-                    "dynamic_robot_status": f"{dynamic_status}\n- 载货判定：{load_status}"
-                }
-
-                manus_result = await self.manus_agent.run(
-                    task=f"请为任务创建执行计划：{input_text}。计划 ID 为 '{plan_id}'。",
-                    session=self.session,
-                    context=context,
-                    system_prompt_vars=prompt_vars  # 传递变量
-                )
-                
-                # 校验：如果 Manus 执行完后依然没生成计划，说明输入被判定为非法或无意义
-                if plan_id not in PLANS:
-                    logger.warning(f"Manus 判定无效指令: {input_text}")
-                    # 依然走总结逻辑，把 Manus 的一大堆解释浓缩成一句短语音
-                    fail_msg = await self.manus_agent.summarize_task(input_text, [manus_result])
-                    if self.voice_pusher:
-                        self.voice_pusher.push_failed(
-                            fail_msg, 
-                            session_id=self.session.session_id,
-                            request_id=self.session.active_request_id
-                        )
-                    return fail_msg
-            
-            # 2. 宏观循环 (分发步骤)
-            while not stop_event or not stop_event.is_set():
-                # 获取当前计划状态
-                plan = PLANS.get(plan_id)
-                if not plan:
-                    return "错误：计划创建失败。"
-                
-                steps = plan.get("steps", [])
-                statuses = plan.get("step_statuses", [])
-                plan_title = plan.get("title", "机器人任务")
-                
-                # 严格防御：如果由于某种原因 steps 还是字符串，立即修正或报错
-                if isinstance(steps, str):
-                    logger.warning("发现 steps 为字符串，尝试解析...")
-                    try:
-                        steps = json.loads(steps)
-                    except:
-                        return "错误：计划中的步骤格式损坏。"
-                
-                if not isinstance(steps, list):
-                    return "错误：计划步骤结构异常，无法继续。"
-
-                # 查找下一个“待执行”的步骤
-                next_step_idx = -1
-                for i, status in enumerate(statuses):
-                    if status == "not_started":
-                        next_step_idx = i
-                        break
-                
-                if next_step_idx == -1:
-                    # 所有步骤已完成
-                    logger.info("所有步骤均已处理完成。")
-                    
-                    # 【新逻辑】调用 LLM 生成全量复盘总结
-                    all_results = plan.get("step_results", [])
-                    final_summary = await self.manus_agent.summarize_task(input_text, all_results)
-                    
-                    if self.voice_pusher:
-                        self.voice_pusher.push_completed(
-                            final_summary, 
-                            session_id=self.session.session_id,
-                            request_id=self.session.active_request_id
-                        )
-                    
-                    return final_summary
-                
-                step_desc = steps[next_step_idx]
-                logger.info(f"正在处理步骤 {next_step_idx}: {step_desc}")
-                
-                # 【新增】任务启动播报：清洗数据，只推文字描述
-                if self.voice_pusher:
-                    clean_desc = self._extract_text(step_desc)
-                    self.voice_pusher.push_plan(
-                        clean_desc, 
-                        session_id=self.session.session_id,
-                        request_id=self.session.active_request_id
-                    )
+                load = describe_load(status_data)
+                load_status = load or "未知"
 
-                # 更新状态为“进行中”
-                statuses[next_step_idx] = "in_progress"
-                
-                # 3. 选择执行 Agent (当前使用关键词启发式路由)
-                executor = self._select_agent(step_desc)
-                logger.info(f"选定执行者: {executor.name}")
-                
-                # 4. 微观循环 (Agent 具体执行)
-                try:
-                    result = await executor.run(
-                        task=f"请执行该步骤：{step_desc}",
+                # 3. 计划缓存：同一意图（归一化文本 + 槽位）、地图版本与载货状态下执行成功过的计划直接回放
+                #    载货状态是回放的安全条件：判断不出时既不回放也不缓存
+                cache_state = load
+                match = None
+                if self.plan_cache is not None and cache_state is not None:
+                    match = self.plan_cache.lookup(input_text, state=cache_state)
+                if match is not None:
+                    create_plan(plan_id, match.steps, match.title)
+                    replayed_key = match.key
+                    self.session.push_message("assistant", f"复用已验证的计划「{match.title}」，共 {len(match.steps)} 个步骤。")
+                else:
+                    prompt_vars = {
+                        "static_environment_info": static_env,
+                        "dynamic_robot_status": f"{dynamic_status}\n- 载货判定：{load_status}"
+                    }
+
+                    manus_result = await self.manus_agent.run(
+                        task=f"请为任务创建执行计划：{input_text}。计划 ID 为 '{plan_id}'。",
                         session=self.session,
-                        context=context
+                        context=context,
+                        system_prompt_vars=prompt_vars  # 传递变量
                     )
-                    
-                    # 检查逻辑失败（Agent 没报错，但返回了失败信息）
-                    is_logical_failure = any(kw in result for kw in ["失败", "错误", "超时", "异常", "无法", "未能"])
-                    
-                    if is_logical_failure:
-                        # 更新计划状态并记录结果
-                        statuses[next_step_idx] = "failed"
-                        PLANS[plan_id]["step_results"][next_step_idx] = result
-                        
-                        # 【收尾】不再推送中间的“失败”，直接生成并推送智能复盘总结
-                        all_results = PLANS[plan_id]["step_results"]
-                        fail_summary = await self.manus_agent.summarize_task(input_text, all_results)
-                        if self.voice_pusher:
-                            self.voice_pusher.push_failed(fail_summary, session_id=self.session.session_id)
-                        return fail_summary
-                    
-                except Exception as e:
-                    logger.error(f"步骤执行发生异常: {e}")
-                    statuses[next_step_idx] = "error"
-                    PLANS[plan_id]["step_results"][next_step_idx] = f"系统异常: {e}"
-                    
-                    # 【收尾】生成异常总结并停止，不再推送中间的“失败”
-                    all_results = PLANS[plan_id]["step_results"]
-                    err_summary = await self.manus_agent.summarize_task(input_text, all_results)
-                    if self.voice_pusher:
-                        self.voice_pusher.push_failed(err_summary, session_id=self.session.session_id)
-                    return err_summary
-                
-                # 5. 更新计划状态 (成功执行)
-                # 注意：此处不再推送中间的“成功”，保持语音链路简洁，只在全部结束时汇总播报
-                statuses[next_step_idx] = "completed"
-                PLANS[plan_id]["step_results"][next_step_idx] = result
                 
-                logger.info(f"步骤 {next_step_idx} 执行完毕，结果: {result}")
-                
-                # 可选：向 Flow 提供反馈？（目前通过更新 PLANS 隐式处理）
+                    # 校验：如果 Manus 执行完后依然没生成计划，说明输入被判定为非法或无意义
+                    if plan_id not in PLANS:
+                        logger.warning(f"Manus 判定无效指令: {input_text}")
+                        # 依然走总结逻辑，把 Manus 的一大堆解释浓缩成一句短语音
+                        fail_msg = await self.manus_agent.summarize_task(input_text, [manus_result])
+                        if self.voice_pusher:
+                            self.voice_pusher.push_failed(
+                                fail_msg, 
+                                session_id=self.session.session_id,
+                                request_id=self.session.active_request_id
+                            )
+                        return fail_msg
             
-            return "任务已被停止或中断。"
+            # 2. 宏观循环：按计划步骤的依赖图分发（见 app/flows/plan_dag.py）
+            #    - 依赖已提交的只读步骤与当前步骤并行执行
+            #    - 下一步的思考与当前步骤的执行重叠（推测执行），依赖提交前不执行工具
+            #    - 结果按计划顺序提交；max_parallel_steps=1 时等同于逐步执行
+            barrier = CommitBarrier()
+            running: Dict[int, _RunningStep] = {}
+            dag: List[PlanStep] = []
+            dag_key: tuple = ()
+            try:
+                while not stop_event or not stop_event.is_set():
+                    # 获取当前计划状态
+                    plan = PLANS.get(plan_id)
+                    if not plan:
+                        return "错误：计划创建失败。"
+
+                    steps = plan.get("steps", [])
+                    statuses = plan.get("step_statuses", [])
+
+                    # 严格防御：如果由于某种原因 steps 还是字符串，立即修正或报错
+                    if isinstance(steps, str):
+                        logger.warning("发现 steps 为字符串，尝试解析...")
+                        try:
+                            steps = json.loads(steps)
+                        except:
+                            return "错误：计划中的步骤格式损坏。"
+
+                    if not isinstance(steps, list):
+                        return "错误：计划步骤结构异常，无法继续。"
+
+                    # 计划被改写（Manus 步骤调用 update_steps）时重建依赖图
+                    if tuple(steps) != dag_key:
+                        dag_key, dag = tuple(steps), build_dag(steps)
+
+                    # 查找下一个待提交的步骤（未开始，或已开始但结果尚未提交）
+                    next_step_idx = self._next_pending(statuses, running)
+                    barrier.advance(len(statuses) if next_step_idx == -1 else next_step_idx)
+
+                    if next_step_idx == -1:
+                        # 所有步骤已完成
+                        logger.info("所有步骤均已处理完成。")
+
+                        if self.plan_cache is not None and cache_state is not None and replayed_key is None:
+                            self.plan_cache.store(input_text, plan, state=cache_state)
+
+                        # 【新逻辑】调用 LLM 生成全量复盘总结
+                        all_results = plan.get("step_results", [])
+                        final_summary = await self.manus_agent.summarize_task(input_text, all_results)
+
+                        if self.voice_pusher:
+                            self.voice_pusher.push_completed(
+                                final_summary,
+                                session_id=self.session.session_id,
+                                request_id=self.session.active_request_id
+                            )
+
+                        return final_summary
+
+                    # 按计划顺序提交：只有排在最前面的步骤完成后才提交，之后重新读取计划
+                    step_run = running.get(next_step_idx)
+                    if step_run is not None and step_run.task.done():
+                        del running[next_step_idx]
+                        failure = await self._commit_step(plan_id, step_run, input_text, replayed_key)
+                        if failure is not None:
+                            return failure
+                        continue
+
+                    self._dispatch(plan_id, dag, statuses, running, next_step_idx, barrier, context)
+                    await asyncio.wait([r.task for r in running.values()], timeout=_STOP_POLL_S,
+                                       return_when=asyncio.FIRST_COMPLETED)
+
+                return "任务已被停止或中断。"
+            finally:
+                # 步骤失败：还在等待放行的推测步骤与并行中的只读步骤一并取消（结果不提交）
+                # 任务停止：已经开始的步骤自行响应 stop_event 收尾（与逐步执行一致），其余取消
+                barrier.abort()
+                stopping = stop_event is not None and stop_event.is_set()
+                for step_run in running.values():
+                    if not (stopping and step_run.announced):
+                        step_run.task.cancel()
+                    if step_run.speculative:
+                        _SPECULATION.labels("cancelled").inc()
+                if running:
+                    await asyncio.gather(*(r.task for r in running.values()), return_exceptions=True)
         finally:
             # 0. 释放任务锁
-            with _session_lock:
-                if self.session.session_id in _running_sessions:
-                    _running_sessions.remove(self.session.session_id)
+            release_session(self.session.session_id)
 
             # 【核心修改点】任务结束（无论成功失败），立即清洗上下文
             logger.info(f"🧹 任务结束，清理 Session {self.session.session_id} 的历史噪音...")
@@ -267,6 +325,163 @@ class PlanningFlow:
             # 同时清除 active_plan_id，确保下次是全新规划
             self.session.active_plan_id = None
 
+    # ------------------ 步骤分发 / 提交 ------------------
+    @staticmethod
+    def _next_pending(statuses: List[str], running: Dict[int, "_RunningStep"]) -> int:
+        """第一个未开始或结果尚未提交的步骤；全部处理完时返回 -1"""
+        for i, status in enumerate(statuses):
+            if status == "not_started" or i in running:
+                return i
+        return -1
+
+    def _dispatch(self, plan_id: str, dag: List[PlanStep], statuses: List[str], running: Dict[int, "_RunningStep"],
+                  frontier: int, barrier: CommitBarrier, context: Dict[str, Any]) -> None:
+        """在 [frontier, frontier + max_parallel_steps) 窗口内启动可以开始的步骤"""
+        limit = self.max_parallel_steps
+
+        def _settled(step: PlanStep) -> bool:
+            return all(d not in running and statuses[d] != "not_started" for d in step.deps)
+
+        def _speculable(step: PlanStep) -> bool:
+            # 推测步骤的思考看不到尚未提交的步骤的结果：只越过驱动类步骤推测（结果只有成功/失败，失败时推测步骤被取消），
+            # 查询/确认/Manus 步骤的输出可能决定下一步的工具参数，必须等它们提交后再思考
+            return step.resource != OTHER and all(dag[d].resource in ACTUATION for d in step.deps if d in running)
+
+        # 推测执行的步骤：依赖已提交，正式开始
+        for i, step_run in sorted(running.items()):
+            if not step_run.announced and _settled(dag[i]):
+                self._announce(plan_id, step_run)
+
+        active = sum(1 for r in running.values() if not r.task.done())
+        # 同一时间只推测一个步骤：紧接在已启动步骤之后、第一个还没开始的步骤
+        speculate = limit > 1 and not any(not r.announced for r in running.values())
+        for i in range(frontier, min(len(dag), len(statuses), frontier + limit)):
+            step = dag[i]
+            settled = _settled(step)
+            step_run = running.get(i)
+            if step_run is not None:
+                if step.resource == OTHER:
+                    speculate = False  # Manus 步骤可能改写计划，不越过它推测
+                continue
+            if statuses[i] != "not_started":
+                continue
+            speculative = not settled and speculate and _speculable(step)
+            if active >= limit or not (settled or speculative):
+                speculate = False  # 前面有还没开始的步骤，之后的步骤不推测
+                continue
+            if speculative:
+                speculate = False
+            mode = "speculative" if speculative else ("parallel" if running else "sequential")
+            _STEPS_DISPATCHED.labels(mode).inc()
+            step_run = self._start_step(step, statuses, barrier, context, speculative=speculative)
+            running[i] = step_run
+            active += 1
+            if not speculative:
+                self._announce(plan_id, step_run)
+
+    def _start_step(self, step: PlanStep, statuses: List[str], barrier: CommitBarrier, context: Dict[str, Any],
+                    *, speculative: bool) -> "_RunningStep":
+        # 3. 选择执行 Agent (当前使用关键词启发式路由)
+        executor = self._select_agent(step.text)
+        dep_frontier = max(step.deps) + 1 if step.deps else 0
+
+        async def _gate(tool_name: str) -> None:
+            await barrier.wait(dep_frontier)
+            if not is_read_only_tool(tool_name):
+                # 有副作用的工具：前面所有步骤都提交（且成功）后才执行
+                await barrier.wait(step.index)
+
+        # 每个步骤用一份对话副本，提交时按计划顺序合并回会话
+        session = self.session.fork()
+        task = asyncio.ensure_future(self._run_step(executor, step, session, {**context, "gate": _gate}, speculative))
+        return _RunningStep(step=step, executor=executor.name, task=task, session=session,
+                            statuses=statuses, speculative=speculative)
+
+    async def _run_step(self, executor, step: PlanStep, session: SessionState, context: Dict[str, Any],
+                        speculative: bool) -> str:
+        # 4. 微观循环 (Agent 具体执行)
+        with span("plan.step", index=step.index, resource=step.resource, speculative=speculative):
+            return await executor.run(task=f"请执行该步骤：{step.text}", session=session, context=context)
+
+    def _announce(self, plan_id: str, step_run: "_RunningStep") -> None:
+        """步骤正式开始：播报并标记为进行中"""
+        step_run.announced = True
+        i, step_desc = step_run.step.index, step_run.step.text
+        logger.info(f"正在处理步骤 {i}: {step_desc}（{step_run.step.resource}）")
+
+        # 【新增】任务启动播报：清洗数据，只推文字描述
+        if self.voice_pusher:
+            clean_desc = self._extract_text(step_desc)
+            self.voice_pusher.push_plan(
+                clean_desc,
+                session_id=self.session.session_id,
+                request_id=self.session.active_request_id
+            )
+
+        # 更新状态为“进行中”
+        step_run.statuses[i] = "in_progress"
+        save_plan(plan_id)
+        logger.info(f"选定执行者: {step_run.executor}")
+
+    async def _commit_step(self, plan_id: str, step_run: "_RunningStep", input_text: str,
+                           replayed_key: Optional[tuple]) -> Optional[str]:
+        """
+        提交一个已完成的步骤（按计划顺序调用）
+        :return: 步骤失败时返回失败总结（Flow 结束），成功时返回 None
+        """
+        i = step_run.step.index
+        statuses = step_run.statuses
+        if not step_run.announced:
+            self._announce(plan_id, step_run)
+        if step_run.speculative:
+            _SPECULATION.labels("committed").inc()
+        self.session.merge_fork(step_run.session)
+
+        try:
+            result = step_run.task.result()
+        except Exception as e:
+            logger.error(f"步骤执行发生异常: {e}")
+            statuses[i] = "error"
+            PLANS[plan_id]["step_results"][i] = f"系统异常: {e}"
+            save_plan(plan_id)
+            if replayed_key is not None:
+                self.plan_cache.invalidate(replayed_key, replay_failed=True)
+
+            # 【收尾】生成异常总结并停止，不再推送中间的“失败”
+            all_results = PLANS[plan_id]["step_results"]
+            err_summary = await self.manus_agent.summarize_task(input_text, all_results)
+            if self.voice_pusher:
+                self.voice_pusher.push_failed(err_summary, session_id=self.session.session_id)
+            return err_summary
+
+        # 检查逻辑失败（Agent 没报错，但返回了失败信息）
+        is_logical_failure = any(kw in result for kw in ["失败", "错误", "超时", "异常", "无法", "未能"])
+
+        if is_logical_failure:
+            # 更新计划状态并记录结果
+            statuses[i] = "failed"
+            PLANS[plan_id]["step_results"][i] = result
+            save_plan(plan_id)
+
+            if replayed_key is not None:
+                self.plan_cache.invalidate(replayed_key, replay_failed=True)
+
+            # 【收尾】不再推送中间的“失败”，直接生成并推送智能复盘总结
+            all_results = PLANS[plan_id]["step_results"]
+            fail_summary = await self.manus_agent.summarize_task(input_text, all_results)
+            if self.voice_pusher:
+                self.voice_pusher.push_failed(fail_summary, session_id=self.session.session_id)
+            return fail_summary
+
+        # 5. 更新计划状态 (成功执行)
+        # 注意：此处不再推送中间的“成功”，保持语音链路简洁，只在全部结束时汇总播报
+        statuses[i] = "completed"
+        PLANS[plan_id]["step_results"][i] = result
+        save_plan(plan_id)
+
+        logger.info(f"步骤 {i} 执行完毕，结果: {result}")
+        return None
+
     def _extract_text(self, raw_content: Any) -> str:
         """
         从结构化数据中提取纯中文描述，严禁输出英文和复杂标点。
@@ -349,7 +564,13 @@ class PlanningFlow:
 
 class FlowFactory:
     @staticmethod
-    def create_flow(flow_type: str, llm: DashScopeLLMProvider, session: SessionState, voice_pusher: Optional[VoicePushNotifier] = None) -> PlanningFlow:
+    def create_flow(flow_type: str, llm: DashScopeLLMProvider, session: SessionState, voice_pusher: Optional[VoicePushNotifier] = None,
+                    emit: Optional[Callable[[str, Optional[dict]], None]] = None,
+                    plan_cache: Optional[PlanCache] = None, command: Any = None, max_parallel_steps: int = 1):
         if flow_type == "planning":
-            return PlanningFlow(llm, session, voice_pusher)
+            return PlanningFlow(llm, session, voice_pusher, emit=emit, plan_cache=plan_cache,
+                                max_parallel_steps=max_parallel_steps)
+        if flow_type == "fast_path":
+            from app.flows.fast_path import FastPathFlow
+            return FastPathFlow(command, session, voice_pusher, emit=emit)
         raise ValueError(f"未知 Flow 类型: {flow_type}")
@@ -4,6 +4,8 @@ import functools
 from typing import Callable, Dict, Any, List, Optional
 import logging
 
+from core.tracing import span
+
 logger = logging.getLogger(__name__)
 
 class ToolRegistry:
@@ -75,17 +77,20 @@ class ToolRegistry:
                 if param_name in sig.parameters:
                     arguments[param_name] = context[param_name]
 
-        try:
-            # Check if the function is a coroutine
-            if inspect.iscoroutinefunction(tool_func):
-                result = await tool_func(**arguments)
-            else:
-                result = tool_func(**arguments)
-            
-            return str(result)
-        except Exception as e:
-            logger.error(f"Error executing tool {name}: {e}", exc_info=True)
-            return f"Error executing tool '{name}': {str(e)}"
+        with span("tool.execute", tool=name) as sp:
+            try:
+                # Check if the function is a coroutine
+                if inspect.iscoroutinefunction(tool_func):
+                    result = await tool_func(**arguments)
+                else:
+                    result = tool_func(**arguments)
+
+                return str(result)
+            except Exception as e:
+                logger.error(f"Error executing tool {name}: {e}", exc_info=True)
+                if sp is not None:
+                    sp.status, sp.error = "error", f"{type(e).__name__}: {e}"
+                return f"Error executing tool '{name}': {str(e)}"
 
     @staticmethod
     def _generate_schema(func: Callable, name: str, description: str) -> Dict[str, Any]:
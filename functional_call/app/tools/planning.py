@@ -1,11 +1,45 @@
 from typing import List, Dict, Any, Optional
 import json
 from .base import ToolRegistry
+from core.context import get_request_id
 
 # In-memory storage for plans (Plan Board)
-# Structure: { plan_id: { "steps": [...], "status": "...", "title": "..." } }
+# Structure: { plan_id: { "steps": [...], "status": "...", "title": "...", "request_id": "..." } }
 PLANS = {}
 
+# 持久化日志（可选，由 Orchestrator 注入）：每次计划变化写入一份快照，重启后恢复
+_journal = None
+
+
+def set_plan_journal(journal) -> None:
+    global _journal
+    _journal = journal
+
+
+def save_plan(plan_id: str) -> None:
+    """把计划当前状态写入持久化日志（快照按值复制，之后修改 PLANS 不影响已入队的记录）"""
+    plan = PLANS.get(plan_id)
+    if _journal is None or plan is None:
+        return
+    request_id = plan.get("request_id") or get_request_id() or plan_id
+    snapshot = json.loads(json.dumps(plan, ensure_ascii=False, default=str))
+    _journal.append("plan", request_id, {"plan_id": plan_id, "plan": snapshot})
+
+
+def create_plan(plan_id: str, steps: List[Any], title: Optional[str] = None) -> Dict[str, Any]:
+    """新建计划（全部步骤未开始）并写入持久化日志"""
+    PLANS[plan_id] = {
+        "title": title or "未命名计划",
+        "steps": [str(s) for s in steps],
+        "step_statuses": ["not_started"] * len(steps),
+        "step_results": [""] * len(steps),
+        "status": "active",
+        "request_id": get_request_id(),
+    }
+    save_plan(plan_id)
+    return PLANS[plan_id]
+
+
 @ToolRegistry.register(name="planning", description="任务计划管理工具。用于创建、更新或查询执行计划。")
 def planning(command: str, plan_id: str, steps: List[str] = None, step_index: int = None, step_status: str = None, title: str = None):
     """
@@ -34,13 +68,7 @@ def planning(command: str, plan_id: str, steps: List[str] = None, step_index: in
         if not isinstance(steps, list):
             return "错误：'steps' 必须是一个列表。"
 
-        PLANS[plan_id] = {
-            "title": title or "未命名计划",
-            "steps": [str(s) for s in steps],
-            "step_statuses": ["not_started"] * len(steps),
-            "step_results": [""] * len(steps),
-            "status": "active"
-        }
+        create_plan(plan_id, steps, title)
         return f"计划已创建，ID: {plan_id}。共 {len(steps)} 个步骤。"
 
     elif command == "get":
@@ -58,6 +86,7 @@ def planning(command: str, plan_id: str, steps: List[str] = None, step_index: in
             return f"错误：无效的步骤索引 {step_index}。"
             
         plan["step_statuses"][step_index] = step_status
+        save_plan(plan_id)
         return f"步骤 {step_index} 已标记为 {step_status}。"
 
     elif command == "update_steps":
@@ -70,6 +99,7 @@ def planning(command: str, plan_id: str, steps: List[str] = None, step_index: in
         # 简单覆盖现有步骤
         plan["steps"] = steps
         plan["step_statuses"] = ["not_started"] * len(steps)
+        save_plan(plan_id)
         return f"计划步骤已更新。新步骤数：{len(steps)}。"
 
     return f"错误：未知指令 {command}。"
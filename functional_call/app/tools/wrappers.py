@@ -2,52 +2,62 @@ from app.tools.base import ToolRegistry
 from tools.nav_toolbox import NavToolbox
 from tools.action_toolbox import ActionToolbox
 from tools.status_toolbox import StatusToolbox
+import asyncio
 import logging
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     from tools.robot_client import EventEmitter
+    from tools.robot_fleet import RobotFleet
     import threading
 
 logger = logging.getLogger(__name__)
 
-# Instances to be injected later
-_nav_toolbox: NavToolbox = None
-_action_toolbox: ActionToolbox = None
-_status_toolbox: StatusToolbox = None
+# Instance to be injected later
+_fleet: 'RobotFleet' = None
 
-def initialize_tools(nav: NavToolbox, action: ActionToolbox, status: StatusToolbox):
-    global _nav_toolbox, _action_toolbox, _status_toolbox
-    _nav_toolbox = nav
-    _action_toolbox = action
-    _status_toolbox = status
+def initialize_tools(fleet: 'RobotFleet'):
+    global _fleet
+    _fleet = fleet
 
-@ToolRegistry.register(name="move_to_station", description="导航机器人到指定站点。")
-async def move_to_station(station_no: int, timeout_s: int = 120, emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
-    if not _nav_toolbox:
+def describe_fleet() -> str:
+    """车队机器人列表（供提示词使用），单机器人时返回空字符串"""
+    if not _fleet or len(_fleet.robot_ids()) <= 1:
+        return ""
+    ids = ", ".join(f"{rid}（默认）" if rid == _fleet.default_robot_id else rid for rid in _fleet.robot_ids())
+    return f"可用机器人：{ids}。工具参数 robot_id 为空时操作默认机器人。"
+
+# 导航/动作/充电会阻塞到机器人任务结束（数十秒），放到线程里等待，不占住事件循环：
+# 同一事件循环上的 LLM 流式读取、并行的查询步骤可以继续进行（停止信号仍由 stop_event 传递）
+@ToolRegistry.register(name="move_to_station", description="导航机器人到指定站点。robot_id 为空表示默认机器人。")
+async def move_to_station(station_no: int, timeout_s: int = 120, robot_id: str = "", emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
+    if not _fleet:
         return "错误：导航工具未初始化。"
     try:
-        _nav_toolbox.move_to_station(station_no, timeout_s=timeout_s, emit=emit, stop_event=stop_event)
+        with _fleet.lease(robot_id) as robot:
+            await asyncio.to_thread(NavToolbox(robot).move_to_station, station_no, timeout_s=timeout_s, emit=emit, stop_event=stop_event)
         return f"成功到达站点 {station_no}。"
     except Exception as e:
         logger.error(f"导航失败: {e}")
         return f"错误：导航失败。{str(e)}"
 
-@ToolRegistry.register(name="lift_up", description="顶升货物。")
-async def lift_up(height: int = 50, timeout_s: int = 60, emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
-    if not _action_toolbox or not _status_toolbox:
+@ToolRegistry.register(name="lift_up", description="顶升货物。robot_id 为空表示默认机器人。")
+async def lift_up(height: int = 50, timeout_s: int = 60, robot_id: str = "", emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
+    if not _fleet:
         return "错误：工具未初始化。"
     try:
-        # 1. 动作前校验：确保当前不在移动中
-        status = _status_toolbox.get_movement_task_info()
-        if "MT_RUNNING" in str(status.get("state", "")):
-            return "错误：机器人正在移动中，无法执行顶升。"
-
-        # 2. 执行顶升 (action_id=4, param1=11, param2=height)
-        _action_toolbox.execute_action(4, 11, height, timeout_s=timeout_s, emit=emit, stop_event=stop_event)
-        
-        # 3. 动作后校验：确认动作任务已完成
-        action_status = _status_toolbox.get_action_task_info()
+        with _fleet.lease(robot_id) as robot:
+            status_toolbox = StatusToolbox(robot)
+            # 1. 动作前校验：确保当前不在移动中（紧跟在导航指令之后，读实时状态而不是轮询缓存）
+            status = await asyncio.to_thread(status_toolbox.get_movement_task_info, fresh=True)
+            if "MT_RUNNING" in str(status.get("state", "")):
+                return "错误：机器人正在移动中，无法执行顶升。"
+
+            # 2. 执行顶升 (action_id=4, param1=11, param2=height)
+            await asyncio.to_thread(ActionToolbox(robot).execute_action, 4, 11, height, timeout_s=timeout_s, emit=emit, stop_event=stop_event)
+            
+            # 3. 动作后校验：确认动作任务已完成
+            action_status = await asyncio.to_thread(status_toolbox.get_action_task_info, fresh=True)
         if "AT_FINISHED" in str(action_status.get("state", "")):
             return f"顶升成功 (高度 {height})。"
         else:
@@ -57,21 +67,23 @@ async def lift_up(height: int = 50, timeout_s: int = 60, emit: 'EventEmitter' =
         logger.error(f"顶升失败: {e}")
         return f"错误：顶升失败。{str(e)}"
 
-@ToolRegistry.register(name="put_down", description="降下货物。")
-async def put_down(timeout_s: int = 60, emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
-    if not _action_toolbox or not _status_toolbox:
+@ToolRegistry.register(name="put_down", description="降下货物。robot_id 为空表示默认机器人。")
+async def put_down(timeout_s: int = 60, robot_id: str = "", emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
+    if not _fleet:
         return "错误：工具未初始化。"
     try:
-        # 1. 动作前校验
-        status = _status_toolbox.get_movement_task_info()
-        if "MT_RUNNING" in str(status.get("state", "")):
-            return "错误：机器人正在移动中，无法执行下降。"
-
-        # 2. 执行下降 (action_id=4, param1=11, param2=0)
-        _action_toolbox.execute_action(4, 11, 0, timeout_s=timeout_s, emit=emit, stop_event=stop_event)
-        
-        # 3. 动作后校验
-        action_status = _status_toolbox.get_action_task_info()
+        with _fleet.lease(robot_id) as robot:
+            status_toolbox = StatusToolbox(robot)
+            # 1. 动作前校验
+            status = await asyncio.to_thread(status_toolbox.get_movement_task_info, fresh=True)
+            if "MT_RUNNING" in str(status.get("state", "")):
+                return "错误：机器人正在移动中，无法执行下降。"
+
+            # 2. 执行下降 (action_id=4, param1=11, param2=0)
+            await asyncio.to_thread(ActionToolbox(robot).execute_action, 4, 11, 0, timeout_s=timeout_s, emit=emit, stop_event=stop_event)
+            
+            # 3. 动作后校验
+            action_status = await asyncio.to_thread(status_toolbox.get_action_task_info, fresh=True)
         if "AT_FINISHED" in str(action_status.get("state", "")):
             return "降下成功。"
         else:
@@ -81,54 +93,72 @@ async def put_down(timeout_s: int = 60, emit: 'EventEmitter' = None, stop_event:
         logger.error(f"降下失败: {e}")
         return f"错误：降下失败。{str(e)}"
 
-@ToolRegistry.register(name="execute_action", description="执行特定的硬件动作（如顶升、降下）。")
-async def execute_action(action_id: int, param1: int, param2: int, timeout_s: int = 60, emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
-    if not _action_toolbox:
+@ToolRegistry.register(name="execute_action", description="执行特定的硬件动作（如顶升、降下）。robot_id 为空表示默认机器人。")
+async def execute_action(action_id: int, param1: int, param2: int, timeout_s: int = 60, robot_id: str = "", emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
+    if not _fleet:
         return "错误：动作工具未初始化。"
     try:
-        _action_toolbox.execute_action(action_id, param1, param2, timeout_s=timeout_s, emit=emit, stop_event=stop_event)
+        with _fleet.lease(robot_id) as robot:
+            await asyncio.to_thread(ActionToolbox(robot).execute_action, action_id, param1, param2, timeout_s=timeout_s, emit=emit, stop_event=stop_event)
         return f"动作 {action_id} 执行成功。"
     except Exception as e:
         logger.error(f"动作执行失败: {e}")
         return f"错误：动作 {action_id} 执行失败。{str(e)}"
 
-@ToolRegistry.register(name="start_charge", description="开始给机器人充电。注意：物理状态转变需一定时间，timeout_s 建议设为 40。")
-async def start_charge(timeout_s: int = 40, emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
-    if not _action_toolbox:
+@ToolRegistry.register(name="start_charge", description="开始给机器人充电。注意：物理状态转变需一定时间，timeout_s 建议设为 40。robot_id 为空表示默认机器人。")
+async def start_charge(timeout_s: int = 40, robot_id: str = "", emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
+    if not _fleet:
         return "错误：动作工具未初始化。"
     try:
-        _action_toolbox.start_charge(timeout_s=timeout_s, emit=emit, stop_event=stop_event)
+        with _fleet.lease(robot_id) as robot:
+            await asyncio.to_thread(ActionToolbox(robot).start_charge, timeout_s=timeout_s, emit=emit, stop_event=stop_event)
         return "成功开始充电。"
     except Exception as e:
         logger.error(f"开始充电失败: {e}")
         return f"错误：开始充电失败。{str(e)}"
 
-@ToolRegistry.register(name="stop_charge", description="停止给机器人充电。timeout_s 建议设为 40。")
-async def stop_charge(timeout_s: int = 40, emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
-    if not _action_toolbox:
+@ToolRegistry.register(name="stop_charge", description="停止给机器人充电。timeout_s 建议设为 40。robot_id 为空表示默认机器人。")
+async def stop_charge(timeout_s: int = 40, robot_id: str = "", emit: 'EventEmitter' = None, stop_event: 'threading.Event' = None):
+    if not _fleet:
         return "错误：动作工具未初始化。"
     try:
-        _action_toolbox.stop_charge(timeout_s=timeout_s, emit=emit, stop_event=stop_event)
+        with _fleet.lease(robot_id) as robot:
+            await asyncio.to_thread(ActionToolbox(robot).stop_charge, timeout_s=timeout_s, emit=emit, stop_event=stop_event)
         return "成功停止充电。"
     except Exception as e:
         logger.error(f"停止充电失败: {e}")
         return f"错误：停止充电失败。{str(e)}"
 
-@ToolRegistry.register(name="get_robot_status", description="获取机器人当前状态，包括电量、位置和任务信息。")
-def get_robot_status():
-    if not _status_toolbox:
+def get_robot_status_data(fresh: bool = False, robot_id: str = "") -> dict | None:
+    """
+    结构化状态（非 LLM 工具），供会话缓存与规划器使用。默认读取后台轮询缓存。
+    """
+    if not _fleet:
+        return None
+    try:
+        with _fleet.lease(robot_id) as robot:
+            return StatusToolbox(robot).get_status(fresh=fresh)
+    except Exception as e:
+        logger.error(f"获取状态失败: {e}")
+        return None
+
+def format_robot_status(status: dict) -> str:
+    """状态字典 -> 状态报告文本（get_robot_status 工具与规划器提示词共用）"""
+    return (f"机器人状态报告：\n"
+            f"- 电池电量：{status['battery']}\n"
+            f"- 是否充电：{status['is_charging']}\n"
+            f"- 移动任务：{status['movement']}\n"
+            f"- 动作任务：{status['action']}")
+
+@ToolRegistry.register(name="get_robot_status", description="获取机器人当前状态，包括电量、位置和任务信息。默认返回缓存状态（2 秒内），fresh=true 时强制实时读取。robot_id 为空表示默认机器人。")
+def get_robot_status(fresh: bool = False, robot_id: str = ""):
+    if not _fleet:
         return "错误：状态工具未初始化。"
     try:
-        battery = _status_toolbox.get_battery_info()
-        movement = _status_toolbox.get_movement_task_info()
-        action = _status_toolbox.get_action_task_info()
-        is_charging = _status_toolbox.is_charging()
-        
-        return (f"机器人状态报告：\n"
-                f"- 电池电量：{battery}\n"
-                f"- 是否充电：{is_charging}\n"
-                f"- 移动任务：{movement}\n"
-                f"- 动作任务：{action}")
+        # 一次状态读取得到一致的快照，而不是四次独立轮询
+        with _fleet.lease(robot_id) as robot:
+            status = StatusToolbox(robot).get_status(fresh=fresh)
+        return format_robot_status(status)
     except Exception as e:
         logger.error(f"获取状态失败: {e}")
         return f"错误：获取状态失败。{str(e)}"
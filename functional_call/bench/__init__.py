@@ -0,0 +1,3 @@
+"""
+基准测试（在 functional_call 目录下以 python -m bench.<name> 运行，结果写入 bench/results/*.json）。
+"""
@@ -0,0 +1,114 @@
+"""
+基准测试公共工具：延迟分位数统计、运行环境元数据、JSON 结果输出。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def percentile(sorted_samples: list[float], q: float) -> float:
+    """线性插值分位数，sorted_samples 需已排序"""
+    if not sorted_samples:
+        return math.nan
+    pos = (len(sorted_samples) - 1) * q
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (pos - lo)
+
+
+def summarize(samples_s: list[float], *, errors: int = 0) -> dict[str, Any]:
+    """秒级样本 -> 毫秒统计"""
+    samples = sorted(s * 1000 for s in samples_s)
+    if not samples:
+        return {"count": 0, "errors": errors}
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "min_ms": round(samples[0], 3),
+        "p50_ms": round(percentile(samples, 0.50), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def time_calls(func: Callable[[], Any], iterations: int, *, warmup: int = 3) -> dict[str, Any]:
+    """顺序调用 func，统计每次耗时；异常计入 errors"""
+    for _ in range(warmup):
+        try:
+            func()
+        except Exception:
+            pass
+    samples: list[float] = []
+    errors = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            errors += 1
+            continue
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, errors=errors)
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5, cwd=Path(__file__).resolve().parent).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_metadata(**extra: Any) -> dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        **extra,
+    }
+
+
+def write_results(name: str, results: dict[str, Any], output: str | None = None) -> Path:
+    """
+    写入 JSON 结果；output 为空时写到 bench/results/<name>-<时间戳>.json
+    :return: 结果文件路径
+    """
+    if output:
+        path = Path(output)
+    else:
+        path = RESULTS_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], *, metric: str = "p95_ms",
+            threshold: float = 1.2, _path: str = "") -> list[dict[str, Any]]:
+    """
+    逐项对比两份结果中的 metric，返回变慢超过 threshold 倍的条目
+    """
+    regressions: list[dict[str, Any]] = []
+    for key, value in current.items():
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        path = f"{_path}.{key}" if _path else key
+        if isinstance(value, dict) and isinstance(old, dict):
+            regressions.extend(compare(old, value, metric=metric, threshold=threshold, _path=path))
+        elif key == metric and isinstance(value, (int, float)) and isinstance(old, (int, float)) and old > 0:
+            if value / old >= threshold:
+                regressions.append({"path": path, "baseline": old, "current": value, "ratio": round(value / old, 2)})
+    return regressions
@@ -0,0 +1,235 @@
+"""
+语音指令端到端基准测试：同一批简单指令分别走快速通道（fast_path）与 LLM 规划（PlanningFlow）的耗时。
+
+进程内启动 sim 仿真车，构造完整的 Orchestrator，从 handle_query 受理开始计时，到任务结束（JobManager
+中不再活跃）为止。默认用脚本化的 LLM 替身（按 --llm-latency-ms 模拟每次 DashScope 往返，并按正常的
+规划 → 执行 → 总结顺序调用工具），这样结果只取决于调用次数与机器人执行时间；--real-llm 时使用真实
+DashScope（需要 DASHSCOPE_API_KEY）。两条路径都关闭计划缓存，规划路径每次都完整经过 Manus。
+
+在 functional_call 目录下运行：
+
+    python -m bench.intent_bench
+    python -m bench.intent_bench --llm-latency-ms 1200 --iterations 10
+    python -m bench.intent_bench --real-llm --iterations 3
+    python -m bench.intent_bench --baseline bench/results/上一版.json
+
+结果（JSON）：
+- paths.<fast_path|planning>.<指令>: 端到端耗时分位数与平均 LLM 调用次数
+- speedup_p50: 每条指令规划路径 p50 / 快速通道 p50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import random
+import re
+import sys
+import time
+import uuid
+from typing import Any
+
+from bench.common import compare, run_metadata, summarize, write_results
+from core.config import Settings, load_settings
+from core.models import VoiceQueryRequest
+
+
+logger = logging.getLogger(__name__)
+
+# 一轮指令按顺序执行（顶升/放下依赖机器人当前状态），最后回到起点保证下一轮可重复
+DEFAULT_COMMANDS = "电量多少,查询状态,去站点2,顶升,放下,去站点1"
+
+# 意图 -> (Manus 规划出的步骤描述, Worker/Status 调用的工具)
+_STEPS = {
+    "move": ("前往站点{station_no}", "move_to_station"),
+    "lift_up": ("执行顶升动作", "lift_up"),
+    "put_down": ("执行下降放货动作", "put_down"),
+    "start_charge": ("开始充电", "start_charge"),
+    "stop_charge": ("停止充电", "stop_charge"),
+    "battery": ("查询电量", "get_robot_status"),
+    "status": ("查询机器人状态", "get_robot_status"),
+}
+
+
+class _ScriptedLLM:
+    """
+    DashScope 替身：每次调用等待模拟的往返延迟，然后按提示词所属的 Agent 给出与真实模型相同形状的回复
+    （Manus: planning 建一步计划；Worker/Status: 调一次工具后给出文字结论；总结: 一句话）
+    """
+
+    streaming = False
+
+    def __init__(self, latency_ms: float, jitter_ms: float, seed: int = 0) -> None:
+        self.latency_s = latency_ms / 1000
+        self.jitter_s = jitter_ms / 1000
+        self.calls = 0
+        self.command: Any = None  # 当前指令的 FastCommand（由基准在每次请求前设置）
+        self._rng = random.Random(seed)
+
+    async def _delay(self) -> None:
+        self.calls += 1
+        await asyncio.sleep(max(0.0, self.latency_s + self._rng.uniform(-self.jitter_s, self.jitter_s)))
+
+    @staticmethod
+    def _tool_call(name: str, arguments: dict) -> dict:
+        return {
+            "content": "",
+            "tool_calls": [{
+                "id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)},
+            }],
+        }
+
+    async def acall_with_tools(self, messages: list, tools: list | None = None) -> dict:
+        await self._delay()
+        if messages[-1]["role"] == "tool":
+            return {"content": "步骤已完成", "tool_calls": None}
+        system = messages[0]["content"]
+        task = messages[-1]["content"]
+        step, tool = _STEPS[self.command.intent]
+        if "Manus" in system:
+            plan_id = re.search(r"计划 ID 为 '([^']+)'", task).group(1)
+            return self._tool_call("planning", {
+                "command": "create", "plan_id": plan_id, "title": step.format(**self.command.arguments),
+                "steps": [step.format(**self.command.arguments)],
+            })
+        return self._tool_call(tool, {} if tool == "get_robot_status" else dict(self.command.arguments))
+
+    async def ask(self, prompt: str) -> str:
+        await self._delay()
+        return "已完成"
+
+    def stats(self) -> dict:
+        return {"scripted": True, "calls": self.calls}
+
+    def close(self) -> None:
+        pass
+
+
+def _wait_done(orch: Any, request_id: str, timeout_s: float) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        job = orch.job_manager.get(request_id)
+        if job is not None and not job.is_active:
+            return job.status == "completed"
+        time.sleep(0.002)
+    return False
+
+
+def bench_path(orch: Any, llm: _ScriptedLLM | None, commands: list[str], iterations: int,
+               timeout_s: float) -> dict[str, Any]:
+    """按顺序循环执行指令，统计每条指令的端到端耗时与 LLM 调用次数"""
+    from app.flows.fast_path import parse_command
+    from core.resource_manager import resource_manager
+
+    samples: dict[str, list[float]] = {c: [] for c in commands}
+    errors = {c: 0 for c in commands}
+    llm_calls = {c: 0 for c in commands}
+    for _ in range(iterations):
+        for text in commands:
+            if llm is not None:
+                llm.command = parse_command(text, stations=resource_manager.get_stations())
+                calls_before = llm.calls
+            request_id = str(uuid.uuid4())
+            start = time.perf_counter()
+            status, _ = orch.handle_query(VoiceQueryRequest(query=text, session_id=str(uuid.uuid4()),
+                                                            request_id=request_id, lang="zh"))
+            ok = status < 300 and _wait_done(orch, request_id, timeout_s)
+            elapsed = time.perf_counter() - start
+            if llm is not None:
+                llm_calls[text] += llm.calls - calls_before
+            if ok:
+                samples[text].append(elapsed)
+            else:
+                errors[text] += 1
+    return {
+        text: {**summarize(samples[text], errors=errors[text]),
+               **({"llm_calls_mean": round(llm_calls[text] / iterations, 2)} if llm is not None else {})}
+        for text in commands
+    }
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m bench.intent_bench", description="语音指令快速通道 vs LLM 规划端到端基准测试")
+    parser.add_argument("--commands", default=DEFAULT_COMMANDS, help="按顺序循环执行的指令（逗号分隔）")
+    parser.add_argument("--iterations", type=int, default=5, help="指令序列循环次数")
+    parser.add_argument("--llm-latency-ms", type=float, default=900.0, help="LLM 替身每次调用的延迟")
+    parser.add_argument("--llm-jitter-ms", type=float, default=300.0, help="LLM 替身延迟抖动（±）")
+    parser.add_argument("--real-llm", action="store_true", help="使用真实 DashScope（读取 DASHSCOPE_API_KEY 等配置）")
+    parser.add_argument("--time-scale", type=float, default=20.0, help="仿真时间倍速（缩短移动/动作耗时）")
+    parser.add_argument("--timeout-s", type=float, default=120.0, help="单条指令的最长等待时间")
+    parser.add_argument("--output", default=None, help="结果文件，缺省写到 bench/results/")
+    parser.add_argument("--baseline", default=None, help="上一版结果文件，对比 p95 是否退化")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p95 变慢多少倍视为退化")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    from orchestrator.orchestrator import Orchestrator
+    from sim import SimFleet, SimRobotConfig
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    args = _parse_args(argv)
+    commands = [c.strip() for c in args.commands.split(",") if c.strip()]
+
+    fleet = SimFleet.build(1, base_port=0, robot_config=SimRobotConfig(
+        stations={1: (0, 0, 0), 2: (3000, 0, 0)}, time_scale=args.time_scale, seed=0,
+    )).start_in_thread()
+    host, port = fleet.servers[0].host, fleet.servers[0].port
+
+    base = load_settings() if args.real_llm else Settings(dashscope_api_key="bench")
+    settings = dataclasses.replace(
+        base, modbus_host=host, modbus_port=port, robot_fleet=None, voice_push_enabled=False,
+        journal_path=None, plan_cache_enabled=False,
+    )
+    orch = Orchestrator(settings)
+    llm = None
+    if not args.real_llm:
+        orch.llm.close()
+        orch.llm = llm = _ScriptedLLM(args.llm_latency_ms, args.llm_jitter_ms)
+
+    results: dict[str, Any] = {"meta": run_metadata(
+        target={"type": "sim", "address": f"{host}:{port}", "time_scale": args.time_scale},
+        llm="dashscope" if args.real_llm else {"type": "scripted", "latency_ms": args.llm_latency_ms,
+                                                "jitter_ms": args.llm_jitter_ms},
+        iterations=args.iterations, commands=commands,
+    ), "paths": {}}
+    try:
+        orch.warm_up()
+        for path, enabled in (("fast_path", True), ("planning", False)):
+            orch.settings = dataclasses.replace(settings, fast_path_enabled=enabled)
+            print(f"▶ {path}: {len(commands)} 条指令 × {args.iterations} 轮", file=sys.stderr)
+            results["paths"][path] = bench_path(orch, llm, commands, args.iterations, args.timeout_s)
+        fast, planning = results["paths"]["fast_path"], results["paths"]["planning"]
+        results["speedup_p50"] = {
+            text: round(planning[text]["p50_ms"] / fast[text]["p50_ms"], 2)
+            for text in commands if fast[text]["count"] and planning[text]["count"]
+        }
+        results["sim_stats"] = fleet.stats()
+    finally:
+        orch.shutdown()
+        fleet.stop()
+
+    for text, ratio in results.get("speedup_p50", {}).items():
+        print(f"  {text}: 快速通道 p50 {results['paths']['fast_path'][text]['p50_ms']}ms，"
+              f"规划 p50 {results['paths']['planning'][text]['p50_ms']}ms（×{ratio}）", file=sys.stderr)
+    path = write_results("intent_bench", results, args.output)
+    print(f"✅ 结果已写入 {path}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, threshold=args.threshold)
+        for r in regressions:
+            print(f"⚠️ p95 退化 {r['path']}: {r['baseline']} → {r['current']} ms (×{r['ratio']})", file=sys.stderr)
+        if regressions:
+            return 1
+        print("✅ 与基线相比无 p95 退化", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+锁竞争基准测试：EventBus / JobManager / SessionStore 在不同并发会话数下的吞吐（全局锁 vs 分段锁）。
+
+每个线程模拟一个语音会话，循环执行一轮“会话查询 → 任务状态查询 → emit 进度事件 → 增量拉取事件”，
+统计每秒完成的轮数与单轮延迟分位数。stripes=1 等价于原先的单把全局锁。
+
+在 functional_call 目录下运行：
+
+    python -m bench.lock_bench
+    python -m bench.lock_bench --sessions 1,4,16,64 --stripes 1,16,64 --duration-s 2
+    python -m bench.lock_bench --baseline bench/results/上一版.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import threading
+import time
+import uuid
+from typing import Any
+
+from bench.common import compare, run_metadata, summarize, write_results
+from core.event_bus import EventBus
+from core.job_manager import JobManager
+from memory.session_store import SessionStore
+
+
+# 单轮延迟只抽样记录，避免样本列表本身成为开销
+_SAMPLE_EVERY = 16
+
+
+def _run(stripes: int, sessions: int, duration_s: float, emit_every: int) -> dict[str, Any]:
+    bus = EventBus(retention_max=200, stripes=stripes)
+    jobs = JobManager(bus, stripes=stripes)
+    store = SessionStore(stripes=stripes)
+
+    ids = [(str(uuid.uuid4()), str(uuid.uuid4())) for _ in range(sessions)]
+    for session_id, request_id in ids:
+        store.get_or_create(session_id)
+        bus.ensure_stream(request_id)
+        jobs.start(request_id=request_id, session_id=session_id, runner=lambda stop: stop.wait() and None)
+
+    samples: list[float] = []
+    rounds = 0
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(sessions + 1)
+    stop_at = [0.0]
+
+    def _worker(session_id: str, request_id: str) -> None:
+        nonlocal rounds
+        local: list[float] = []
+        n = 0
+        cursor = 0
+        start_barrier.wait()
+        deadline = stop_at[0]
+        while True:
+            t0 = time.perf_counter()
+            if t0 >= deadline:
+                break
+            state = store.get_or_create(session_id)
+            jobs.get(request_id)
+            state.is_busy()
+            if n % emit_every == 0:
+                bus.emit(request_id, type="progress", speak_text="正在前往站点", data={"step": n, "station": 3})
+            _, _, cursor = bus.get_events(request_id, after=cursor)
+            n += 1
+            if n % _SAMPLE_EVERY == 0:
+                local.append(time.perf_counter() - t0)
+        with lock:
+            samples.extend(local)
+            rounds += n
+
+    workers = [threading.Thread(target=_worker, args=pair, daemon=True) for pair in ids]
+    for w in workers:
+        w.start()
+    stop_at[0] = time.perf_counter() + duration_s
+    started = time.perf_counter()
+    start_barrier.wait()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    for session_id, _ in ids:
+        jobs.cancel_session_job(session_id)
+
+    stats = summarize(samples)
+    stats["rounds"] = rounds
+    stats["rounds_per_s"] = round(rounds / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m bench.lock_bench", description="EventBus/JobManager/SessionStore 锁竞争基准")
+    parser.add_argument("--sessions", default="1,2,4,8,16,32", help="并发会话（线程）数列表")
+    parser.add_argument("--stripes", default="1,16", help="锁分段数列表（1 即全局锁）")
+    parser.add_argument("--duration-s", type=float, default=2.0, help="每个组合的持续时间")
+    parser.add_argument("--emit-every", type=int, default=1, help="每几轮 emit 一次事件")
+    parser.add_argument("--output", default=None, help="结果文件，缺省写到 bench/results/")
+    parser.add_argument("--baseline", default=None, help="上一版结果文件，对比 p95 是否退化")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p95 变慢多少倍视为退化")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    import json
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    args = _parse_args(argv)
+    session_levels = [int(x) for x in args.sessions.split(",") if x.strip()]
+    stripe_levels = [int(x) for x in args.stripes.split(",") if x.strip()]
+
+    results: dict[str, Any] = {
+        "meta": run_metadata(sessions=session_levels, stripes=stripe_levels, duration_s=args.duration_s,
+                             switch_interval_s=sys.getswitchinterval()),
+        "contention": {},
+    }
+    for stripes in stripe_levels:
+        per_level: dict[str, Any] = {}
+        for sessions in session_levels:
+            print(f"▶ stripes={stripes} sessions={sessions}", file=sys.stderr)
+            per_level[str(sessions)] = _run(stripes, sessions, args.duration_s, max(1, args.emit_every))
+        base = per_level[str(session_levels[0])]["rounds_per_s"]
+        for stats in per_level.values():
+            stats["scaling"] = round(stats["rounds_per_s"] / base, 2) if base else None
+        results["contention"][f"stripes_{stripes}"] = per_level
+
+    path = write_results("lock_bench", results, args.output)
+    print(f"✅ 结果已写入 {path}", file=sys.stderr)
+    for name, per_level in results["contention"].items():
+        line = "  ".join(f"{k}:{v['rounds_per_s']:.0f}/s p99={v.get('p99_ms', 0):.3f}ms" for k, v in per_level.items())
+        print(f"{name:>12}  {line}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, threshold=args.threshold)
+        for r in regressions:
+            print(f"⚠️ p95 退化 {r['path']}: {r['baseline']} → {r['current']} ms (×{r['ratio']})", file=sys.stderr)
+        if regressions:
+            return 1
+        print("✅ 与基线相比无 p95 退化", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
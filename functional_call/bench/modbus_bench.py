@@ -0,0 +1,261 @@
+"""
+Modbus 基准测试：SRModbusSdk / RobotClient 在本地从站（默认进程内启动 sim 仿真车）上的延迟与吞吐。
+
+在 functional_call 目录下运行：
+
+    python -m bench.modbus_bench --latency-ms 15 --jitter-ms 5          # 模拟 SSH 隧道
+    python -m bench.modbus_bench --target 127.0.0.1:1502 --skip-control-loop   # 实车/外部从站（不下发移动）
+    python -m bench.modbus_bench --baseline bench/results/上一版.json   # 与上一版结果对比 p95
+
+结果（JSON）：
+- ranges: 每个输入寄存器区段单次读取的 p50/p95/p99
+- batched_vs_getters: 合并块读快照 vs 逐个 getter 读取同样字段
+- concurrency: 不同并发度下 RobotClient.get_state(fresh=True) 的每秒读取数与延迟（串行锁 / 流水线两种模式）
+- control_loop: move_to_station / execute_action 完整控制回路耗时
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from typing import Any, Callable
+
+from bench.common import compare, run_metadata, summarize, time_calls, write_results
+from src.sr_modbus_sdk import INPUT_REGISTER_RANGES, SRModbusSdk
+from tools.robot_client import RobotClient
+
+
+logger = logging.getLogger(__name__)
+
+
+class _CountingSdk:
+    """统计 SDK 实际发出的 Modbus 请求数（包一层 _execute）"""
+
+    def __init__(self, sdk: SRModbusSdk) -> None:
+        self.requests = 0
+        execute = sdk._execute
+
+        def _counted(*args: Any, **kwargs: Any) -> Any:
+            self.requests += 1
+            return execute(*args, **kwargs)
+        sdk._execute = _counted
+
+
+def _connect_sdk(host: str, port: int) -> SRModbusSdk:
+    sdk = SRModbusSdk(retry_count=1)
+    if not sdk.connect_tcp(host, port):
+        raise ConnectionError(f"无法连接从站 {host}:{port}")
+    return sdk
+
+
+def bench_ranges(host: str, port: int, iterations: int) -> dict[str, Any]:
+    """逐区段读取原始寄存器（绕过读缓存），以及离散量读取"""
+    sdk = _connect_sdk(host, port)
+    try:
+        results = {
+            name: time_calls(lambda s=start, c=count: sdk.read_input_registers_raw(s, c), iterations)
+            for name, (start, count) in INPUT_REGISTER_RANGES.items()
+        }
+        results["discrete:is_charge"] = time_calls(sdk.is_charge, iterations)
+        return results
+    finally:
+        sdk.close()
+
+
+def bench_batched_vs_getters(host: str, port: int, iterations: int) -> dict[str, Any]:
+    """RobotClient.STATE_FIELDS 对应的数据：一次快照块读 vs 逐个 getter"""
+    sdk = _connect_sdk(host, port)
+    counter = _CountingSdk(sdk)
+    getters: list[Callable[[], Any]] = [
+        sdk.get_cur_system_state,
+        sdk.get_cur_locate_state,
+        sdk.get_cur_pose,
+        sdk.get_cur_station_no,
+        sdk.get_battery_info,
+        sdk.get_movement_task_info,
+        sdk.get_action_task_info,
+        sdk.is_charge,
+    ]
+
+    def _snapshot() -> None:
+        sdk.read_snapshot(RobotClient.STATE_FIELDS)
+        sdk.is_charge()
+
+    def _getters() -> None:
+        for getter in getters:
+            getter()
+
+    try:
+        results = {}
+        for name, func in (("batched", _snapshot), ("per_getter", _getters)):
+            before = counter.requests
+            stats = time_calls(func, iterations, warmup=0)
+            rounds = stats["count"] + stats["errors"]
+            stats["requests_per_round"] = round((counter.requests - before) / rounds, 2) if rounds else None
+            results[name] = stats
+        if results["batched"].get("p50_ms") and results["per_getter"].get("p50_ms"):
+            results["speedup_p50"] = round(results["per_getter"]["p50_ms"] / results["batched"]["p50_ms"], 2)
+        results["register_cache"] = sdk.cache_stats()
+        return results
+    finally:
+        sdk.close()
+
+
+def _run_concurrent(robot: RobotClient, threads: int, duration_s: float) -> dict[str, Any]:
+    samples: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def _worker() -> None:
+        nonlocal errors
+        local: list[float] = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                robot.get_state(fresh=True)
+            except Exception:
+                local_errors += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            samples.extend(local)
+            errors += local_errors
+
+    workers = [threading.Thread(target=_worker, daemon=True) for _ in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    stats = summarize(samples, errors=errors)
+    stats["reads_per_s"] = round(len(samples) / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
+
+def bench_concurrency(host: str, port: int, levels: list[int], duration_s: float, modes: list[str]) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    for mode in modes:
+        robot = RobotClient(host, port, pipelined=(mode == "pipelined"), max_in_flight=max(levels))
+        try:
+            robot.get_state(fresh=True)
+            results[mode] = {str(level): _run_concurrent(robot, level, duration_s) for level in levels}
+            if mode == "pipelined":
+                results[mode]["scheduler"] = robot.scheduler_stats()
+        finally:
+            robot.close()
+    return results
+
+
+def bench_control_loop(host: str, port: int, stations: list[int], loops: int, action: tuple[int, int, int] | None,
+                       mode: str) -> dict[str, Any]:
+    """完整控制回路：下发指令 → 轮询状态直到完成"""
+    robot = RobotClient(host, port, pipelined=(mode == "pipelined"))
+    try:
+        move_samples: list[float] = []
+        errors = 0
+        for i in range(loops):
+            for station in stations:
+                start = time.perf_counter()
+                try:
+                    robot.move_to_station(station)
+                except Exception as e:
+                    logger.warning(f"⚠️ 导航到站点 {station} 失败: {e}")
+                    errors += 1
+                    continue
+                move_samples.append(time.perf_counter() - start)
+        results: dict[str, Any] = {"move_to_station": summarize(move_samples, errors=errors)}
+        if action is not None:
+            results["execute_action"] = time_calls(lambda: robot.execute_action(*action), loops, warmup=0)
+        results["register_cache"] = robot.cache_stats()
+        return results
+    finally:
+        robot.close()
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m bench.modbus_bench", description="Modbus 延迟/吞吐基准测试")
+    parser.add_argument("--target", default=None, help="外部从站 host:port；缺省在进程内启动仿真车")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="仿真链路延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="仿真链路抖动（±）")
+    parser.add_argument("--loss", type=float, default=0.0, help="仿真链路丢包率")
+    parser.add_argument("--time-scale", type=float, default=20.0, help="仿真时间倍速（缩短控制回路测试）")
+    parser.add_argument("--iterations", type=int, default=200, help="每项延迟测试的次数")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="并发度列表")
+    parser.add_argument("--duration-s", type=float, default=3.0, help="每个并发度的持续时间")
+    parser.add_argument("--modes", default="sync,pipelined", help="RobotClient 模式：sync（串行锁）/ pipelined")
+    parser.add_argument("--stations", default="1,2", help="控制回路往返的站点")
+    parser.add_argument("--loops", type=int, default=3, help="控制回路往返次数")
+    parser.add_argument("--action", default="4,11,1", help="控制回路动作 action_id,param1,param2；空串跳过")
+    parser.add_argument("--skip-control-loop", action="store_true", help="不下发移动/动作（连实车时使用）")
+    parser.add_argument("--output", default=None, help="结果文件，缺省写到 bench/results/")
+    parser.add_argument("--baseline", default=None, help="上一版结果文件，对比 p95 是否退化")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p95 变慢多少倍视为退化")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    import json
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    args = _parse_args(argv)
+    levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+
+    fleet = None
+    if args.target:
+        host, _, port = args.target.rpartition(":")
+        port = int(port)
+        target = {"type": "external", "address": args.target}
+    else:
+        from sim import LinkProfile, SimFleet, SimRobotConfig
+
+        link = LinkProfile(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, loss=args.loss, seed=0)
+        fleet = SimFleet.build(1, base_port=0, link=link,
+                               robot_config=SimRobotConfig(time_scale=args.time_scale, seed=0)).start_in_thread()
+        host, port = fleet.servers[0].host, fleet.servers[0].port
+        target = {"type": "sim", "address": f"{host}:{port}", "link": link.__dict__, "time_scale": args.time_scale}
+
+    results: dict[str, Any] = {"meta": run_metadata(target=target, iterations=args.iterations)}
+    try:
+        print(f"▶ ranges ({args.iterations} 次/区段)", file=sys.stderr)
+        results["ranges"] = bench_ranges(host, port, args.iterations)
+        print("▶ batched_vs_getters", file=sys.stderr)
+        results["batched_vs_getters"] = bench_batched_vs_getters(host, port, args.iterations)
+        print(f"▶ concurrency {levels} × {modes}", file=sys.stderr)
+        results["concurrency"] = bench_concurrency(host, port, levels, args.duration_s, modes)
+        if not args.skip_control_loop:
+            stations = [int(x) for x in args.stations.split(",") if x.strip()]
+            action = tuple(int(x) for x in args.action.split(",")) if args.action else None
+            print(f"▶ control_loop 站点 {stations} × {args.loops}", file=sys.stderr)
+            results["control_loop"] = {
+                mode: bench_control_loop(host, port, stations, args.loops, action, mode) for mode in modes
+            }
+        if fleet is not None:
+            results["sim_stats"] = fleet.stats()
+    finally:
+        if fleet is not None:
+            fleet.stop()
+
+    path = write_results("modbus_bench", results, args.output)
+    print(f"✅ 结果已写入 {path}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, threshold=args.threshold)
+        for r in regressions:
+            print(f"⚠️ p95 退化 {r['path']}: {r['baseline']} → {r['current']} ms (×{r['ratio']})", file=sys.stderr)
+        if regressions:
+            return 1
+        print("✅ 与基线相比无 p95 退化", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
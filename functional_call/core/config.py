@@ -42,13 +42,70 @@ class Settings:
     qwen_timeout_s: int = 30
     # OpenAI兼容接口 base_url（DashScope）
     qwen_base_url: str = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+    # 连接复用：连接池大小 / 异步接口是否走 HTTP/2（需要 h2）/ 空闲连接保留时间
+    qwen_http_pool_size: int = 8
+    qwen_http2: bool = True
+    qwen_keepalive_s: float = 60.0
+    # Agent 使用流式接口：工具调用参数一完整就开始执行，直接回答的首句先播报
+    qwen_stream: bool = True
+    # 计划缓存：重复指令（同一意图模板 + 地图版本 + 载货状态）回放验证过的计划，跳过规划 LLM 调用
+    plan_cache_enabled: bool = True
+    plan_cache_max_entries: int = 256
+    # 简单指令快速通道：去N号站 / 顶升 / 放下 / 开始、停止充电 / 电量、状态查询不经过 LLM
+    fast_path_enabled: bool = True
+    # 计划步骤并行：只读步骤与当前步骤并行、下一步的思考与当前步骤执行重叠（1 = 逐步执行）
+    plan_max_parallel_steps: int = 1
 
     # 机器人（Modbus over SSH tunnel）
     modbus_host: str = "localhost"
     modbus_port: int = 1502
+    # 状态轮询：后台刷新间隔（秒，0 表示关闭）与读取方可接受的缓存年龄
+    robot_state_poll_interval_s: float = 0.5
+    robot_state_max_age_s: float = 2.0
+    # Modbus 请求调度：读请求流水线化、停止/急停走独立连接不排队
+    robot_modbus_pipelined: bool = False
+    robot_modbus_max_in_flight: int = 4
+    # 长任务进度播报：状态跳变 / 行驶距离 / ETA 偏离 / 静默过久才播报，抖动状态合并
+    robot_progress_max_silence_s: float = 15.0
+    robot_progress_min_interval_s: float = 5.0
+    robot_progress_settle_s: float = 1.0
+    robot_progress_min_distance_m: float = 10.0
+    robot_progress_eta_delta_s: float = 10.0
+    # 车队："amr1=10.0.0.11:1502,amr2=10.0.0.12:1502"，为空时仅使用 modbus_host/modbus_port
+    robot_fleet: str | None = None
+    default_robot_id: str | None = None
+    robot_fleet_max_connections: int = 0  # 0 表示不限制
+    robot_fleet_idle_evict_s: float = 300.0  # 0 表示不回收空闲连接
+    robot_fleet_health_check_s: float = 10.0
 
     # 事件流
     event_retention_max: int = 2000  # 每个request最多保留多少条事件
+    event_stream_ttl_s: float = 600.0  # 已结束的事件流保留多久（秒），0 表示不按时间回收
+    event_max_streams: int = 1000  # 最多保留多少个事件流（超出时淘汰最久未访问的已结束流）
+    event_long_poll_max_s: float = 30.0  # 长轮询 wait_s 的上限（秒）
+    event_sse_keepalive_s: float = 15.0  # SSE 无事件时发送心跳注释的间隔（秒）
+    lock_stripes: int = 16  # EventBus/JobManager/SessionStore 的锁分段数（1 即单把全局锁）
+
+    # 请求级耗时追踪
+    tracing_enabled: bool = True
+    trace_max_spans: int = 20000  # 进程内最多保留多少个 span（环形缓冲区）
+    trace_max_requests: int = 500  # 最多为多少个请求保留瀑布图
+    trace_otlp_path: str | None = None  # OTLP/JSON 文件导出路径，为空时不导出
+
+    # 会话（LRU/TTL 回收；有进行中任务的会话不回收）
+    session_max: int = 1000  # 最多保留多少个会话，0 表示不限
+    session_idle_ttl_s: float = 1800.0  # 会话空闲多久后回收（秒），0 表示不按时间回收
+    session_sweep_interval_s: float = 60.0  # 后台回收间隔（秒），0 表示只在创建新会话时惰性回收
+
+    # 任务执行器（有界线程池 + 优先级队列）
+    job_max_workers: int = 8  # 同时执行的任务数上限
+    job_max_queue: int = 32  # 排队任务上限，超出时返回 429
+    job_emergency_reserve: int = 2  # 线程全忙时急停/取消可额外使用的预留线程数
+
+    # 持久化日志（任务状态/计划/事件，重启后恢复并接管在途机器人任务）
+    journal_path: str | None = None  # 为空时不启用
+    journal_flush_ms: int = 50  # 攒批写入间隔
+    journal_retention_s: float = 86400.0  # 已结束请求的记录保留时长（启动时清理）
 
     # 路由增强（本地小模型：可选）
     enable_local_router_models: bool = False
@@ -57,6 +114,7 @@ class Settings:
     voice_push_url: str | None = None
     voice_push_enabled: bool = True
     voice_push_timeout_s: int = 5
+    voice_push_queue_max: int = 100  # 每个目标的待发送队列上限
 
     # 语音中转（飞书 -> 大脑 -> 机器人语音模块）
     remote_voice_url: str = "http://127.0.0.1:8866/v1/voice/inject_stream"
@@ -77,6 +135,15 @@ def load_settings() -> Settings:
         except Exception:
             return default
 
+    def _get_float(key: str, default: float) -> float:
+        v = os.getenv(key)
+        if v is None or v == "":
+            return default
+        try:
+            return float(v)
+        except Exception:
+            return default
+
     def _get_bool(key: str, default: bool) -> bool:
         v = os.getenv(key)
         if v is None or v == "":
@@ -90,13 +157,54 @@ def load_settings() -> Settings:
         qwen_model=os.getenv("QWEN_MODEL", "qwen-plus"),
         qwen_timeout_s=_get_int("QWEN_TIMEOUT_S", 30),
         qwen_base_url=os.getenv("QWEN_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1"),
+        qwen_http_pool_size=_get_int("QWEN_HTTP_POOL_SIZE", 8),
+        qwen_http2=_get_bool("QWEN_HTTP2", True),
+        qwen_keepalive_s=_get_float("QWEN_KEEPALIVE_S", 60.0),
+        qwen_stream=_get_bool("QWEN_STREAM", True),
+        plan_cache_enabled=_get_bool("PLAN_CACHE_ENABLED", True),
+        plan_cache_max_entries=_get_int("PLAN_CACHE_MAX_ENTRIES", 256),
+        fast_path_enabled=_get_bool("FAST_PATH_ENABLED", True),
+        plan_max_parallel_steps=_get_int("PLAN_MAX_PARALLEL_STEPS", 1),
         modbus_host=os.getenv("MODBUS_HOST", "localhost"),
         modbus_port=_get_int("MODBUS_PORT", 1502),
+        robot_state_poll_interval_s=_get_float("ROBOT_STATE_POLL_INTERVAL_S", 0.5),
+        robot_state_max_age_s=_get_float("ROBOT_STATE_MAX_AGE_S", 2.0),
+        robot_modbus_pipelined=_get_bool("ROBOT_MODBUS_PIPELINED", False),
+        robot_modbus_max_in_flight=_get_int("ROBOT_MODBUS_MAX_IN_FLIGHT", 4),
+        robot_progress_max_silence_s=_get_float("ROBOT_PROGRESS_MAX_SILENCE_S", 15.0),
+        robot_progress_min_interval_s=_get_float("ROBOT_PROGRESS_MIN_INTERVAL_S", 5.0),
+        robot_progress_settle_s=_get_float("ROBOT_PROGRESS_SETTLE_S", 1.0),
+        robot_progress_min_distance_m=_get_float("ROBOT_PROGRESS_MIN_DISTANCE_M", 10.0),
+        robot_progress_eta_delta_s=_get_float("ROBOT_PROGRESS_ETA_DELTA_S", 10.0),
+        robot_fleet=os.getenv("ROBOT_FLEET"),
+        default_robot_id=os.getenv("DEFAULT_ROBOT_ID") or None,
+        robot_fleet_max_connections=_get_int("ROBOT_FLEET_MAX_CONNECTIONS", 0),
+        robot_fleet_idle_evict_s=_get_float("ROBOT_FLEET_IDLE_EVICT_S", 300.0),
+        robot_fleet_health_check_s=_get_float("ROBOT_FLEET_HEALTH_CHECK_S", 10.0),
         event_retention_max=_get_int("EVENT_RETENTION_MAX", 2000),
+        event_stream_ttl_s=_get_float("EVENT_STREAM_TTL_S", 600.0),
+        event_max_streams=_get_int("EVENT_MAX_STREAMS", 1000),
+        event_long_poll_max_s=_get_float("EVENT_LONG_POLL_MAX_S", 30.0),
+        event_sse_keepalive_s=_get_float("EVENT_SSE_KEEPALIVE_S", 15.0),
+        lock_stripes=_get_int("LOCK_STRIPES", 16),
+        tracing_enabled=_get_bool("TRACING_ENABLED", True),
+        trace_max_spans=_get_int("TRACE_MAX_SPANS", 20000),
+        trace_max_requests=_get_int("TRACE_MAX_REQUESTS", 500),
+        trace_otlp_path=os.getenv("TRACE_OTLP_PATH") or None,
+        session_max=_get_int("SESSION_MAX", 1000),
+        session_idle_ttl_s=_get_float("SESSION_IDLE_TTL_S", 1800.0),
+        session_sweep_interval_s=_get_float("SESSION_SWEEP_INTERVAL_S", 60.0),
+        job_max_workers=_get_int("JOB_MAX_WORKERS", 8),
+        job_max_queue=_get_int("JOB_MAX_QUEUE", 32),
+        job_emergency_reserve=_get_int("JOB_EMERGENCY_RESERVE", 2),
+        journal_path=os.getenv("JOURNAL_PATH", str(Path(__file__).resolve().parent.parent / "data" / "journal.sqlite3")) or None,
+        journal_flush_ms=_get_int("JOURNAL_FLUSH_MS", 50),
+        journal_retention_s=_get_float("JOURNAL_RETENTION_S", 86400.0),
         enable_local_router_models=_get_bool("ENABLE_LOCAL_ROUTER_MODELS", False),
         voice_push_url=os.getenv("VOICE_PUSH_URL"),
         voice_push_enabled=_get_bool("VOICE_PUSH_ENABLED", True),
         voice_push_timeout_s=_get_int("VOICE_PUSH_TIMEOUT_S", 5),
+        voice_push_queue_max=_get_int("VOICE_PUSH_QUEUE_MAX", 100),
         remote_voice_url=os.getenv("REMOTE_VOICE_URL", "http://127.0.0.1:8866/v1/voice/inject_stream"),
         prompts_dir=os.getenv("PROMPTS_DIR", str(Path(__file__).resolve().parent.parent / "prompts")),
     )
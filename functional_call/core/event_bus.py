@@ -2,42 +2,173 @@
 事件总线（内存版）。
 
 为每个 request_id 保存事件序列，支持 after_id 增量拉取。
+
+- 每个流是固定容量的环形缓冲区，事件 ID 单调连续，after 游标按偏移量直接定位（不扫描）
+- 已结束的流在 done_ttl_s 后回收；流数量超过 max_streams 时按最近访问时间淘汰已结束的流
+- stats() 提供流数量、事件数与内存估算
+- wait_for_events() 供长轮询/SSE 使用：emit/mark_done 只唤醒该 request 的等待者
+  （等待者挂在各自的 asyncio 事件循环上，任务线程通过 call_soon_threadsafe 唤醒）
+- 可选 journal：emit/mark_done 追加写入持久化日志（仅入队，不做 IO），重启后用 restore() 恢复
+- 流按 request_id 哈希分段，每段一把锁：不同 request 的 emit/轮询互不阻塞
+  （TTL/LRU 回收按段进行，max_streams 平均分到各段）
 """
 
 from __future__ import annotations
 
-import threading
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from .models import VoiceEvent
+from .striped_lock import DEFAULT_STRIPES, StripedLock
+
+if TYPE_CHECKING:
+    from .journal import Journal
+
+
+def _estimate_event_bytes(ev: VoiceEvent) -> int:
+    """粗略估算一条事件占用的内存（文本按 UTF-8 计，外加对象开销）"""
+    try:
+        data_len = len(json.dumps(ev.data, ensure_ascii=False, default=str).encode("utf-8")) if ev.data else 0
+    except Exception:
+        data_len = 256
+    return 400 + len(ev.speak_text.encode("utf-8")) + len(ev.type) + data_len
+
+
+class EventRing:
+    """
+    固定容量环形缓冲区：保存最近 capacity 条事件（事件 ID 连续递增），按 ID 定位为 O(1)。
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = max(1, int(capacity))
+        self._buf: List[Optional[VoiceEvent]] = []
+        self._sizes: List[int] = []
+        self._head = 0  # 最老事件在 _buf 中的下标（缓冲区写满后生效）
+        self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def append(self, ev: VoiceEvent) -> int:
+        """
+        追加事件
+        :return: 因容量上限被覆盖的事件字节数（0 表示没有丢弃）
+        """
+        size = _estimate_event_bytes(ev)
+        self.total_bytes += size
+        if len(self._buf) < self._capacity:
+            self._buf.append(ev)
+            self._sizes.append(size)
+            return 0
+        dropped = self._sizes[self._head]
+        self._buf[self._head] = ev
+        self._sizes[self._head] = size
+        self._head = (self._head + 1) % self._capacity
+        self.total_bytes -= dropped
+        return dropped
+
+    def _at(self, index: int) -> VoiceEvent:
+        return self._buf[(self._head + index) % len(self._buf)]
+
+    def slice_after(self, after: int, last_event_id: int, limit: int) -> List[VoiceEvent]:
+        """
+        返回 event_id > after 的事件（最多 limit 条，limit<=0 表示不限）
+        :param last_event_id: 最新事件的 ID（与缓冲区尾部对应）
+        """
+        n = len(self._buf)
+        if not n or after >= last_event_id:
+            return []
+        first_id = last_event_id - n + 1
+        start = max(0, after - first_id + 1)  # 游标早于保留窗口时从最老事件开始
+        end = n if not limit or limit <= 0 else min(n, start + limit)
+        return [self._at(i) for i in range(start, end)]
 
 
 @dataclass
 class RequestEventStream:
     request_id: str
-    events: List[VoiceEvent]
+    events: EventRing
     done: bool = False
     last_event_id: int = 0
+    created_ts: float = field(default_factory=time.monotonic)
+    last_access_ts: float = field(default_factory=time.monotonic)
+    done_ts: float | None = None
+    # 长轮询/SSE 等待者：(事件循环, future)
+    waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = field(default_factory=list)
+
+
+class _EventShard:
+    """一个分段：自己的锁、流表（按最近访问排序，最久未访问的在前）、回收记录与计数"""
+
+    def __init__(self, lock) -> None:
+        self.lock = lock
+        self.streams: "OrderedDict[str, RequestEventStream]" = OrderedDict()
+        # 最近被回收的 request_id：继续轮询时返回 done=True，避免客户端无限等待
+        self.evicted: "OrderedDict[str, None]" = OrderedDict()
+        self.last_sweep = time.monotonic()
+        self.counters = {"events_emitted": 0, "events_dropped": 0, "evicted_ttl": 0, "evicted_lru": 0}
 
 
 class EventBus:
-    def __init__(self, *, retention_max: int = 2000) -> None:
+    def __init__(
+        self,
+        *,
+        retention_max: int = 2000,
+        done_ttl_s: float = 600.0,
+        max_streams: int = 1000,
+        sweep_interval_s: float = 10.0,
+        stripes: int = DEFAULT_STRIPES,
+        journal: "Journal | None" = None,
+    ) -> None:
+        """
+        :param retention_max: 每个流最多保留多少条事件
+        :param done_ttl_s: 已结束的流保留多久（秒），0 表示不按时间回收
+        :param max_streams: 最多保留多少个流（超出时淘汰最久未访问的已结束流），0 表示不限
+        :param sweep_interval_s: 惰性回收的最小间隔（在创建新流时顺带执行）
+        :param stripes: 锁分段数
+        :param journal: 持久化日志（可选）
+        """
+        self._journal = journal
         self._retention_max = retention_max
-        self._lock = threading.RLock()
-        self._streams: Dict[str, RequestEventStream] = {}
+        self._done_ttl_s = float(done_ttl_s)
+        self._sweep_interval_s = float(sweep_interval_s)
+        self._locks = StripedLock(stripes)
+        self._shards = [_EventShard(self._locks.at(i)) for i in range(len(self._locks))]
+        max_streams = max(0, int(max_streams))
+        self._shard_max_streams = math.ceil(max_streams / len(self._shards)) if max_streams else 0
+        self._shard_evicted_max = math.ceil(max(1000, max_streams * 4) / len(self._shards))
+
+    def _shard(self, request_id: str) -> _EventShard:
+        return self._shards[self._locks.index(request_id)]
 
     def ensure_stream(self, request_id: str) -> None:
-        with self._lock:
-            if request_id not in self._streams:
-                self._streams[request_id] = RequestEventStream(
-                    request_id=request_id, events=[], done=False, last_event_id=0
-                )
+        shard = self._shard(request_id)
+        with shard.lock:
+            self._ensure_stream(shard, request_id)
+
+    def _ensure_stream(self, shard: _EventShard, request_id: str) -> RequestEventStream:
+        """调用方需持有 shard.lock"""
+        stream = shard.streams.get(request_id)
+        if stream is not None:
+            stream.last_access_ts = time.monotonic()
+            shard.streams.move_to_end(request_id)
+            return stream
+        self._maybe_sweep(shard)
+        stream = RequestEventStream(request_id=request_id, events=EventRing(self._retention_max))
+        shard.streams[request_id] = stream
+        shard.evicted.pop(request_id, None)
+        self._enforce_max_streams(shard)
+        return stream
 
     def emit(self, request_id: str, *, type: str, speak_text: str, data: dict | None = None) -> VoiceEvent:
-        with self._lock:
-            self.ensure_stream(request_id)
-            stream = self._streams[request_id]
+        shard = self._shard(request_id)
+        with shard.lock:
+            stream = self._ensure_stream(shard, request_id)
             stream.last_event_id += 1
             ev = VoiceEvent(
                 event_id=stream.last_event_id,
@@ -45,27 +176,172 @@ class EventBus:
                 speak_text=speak_text,
                 data=data or {},
             )
-            stream.events.append(ev)
-            # 事件保留上限（丢弃最老的）
-            if len(stream.events) > self._retention_max:
-                stream.events = stream.events[-self._retention_max :]
+            # 事件保留上限（覆盖最老的）
+            if stream.events.append(ev):
+                shard.counters["events_dropped"] += 1
+            shard.counters["events_emitted"] += 1
+            self._wake(stream)
+            if self._journal is not None:
+                # 在分段锁内入队，保证同一 request 的事件按 ID 顺序落盘
+                self._journal.append("event", request_id, ev)
             return ev
 
     def mark_done(self, request_id: str, done: bool = True) -> None:
-        with self._lock:
-            self.ensure_stream(request_id)
-            self._streams[request_id].done = done
+        shard = self._shard(request_id)
+        with shard.lock:
+            stream = shard.streams.get(request_id)
+            if stream is None and request_id in shard.evicted:
+                # 已回收的流：读取方已按 done=True 处理，不再重建（否则 TTL/LRU 回收的流会重新出现）
+                shard.evicted.move_to_end(request_id)
+            else:
+                stream = self._ensure_stream(shard, request_id)
+                stream.done = done
+                stream.done_ts = time.monotonic() if done else None
+                self._wake(stream)
+        if self._journal is not None and done:
+            self._journal.append("stream_done", request_id, {})
+
+    def restore(self, request_id: str, events: List[dict], *, done: bool) -> None:
+        """从持久化日志恢复一个流（不再写回日志），之后 emit 的事件 ID 接着原序号递增"""
+        shard = self._shard(request_id)
+        with shard.lock:
+            stream = self._ensure_stream(shard, request_id)
+            for data in sorted(events, key=lambda e: e.get("event_id", 0)):
+                ev = VoiceEvent(**data)
+                if ev.event_id <= stream.last_event_id:
+                    continue
+                stream.last_event_id = ev.event_id
+                stream.events.append(ev)
+            stream.done = done
+            stream.done_ts = time.monotonic() if done else None
 
     def get_events(self, request_id: str, *, after: int = 0, limit: int = 200) -> Tuple[List[VoiceEvent], bool, int]:
-        with self._lock:
-            if request_id not in self._streams:
-                return [], False, after
-            stream = self._streams[request_id]
+        shard = self._shard(request_id)
+        with shard.lock:
+            stream = shard.streams.get(request_id)
+            if stream is None:
+                return [], request_id in shard.evicted, after
+            stream.last_access_ts = time.monotonic()
+            shard.streams.move_to_end(request_id)
             # after=0 -> 返回全部；after=n -> 返回 event_id > n
-            new_events = [e for e in stream.events if e.event_id > after]
-            if limit and len(new_events) > limit:
-                new_events = new_events[:limit]
+            new_events = stream.events.slice_after(after, stream.last_event_id, limit)
             next_after = new_events[-1].event_id if new_events else after
             return new_events, stream.done, next_after
 
+    # ------------------ 等待（长轮询 / SSE） ------------------
+    @staticmethod
+    def _resolve(fut: asyncio.Future) -> None:
+        if not fut.done():
+            fut.set_result(None)
+
+    def _wake(self, stream: RequestEventStream) -> None:
+        """唤醒该流的全部等待者（调用方需持有所在分段的锁；可在任意线程调用）"""
+        if not stream.waiters:
+            return
+        waiters, stream.waiters = stream.waiters, []
+        for loop, fut in waiters:
+            try:
+                loop.call_soon_threadsafe(self._resolve, fut)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+
+    async def wait_for_events(self, request_id: str, *, after: int = 0, timeout_s: float = 0.0) -> bool:
+        """
+        等待直到该流出现 event_id > after 的事件、流结束或超时
+        :return: 是否有新事件或流已结束（False 表示超时或流不存在）
+        """
+        loop = asyncio.get_running_loop()
+        shard = self._shard(request_id)
+        waiter = None
+        with shard.lock:
+            stream = shard.streams.get(request_id)
+            if stream is not None:
+                if stream.last_event_id > after or stream.done:
+                    return True
+                if timeout_s <= 0:
+                    return False
+                waiter = (loop, loop.create_future())
+                stream.waiters.append(waiter)
+            elif request_id in shard.evicted:
+                return True
+        if waiter is None:
+            # 未知的 request_id：按超时挂起，避免调用方空转
+            if timeout_s > 0:
+                await asyncio.sleep(timeout_s)
+            return False
+        try:
+            await asyncio.wait_for(waiter[1], timeout_s)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with shard.lock:
+                try:
+                    stream.waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    # ------------------ 回收 ------------------
+    def _forget(self, shard: _EventShard, request_id: str, reason: str) -> None:
+        """调用方需持有 shard.lock"""
+        stream = shard.streams.pop(request_id, None)
+        if stream is not None:
+            self._wake(stream)
+        shard.evicted[request_id] = None
+        while len(shard.evicted) > self._shard_evicted_max:
+            shard.evicted.popitem(last=False)
+        shard.counters[f"evicted_{reason}"] += 1
+
+    def _maybe_sweep(self, shard: _EventShard) -> None:
+        now = time.monotonic()
+        if now - shard.last_sweep >= self._sweep_interval_s:
+            self._sweep(shard, now)
+
+    def _sweep(self, shard: _EventShard, now: float) -> int:
+        shard.last_sweep = now
+        if self._done_ttl_s <= 0:
+            return 0
+        expired = [
+            rid for rid, s in shard.streams.items()
+            if s.done and s.done_ts is not None and now - s.done_ts >= self._done_ttl_s
+        ]
+        for rid in expired:
+            self._forget(shard, rid, "ttl")
+        return len(expired)
+
+    def _enforce_max_streams(self, shard: _EventShard) -> None:
+        if not self._shard_max_streams or len(shard.streams) <= self._shard_max_streams:
+            return
+        # 从最久未访问的开始淘汰已结束的流；进行中的流不淘汰
+        for rid in [rid for rid, s in shard.streams.items() if s.done]:
+            if len(shard.streams) <= self._shard_max_streams:
+                break
+            self._forget(shard, rid, "lru")
+
+    def sweep(self) -> int:
+        """立即回收过期的已结束流，返回回收数量"""
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                removed += self._sweep(shard, time.monotonic())
+        return removed
 
+    def stats(self) -> dict:
+        totals = {
+            "streams": 0, "active_streams": 0, "done_streams": 0,
+            "events_retained": 0, "waiters": 0, "approx_bytes": 0,
+        }
+        # 逐段统计，不同时持有多段锁
+        for shard in self._shards:
+            with shard.lock:
+                active = sum(1 for s in shard.streams.values() if not s.done)
+                totals["streams"] += len(shard.streams)
+                totals["active_streams"] += active
+                totals["done_streams"] += len(shard.streams) - active
+                totals["events_retained"] += sum(len(s.events) for s in shard.streams.values())
+                totals["waiters"] += sum(len(s.waiters) for s in shard.streams.values())
+                totals["approx_bytes"] += sum(s.events.total_bytes for s in shard.streams.values())
+                for key, value in shard.counters.items():
+                    totals[key] = totals.get(key, 0) + value
+        totals["stripes"] = len(self._shards)
+        return totals
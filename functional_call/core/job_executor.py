@@ -0,0 +1,232 @@
+"""
+有界优先级任务执行器（JobManager 的工作线程池）。
+
+原先每个请求新建一个 daemon 线程（线程内再新建 asyncio 事件循环），突发的语音/飞书指令会无限制地创建线程。
+这里改为：
+- 固定上限的工作线程（按需创建），每个线程持有一个复用的 asyncio 事件循环（worker_event_loop()）
+- 优先级队列：急停/取消 > 查询 > 长任务，同优先级先进先出
+- 队列满时 submit 直接抛 QueueFullError（上层返回 429 + 建议重试时间），不排队等待
+- 急停/取消在工作线程全忙时使用预留线程立即执行，不受队列上限限制
+- stats() 提供队列深度、排队等待时间分位数与拒绝计数
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+PRIORITY_EMERGENCY = 0
+PRIORITY_QUERY = 1
+PRIORITY_LONG = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_EMERGENCY: "emergency",
+    PRIORITY_QUERY: "query",
+    PRIORITY_LONG: "long",
+}
+
+
+class QueueFullError(RuntimeError):
+    """任务队列已满（过载），调用方应尽快返回 429"""
+
+    def __init__(self, queue_depth: int, retry_after_s: float) -> None:
+        super().__init__(f"任务队列已满（排队 {queue_depth} 个），请 {retry_after_s:.0f} 秒后重试")
+        self.queue_depth = queue_depth
+        self.retry_after_s = retry_after_s
+
+
+@dataclass(order=True)
+class _WorkItem:
+    priority: int
+    seq: int
+    func: Callable[[], None] = field(compare=False)
+    name: str = field(compare=False, default="")
+    enqueued_ts: float = field(compare=False, default_factory=time.monotonic)
+
+
+_local = threading.local()
+
+
+def worker_event_loop() -> asyncio.AbstractEventLoop | None:
+    """当前执行器线程复用的事件循环；不在执行器线程中时返回 None"""
+    return getattr(_local, "loop", None)
+
+
+class PriorityJobExecutor:
+    def __init__(
+        self,
+        *,
+        max_workers: int = 8,
+        max_queue: int = 32,
+        emergency_reserve: int = 2,
+        name: str = "job",
+    ) -> None:
+        """
+        :param max_workers: 常驻工作线程上限
+        :param max_queue: 排队任务上限（不含正在执行的），超出时拒绝；急停/取消不受限
+        :param emergency_reserve: 工作线程全忙时，急停/取消可额外占用的预留线程数
+        """
+        self._max_workers = max(1, int(max_workers))
+        self._max_queue = max(0, int(max_queue))
+        self._emergency_reserve = max(0, int(emergency_reserve))
+        self._name = name
+
+        self._cond = threading.Condition()
+        self._heap: List[_WorkItem] = []
+        self._seq = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._idle = 0
+        self._busy = 0
+        self._reserve_running = 0
+        self._shutdown = False
+
+        # 最近的排队等待/执行耗时（秒），用于统计与估算 Retry-After
+        self._waits: Dict[int, deque] = {p: deque(maxlen=512) for p in PRIORITY_NAMES}
+        self._run_times: deque = deque(maxlen=128)
+        self._counters = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "reserve_used": 0}
+
+    # ------------------ 提交 ------------------
+    def submit(self, func: Callable[[], None], *, priority: int = PRIORITY_LONG, name: str = "") -> int:
+        """
+        提交任务
+        :return: 排队位置（0 表示马上执行）
+        :raises QueueFullError: 队列已满
+        """
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("任务执行器已关闭")
+            item = _WorkItem(priority=priority, seq=next(self._seq), func=func, name=name)
+
+            no_free_worker = self._idle <= len(self._heap) and len(self._workers) >= self._max_workers
+            if priority == PRIORITY_EMERGENCY and no_free_worker and self._reserve_running < self._emergency_reserve:
+                self._reserve_running += 1
+                self._counters["submitted"] += 1
+                self._counters["reserve_used"] += 1
+                threading.Thread(target=self._run_reserve, args=(item,), name=f"{self._name}-reserve",
+                                 daemon=True).start()
+                return 0
+
+            if priority != PRIORITY_EMERGENCY and len(self._heap) >= self._max_queue and no_free_worker:
+                self._counters["rejected"] += 1
+                retry_after = self._estimate_retry_after()
+                logger.warning(f"🚦 任务队列已满，拒绝 {name or '任务'}（排队 {len(self._heap)}，建议 {retry_after:.0f}s 后重试）")
+                raise QueueFullError(len(self._heap), retry_after)
+
+            ahead = sum(1 for other in self._heap if other < item)
+            heapq.heappush(self._heap, item)
+            self._counters["submitted"] += 1
+            if self._idle < len(self._heap) and len(self._workers) < self._max_workers:
+                t = threading.Thread(target=self._worker_loop, name=f"{self._name}-worker-{len(self._workers)}",
+                                     daemon=True)
+                self._workers.append(t)
+                t.start()
+                return 0
+            self._cond.notify()
+            return max(0, ahead + 1 - self._idle)
+
+    def _estimate_retry_after(self) -> float:
+        avg_run = sum(self._run_times) / len(self._run_times) if self._run_times else 5.0
+        return max(1.0, min(60.0, avg_run * (len(self._heap) + 1) / self._max_workers))
+
+    # ------------------ 执行 ------------------
+    def _execute(self, item: _WorkItem) -> None:
+        start = time.monotonic()
+        self._waits[item.priority].append(start - item.enqueued_ts)
+        try:
+            item.func()
+            ok = True
+        except Exception as e:
+            ok = False
+            logger.error(f"❌ 任务执行异常 ({item.name}): {e}")
+        with self._cond:
+            self._run_times.append(time.monotonic() - start)
+            self._counters["completed" if ok else "failed"] += 1
+
+    def _worker_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _local.loop = loop
+        try:
+            while True:
+                with self._cond:
+                    self._idle += 1
+                    while not self._heap and not self._shutdown:
+                        self._cond.wait()
+                    self._idle -= 1
+                    if not self._heap:
+                        return
+                    item = heapq.heappop(self._heap)
+                    self._busy += 1
+                try:
+                    self._execute(item)
+                finally:
+                    with self._cond:
+                        self._busy -= 1
+        finally:
+            _local.loop = None
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def _run_reserve(self, item: _WorkItem) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _local.loop = loop
+        try:
+            self._execute(item)
+        finally:
+            _local.loop = None
+            asyncio.set_event_loop(None)
+            loop.close()
+            with self._cond:
+                self._reserve_running -= 1
+
+    def shutdown(self, wait: bool = False, timeout_s: float = 5.0) -> None:
+        """停止接收新任务；已排队的任务仍会执行完"""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            workers = list(self._workers)
+        if wait:
+            deadline = time.monotonic() + timeout_s
+            for t in workers:
+                t.join(max(0.0, deadline - time.monotonic()))
+
+    # ------------------ 统计 ------------------
+    @staticmethod
+    def _wait_summary(samples: deque) -> dict:
+        if not samples:
+            return {"count": 0}
+        ordered = sorted(samples)
+
+        def pick(q: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+        return {"count": len(ordered), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "max_ms": round(ordered[-1] * 1000, 1)}
+
+    def stats(self) -> dict:
+        with self._cond:
+            by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+            for item in self._heap:
+                by_priority[PRIORITY_NAMES.get(item.priority, str(item.priority))] += 1
+            return {
+                "max_workers": self._max_workers,
+                "workers": len(self._workers),
+                "busy": self._busy,
+                "idle": self._idle,
+                "reserve_running": self._reserve_running,
+                "queue_depth": len(self._heap),
+                "max_queue": self._max_queue,
+                "queue_by_priority": by_priority,
+                "wait": {PRIORITY_NAMES[p]: self._wait_summary(w) for p, w in self._waits.items()},
+                **self._counters,
+            }
@@ -3,9 +3,12 @@ Job 管理（内存版）。
 
 用于承载“长任务”（导航/动作/充电等待等）：
 - 立即返回 request_id
-- 后台线程执行
+- 提交到有界优先级执行器（PriorityJobExecutor）执行，过载时抛 QueueFullError
 - 执行过程中通过 EventBus 产出事件（给语音系统流式播报）
 - 托管任务生命周期，确保失败或超时后状态自动清理
+
+加锁：任务表按 request_id 分段加锁，session 索引按 session_id 分段加锁；
+需要同时持有两者时，先 session 段再 request 段。
 """
 
 from __future__ import annotations
@@ -14,19 +17,33 @@ import threading
 import time
 import logging
 from dataclasses import dataclass, field
-from typing import Callable, Dict, Optional, Any
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Any
 
 from .event_bus import EventBus
+from .job_executor import PRIORITY_LONG, PRIORITY_NAMES, PriorityJobExecutor, QueueFullError
+from .metrics import counter, histogram
+from .striped_lock import DEFAULT_STRIPES, StripedLock
+
+if TYPE_CHECKING:
+    from .journal import Journal
 
 logger = logging.getLogger(__name__)
 
+_JOBS_SUBMITTED = counter("jobs_submitted_total", "提交的任务数（rejected 为过载拒绝）", ("priority", "result"))
+_JOBS_FINISHED = counter("jobs_finished_total", "结束的任务数", ("priority", "status"))
+_JOB_QUEUE_WAIT = histogram("job_queue_wait_seconds", "任务从提交到开始执行的排队时间", ("priority",))
+_JOB_RUN_SECONDS = histogram("job_run_seconds", "任务执行耗时", ("priority",))
+
 
 @dataclass
 class JobInfo:
     request_id: str
     session_id: str
-    status: str = "running"  # running/completed/failed/cancelled
+    status: str = "queued"  # queued/running/completed/failed/cancelled
+    priority: int = PRIORITY_LONG
+    queue_position: int = 0  # 提交时的排队位置（0 表示立即执行）
     started_ts: float = field(default_factory=lambda: time.time())
+    run_ts: float | None = None
     ended_ts: float | None = None
     error: str | None = None
     result_text: str | None = None
@@ -34,17 +51,44 @@ class JobInfo:
     # 停止信号
     stop_event: threading.Event = field(default_factory=threading.Event)
 
+    @property
+    def is_active(self) -> bool:
+        """排队中或执行中"""
+        return self.status in ("queued", "running")
+
 
 class JobManager:
-    def __init__(self, event_bus: EventBus) -> None:
+    def __init__(
+        self,
+        event_bus: EventBus,
+        *,
+        stripes: int = DEFAULT_STRIPES,
+        executor: PriorityJobExecutor | None = None,
+        journal: "Journal | None" = None,
+    ) -> None:
         self._event_bus = event_bus
-        self._lock = threading.RLock()
+        self._executor = executor or PriorityJobExecutor()
+        self._journal = journal
+        self._job_locks = StripedLock(stripes)
+        self._session_locks = StripedLock(stripes)
         self._jobs: Dict[str, JobInfo] = {}
         # 建立 session 到 request 的快速索引，用于判定 session 忙碌
         self._session_to_request: Dict[str, str] = {}
 
+    def _record(self, job: JobInfo) -> None:
+        """状态变化写入持久化日志（调用方持有该任务的分段锁，保证同一任务的记录有序）"""
+        if self._journal is None:
+            return
+        self._journal.append("job", job.request_id, {
+            "status": job.status,
+            "session_id": job.session_id,
+            "priority": job.priority,
+            "error": job.error,
+            "result_text": job.result_text,
+        })
+
     def get(self, request_id: str) -> JobInfo | None:
-        with self._lock:
+        with self._job_locks.get(request_id):
             return self._jobs.get(request_id)
 
     def get_job(self, request_id: str) -> JobInfo | None:
@@ -53,14 +97,15 @@ class JobManager:
 
     def get_active_job_by_session(self, session_id: str) -> JobInfo | None:
         """获取该会话当前正在运行的任务"""
-        with self._lock:
+        with self._session_locks.get(session_id):
             req_id = self._session_to_request.get(session_id)
             if not req_id:
                 return None
-            job = self._jobs.get(req_id)
-            if job and job.status == "running":
-                return job
-            return None
+            with self._job_locks.get(req_id):
+                job = self._jobs.get(req_id)
+                if job and job.is_active:
+                    return job
+                return None
 
     def cancel_session_job(self, session_id: str) -> None:
         """主动取消某个会话的任务"""
@@ -68,8 +113,9 @@ class JobManager:
         if job:
             logger.info(f"🛑 正在请求取消任务: {job.request_id} (session: {session_id})")
             job.stop_event.set()
-            with self._lock:
+            with self._job_locks.get(job.request_id):
                 job.status = "cancelled"
+                self._record(job)
 
     def start(
         self,
@@ -79,45 +125,58 @@ class JobManager:
         runner: Callable[[threading.Event], str | None],
         on_done: Callable[[JobInfo], None] | None = None,
         on_cleanup: Callable[[], None] | None = None,
+        priority: int = PRIORITY_LONG,
     ) -> JobInfo:
         """
         启动后台托管任务。
         runner 现在接收一个 stop_event 参数，业务逻辑应周期性检查此信号以便提前退出。
+        :param priority: 执行优先级（PRIORITY_EMERGENCY / PRIORITY_QUERY / PRIORITY_LONG）
+        :raises QueueFullError: 执行器队列已满；此时不登记任务，也不打断该会话已有的任务
         """
-        job = JobInfo(request_id=request_id, session_id=session_id)
-        
-        with self._lock:
-            # 清理该 session 的旧索引（如果存在）
-            if session_id in self._session_to_request:
-                old_req = self._session_to_request[session_id]
-                if old_req in self._jobs and self._jobs[old_req].status == "running":
-                    logger.warning(f"⚠️ Session {session_id} 已有运行中任务 {old_req}，将被新任务覆盖。")
-                    self._jobs[old_req].stop_event.set()
+        job = JobInfo(request_id=request_id, session_id=session_id, priority=priority)
 
-            self._jobs[request_id] = job
+        with self._session_locks.get(session_id):
+            old_req = self._session_to_request.get(session_id)
+            with self._job_locks.get(request_id):
+                self._jobs[request_id] = job
+                self._record(job)
             self._session_to_request[session_id] = request_id
 
         def _run_wrapper():
             try:
+                with self._job_locks.get(request_id):
+                    # 排队期间已被取消/覆盖：不再执行
+                    if job.stop_event.is_set():
+                        if job.status == "queued":
+                            job.status = "cancelled"
+                        job.ended_ts = time.time()
+                        cancelled_in_queue = True
+                    else:
+                        job.status = "running"
+                        job.run_ts = time.time()
+                        cancelled_in_queue = False
+                        self._record(job)
                 # 执行真正的业务逻辑
-                result_text = runner(job.stop_event)
+                result_text = None if cancelled_in_queue else runner(job.stop_event)
                 
-                with self._lock:
+                with self._job_locks.get(request_id):
                     job.result_text = result_text
                     # 如果不是在执行过程中被改成了 cancelled，则标记为 completed
                     if job.status == "running":
                         job.status = "completed"
                     job.ended_ts = time.time()
+                    self._record(job)
                 
                 self._event_bus.mark_done(request_id, True)
                 if on_done:
                     on_done(job)
                 
             except Exception as e:
-                with self._lock:
+                with self._job_locks.get(request_id):
                     job.status = "failed"
                     job.error = str(e)
                     job.ended_ts = time.time()
+                    self._record(job)
                 
                 self._event_bus.mark_done(request_id, True)
                 logger.error(f"❌ 托管任务异常退出: {request_id}, Error: {e}")
@@ -125,8 +184,14 @@ class JobManager:
                     on_done(job)
             
             finally:
+                priority_name = PRIORITY_NAMES.get(priority, str(priority))
+                _JOBS_FINISHED.labels(priority_name, job.status).inc()
+                if job.run_ts is not None:
+                    _JOB_QUEUE_WAIT.labels(priority_name).observe(max(0.0, job.run_ts - job.started_ts))
+                    _JOB_RUN_SECONDS.labels(priority_name).observe(max(0.0, (job.ended_ts or time.time()) - job.run_ts))
+
                 # 无论成功失败，确保清理 session 到 request 的映射
-                with self._lock:
+                with self._session_locks.get(session_id):
                     if self._session_to_request.get(session_id) == request_id:
                         self._session_to_request.pop(session_id, None)
                 
@@ -136,6 +201,49 @@ class JobManager:
                     except Exception as ce:
                         logger.error(f"清理回调执行失败: {ce}")
 
-        t = threading.Thread(target=_run_wrapper, name=f"job-{request_id[:8]}", daemon=True)
-        t.start()
+        try:
+            job.queue_position = self._executor.submit(
+                _run_wrapper, priority=priority, name=f"job-{request_id[:8]}"
+            )
+        except QueueFullError:
+            _JOBS_SUBMITTED.labels(PRIORITY_NAMES.get(priority, str(priority)), "rejected").inc()
+            # 未被接纳：撤销登记，恢复该会话原有的任务索引
+            with self._session_locks.get(session_id):
+                with self._job_locks.get(request_id):
+                    self._jobs.pop(request_id, None)
+                    job.status = "cancelled"
+                    job.error = "过载拒绝"
+                    self._record(job)
+                if self._session_to_request.get(session_id) == request_id:
+                    if old_req:
+                        self._session_to_request[session_id] = old_req
+                    else:
+                        self._session_to_request.pop(session_id, None)
+            raise
+        _JOBS_SUBMITTED.labels(PRIORITY_NAMES.get(priority, str(priority)), "accepted").inc()
+
+        # 新任务已被接纳，再打断该会话的旧任务
+        if old_req and old_req != request_id:
+            with self._job_locks.get(old_req):
+                old_job = self._jobs.get(old_req)
+                if old_job and old_job.is_active:
+                    logger.warning(f"⚠️ Session {session_id} 已有运行中任务 {old_req}，将被新任务覆盖。")
+                    old_job.stop_event.set()
+
+        if job.queue_position:
+            logger.info(f"⏳ 任务排队中: {request_id} (优先级={PRIORITY_NAMES.get(priority, priority)}, 位置={job.queue_position})")
         return job
+
+    def stats(self) -> dict:
+        """执行器队列深度、等待时间与任务状态分布"""
+        by_status: Dict[str, int] = {}
+        for job in list(self._jobs.values()):
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {"executor": self._executor.stats(), "jobs": by_status}
+
+    def shutdown(self) -> None:
+        """通知所有任务停止，并停止执行器接收新任务"""
+        for job in list(self._jobs.values()):
+            if job.is_active:
+                job.stop_event.set()
+        self._executor.shutdown()
@@ -0,0 +1,245 @@
+"""
+任务/计划/事件日志（SQLite WAL，只追加）。
+
+PLANS / JobManager / EventBus 都在进程内存中，voice_server 在导航途中重启会丢失计划、进度与全部事件，
+机器人却仍在行驶。Journal 把这三类状态变化追加写入 SQLite（WAL 模式）：
+
+- append() 只把记录放进内存队列（不做 IO、不序列化，只在更新追加序号时持有一把极短的锁），
+  emit 路径上没有可测的额外延迟
+- 后台写线程按 flush_interval_s 攒批，一批一个事务（synchronous=FULL：一批一次 fsync）
+- replay() 启动时一次顺序扫描重建状态：每个 request 的最后任务状态、事件序列、计划快照
+- compact() 删除已结束且超过保留期的 request 的全部记录
+
+记录按 request_id 归档（key 列），kind 取值：
+- job: 任务状态变化 {status, session_id, priority, error, result_text}
+- event: 事件（VoiceEvent）
+- stream_done: 事件流结束
+- plan: 计划快照 {plan_id, plan}
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+TERMINAL_JOB_STATUSES = ("completed", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS journal_key ON journal (key);
+"""
+
+
+def _encode(payload: Any) -> str:
+    if hasattr(payload, "model_dump"):
+        payload = payload.model_dump()
+    return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+@dataclass
+class JournalSnapshot:
+    """replay() 的结果（均按 request_id 索引）"""
+    jobs: Dict[str, dict] = field(default_factory=dict)  # 最后一条 job 记录（附 ts）
+    events: Dict[str, List[dict]] = field(default_factory=dict)
+    done: set = field(default_factory=set)
+    plans: Dict[str, dict] = field(default_factory=dict)  # request_id -> {plan_id, plan}
+    records: int = 0
+    elapsed_ms: float = 0.0
+
+    def in_flight(self) -> Dict[str, dict]:
+        """重启前仍在排队/执行的任务"""
+        return {rid: job for rid, job in self.jobs.items() if job.get("status") not in TERMINAL_JOB_STATUSES}
+
+
+class Journal:
+    def __init__(self, path: str, *, flush_interval_s: float = 0.05, batch_max: int = 1000) -> None:
+        """
+        :param path: SQLite 文件路径（目录不存在时自动创建）
+        :param flush_interval_s: 攒批写入的最长间隔
+        :param batch_max: 队列积压到该条数时立即写入
+        """
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._flush_interval_s = max(0.001, float(flush_interval_s))
+        self._batch_max = max(1, int(batch_max))
+
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._flushed = threading.Condition()
+        self._closed = False
+        # 取序号与写回 _appended 必须一起完成：否则并发追加时 _appended 可能回退，
+        # flush() 会在后追加的记录落盘前就返回
+        self._append_lock = threading.Lock()
+        self._appended = 0
+        self._counters = {"written": 0, "dropped": 0, "batches": 0, "errors": 0}
+        self._last_batch_ms = 0.0
+        self._max_batch_ms = 0.0
+
+        self._conn = self._connect()
+        self._conn.executescript(_SCHEMA)
+        self._writer = threading.Thread(target=self._writer_loop, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self._path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    # ------------------ 写入 ------------------
+    def append(self, kind: str, key: str, payload: Any) -> None:
+        """
+        追加一条记录（非阻塞）。payload 在写线程中序列化，调用方追加后不应再修改它。
+        """
+        if self._closed:
+            return
+        self._queue.append((time.time(), kind, key, payload))
+        with self._append_lock:
+            self._appended += 1
+        if len(self._queue) >= self._batch_max:
+            self._wake.set()
+
+    def _drain(self) -> int:
+        batch = []
+        while self._queue:
+            ts, kind, key, payload = self._queue.popleft()
+            try:
+                batch.append((ts, kind, key, _encode(payload)))
+            except Exception as e:
+                self._counters["dropped"] += 1
+                logger.error(f"❌ 日志记录序列化失败 ({kind}/{key}): {e}")
+        if not batch:
+            return 0
+        start = time.perf_counter()
+        try:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT INTO journal (ts, kind, key, payload) VALUES (?, ?, ?, ?)", batch)
+            self._conn.execute("COMMIT")
+        except Exception as e:
+            self._counters["errors"] += 1
+            self._counters["dropped"] += len(batch)
+            logger.error(f"❌ 日志写入失败（丢弃 {len(batch)} 条）: {e}")
+            try:
+                self._conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            return 0
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._last_batch_ms = elapsed_ms
+        self._max_batch_ms = max(self._max_batch_ms, elapsed_ms)
+        self._counters["written"] += len(batch)
+        self._counters["batches"] += 1
+        return len(batch)
+
+    def _writer_loop(self) -> None:
+        while True:
+            self._wake.wait(self._flush_interval_s)
+            self._wake.clear()
+            closed = self._closed
+            self._drain()
+            with self._flushed:
+                self._flushed.notify_all()
+            if closed:
+                return
+
+    def flush(self, timeout_s: float = 5.0) -> bool:
+        """等待此前追加的记录全部落盘"""
+        target = self._appended
+        deadline = time.monotonic() + timeout_s
+        self._wake.set()
+        with self._flushed:
+            while self._counters["written"] + self._counters["dropped"] < target and self._writer.is_alive():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._flushed.wait(min(remaining, self._flush_interval_s))
+                self._wake.set()
+        return True
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join(timeout=5.0)
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+
+    # ------------------ 重放 / 压缩 ------------------
+    def replay(self) -> JournalSnapshot:
+        """顺序扫描全部记录，重建每个 request 的最终状态"""
+        start = time.perf_counter()
+        snap = JournalSnapshot()
+        conn = sqlite3.connect(str(self._path))
+        try:
+            for ts, kind, key, payload in conn.execute("SELECT ts, kind, key, payload FROM journal ORDER BY seq"):
+                snap.records += 1
+                try:
+                    data = json.loads(payload)
+                except ValueError:
+                    continue
+                if kind == "event":
+                    snap.events.setdefault(key, []).append(data)
+                elif kind == "job":
+                    data["ts"] = ts
+                    snap.jobs[key] = data
+                elif kind == "stream_done":
+                    snap.done.add(key)
+                elif kind == "plan":
+                    snap.plans[key] = data
+        finally:
+            conn.close()
+        snap.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        return snap
+
+    def compact(self, snap: JournalSnapshot, *, retention_s: float) -> int:
+        """删除已结束且结束时间早于 retention_s 的 request 的全部记录，返回删除的 request 数"""
+        cutoff = time.time() - retention_s
+        expired = [
+            rid for rid, job in snap.jobs.items()
+            if job.get("status") in TERMINAL_JOB_STATUSES and job.get("ts", 0) < cutoff
+        ]
+        if not expired:
+            return 0
+        self.flush()
+        conn = sqlite3.connect(str(self._path))
+        try:
+            with conn:
+                conn.executemany("DELETE FROM journal WHERE key = ?", [(rid,) for rid in expired])
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+        for rid in expired:
+            snap.jobs.pop(rid, None)
+            snap.events.pop(rid, None)
+            snap.plans.pop(rid, None)
+            snap.done.discard(rid)
+        return len(expired)
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self._path),
+            "queue_depth": len(self._queue),
+            "appended": self._appended,
+            "last_batch_ms": round(self._last_batch_ms, 2),
+            "max_batch_ms": round(self._max_batch_ms, 2),
+            **self._counters,
+        }
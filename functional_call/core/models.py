@@ -26,13 +26,15 @@ class VoiceQueryResponse(BaseModel):
     # 扩展字段（语音系统可选用）
     session_id: str | None = None
     request_id: str | None = None
-    status: str | None = None  # accepted/completed/failed
+    status: str | None = None  # accepted/completed/failed/rejected
     lang: str | None = None
+    queue_position: int | None = None  # 排队位置（0 表示已开始执行）
+    retry_after_s: float | None = None  # 过载被拒绝时建议的重试间隔
 
 
 class VoiceEvent(BaseModel):
     event_id: int
-    type: str  # started/progress/step_done/completed/failed/info
+    type: str  # started/progress/step_done/completed/failed/info/answer_preview
     speak_text: str
     ts: str = Field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
     data: Dict[str, Any] = Field(default_factory=dict)
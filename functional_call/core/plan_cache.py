@@ -0,0 +1,309 @@
+"""
+重复语音指令的计划缓存。
+
+操作员一天里反复说同样的话（"去站点3取货送到站点5"、"电量多少"），每次都让 Manus 带着整份地图摘要
+重新规划一遍。这里把"说法"归一成意图模板 + 槽位：
+
+- 文本归一：全角转半角、去标点/空白/语气词、中文数字转阿拉伯数字
+- 槽位提取：站点（站点3 / 3号站 / 地图中的站点名称）与高度（50mm / 高度50 / 5厘米），模板中统一替换为占位符；
+  不带单位的高度按毫米处理，厘米单独成一类槽位，"顶升5毫米" 与 "顶升5厘米" 不会共用一个模板
+
+第一次由 Manus 规划并且全部步骤执行成功后，把计划中出现的槽位值替换为占位符存为模板；之后同一模板
+（且地图版本、载货状态相同）的指令直接把新的槽位值填回模板，跳过规划用的 LLM 调用。
+
+只缓存"验证过"的计划：执行全部成功、每个槽位都在步骤中出现过、槽位值互不相同；回放时新的站点必须
+存在于当前地图中。回放的计划执行失败时删除该条目，下次重新规划。地图重新加载时清空缓存。
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 不影响意图的语气词/客套话（归一时删除）
+_FILLERS = ("麻烦你", "麻烦", "帮我", "帮忙", "请你", "请", "一下", "好吗", "吧", "呢", "啊", "呀", "哦", "嗯", "了")
+_PUNCT_RE = re.compile(r"[\s,.!?;:，。！？；：、\"'“”‘’()（）\[\]【】<>《》~～\-—_]+")
+_CN_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_CN_NUM_RE = re.compile(r"[零〇一二两三四五六七八九十百]+")
+
+# 槽位：(类型, 正则)；正则第一个分组为槽位值
+_SLOT_PATTERNS = (
+    ("station", re.compile(r"(?:站点|工位|站)(\d+)")),
+    ("station", re.compile(r"(\d+)号(?:站点|工位|站)?")),
+    ("height", re.compile(r"(?:高度)?(\d+)(?:mm|毫米)")),
+    ("height_cm", re.compile(r"(?:高度)?(\d+)(?:cm|厘米)")),
+    ("height", re.compile(r"高度(\d+)")),
+)
+# 按名称说出的站点（station_name）与按编号说出的站点模板相同，但计划里写的是名称，不能互相回放
+_SLOT_TEMPLATES = {
+    "station": "站点{station}",
+    "station_name": "站点{station}",
+    "height": "高度{height}",  # 毫米（不带单位时默认毫米）
+    "height_cm": "高度{height}厘米",
+}
+
+
+def _cn_to_int(text: str) -> Optional[int]:
+    """十以内组合的中文数字（三 / 十二 / 二十五 / 一百零五）转整数，无法解析时返回 None"""
+    if all(ch in _CN_DIGITS for ch in text):
+        return int("".join(str(_CN_DIGITS[ch]) for ch in text))  # 逐位读法：一零五
+    total, current = 0, 0
+    for ch in text:
+        if ch in _CN_DIGITS:
+            current = _CN_DIGITS[ch]
+        elif ch == "十":
+            total += (current or 1) * 10
+            current = 0
+        elif ch == "百":
+            total += (current or 1) * 100
+            current = 0
+        else:
+            return None
+    return total + current
+
+
+def normalize_text(text: str) -> str:
+    """文本归一：全角转半角、小写、去标点与语气词、中文数字转阿拉伯数字"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _PUNCT_RE.sub("", text)
+    for filler in _FILLERS:
+        text = text.replace(filler, "")
+
+    def _convert(m: re.Match) -> str:
+        value = _cn_to_int(m.group(0))
+        return m.group(0) if value is None else str(value)
+
+    return _CN_NUM_RE.sub(_convert, text)
+
+
+def extract_intent(text: str, station_names: Optional[Dict[str, str]] = None) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    归一化并提取槽位
+    :param station_names: 站点名称 -> 站点 ID（只收录不含数字的名称，带编号的名称由正则提取）
+    :return: (意图模板, [(槽位类型, 槽位值), ...])；不同说法统一写成 站点{station} / 高度{height}，
+             "去5号站" 与 "去站点5" 得到同一个模板；厘米写成 高度{height}厘米，槽位类型为 height_cm
+    """
+    normalized = normalize_text(text)
+    found: List[Tuple[int, int, str, str]] = []  # (起, 止, 类型, 值)
+
+    def _free(start: int, end: int) -> bool:
+        return all(end <= s or start >= e for s, e, _, _ in found)
+
+    for name in sorted(station_names or {}, key=len, reverse=True):
+        key = normalize_text(name)
+        if not key:
+            continue
+        for m in re.finditer(re.escape(key), normalized):
+            if _free(m.start(), m.end()):
+                found.append((m.start(), m.end(), "station_name", name))
+    for kind, pattern in _SLOT_PATTERNS:
+        for m in pattern.finditer(normalized):
+            if _free(m.start(), m.end()):
+                found.append((m.start(), m.end(), kind, m.group(1)))
+
+    found.sort()
+    parts, slots, pos = [], [], 0
+    for start, end, kind, value in found:
+        parts.append(normalized[pos:start])
+        parts.append(_SLOT_TEMPLATES[kind])
+        slots.append((kind, value))
+        pos = end
+    parts.append(normalized[pos:])
+    return "".join(parts), slots
+
+
+def _marker(i: int) -> str:
+    return f"⟨{i}⟩"
+
+
+def _slot_regex(value: str) -> re.Pattern:
+    # 数字槽位按完整数字匹配：站点 3 不能匹配到 30 或 高度 300 里的 3
+    if value.isdigit():
+        return re.compile(rf"(?<!\d){re.escape(value)}(?!\d)")
+    return re.compile(re.escape(value))
+
+
+@dataclass
+class _Entry:
+    steps: List[str]
+    title: str
+    created_ts: float = field(default_factory=time.time)
+    hits: int = 0
+    last_hit_ts: float = 0.0
+
+
+@dataclass
+class PlanMatch:
+    """lookup() 命中时的结果：槽位已填好的计划"""
+    key: tuple
+    steps: List[str]
+    title: str
+    slots: List[Tuple[str, str]]
+
+
+class PlanCache:
+    def __init__(self, *, resources: Any = None, enabled: bool = True, max_entries: int = 256) -> None:
+        """
+        :param resources: 提供 get_map_version() / get_stations() / add_reload_listener() 的地图来源
+                          （默认 core.resource_manager.resource_manager）
+        :param max_entries: 最多缓存的意图模板数（LRU）
+        """
+        if resources is None:
+            from core.resource_manager import resource_manager as resources
+        self._resources = resources
+        self.enabled = bool(enabled)
+        self._max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0, "misses": 0, "rejected": 0, "stored": 0, "uncacheable": 0,
+            "evicted": 0, "replay_failed": 0, "invalidations": 0,
+        }
+        if hasattr(resources, "add_reload_listener"):
+            resources.add_reload_listener(self._on_map_reload)
+
+    # ------------------ 键 ------------------
+    def _intent(self, text: str) -> Tuple[str, List[Tuple[str, str]], Dict[str, str]]:
+        stations = self._resources.get_stations()
+        # 只有不含数字的站点名称需要按名称匹配；"站点3" 这类名称由正则按编号提取
+        by_name = {name: sid for sid, name in stations.items() if name and not re.search(r"\d", name)}
+        template, slots = extract_intent(text, by_name)
+        return template, slots, stations
+
+    def _key(self, template: str, slots: List[Tuple[str, str]], state: str) -> tuple:
+        return template, tuple(kind for kind, _ in slots), self._resources.get_map_version(), state
+
+    # ------------------ 查找 / 写入 ------------------
+    def lookup(self, text: str, *, state: str = "") -> Optional[PlanMatch]:
+        """
+        查找可回放的计划
+        :param state: 影响规划结果的机器人状态摘要（例如载货状态），作为键的一部分
+        """
+        if not self.enabled:
+            return None
+        template, slots, stations = self._intent(text)
+        key = self._key(template, slots, state)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            if not self._slots_valid(slots, stations):
+                self._counters["rejected"] += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            entry.last_hit_ts = time.time()
+            self._counters["hits"] += 1
+            steps, title = list(entry.steps), entry.title
+
+        values = [value for _, value in slots]
+        steps = [self._fill(step, values) for step in steps]
+        title = self._fill(title, values)
+        logger.info(f"♻️ 计划缓存命中: {template} {values} -> {len(steps)} 个步骤")
+        return PlanMatch(key=key, steps=steps, title=title, slots=slots)
+
+    @staticmethod
+    def _slots_valid(slots: List[Tuple[str, str]], stations: Dict[str, str]) -> bool:
+        """回放时的站点必须存在于当前地图（地图里没有站点信息时不校验）"""
+        if not stations:
+            return True
+        names = set(stations.values())
+        return all(value in stations if kind == "station" else value in names
+                   for kind, value in slots if kind in ("station", "station_name"))
+
+    @staticmethod
+    def _fill(text: str, values: List[str]) -> str:
+        for i, value in enumerate(values):
+            text = text.replace(_marker(i), value)
+        return text
+
+    def store(self, text: str, plan: Dict[str, Any], *, state: str = "") -> bool:
+        """
+        把执行成功的计划存为模板；计划不依赖槽位或无法无歧义地替换槽位时不缓存
+        :return: 是否已缓存
+        """
+        if not self.enabled:
+            return False
+        template, slots, _ = self._intent(text)
+        steps = [str(s) for s in plan.get("steps") or []]
+        title = str(plan.get("title") or "")
+        values = [value for _, value in slots]
+
+        reason = None
+        if not steps:
+            reason = "计划为空"
+        elif len(set(values)) != len(values):
+            reason = "槽位值重复，无法区分"
+        elif any("⟨" in s for s in steps + [title]):
+            reason = "计划中包含占位符字符"
+        else:
+            for i, value in enumerate(values):
+                pattern = _slot_regex(value)
+                if not any(pattern.search(s) for s in steps):
+                    reason = f"槽位 {value} 未出现在计划步骤中"
+                    break
+                steps = [pattern.sub(_marker(i), s) for s in steps]
+                title = pattern.sub(_marker(i), title)
+        if reason is not None:
+            with self._lock:
+                self._counters["uncacheable"] += 1
+            logger.info(f"计划未缓存（{reason}）: {template}")
+            return False
+
+        key = self._key(template, slots, state)
+        with self._lock:
+            self._entries[key] = _Entry(steps=steps, title=title)
+            self._entries.move_to_end(key)
+            self._counters["stored"] += 1
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evicted"] += 1
+        logger.info(f"💾 计划已缓存: {template}（{len(steps)} 个步骤）")
+        return True
+
+    # ------------------ 失效 ------------------
+    def invalidate(self, key: tuple, *, replay_failed: bool = False) -> None:
+        """删除一个条目（回放的计划执行失败时调用）"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._counters["invalidations"] += 1
+            if replay_failed:
+                self._counters["replay_failed"] += 1
+
+    def clear(self) -> int:
+        with self._lock:
+            n = len(self._entries)
+            self._entries.clear()
+            if n:
+                self._counters["invalidations"] += n
+        return n
+
+    def _on_map_reload(self, map_version: str) -> None:
+        n = self.clear()
+        if n:
+            logger.info(f"🗺️ 地图已更新（{map_version}），清空计划缓存 {n} 条")
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        lookups = counters["hits"] + counters["misses"] + counters["rejected"]
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "max_entries": self._max_entries,
+            "map_version": self._resources.get_map_version(),
+            "lookups": lookups,
+            "hit_rate": round(counters["hits"] / lookups, 3) if lookups else None,
+            **counters,
+        }
@@ -1,7 +1,8 @@
+import hashlib
 import logging
 import os
 import json
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,10 @@ class CoreResourceManager:
     _instance = None
     _map_summary: str = "暂无地图信息。"
     _raw_maps: Dict[str, Any] = {}
+    # 地图内容指纹：地图文件变化后重新加载时改变，依赖地图的缓存（如计划缓存）以此失效
+    _map_version: str = ""
+    _stations: Dict[str, str] = {}
+    _reload_listeners: List[Callable[[str], None]] = []
 
     def __new__(cls):
         if cls._instance is None:
@@ -35,15 +40,16 @@ class CoreResourceManager:
                 logger.warning(f"⚠️ 未找到地图目录: {maps_dir}")
                 return
 
-            # 遍历加载 JSON 地图
+            # 遍历加载 JSON 地图（重新加载时整体替换，不保留已删除的地图）
             loaded_maps = []
-            for filename in os.listdir(maps_dir):
+            raw_maps: Dict[str, Any] = {}
+            for filename in sorted(os.listdir(maps_dir)):
                 if filename.endswith(".json"):
                     full_path = os.path.join(maps_dir, filename)
                     try:
                         with open(full_path, 'r', encoding='utf-8') as f:
                             data = json.load(f)
-                            self._raw_maps[filename] = data
+                            raw_maps[filename] = data
                             summary = self._summarize_map(filename, data)
                             loaded_maps.append(summary)
                     except Exception as e:
@@ -54,10 +60,41 @@ class CoreResourceManager:
                 logger.info(f"✅ 地图资源加载并解析完成，共加载 {len(loaded_maps)} 个文件。")
             else:
                 logger.warning(f"⚠️ 在 {maps_dir} 中未找到任何 .json 地图文件。")
+            self._set_maps(raw_maps)
 
         except Exception as e:
             logger.error(f"核心资源初始化异常: {e}")
 
+    def _set_maps(self, raw_maps: Dict[str, Any]) -> None:
+        """替换已加载的地图；内容有变化时通知监听者"""
+        digest = hashlib.sha1(json.dumps(raw_maps, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+        stations: Dict[str, str] = {}
+        for data in raw_maps.values():
+            for s in (data.get("data", data) or {}).get("station", []) or []:
+                if s.get("id") is not None:
+                    stations[str(s.get("id"))] = str(s.get("name") or "")
+        changed = digest != self._map_version
+        self._raw_maps = raw_maps
+        self._stations = stations
+        self._map_version = digest
+        if not changed:
+            return
+        logger.info(f"🗺️ 地图版本: {digest}（{len(stations)} 个站点）")
+        for listener in list(self._reload_listeners):
+            try:
+                listener(digest)
+            except Exception as e:
+                logger.error(f"❌ 地图重新加载回调失败: {e}")
+
+    def reload(self) -> str:
+        """重新扫描地图目录，返回新的地图版本"""
+        self.initialize()
+        return self._map_version
+
+    def add_reload_listener(self, listener: Callable[[str], None]) -> None:
+        """地图内容变化（首次加载 / 重新加载）时回调 listener(map_version)"""
+        self._reload_listeners.append(listener)
+
     def _summarize_map(self, filename: str, data: Dict[str, Any]) -> str:
         """
         将复杂的地图 JSON 数据压缩为 LLM 易读的自然语言摘要。
@@ -99,6 +136,14 @@ class CoreResourceManager:
         """获取原始地图数据（如果 Agent 确实需要深挖）"""
         return self._raw_maps.get(filename)
 
+    def get_map_version(self) -> str:
+        """当前地图内容指纹（未加载地图时为空字符串）"""
+        return self._map_version
+
+    def get_stations(self) -> Dict[str, str]:
+        """所有地图中的站点：站点 ID -> 站点名称"""
+        return dict(self._stations)
+
 # 全局单例
 resource_manager = CoreResourceManager()
 
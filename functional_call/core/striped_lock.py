@@ -0,0 +1,57 @@
+"""
+分段锁（lock striping）。
+
+EventBus / JobManager / SessionStore 原先用一把全局 RLock 保护所有 request/session，
+并发会话多时每次 emit、轮询、会话查询都在这把锁上排队。
+StripedLock 按 key 的哈希把锁分成固定数量的段：不同 key 大概率落在不同段上，互不阻塞；
+同一个 key 永远映射到同一把锁，保证单个 request/session 内的操作仍然串行。
+
+需要同时持有多段锁时（全量统计/回收），用 acquire_all() 按段序号加锁，避免死锁。
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Hashable, Iterator, List
+
+
+DEFAULT_STRIPES = 16
+
+
+class StripedLock:
+    def __init__(self, stripes: int = DEFAULT_STRIPES, factory: Callable[[], object] = threading.RLock) -> None:
+        """
+        :param stripes: 段数（建议为 2 的幂，远大于 CPU 核数时收益不再增加）
+        :param factory: 锁工厂，默认可重入锁
+        """
+        self._stripes = max(1, int(stripes))
+        self._locks: List = [factory() for _ in range(self._stripes)]
+
+    def __len__(self) -> int:
+        return self._stripes
+
+    def index(self, key: Hashable) -> int:
+        """key 所在的段序号（同一进程内稳定）"""
+        return hash(key) % self._stripes
+
+    def get(self, key: Hashable):
+        """key 对应的锁，可直接用于 with 语句"""
+        return self._locks[hash(key) % self._stripes]
+
+    def at(self, index: int):
+        """按段序号取锁（配合分段存储的数据结构使用）"""
+        return self._locks[index]
+
+    @contextmanager
+    def acquire_all(self) -> Iterator[None]:
+        """按段序号依次持有全部锁"""
+        acquired = []
+        try:
+            for lock in self._locks:
+                lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
@@ -0,0 +1,383 @@
+"""
+请求级耗时追踪（span）。
+
+core/context.py 已经通过 contextvars 在线程/协程间传递 trace/session/request，这里在其上记录耗时：
+
+- span(name, **attrs)：上下文管理器，记录一段代码的起止时间；嵌套时自动挂到外层 span 下
+- traced(name)：装饰器版本（同步函数与协程均可）
+- record_span(...)：在没有请求上下文的线程里（如语音推送投递线程）按显式 request_id 补记一段耗时
+- 进程内环形缓冲区：全局最多 max_spans 条，按 request_id 建索引，最多保留 max_requests 个请求（LRU）
+- waterfall(request_id)：按开始时间排列的瀑布图（偏移/耗时/层级/文本条），供 /debug/traces/{request_id}
+- 可选 OTLP 文件导出：后台线程把 span 按 OTLP/JSON（ExportTraceServiceRequest）每批一行追加写入文件，
+  可直接交给 OpenTelemetry Collector 的 otlpjsonfile 接收器
+
+没有请求上下文（request_id 为空）或追踪关闭时，span() 直接返回空操作，热路径上只有一次 contextvar 读取。
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from .context import get_request_id, get_session_id, get_trace_id
+
+logger = logging.getLogger(__name__)
+
+
+_current_span_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("span_id", default=None)
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def current_span_id() -> str | None:
+    """当前上下文中最内层 span 的 ID（跨线程传递父子关系时使用）"""
+    return _current_span_var.get()
+
+
+@dataclass
+class Span:
+    name: str
+    request_id: str
+    trace_id: str | None
+    span_id: str
+    parent_id: str | None
+    start_ts: float  # 墙钟时间（秒）
+    duration_ms: float = 0.0
+    status: str = "ok"  # ok / error
+    error: str | None = None
+    thread: str = ""
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ts": self.start_ts,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "thread": self.thread,
+            "attrs": self.attrs,
+        }
+
+
+class OtlpFileExporter:
+    """
+    OTLP/JSON 文件导出：每批 span 写成一行 ExportTraceServiceRequest（JSON Lines）。
+    export() 只入队，序列化与写文件在后台线程完成。
+    """
+
+    def __init__(self, path: str, *, service_name: str = "functional_call", flush_interval_s: float = 1.0) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._service_name = service_name
+        self._flush_interval_s = max(0.05, float(flush_interval_s))
+        self._queue: Deque[Span] = deque(maxlen=100_000)
+        self._stop = threading.Event()
+        self._counters = {"exported": 0, "errors": 0}
+        self._writer = threading.Thread(target=self._writer_loop, name="trace-exporter", daemon=True)
+        self._writer.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.append(span)
+
+    @staticmethod
+    def _attr(key: str, value: Any) -> dict:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _otlp_span(self, span: Span) -> dict:
+        start_ns = int(span.start_ts * 1e9)
+        attrs = [self._attr("request_id", span.request_id), self._attr("thread.name", span.thread)]
+        attrs += [self._attr(k, v) for k, v in span.attrs.items()]
+        out = {
+            # trace_id 是 uuid4：去掉连字符即为 32 位十六进制
+            "traceId": (span.trace_id or span.request_id).replace("-", "")[:32].ljust(32, "0"),
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int(span.duration_ms * 1e6)),
+            "attributes": attrs,
+            "status": {"code": 2, "message": span.error or ""} if span.status == "error" else {"code": 1},
+        }
+        if span.parent_id:
+            out["parentSpanId"] = span.parent_id
+        return out
+
+    def _write_batch(self) -> int:
+        batch = []
+        while self._queue:
+            batch.append(self._queue.popleft())
+        if not batch:
+            return 0
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [self._attr("service.name", self._service_name)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [self._otlp_span(s) for s in batch]}],
+            }]
+        }
+        try:
+            with self._path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(payload, ensure_ascii=False, default=str) + "\n")
+            self._counters["exported"] += len(batch)
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"❌ 追踪导出失败（丢弃 {len(batch)} 个 span）: {e}")
+        return len(batch)
+
+    def _writer_loop(self) -> None:
+        while not self._stop.wait(self._flush_interval_s):
+            self._write_batch()
+        self._write_batch()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._writer.join(timeout=5.0)
+
+    def stats(self) -> dict:
+        return {"path": str(self._path), "queue_depth": len(self._queue), **self._counters}
+
+
+class Tracer:
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        max_spans: int = 20000,
+        max_requests: int = 500,
+        exporter: OtlpFileExporter | None = None,
+    ) -> None:
+        """
+        :param max_spans: 全局最多保留多少个 span（环形缓冲区，覆盖最老的）
+        :param max_requests: 最多为多少个请求保留瀑布图索引（LRU）
+        :param exporter: 可选的 OTLP 文件导出器
+        """
+        self.enabled = enabled
+        self._max_requests = max(1, int(max_requests))
+        self._spans: Deque[Span] = deque(maxlen=max(1, int(max_spans)))
+        self._by_request: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._exporter = exporter
+        self._counters = {"recorded": 0}
+
+    # ------------------ 记录 ------------------
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            if len(self._spans) == self._spans.maxlen:
+                # 环形缓冲区覆盖最老的 span：同步从索引中移除
+                oldest = self._spans[0]
+                spans = self._by_request.get(oldest.request_id)
+                if spans and spans[0] is oldest:
+                    spans.pop(0)
+            self._spans.append(span)
+            spans = self._by_request.get(span.request_id)
+            if spans is None:
+                spans = self._by_request[span.request_id] = []
+                while len(self._by_request) > self._max_requests:
+                    self._by_request.popitem(last=False)
+            else:
+                self._by_request.move_to_end(span.request_id)
+            spans.append(span)
+            self._counters["recorded"] += 1
+        if self._exporter is not None:
+            self._exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, *, parent_id: str | None = None, **attrs: Any) -> Iterator[Span | None]:
+        """
+        记录一段耗时；没有请求上下文或追踪关闭时为空操作（yield None）。
+        :param parent_id: 显式指定父 span（跨线程时使用），缺省取当前上下文中的 span
+        """
+        request_id = get_request_id() if self.enabled else None
+        if not request_id:
+            yield None
+            return
+        span = Span(
+            name=name,
+            request_id=request_id,
+            trace_id=get_trace_id(),
+            span_id=_new_span_id(),
+            parent_id=parent_id or _current_span_var.get(),
+            start_ts=time.time(),
+            thread=threading.current_thread().name,
+            attrs=attrs,
+        )
+        token = _current_span_var.set(span.span_id)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - start) * 1000
+            _current_span_var.reset(token)
+            self._finish(span)
+
+    def record_span(
+        self,
+        name: str,
+        *,
+        request_id: str,
+        start_ts: float,
+        duration_ms: float,
+        trace_id: str | None = None,
+        parent_id: str | None = None,
+        error: str | None = None,
+        **attrs: Any,
+    ) -> None:
+        """补记一段已结束的耗时（用于没有请求上下文的后台线程）"""
+        if not self.enabled or not request_id:
+            return
+        self._finish(Span(
+            name=name,
+            request_id=request_id,
+            trace_id=trace_id,
+            span_id=_new_span_id(),
+            parent_id=parent_id,
+            start_ts=start_ts,
+            duration_ms=duration_ms,
+            status="error" if error else "ok",
+            error=error,
+            thread=threading.current_thread().name,
+            attrs=attrs,
+        ))
+
+    # ------------------ 查询 ------------------
+    def get_spans(self, request_id: str) -> List[Span]:
+        with self._lock:
+            return list(self._by_request.get(request_id, ()))
+
+    def waterfall(self, request_id: str, *, width: int = 40) -> dict | None:
+        """按开始时间排列的瀑布图；请求不存在（或已被淘汰）时返回 None"""
+        spans = sorted(self.get_spans(request_id), key=lambda s: s.start_ts)
+        if not spans:
+            return None
+        t0 = spans[0].start_ts
+        t1 = max(s.start_ts + s.duration_ms / 1000 for s in spans)
+        total_ms = max((t1 - t0) * 1000, 0.001)
+
+        by_id = {s.span_id: s for s in spans}
+
+        def depth(s: Span) -> int:
+            d, parent = 0, s.parent_id
+            while parent in by_id and d < 32:
+                d, parent = d + 1, by_id[parent].parent_id
+            return d
+
+        rows, summary = [], {}
+        for s in spans:
+            offset_ms = (s.start_ts - t0) * 1000
+            begin = min(width - 1, int(offset_ms / total_ms * width))
+            length = max(1, round(s.duration_ms / total_ms * width))
+            rows.append({
+                **s.to_dict(),
+                "offset_ms": round(offset_ms, 3),
+                "depth": depth(s),
+                "bar": "·" * begin + "█" * min(length, width - begin) + "·" * max(0, width - begin - length),
+            })
+            agg = summary.setdefault(s.name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            agg["count"] += 1
+            agg["total_ms"] += s.duration_ms
+            agg["max_ms"] = max(agg["max_ms"], s.duration_ms)
+        for agg in summary.values():
+            agg["total_ms"] = round(agg["total_ms"], 1)
+            agg["max_ms"] = round(agg["max_ms"], 1)
+        return {
+            "request_id": request_id,
+            "trace_id": spans[0].trace_id,
+            "total_ms": round(total_ms, 1),
+            "span_count": len(spans),
+            "by_name": dict(sorted(summary.items(), key=lambda kv: -kv[1]["total_ms"])),
+            "spans": rows,
+        }
+
+    def close(self) -> None:
+        if self._exporter is not None:
+            self._exporter.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {
+                "enabled": self.enabled,
+                "spans": len(self._spans),
+                "requests": len(self._by_request),
+                **self._counters,
+            }
+        if self._exporter is not None:
+            out["exporter"] = self._exporter.stats()
+        return out
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def configure_tracing(
+    *,
+    enabled: bool = True,
+    max_spans: int = 20000,
+    max_requests: int = 500,
+    otlp_path: str | None = None,
+) -> Tracer:
+    """按配置替换全局 Tracer（服务启动时调用一次）"""
+    global _tracer
+    exporter = OtlpFileExporter(otlp_path) if enabled and otlp_path else None
+    _tracer.close()
+    _tracer = Tracer(enabled=enabled, max_spans=max_spans, max_requests=max_requests, exporter=exporter)
+    return _tracer
+
+
+def span(name: str, **attrs: Any):
+    """记录一段耗时：with span("llm.call", model=...): ..."""
+    return _tracer.span(name, **attrs)
+
+
+def record_span(name: str, **kwargs: Any) -> None:
+    _tracer.record_span(name, **kwargs)
+
+
+def traced(name: str | None = None) -> Callable[[Callable], Callable]:
+    """装饰器：把整个函数（同步或协程）记为一个 span，缺省以函数限定名命名"""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def _async_wrapper(*args, **kwargs):
+                with _tracer.span(span_name):
+                    return await func(*args, **kwargs)
+            return _async_wrapper
+
+        @functools.wraps(func)
+        def _wrapper(*args, **kwargs):
+            with _tracer.span(span_name):
+                return func(*args, **kwargs)
+        return _wrapper
+
+    return decorator
@@ -9,27 +9,114 @@
   3. completed/failed（结束）：任务成功完成或最终失败
 
 配置：
-- VOICE_PUSH_URL: 语音端回调接口地址（例如：http://10.62.232.70:8800/voice/callback）
+- VOICE_PUSH_URL: 语音端回调接口地址，多个用逗号分隔（例如：http://10.62.232.70:8800/voice/callback）
 - VOICE_PUSH_ENABLED: 是否启用推送（默认 true）
 - VOICE_PUSH_TIMEOUT_S: 推送超时时间（默认 5秒）
+- VOICE_PUSH_QUEUE_MAX: 每个目标的待发送队列上限（默认 100）
+
+投递模型：
+- 一个后台线程运行 asyncio 事件循环，每个目标一个发送协程 + 一个长连接（keep-alive）
+  （安装了 httpx 时用 httpx.AsyncClient，否则用 requests.Session 在该目标专属的单线程中发送）
+- 各目标并行发送；同一目标内按入队顺序逐条发送，因此同一 request_id 的消息保持顺序
+- 每个目标的队列有界：满时丢弃最老的非结束类消息（plan/fault），结束类消息尽量保留
+- 队列尾部连续的同一 request_id 的 plan 消息合并为最新一条（语音端只需要播报最新进度）
+- 失败重试在协程中异步退避，不阻塞其它目标
+- stats() 提供投递延迟分位数与 入队/发送/失败/丢弃/合并 计数
 
 设计原则：
 - 推送失败不影响主流程（只记录日志）
 - 异步推送（不阻塞任务执行）
-- 自动重试1次（避免网络抖动）
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import threading
 import time
 import requests
-from typing import Any, Dict
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+try:
+    import httpx  # type: ignore
+except Exception:  # 可选依赖：未安装时回退到 requests.Session
+    httpx = None
+
+from core.metrics import histogram
+from core.tracing import current_span_id, record_span
 
 logger = logging.getLogger(__name__)
 
 
+_PUSH_SECONDS = histogram("voice_push_delivery_seconds", "语音推送从入队到投递成功的延迟", ("target",))
+
+# 可合并的进度类消息；结束类消息（completed/failed）不合并，队列满时也优先保留
+_COALESCE_TYPES = {"plan"}
+_TERMINAL_TYPES = {"completed", "failed"}
+
+
+@dataclass
+class _PushItem:
+    event_type: str
+    request_id: str
+    payload: Dict[str, Any]
+    enqueued_ts: float = field(default_factory=time.monotonic)
+    # 追踪：推送发起处的 trace/span（投递线程没有请求上下文）
+    trace_id: str | None = None
+    parent_span_id: str | None = None
+
+
+class _TargetChannel:
+    """单个推送目标：有界队列 + 长连接 + 顺序发送（队列、计数与延迟样本只在投递线程的事件循环中访问）"""
+
+    def __init__(self, url: str, queue_max: int) -> None:
+        self.url = url
+        self.queue: deque = deque()
+        self.queue_max = max(1, queue_max)
+        self.wakeup: asyncio.Event | None = None
+        self.client = None  # httpx.AsyncClient
+        self.session: requests.Session | None = None
+        self.executor: ThreadPoolExecutor | None = None
+        self.latencies_ms: deque = deque(maxlen=512)
+        self.latency_metric = _PUSH_SECONDS.labels(url)
+        self.counters = {"enqueued": 0, "sent": 0, "failed": 0, "dropped": 0, "coalesced": 0, "retries": 0}
+
+    def enqueue(self, item: _PushItem) -> None:
+        self.counters["enqueued"] += 1
+        tail = self.queue[-1] if self.queue else None
+        if (tail is not None and item.event_type in _COALESCE_TYPES and tail.event_type == item.event_type
+                and tail.request_id == item.request_id):
+            # 合并：保留最早的入队时间（延迟统计按最早那条算）
+            tail.payload = item.payload
+            self.counters["coalesced"] += 1
+            return
+        if len(self.queue) >= self.queue_max:
+            victim = next((x for x in self.queue if x.event_type not in _TERMINAL_TYPES), self.queue[0])
+            self.queue.remove(victim)
+            self.counters["dropped"] += 1
+            logger.warning(f"⚠️ 推送队列已满，丢弃 {victim.event_type} 消息 ({self.url}, req_id={victim.request_id})")
+        self.queue.append(item)
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def stats(self) -> dict:
+        """只能在投递线程的事件循环中调用（其他线程经 VoicePushNotifier.stats() 取快照）"""
+        ordered = sorted(self.latencies_ms)
+
+        def pick(q: float) -> float | None:
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1) if ordered else None
+
+        return {
+            "queue_depth": len(self.queue),
+            "latency_p50_ms": pick(0.50),
+            "latency_p95_ms": pick(0.95),
+            **self.counters,
+        }
+
+
 class VoicePushNotifier:
     """语音端回调推送器"""
 
@@ -38,13 +125,26 @@ class VoicePushNotifier:
         push_url: str | None = None,
         enabled: bool = True,
         timeout_s: int = 5,
+        queue_max: int = 100,
+        max_retries: int = 3,
+        retry_backoff_s: float = 2.0,
     ) -> None:
         self.push_url = push_url
         self.enabled = enabled and bool(push_url)
         self.timeout_s = timeout_s
+        self._max_retries = max(1, max_retries)
+        self._retry_backoff_s = retry_backoff_s
+
+        targets = [t.strip() for t in (push_url or "").split(",") if t.strip()]
+        self._channels: List[_TargetChannel] = [_TargetChannel(url, queue_max) for url in targets]
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._tasks: List[asyncio.Task] = []
 
         if self.enabled:
-            logger.info(f"✅ 语音推送器已启用: push_url={self.push_url}, timeout={self.timeout_s}s")
+            self._start()
+            logger.info(f"✅ 语音推送器已启用: push_url={self.push_url}, timeout={self.timeout_s}s, "
+                        f"transport={'httpx' if httpx is not None else 'requests.Session'}")
         else:
             logger.info("⚠️ 语音推送器未启用（未配置 VOICE_PUSH_URL 或 VOICE_PUSH_ENABLED=false）")
 
@@ -152,7 +252,7 @@ class VoicePushNotifier:
         内部推送方法（异步 + 失败不影响主流程）
         """
         # 尝试从上下文中自动获取 request_id 和 session_id (如果未提供)
-        from core.context import get_request_id, get_session_id
+        from core.context import get_request_id, get_session_id, get_trace_id
         if not request_id:
             request_id = get_request_id() or ""
         if not session_id:
@@ -161,57 +261,178 @@ class VoicePushNotifier:
         # 调试日志：无论是否启用推送，都在日志中记录内容
         logger.info(f"📢 [语音推送] 类型={event_type}, 内容=\"{speak_text}\" (启用状态={self.enabled}, req_id={request_id}, sess_id={session_id})")
 
-        if not self.enabled:
+        if not self.enabled or self._loop is None:
             return
 
-        # 异步推送（不阻塞主流程）
-        t = threading.Thread(
-            target=self._do_push,
-            args=(event_type, speak_text, request_id, session_id, data),
-            name=f"voice-push-{event_type}",
-            daemon=True,
+        # 异步推送（不阻塞主流程）：交给投递线程的事件循环入队
+        item = _PushItem(
+            event_type=event_type,
+            request_id=request_id,
+            payload={
+                "event_type": event_type,
+                "speak_text": speak_text,
+                "request_id": request_id,
+                "session_id": session_id,
+                "data": data,
+            },
+            trace_id=get_trace_id(),
+            parent_span_id=current_span_id(),
         )
-        t.start()
+        try:
+            self._loop.call_soon_threadsafe(self._enqueue, item)
+        except RuntimeError:
+            logger.warning("⚠️ 语音推送器已关闭，消息未发送")
 
-    def _do_push(
-        self,
-        event_type: str,
-        speak_text: str,
-        request_id: str,
-        session_id: str,
-        data: Dict[str, Any],
-    ) -> None:
+    # ------------------ 投递线程 ------------------
+    def _start(self) -> None:
+        ready = threading.Event()
+
+        def _run() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            for channel in self._channels:
+                channel.wakeup = asyncio.Event()
+                if httpx is not None:
+                    channel.client = httpx.AsyncClient(
+                        timeout=self.timeout_s,
+                        limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+                    )
+                else:
+                    channel.session = requests.Session()
+                    channel.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-push-io")
+                self._tasks.append(loop.create_task(self._sender(channel)))
+            ready.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(self._close_transports())
+                loop.close()
+
+        self._thread = threading.Thread(target=_run, name="voice-push", daemon=True)
+        self._thread.start()
+        ready.wait(timeout=5.0)
+
+    def _enqueue(self, item: _PushItem) -> None:
+        for channel in self._channels:
+            # 每个目标各自一份（合并/丢弃时互不影响）
+            channel.enqueue(_PushItem(item.event_type, item.request_id, dict(item.payload), item.enqueued_ts,
+                                      item.trace_id, item.parent_span_id))
+
+    async def _sender(self, channel: _TargetChannel) -> None:
+        while True:
+            await channel.wakeup.wait()
+            channel.wakeup.clear()
+            while channel.queue:
+                item = channel.queue.popleft()
+                start_ts, start = time.time(), time.monotonic()
+                ok = await self._deliver(channel, item)
+                if ok:
+                    channel.counters["sent"] += 1
+                    latency_s = time.monotonic() - item.enqueued_ts
+                    channel.latencies_ms.append(latency_s * 1000)
+                    channel.latency_metric.observe(latency_s)
+                else:
+                    channel.counters["failed"] += 1
+                    logger.error(f"❌ 目标推送彻底失败: {channel.url} ({item.event_type}, req_id={item.request_id})")
+                record_span(
+                    "voice.push",
+                    request_id=item.request_id,
+                    trace_id=item.trace_id,
+                    parent_id=item.parent_span_id,
+                    start_ts=start_ts,
+                    duration_ms=(time.monotonic() - start) * 1000,
+                    error=None if ok else "delivery failed",
+                    target=channel.url,
+                    event_type=item.event_type,
+                    queued_ms=round((start - item.enqueued_ts) * 1000, 1),
+                )
+
+    async def _post(self, channel: _TargetChannel, payload: Dict[str, Any]) -> tuple[int, str]:
+        if channel.client is not None:
+            resp = await channel.client.post(channel.url, json=payload)
+            return resp.status_code, resp.text
+        loop = asyncio.get_running_loop()
+        resp = await loop.run_in_executor(
+            channel.executor, lambda: channel.session.post(channel.url, json=payload, timeout=self.timeout_s)
+        )
+        return resp.status_code, resp.text
+
+    async def _deliver(self, channel: _TargetChannel, item: _PushItem) -> bool:
+        """发送一条消息（带指数退避重试），返回是否成功"""
+        for attempt in range(self._max_retries):
+            try:
+                if attempt == 0:
+                    logger.info(f"📤 推送语音回调 (Target: {channel.url}): {item.event_type}")
+                status, text = await self._post(channel, item.payload)
+                if status == 200:
+                    logger.info(f"✅ 推送成功: {channel.url}")
+                    return True
+                logger.warning(f"⚠️ 推送失败 ({channel.url}, HTTP {status}): {text[:50]}")
+            except Exception as e:
+                logger.warning(f"⚠️ 推送异常 ({channel.url}, {type(e).__name__}): {e}")
+            if attempt < self._max_retries - 1:
+                channel.counters["retries"] += 1
+                await asyncio.sleep((attempt + 1) * self._retry_backoff_s)
+        return False
+
+    async def _close_transports(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for channel in self._channels:
+            if channel.client is not None:
+                await channel.client.aclose()
+            if channel.session is not None:
+                channel.session.close()
+            if channel.executor is not None:
+                channel.executor.shutdown(wait=False)
+
+    def close(self, timeout_s: float = 5.0) -> None:
+        """停止投递线程（尚未发送的消息被丢弃）"""
+        if self._loop is None or self._thread is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        except RuntimeError:
+            pass
+        self._thread.join(timeout=timeout_s)
+        self._loop = None
+
+    def _target_stats(self) -> dict:
+        return {channel.url: channel.stats() for channel in self._channels}
+
+    def stats(self, timeout_s: float = 1.0) -> dict:
         """
-        实际推送逻辑（支持多目标推送 + 带指数退避重试）
+        推送统计。HTTP / 指标线程调用时在投递线程的事件循环里取快照：队列、计数与延迟样本只由该循环修改，
+        在其他线程遍历会与投递并发（deque mutated during iteration）
         """
-        payload = {
-            "event_type": event_type,
-            "speak_text": speak_text,
-            "request_id": request_id,
-            "session_id": session_id,
-            "data": data,
-        }
+        loop = self._loop
+        if loop is None or threading.current_thread() is self._thread:
+            targets = self._target_stats()
+        else:
+            snapshot: Future = Future()
 
-        # 解析多目标 URL
-        targets = [t.strip() for t in (self.push_url or "").split(",") if t.strip()]
-        
-        for url in targets:
-            max_retries = 3
-            for attempt in range(max_retries):
+            def _take() -> None:
                 try:
-                    if attempt == 0:
-                        logger.info(f"📤 推送语音回调 (Target: {url}): {event_type}")
-                
-                    resp = requests.post(url, json=payload, timeout=self.timeout_s)
-                    if resp.status_code == 200:
-                        logger.info(f"✅ 推送成功: {url}")
-                        break
-                    logger.warning(f"⚠️ 推送失败 ({url}, HTTP {resp.status_code}): {resp.text[:50]}")
+                    snapshot.set_result(self._target_stats())
                 except Exception as e:
-                    logger.warning(f"⚠️ 推送异常 ({url}, {type(e).__name__}): {e}")
-            
-                if attempt < max_retries - 1:
-                    time.sleep((attempt + 1) * 2)
-                else:
-                    logger.error(f"❌ 目标推送彻底失败: {url}")
+                    snapshot.set_exception(e)
 
+            try:
+                loop.call_soon_threadsafe(_take)
+                targets = snapshot.result(timeout=timeout_s)
+            except RuntimeError:
+                targets = self._target_stats()  # 投递线程已停止，不再有并发修改
+            except FutureTimeoutError:
+                # 事件循环迟迟没有响应：只给出不需要遍历的部分（延迟分位数缺省）
+                targets = {
+                    channel.url: {"queue_depth": len(channel.queue), "latency_p50_ms": None,
+                                  "latency_p95_ms": None, **dict(channel.counters)}
+                    for channel in self._channels
+                }
+        return {
+            "enabled": self.enabled,
+            "transport": "httpx" if httpx is not None else "requests.Session",
+            "targets": targets,
+        }
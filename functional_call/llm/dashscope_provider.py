@@ -4,20 +4,60 @@ DashScope（通义千问）LLM Provider（OpenAI 兼容接口）。
 说明：
 - 只实现最小可用的 chat completion（messages -> assistant_text）
 - 使用 DashScope OpenAI-compatible endpoint：/v1/chat/completions
+- 连接复用：同步接口共用一个带连接池的 requests.Session；异步接口（acall_with_tools / ask）
+  在每个事件循环上各持有一个 httpx.AsyncClient（安装了 h2 时走 HTTP/2 多路复用），
+  一次语音指令的多轮 ReAct 调用只在第一次付出 TCP+TLS 握手。未安装 httpx 时异步接口回退到
+  线程池里的同步 Session
 """
 
 from __future__ import annotations
 
+import asyncio
+import inspect
 import json
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 
 import requests
 import time
 from functools import wraps
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx  # type: ignore
+except Exception:  # 可选依赖：未安装时异步接口回退到线程池 + requests.Session
+    httpx = None
+
+try:
+    import h2  # type: ignore  # noqa: F401  httpx 的 HTTP/2 支持需要 h2
+    _HAS_H2 = True
+except Exception:
+    _HAS_H2 = False
+
+from core.metrics import counter, histogram
 
 def retry_on_network_error(max_retries=3, delay=1):
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                last_err = None
+                for i in range(max_retries):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        last_err = e
+                        if i < max_retries - 1 and getattr(e, "retryable", True):
+                            _LLM_RETRIES.inc()
+                            logger.warning(f"网络请求失败，正在进行第 {i+1} 次重试: {e}")
+                            await asyncio.sleep(delay * (i + 1))
+                        else:
+                            break
+                raise last_err
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             last_err = None
@@ -26,7 +66,8 @@ def retry_on_network_error(max_retries=3, delay=1):
                     return func(*args, **kwargs)
                 except (requests.RequestException, Exception) as e:
                     last_err = e
-                    if i < max_retries - 1:
+                    if i < max_retries - 1 and getattr(e, "retryable", True):
+                        _LLM_RETRIES.inc()
                         logger.warning(f"网络请求失败，正在进行第 {i+1} 次重试: {e}")
                         time.sleep(delay * (i + 1))
                     else:
@@ -37,9 +78,217 @@ def retry_on_network_error(max_retries=3, delay=1):
 
 logger = logging.getLogger(__name__)
 
+_LLM_SECONDS = histogram("llm_request_seconds", "DashScope 单次请求耗时（每次重试单独计）", ("model", "outcome"))
+_LLM_TOKENS = counter("llm_tokens_total", "DashScope 消耗的 token 数", ("model", "kind"))
+_LLM_RETRIES = counter("llm_retries_total", "DashScope 请求失败后的重试次数")
+_LLM_FIRST_ACTION = histogram("llm_stream_first_action_seconds",
+                              "流式调用从发出请求到第一个可执行结果（完整的工具调用 / 回答首句）的耗时", ("model", "kind"))
+
+
+def _observe_llm_call(func):
+    """记录每次请求的耗时与结果（ok / 异常类型）"""
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            outcome = "ok"
+            try:
+                return await func(self, *args, **kwargs)
+            except Exception as e:
+                outcome = type(e).__name__
+                raise
+            finally:
+                _LLM_SECONDS.labels(self._model, outcome).observe(time.perf_counter() - start)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return func(self, *args, **kwargs)
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            _LLM_SECONDS.labels(self._model, outcome).observe(time.perf_counter() - start)
+    return wrapper
+
 
 class DashScopeError(RuntimeError):
-    pass
+    def __init__(self, message: str, *, retryable: bool = True) -> None:
+        super().__init__(message)
+        # 流式调用中途失败时，已经开始执行的工具不能因为重试再执行一次
+        self.retryable = retryable
+
+
+# 回答首句的结束标点（不含英文句点，避免把小数/站点编号截断）
+_SENTENCE_END = "。！？!?；;\n"
+
+
+class _JsonObjectScanner:
+    """增量扫描 JSON 对象文本，最外层花括号闭合时 feed() 返回 True"""
+
+    __slots__ = ("depth", "started", "in_string", "escaped", "invalid")
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        self.invalid = False
+
+    def feed(self, text: str) -> bool:
+        if self.invalid:
+            return False
+        for ch in text:
+            if not self.started:
+                if ch.isspace():
+                    continue
+                if ch != "{":
+                    self.invalid = True  # 不是对象（或模型输出了奇怪的东西），交给流结束时处理
+                    return False
+                self.started = True
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
+
+
+class _StreamAssembler:
+    """
+    把 SSE 增量（choices[0].delta）拼回完整的 assistant 消息。
+
+    - 某个 tool_calls[i].function.arguments 拼成完整 JSON 对象时立即回调 on_tool_call（每个调用只回调一次）
+    - 纯文本回答的第一句在 finish() 时回调 on_first_sentence：只有流以 finish_reason == "stop" 正常结束且没有
+      工具调用时才算回答（Qwen 常在 tool_calls 增量之前先输出一句"好的，我先规划一下。"，那不是回答）；
+      流中断重试时不会提前播报半截回答
+    - finish() 返回与非流式接口相同的 {"content", "tool_calls"}，并补发没能提前识别的工具调用
+    """
+
+    def __init__(self, on_tool_call=None, on_first_sentence=None, on_first_action=None) -> None:
+        self._on_tool_call = on_tool_call
+        self._on_first_sentence = on_first_sentence
+        self._on_first_action = on_first_action
+        self._content: List[str] = []
+        self._calls: Dict[int, Dict[str, Any]] = {}
+        self._scanners: Dict[int, _JsonObjectScanner] = {}
+        self._dispatched: set = set()
+        self._first_action = False
+        self.finish_reason: Optional[str] = None
+        self.usage: Dict[str, Any] = {}
+
+    @property
+    def dispatched(self) -> int:
+        return len(self._dispatched)
+
+    def feed_line(self, line: str) -> bool:
+        """喂入一行 SSE 文本；收到 [DONE] 时返回 False"""
+        line = line.strip()
+        if not line.startswith("data:"):
+            return True  # 空行 / 注释 / event: 行
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return False
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            logger.warning(f"⚠️ 无法解析的 DashScope 流式数据: {data[:200]}")
+            return True
+        self.feed(chunk)
+        return True
+
+    def feed(self, chunk: Dict[str, Any]) -> None:
+        if "error" in chunk:
+            err = chunk.get("error") or {}
+            raise DashScopeError(f"DashScope错误：{err.get('message') or err}", retryable=not self._dispatched)
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+        for choice in chunk.get("choices") or []:
+            if choice.get("finish_reason"):
+                self.finish_reason = choice["finish_reason"]
+            delta = choice.get("delta") or {}
+            if delta.get("content"):
+                self._content.append(delta["content"])
+            for part in delta.get("tool_calls") or []:
+                self._feed_tool_call(part)
+
+    def _first_sentence(self, content: str) -> Optional[str]:
+        for i, ch in enumerate(content):
+            if ch in _SENTENCE_END and content[:i].strip():
+                return content[:i + 1].strip()
+        return content.strip() or None
+
+    def _feed_tool_call(self, part: Dict[str, Any]) -> None:
+        index = int(part.get("index", len(self._calls)))
+        call = self._calls.get(index)
+        if call is None:
+            call = self._calls[index] = {"id": "", "type": "function", "function": {"name": "", "arguments": ""}}
+            self._scanners[index] = _JsonObjectScanner()
+            # 新的调用开始，说明前面的调用参数已经完整
+            for earlier in sorted(self._calls):
+                if earlier < index:
+                    self._dispatch(earlier)
+        if part.get("id"):
+            call["id"] = part["id"]
+        if part.get("type"):
+            call["type"] = part["type"]
+        function = part.get("function") or {}
+        name = function.get("name")
+        if name and name != call["function"]["name"]:
+            # 名称通常只在第一个增量里出现；个别实现会在每个增量里重复完整名称
+            call["function"]["name"] += name
+        arguments = function.get("arguments")
+        if arguments:
+            if index in self._dispatched:
+                logger.warning(f"⚠️ 工具调用 {index} 已开始执行后仍收到参数增量，忽略: {arguments[:100]}")
+                return
+            call["function"]["arguments"] += arguments
+            if self._scanners[index].feed(arguments):
+                self._dispatch(index)
+
+    def _dispatch(self, index: int) -> None:
+        if index in self._dispatched:
+            return
+        call = self._calls[index]
+        try:
+            json.loads(call["function"]["arguments"] or "{}")
+        except ValueError:
+            return  # 参数不完整/非法：等流结束后随完整消息返回，由调用方按原逻辑处理
+        self._dispatched.add(index)
+        self._action("tool_call")
+        if self._on_tool_call is not None:
+            self._on_tool_call(call)
+
+    def _action(self, kind: str) -> None:
+        if not self._first_action:
+            self._first_action = True
+            if self._on_first_action is not None:
+                self._on_first_action(kind)
+
+    def finish(self) -> Dict[str, Any]:
+        for index in sorted(self._calls):
+            self._dispatch(index)
+        tool_calls = [self._calls[i] for i in sorted(self._calls)] or None
+        content = "".join(self._content)
+        if self._on_first_sentence is not None and tool_calls is None and self.finish_reason == "stop":
+            sentence = self._first_sentence(content)
+            if sentence:
+                self._action("sentence")
+                self._on_first_sentence(sentence)
+        return {"content": content, "tool_calls": tool_calls}
 
 
 class DashScopeLLMProvider:
@@ -50,18 +299,48 @@ class DashScopeLLMProvider:
         model: str = "qwen-plus",
         timeout_s: int = 30,
         base_url: str = "https://dashscope.aliyuncs.com/compatible-mode/v1",
+        pool_size: int = 8,
+        http2: bool = True,
+        keepalive_s: float = 60.0,
+        stream: bool = True,
     ) -> None:
+        """
+        :param pool_size: 每个连接池的最大连接数（同步 Session 与每个 AsyncClient 各自计）
+        :param http2: 异步接口是否启用 HTTP/2（需要安装 h2，否则按 HTTP/1.1 长连接）
+        :param keepalive_s: 空闲连接保留时间（ReAct 两轮之间要执行工具，默认 5 秒太短）
+        :param stream: Agent 是否使用流式接口（astream_with_tools）边生成边执行工具
+        """
         if not api_key:
             raise ValueError("DashScope API Key 不能为空，请设置环境变量 DASHSCOPE_API_KEY")
         self._api_key = api_key
         self._model = model
         self._timeout_s = timeout_s
         self._base_url = base_url
+        self._url = base_url.rstrip("/") + "/chat/completions"
+        self._headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        self._pool_size = max(1, int(pool_size))
+        self._http2 = bool(http2) and _HAS_H2
+        self._keepalive_s = float(keepalive_s)
+        self._stream = bool(stream)
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        # 事件循环 -> AsyncClient（AsyncClient 绑定创建它的事件循环；执行器工作线程的循环是常驻复用的）
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._counters = {"async_requests": 0, "async_connections": 0, "http2_requests": 0}
 
     @property
     def model(self) -> str:
         return self._model
 
+    @property
+    def streaming(self) -> bool:
+        return self._stream
+
     def chat(
         self,
         *,
@@ -84,32 +363,20 @@ class DashScopeLLMProvider:
 
     async def ask(self, prompt: str, temperature: float = 0.2) -> str:
         """
-        简单的问答模式（异步封装）。
+        简单的问答模式（异步）。
         """
-        import asyncio
-        loop = asyncio.get_event_loop()
         messages = [{"role": "user", "content": prompt}]
-        # 直接在线程池运行同步的 chat
-        return await loop.run_in_executor(
-            None, 
-            lambda: self.chat(messages=messages, temperature=temperature)
-        )
+        result = await self.acall_with_tools(messages, None, temperature=temperature)
+        return result.get("content", "")
 
-    @retry_on_network_error(max_retries=3, delay=1)
-    def call_with_tools(
+    def _build_payload(
         self,
         messages: List[Dict[str, Any]],
-        tools: Optional[List[Dict[str, Any]]] = None,
-        temperature: float = 0.2,
-        top_p: float = 0.8,
-        max_tokens: int = 1024,
+        tools: Optional[List[Dict[str, Any]]],
+        temperature: float,
+        top_p: float,
+        max_tokens: int,
     ) -> Dict[str, Any]:
-        """
-        调用 DashScope，支持 tools 参数。
-        返回 Dict: {"content": str, "tool_calls": list | None}
-        """
-        url = self._base_url.rstrip("/") + "/chat/completions"
-        headers = {"Authorization": f"Bearer {self._api_key}", "Content-Type": "application/json"}
         payload: Dict[str, Any] = {
             "model": self._model,
             "messages": messages,
@@ -122,20 +389,173 @@ class DashScopeLLMProvider:
         if tools:
             payload["tools"] = tools
             payload["tool_choice"] = "auto"
+        return payload
+
+    @retry_on_network_error(max_retries=3, delay=1)
+    @_observe_llm_call
+    def call_with_tools(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0.2,
+        top_p: float = 0.8,
+        max_tokens: int = 1024,
+    ) -> Dict[str, Any]:
+        """
+        调用 DashScope，支持 tools 参数。
+        返回 Dict: {"content": str, "tool_calls": list | None}
+        """
+        return self._post(self._build_payload(messages, tools, temperature, top_p, max_tokens))
+
+    @retry_on_network_error(max_retries=3, delay=1)
+    @_observe_llm_call
+    async def acall_with_tools(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0.2,
+        top_p: float = 0.8,
+        max_tokens: int = 1024,
+    ) -> Dict[str, Any]:
+        """
+        call_with_tools 的异步版本（不占用线程，连接按事件循环复用）。
+        """
+        payload = self._build_payload(messages, tools, temperature, top_p, max_tokens)
+        client = self._async_client()
+        if client is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self._post, payload)
 
         try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=self._timeout_s)
+            resp = await client.post(self._url, headers=self._headers, json=payload,
+                                     extensions={"trace": self._on_trace})
+        except httpx.HTTPError as e:
+            raise DashScopeError(f"DashScope 请求失败：{e}") from e
+        with self._lock:
+            self._counters["async_requests"] += 1
+            if resp.http_version == "HTTP/2":
+                self._counters["http2_requests"] += 1
+        return self._handle_response(resp.status_code, resp.text, resp.json)
+
+    @retry_on_network_error(max_retries=3, delay=1)
+    @_observe_llm_call
+    async def astream_with_tools(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0.2,
+        top_p: float = 0.8,
+        max_tokens: int = 1024,
+        *,
+        on_tool_call: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_first_sentence: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        流式调用（SSE）：返回值与 acall_with_tools 相同，但在生成过程中
+        - 每个工具调用的参数 JSON 一闭合就回调 on_tool_call(tool_call)，调用方可以立即开始执行
+        - 以纯文本回答正常结束（finish_reason == "stop"、没有工具调用）时回调 on_first_sentence(sentence)，
+          可先送去播报；重试只会在最终成功的那次流上回调一次
+        已经回调过工具调用后流再中断时抛出不可重试的 DashScopeError，避免重试导致工具重复执行。
+        """
+        payload = self._build_payload(messages, tools, temperature, top_p, max_tokens)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+
+        start = time.perf_counter()
+
+        def _first_action(kind: str) -> None:
+            _LLM_FIRST_ACTION.labels(self._model, kind).observe(time.perf_counter() - start)
+
+        assembler = _StreamAssembler(on_tool_call, on_first_sentence, _first_action)
+        lines = self._stream_lines(payload)
+        finished = False
+        try:
+            # [DONE] 之后仍把响应读完，连接才能回到连接池
+            async for line in lines:
+                if not finished:
+                    finished = not assembler.feed_line(line)
+        except DashScopeError as e:
+            if assembler.dispatched and e.retryable:
+                raise DashScopeError(str(e), retryable=False) from e
+            raise
+        except Exception as e:
+            raise DashScopeError(f"DashScope 流式响应中断：{e}", retryable=not assembler.dispatched) from e
+        finally:
+            await lines.aclose()
+
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if assembler.usage.get(kind):
+                _LLM_TOKENS.labels(self._model, kind.split("_")[0]).inc(assembler.usage[kind])
+        return assembler.finish()
+
+    async def _stream_lines(self, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """逐行返回 SSE 响应（httpx 直接异步读取；未安装时在线程池中读取 requests 流）"""
+        client = self._async_client()
+        if client is not None:
+            try:
+                async with client.stream("POST", self._url, headers=self._headers, json=payload,
+                                         extensions={"trace": self._on_trace}) as resp:
+                    with self._lock:
+                        self._counters["async_requests"] += 1
+                        if resp.http_version == "HTTP/2":
+                            self._counters["http2_requests"] += 1
+                    if resp.status_code != 200:
+                        text = (await resp.aread()).decode("utf-8", "replace")
+                        raise DashScopeError(f"DashScope 返回异常状态码：{resp.status_code}，内容：{text[:500]}")
+                    async for line in resp.aiter_lines():
+                        yield line
+            except httpx.HTTPError as e:
+                raise DashScopeError(f"DashScope 请求失败：{e}") from e
+            return
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def _read() -> None:
+            try:
+                with self._session.post(self._url, headers=self._headers, json=payload,
+                                        timeout=self._timeout_s, stream=True) as resp:
+                    if resp.status_code != 200:
+                        raise DashScopeError(f"DashScope 返回异常状态码：{resp.status_code}，内容：{resp.text[:500]}")
+                    resp.encoding = "utf-8"  # text/event-stream 未声明 charset 时 requests 会按 ISO-8859-1 解码
+                    for line in resp.iter_lines(decode_unicode=True):
+                        loop.call_soon_threadsafe(queue.put_nowait, line)
+            except requests.RequestException as e:
+                loop.call_soon_threadsafe(queue.put_nowait, DashScopeError(f"DashScope 请求失败：{e}"))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        reader = loop.run_in_executor(None, _read)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # 异常退出时不等待读取线程，它读完剩余数据后自行结束
+            reader.add_done_callback(lambda f: f.exception())
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            resp = self._session.post(self._url, headers=self._headers, json=payload, timeout=self._timeout_s)
         except requests.RequestException as e:
             raise DashScopeError(f"DashScope 请求失败：{e}") from e
+        return self._handle_response(resp.status_code, resp.text, resp.json)
 
-        if resp.status_code != 200:
-            snippet = resp.text[:500] if resp.text else ""
-            raise DashScopeError(f"DashScope 返回异常状态码：{resp.status_code}，内容：{snippet}")
+    def _handle_response(self, status_code: int, text: str, load_json) -> Dict[str, Any]:
+        if status_code != 200:
+            snippet = text[:500] if text else ""
+            raise DashScopeError(f"DashScope 返回异常状态码：{status_code}，内容：{snippet}")
 
         try:
-            data = resp.json()
+            data = load_json()
         except Exception as e:
-            raise DashScopeError(f"DashScope 响应不是合法JSON：{resp.text[:500]}") from e
+            raise DashScopeError(f"DashScope 响应不是合法JSON：{text[:500]}") from e
 
         try:
             if "error" in data:
@@ -149,6 +569,11 @@ class DashScopeLLMProvider:
             message = choices[0].get("message") or {}
             content = message.get("content") or ""
             tool_calls = message.get("tool_calls")
+
+            usage = data.get("usage") or {}
+            for kind in ("prompt_tokens", "completion_tokens"):
+                if usage.get(kind):
+                    _LLM_TOKENS.labels(self._model, kind.split("_")[0]).inc(usage[kind])
             
             return {
                 "content": content,
@@ -157,4 +582,78 @@ class DashScopeLLMProvider:
         except Exception as e:
             raise DashScopeError(f"解析DashScope响应失败：{json.dumps(data, ensure_ascii=False)[:800]}") from e
 
+    # ------------------ 连接复用 ------------------
+    def _async_client(self):
+        """当前事件循环上的 AsyncClient（首次使用时创建）；未安装 httpx 时返回 None"""
+        if httpx is None:
+            return None
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=self._http2,
+                timeout=self._timeout_s,
+                limits=httpx.Limits(
+                    max_connections=self._pool_size,
+                    max_keepalive_connections=self._pool_size,
+                    keepalive_expiry=self._keepalive_s,
+                ),
+            )
+            with self._lock:
+                # 已关闭的循环上的客户端无法再 aclose，直接丢弃
+                for old in [lp for lp in self._async_clients if lp.is_closed()]:
+                    self._async_clients.pop(old, None)
+                self._async_clients[loop] = client
+        return client
 
+    async def _on_trace(self, event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self._counters["async_connections"] += 1
+
+    def close(self) -> None:
+        """关闭连接池（事件循环仍在运行的客户端交给该循环关闭）"""
+        self._session.close()
+        with self._lock:
+            clients = list(self._async_clients.items())
+            self._async_clients.clear()
+        for loop, client in clients:
+            if loop.is_closed():
+                continue
+            try:
+                if loop.is_running():
+                    asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+                else:
+                    loop.run_until_complete(client.aclose())
+            except Exception as e:
+                logger.debug(f"关闭 DashScope 异步客户端失败: {e}")
+
+    def stats(self) -> dict:
+        """连接复用情况：requests = 请求数，connections = 新建连接数，其余均复用了已有连接"""
+        pools = self._session.get_adapter(self._url).poolmanager.pools
+        sync_requests = sync_connections = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                sync_requests += pool.num_requests
+                sync_connections += pool.num_connections
+        with self._lock:
+            counters = dict(self._counters)
+            clients = len(self._async_clients)
+        return {
+            "transport": "httpx" if httpx is not None else "requests.Session",
+            "http2": self._http2,
+            "pool_size": self._pool_size,
+            "sync": {
+                "requests": sync_requests,
+                "connections": sync_connections,
+                "reused": max(0, sync_requests - sync_connections),
+            },
+            "async": {
+                "clients": clients,
+                "requests": counters["async_requests"],
+                "connections": counters["async_connections"],
+                "reused": max(0, counters["async_requests"] - counters["async_connections"]),
+                "http2_requests": counters["http2_requests"],
+            },
+        }
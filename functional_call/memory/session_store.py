@@ -5,15 +5,27 @@
 - conversation：少量对话上下文（给LLM用）
 - operational：运行态（当前是否有任务、当前request_id）
 - cache：机器人状态缓存（可扩展TTL，这里先简单保存最后一次）
+
+容量控制：
+- 对话上下文是定长 deque（maxlen=max_conversation），追加时自动丢弃最老的消息，不再整体切片复制
+- 会话按最近访问排序（LRU）：空闲超过 idle_ttl_s 的会话被回收；总数超过 max_sessions 时淘汰最久未访问的会话
+- 回收前向 JobManager 确认：有排队/执行中任务的会话永不回收
+- 回收在创建新会话时惰性进行，也可由后台线程按 sweep_interval_s 周期执行
+- stats() 提供会话数量与内存估算
 """
 
 from __future__ import annotations
 
+import json
+import math
 import threading
 import time
 import logging
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional
+
+from core.striped_lock import DEFAULT_STRIPES, StripedLock
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +43,8 @@ class SessionState:
     session_id: str
     lang: str = "zh"
 
-    # 对话上下文（仅保留最近N条）
-    conversation: List[ConversationMessage] = field(default_factory=list)
+    # 对话上下文（仅保留最近N条，__post_init__ 中按 max_conversation 建定长 deque）
+    conversation: Deque[ConversationMessage] = field(default_factory=deque)
     max_conversation: int = 20  # ReAct 循环消息较多，调大一点
 
     # 运行态
@@ -48,15 +60,51 @@ class SessionState:
     robot_state_cache: Dict[str, Any] = field(default_factory=dict)
     robot_state_ts: float | None = None
 
-    def push_message(self, role: str, content: str | None = None, tool_calls: List[Dict[str, Any]] | None = None, tool_call_id: str | None = None) -> None:
-        self.conversation.append(ConversationMessage(
+    # 最近访问时间（SessionStore 的 LRU/TTL 回收依据）
+    last_access_ts: float = field(default_factory=time.monotonic)
+
+    # fork() 副本创建时已有的消息数（merge_fork 只合并其后的新消息）
+    _fork_base: int = 0
+
+    def __post_init__(self) -> None:
+        self.conversation = deque(self.conversation, maxlen=self.max_conversation)
+
+    def push_message(self, role: str, content: str | None = None, tool_calls: List[Dict[str, Any]] | None = None, tool_call_id: str | None = None) -> ConversationMessage:
+        msg = ConversationMessage(
             role=role, 
             content=content, 
             tool_calls=tool_calls, 
             tool_call_id=tool_call_id
-        ))
-        if len(self.conversation) > self.max_conversation:
-            self.conversation = self.conversation[-self.max_conversation :]
+        )
+        self.conversation.append(msg)
+        return msg
+
+    def discard_message(self, msg: ConversationMessage) -> None:
+        """撤回一条消息（已被 maxlen 挤出时忽略）"""
+        for i, existing in enumerate(self.conversation):
+            if existing is msg:
+                del self.conversation[i]
+                return
+
+    def fork(self) -> "SessionState":
+        """
+        对话副本：计划步骤并行执行时每个步骤各用一份，从当前历史开始，新消息只写入副本；
+        步骤按计划顺序提交时再用 merge_fork() 合并回来，保证 assistant-tool 消息对不会交错
+        """
+        child = SessionState(
+            session_id=self.session_id, lang=self.lang, max_conversation=self.max_conversation,
+            active_request_id=self.active_request_id, active_plan_id=self.active_plan_id,
+        )
+        # 副本不限长度：merge_fork 按位置取新消息，不能被 maxlen 挤掉
+        child.conversation = deque(self.conversation)
+        child._fork_base = len(child.conversation)
+        return child
+
+    def merge_fork(self, child: "SessionState") -> None:
+        """把副本中新增的消息按顺序追加回来"""
+        for i, msg in enumerate(child.conversation):
+            if i >= child._fork_base:
+                self.conversation.append(msg)
 
     def prune_history(self) -> None:
         """
@@ -82,7 +130,7 @@ class SessionState:
             return True
             
         job = self._job_manager.get(self.active_request_id)
-        if job and job.status == "running":
+        if job and job.is_active:
             return True
             
         # 自愈：如果 JobManager 里的任务已经结束，但 Session 还记着 ID
@@ -92,20 +140,174 @@ class SessionState:
             
         return False
 
+    def approx_bytes(self) -> int:
+        """粗略估算会话占用的内存（文本按 UTF-8 计，外加对象开销）"""
+        size = 600
+        for msg in self.conversation:
+            size += 200 + len((msg.content or "").encode("utf-8"))
+            if msg.tool_calls:
+                size += len(json.dumps(msg.tool_calls, ensure_ascii=False, default=str).encode("utf-8"))
+        if self.robot_state_cache:
+            try:
+                size += len(json.dumps(self.robot_state_cache, ensure_ascii=False, default=str).encode("utf-8"))
+            except Exception:
+                size += 1024
+        return size
+
+
+class _SessionShard:
+    """一个分段：自己的锁、会话表（按最近访问排序，最久未访问的在前）与回收计数"""
+
+    def __init__(self, lock) -> None:
+        self.lock = lock
+        self.sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self.last_sweep = time.monotonic()
+        self.counters = {"created": 0, "evicted_ttl": 0, "evicted_lru": 0, "kept_busy": 0}
+
 
 class SessionStore:
-    def __init__(self) -> None:
-        self._lock = threading.RLock()
-        self._sessions: Dict[str, SessionState] = {}
+    def __init__(
+        self,
+        *,
+        stripes: int = DEFAULT_STRIPES,
+        max_sessions: int = 1000,
+        idle_ttl_s: float = 1800.0,
+        sweep_interval_s: float = 0.0,
+        job_manager: Any = None,
+    ) -> None:
+        """
+        :param stripes: 锁分段数（按 session_id 分段：不同会话的查询/创建互不阻塞）
+        :param max_sessions: 最多保留多少个会话（超出时淘汰最久未访问的空闲会话），0 表示不限
+        :param idle_ttl_s: 会话空闲多久后回收（秒），0 表示不按时间回收
+        :param sweep_interval_s: 后台回收线程的间隔（秒），0 表示只在创建新会话时惰性回收
+        :param job_manager: JobManager，用于判断会话是否有进行中的任务（有则不回收），并注入到会话中做自愈检查
+        """
+        self._locks = StripedLock(stripes)
+        self._shards = [_SessionShard(self._locks.at(i)) for i in range(len(self._locks))]
+        max_sessions = max(0, int(max_sessions))
+        self._shard_max_sessions = math.ceil(max_sessions / len(self._shards)) if max_sessions else 0
+        self._idle_ttl_s = float(idle_ttl_s)
+        # 惰性回收的最小间隔：没有后台线程时，创建新会话时顺带回收
+        self._lazy_sweep_interval_s = 10.0
+        self._job_manager = job_manager
+
+        self._stop = threading.Event()
+        self._sweeper: threading.Thread | None = None
+        if sweep_interval_s > 0:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(float(sweep_interval_s),), name="session-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def _shard(self, session_id: str) -> _SessionShard:
+        return self._shards[self._locks.index(session_id)]
 
     def get_or_create(self, session_id: str, *, lang: str = "zh") -> SessionState:
-        with self._lock:
-            s = self._sessions.get(session_id)
-            if s is None:
-                s = SessionState(session_id=session_id, lang=lang)
-                self._sessions[session_id] = s
+        shard = self._shard(session_id)
+        with shard.lock:
+            s = shard.sessions.get(session_id)
+            if s is not None:
+                s.last_access_ts = time.monotonic()
+                shard.sessions.move_to_end(session_id)
+                return s
+            if self._sweeper is None:
+                self._maybe_sweep(shard)
+            s = SessionState(session_id=session_id, lang=lang, _job_manager=self._job_manager)
+            shard.sessions[session_id] = s
+            shard.counters["created"] += 1
+            self._enforce_max_sessions(shard)
             return s
 
     def get(self, session_id: str) -> SessionState | None:
-        with self._lock:
-            return self._sessions.get(session_id)
+        shard = self._shard(session_id)
+        with shard.lock:
+            s = shard.sessions.get(session_id)
+            if s is not None:
+                s.last_access_ts = time.monotonic()
+                shard.sessions.move_to_end(session_id)
+            return s
+
+    # ------------------ 回收 ------------------
+    def _has_active_job(self, session: SessionState) -> bool:
+        """会话是否有排队/执行中的任务（调用方持有分段锁；JobManager 的锁在其后获取，不会反向加锁）"""
+        jm = self._job_manager
+        if jm is None:
+            return session.active_request_id is not None
+        if jm.get_active_job_by_session(session.session_id) is not None:
+            return True
+        if session.active_request_id:
+            job = jm.get(session.active_request_id)
+            return job is not None and job.is_active
+        return False
+
+    def _maybe_sweep(self, shard: _SessionShard) -> None:
+        now = time.monotonic()
+        if now - shard.last_sweep >= self._lazy_sweep_interval_s:
+            self._sweep(shard, now)
+
+    def _sweep(self, shard: _SessionShard, now: float) -> int:
+        shard.last_sweep = now
+        if self._idle_ttl_s <= 0:
+            return 0
+        removed = 0
+        # 按最近访问排序：遇到未过期的会话即可停止
+        for sid, s in list(shard.sessions.items()):
+            if now - s.last_access_ts < self._idle_ttl_s:
+                break
+            if self._has_active_job(s):
+                shard.counters["kept_busy"] += 1
+                continue
+            del shard.sessions[sid]
+            shard.counters["evicted_ttl"] += 1
+            removed += 1
+        return removed
+
+    def _enforce_max_sessions(self, shard: _SessionShard) -> None:
+        if not self._shard_max_sessions or len(shard.sessions) <= self._shard_max_sessions:
+            return
+        # 从最久未访问的开始淘汰空闲会话；有任务的会话不淘汰（可能暂时超出上限）
+        for sid, s in list(shard.sessions.items()):
+            if len(shard.sessions) <= self._shard_max_sessions:
+                break
+            if self._has_active_job(s):
+                shard.counters["kept_busy"] += 1
+                continue
+            del shard.sessions[sid]
+            shard.counters["evicted_lru"] += 1
+
+    def sweep(self) -> int:
+        """立即回收空闲过期的会话，返回回收数量"""
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                removed += self._sweep(shard, time.monotonic())
+        return removed
+
+    def _sweep_loop(self, interval_s: float) -> None:
+        while not self._stop.wait(interval_s):
+            try:
+                removed = self.sweep()
+                if removed:
+                    logger.info(f"🧹 回收空闲会话 {removed} 个")
+            except Exception as e:
+                logger.error(f"❌ 会话回收异常: {e}")
+
+    def close(self) -> None:
+        """停止后台回收线程"""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5.0)
+
+    def stats(self) -> dict:
+        totals = {"sessions": 0, "busy_sessions": 0, "messages": 0, "approx_bytes": 0}
+        # 逐段统计，不同时持有多段锁
+        for shard in self._shards:
+            with shard.lock:
+                totals["sessions"] += len(shard.sessions)
+                totals["busy_sessions"] += sum(1 for s in shard.sessions.values() if self._has_active_job(s))
+                totals["messages"] += sum(len(s.conversation) for s in shard.sessions.values())
+                totals["approx_bytes"] += sum(s.approx_bytes() for s in shard.sessions.values())
+                for key, value in shard.counters.items():
+                    totals[key] = totals.get(key, 0) + value
+        totals["stripes"] = len(self._shards)
+        return totals
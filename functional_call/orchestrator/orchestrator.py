@@ -10,47 +10,141 @@ from pathlib import Path
 from core.config import Settings
 from core.context import request_context
 from core.event_bus import EventBus
+from core.job_executor import (
+    PRIORITY_EMERGENCY,
+    PRIORITY_LONG,
+    PRIORITY_NAMES,
+    PRIORITY_QUERY,
+    PriorityJobExecutor,
+    QueueFullError,
+    worker_event_loop,
+)
 from core.job_manager import JobManager
+from core.journal import Journal
 from core.language import LanguageService
+from core.metrics import register_collector
 from core.models import VoiceQueryRequest, VoiceQueryResponse
+from core.plan_cache import PlanCache
+from core.tracing import configure_tracing, get_tracer, span
 from core.voice_pusher import VoicePushNotifier
 from llm.dashscope_provider import DashScopeLLMProvider
+from app.flows.fast_path import parse_command
 from app.flows.planning_flow import FlowFactory
 from app.tools.wrappers import initialize_tools
+from app.tools.planning import PLANS, save_plan, set_plan_journal
 import app.tools # 确保所有工具都被注册
 from memory.session_store import SessionStore
-from tools.robot_client import RobotClient
-from tools.nav_toolbox import NavToolbox
-from tools.action_toolbox import ActionToolbox
-from tools.status_toolbox import StatusToolbox
+from tools.robot_client import ProgressThresholds, RobotClient
+from tools.robot_fleet import RobotEndpoint, RobotFleet, parse_fleet_spec
 
 logger = logging.getLogger(__name__)
 
+# 任务优先级判定（只影响排队顺序，不影响 LLM 规划）
+_EMERGENCY_KEYWORDS = ("急停", "停止", "停车", "停下", "别动", "取消", "stop", "cancel", "halt", "abort", "emergency")
+_QUERY_KEYWORDS = ("查询", "查一下", "状态", "电量", "在哪", "位置", "多少", "status", "battery", "where", "how much", "what")
+
+
+def _classify_priority(query: str) -> int:
+    text = query.lower()
+    if any(k in text for k in _EMERGENCY_KEYWORDS):
+        return PRIORITY_EMERGENCY
+    if any(k in text for k in _QUERY_KEYWORDS):
+        return PRIORITY_QUERY
+    return PRIORITY_LONG
+
+
 class Orchestrator:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
         self.lang_service = LanguageService(default_lang="zh")
 
-        self.sessions = SessionStore()
-        self.event_bus = EventBus(retention_max=settings.event_retention_max)
-        self.job_manager = JobManager(self.event_bus)
+        # 请求级耗时追踪（/debug/traces/{request_id}，可选 OTLP 文件导出）
+        configure_tracing(
+            enabled=settings.tracing_enabled,
+            max_spans=settings.trace_max_spans,
+            max_requests=settings.trace_max_requests,
+            otlp_path=settings.trace_otlp_path,
+        )
+
+        # 持久化日志：任务状态 / 计划 / 事件（重启后在 warm_up 中重放）
+        self.journal: Journal | None = None
+        if settings.journal_path:
+            self.journal = Journal(settings.journal_path, flush_interval_s=settings.journal_flush_ms / 1000)
+            set_plan_journal(self.journal)
+
+        self.event_bus = EventBus(
+            retention_max=settings.event_retention_max,
+            done_ttl_s=settings.event_stream_ttl_s,
+            max_streams=settings.event_max_streams,
+            stripes=settings.lock_stripes,
+            journal=self.journal,
+        )
+        self.job_executor = PriorityJobExecutor(
+            max_workers=settings.job_max_workers,
+            max_queue=settings.job_max_queue,
+            emergency_reserve=settings.job_emergency_reserve,
+        )
+        self.job_manager = JobManager(
+            self.event_bus, stripes=settings.lock_stripes, executor=self.job_executor, journal=self.journal
+        )
+        # 会话：LRU/TTL 回收，有进行中任务的会话不回收
+        self.sessions = SessionStore(
+            stripes=settings.lock_stripes,
+            max_sessions=settings.session_max,
+            idle_ttl_s=settings.session_idle_ttl_s,
+            sweep_interval_s=settings.session_sweep_interval_s,
+            job_manager=self.job_manager,
+        )
 
         # 语音推送器（主动推送任务事件到语音端）
         self.voice_pusher = VoicePushNotifier(
             push_url=settings.voice_push_url,
             enabled=settings.voice_push_enabled,
             timeout_s=settings.voice_push_timeout_s,
+            queue_max=settings.voice_push_queue_max,
         )
 
-        self.robot = RobotClient(settings.modbus_host, settings.modbus_port)
+        # 计划缓存：重复指令回放验证过的计划（地图重新加载时自动清空）
+        self.plan_cache = PlanCache(
+            enabled=settings.plan_cache_enabled,
+            max_entries=settings.plan_cache_max_entries,
+        )
+
+        # 机器人车队：按 robot_id 懒连接，工具按需租用
+        progress = ProgressThresholds(
+            max_silence_s=settings.robot_progress_max_silence_s,
+            min_interval_s=settings.robot_progress_min_interval_s,
+            settle_s=settings.robot_progress_settle_s,
+            min_distance_m=settings.robot_progress_min_distance_m,
+            eta_delta_s=settings.robot_progress_eta_delta_s,
+        )
 
-        # 初始化模块化工具箱
-        self.nav_toolbox = NavToolbox(self.robot)
-        self.action_toolbox = ActionToolbox(self.robot)
-        self.status_toolbox = StatusToolbox(self.robot)
+        def _make_robot(ep: RobotEndpoint) -> RobotClient:
+            return RobotClient(
+                ep.host,
+                ep.port,
+                state_poll_interval_s=settings.robot_state_poll_interval_s,
+                state_max_age_s=settings.robot_state_max_age_s,
+                pipelined=settings.robot_modbus_pipelined,
+                max_in_flight=settings.robot_modbus_max_in_flight,
+                progress=progress,
+            )
+
+        self.fleet = RobotFleet(
+            parse_fleet_spec(settings.robot_fleet, default_host=settings.modbus_host, default_port=settings.modbus_port),
+            default_robot_id=settings.default_robot_id,
+            client_factory=_make_robot,
+            max_connections=settings.robot_fleet_max_connections,
+            idle_evict_s=settings.robot_fleet_idle_evict_s,
+            health_check_interval_s=settings.robot_fleet_health_check_s,
+        )
+        self.fleet.start_sweeper()
+
+        # /metrics：队列深度/事件流/会话/推送/连接等在抓取时由各组件 stats() 计算
+        register_collector("orchestrator", self._collect_metrics)
         
         # Initialize global tool wrappers
-        initialize_tools(self.nav_toolbox, self.action_toolbox, self.status_toolbox)
+        initialize_tools(self.fleet)
 
         self.llm = None
         if settings.dashscope_api_key:
@@ -59,6 +153,10 @@ class Orchestrator:
                 model=settings.qwen_model,
                 timeout_s=settings.qwen_timeout_s,
                 base_url=settings.qwen_base_url,
+                pool_size=settings.qwen_http_pool_size,
+                http2=settings.qwen_http2,
+                keepalive_s=settings.qwen_keepalive_s,
+                stream=settings.qwen_stream,
             )
         else:
             logger.warning("未检测到 DASHSCOPE_API_KEY：LLM能力将不可用。")
@@ -78,9 +176,223 @@ class Orchestrator:
         from core.resource_manager import resource_manager
         # 假设 start_server.sh 运行在 functional_call 根目录，则资源在 ./resources
         resource_manager.initialize(resources_dir="resources")
+
+        # 2. 预先连接默认机器人（其余机器人首次使用时再连接）
+        try:
+            self.fleet.get()
+        except Exception as e:
+            logger.warning(f"默认机器人预连接失败（首次使用时重试）: {e}")
+
+        # 3. 重放持久化日志：恢复事件流，接管重启前仍在执行的机器人任务
+        self.recover_from_journal()
         
         logger.info("系统预热完成。")
 
+    def shutdown(self) -> None:
+        """停止任务执行器、语音推送与会话回收，关闭 LLM 连接池，断开所有机器人连接"""
+        self.job_manager.shutdown()
+        self.voice_pusher.close()
+        self.sessions.close()
+        get_tracer().close()
+        self.llm.close()
+        self.fleet.close()
+        if self.journal is not None:
+            self.journal.flush()
+            self.journal.close()
+
+    def _event_emitter(self, request_id: str):
+        """工具进度回调 emit(type, data) -> EventBus 事件（data["text"] 作为播报文本）"""
+        def _emit(event_type: str, data: dict | None = None) -> None:
+            data = data or {}
+            self.event_bus.emit(request_id, type=event_type, speak_text=str(data.get("text", "")), data=data)
+        return _emit
+
+    # ------------------ 重启恢复 ------------------
+    def recover_from_journal(self) -> None:
+        if self.journal is None:
+            return
+        snap = self.journal.replay()
+        removed = self.journal.compact(snap, retention_s=self.settings.journal_retention_s)
+        for request_id, events in snap.events.items():
+            self.event_bus.restore(request_id, events, done=request_id in snap.done)
+        in_flight = snap.in_flight()
+        for request_id, job in in_flight.items():
+            try:
+                self._reattach(request_id, job, snap.events.get(request_id, []), snap.plans.get(request_id))
+            except Exception as e:
+                logger.error(f"❌ 恢复任务失败: {request_id}, {e}")
+        logger.info(
+            f"📒 日志重放完成: {snap.records} 条记录 / {snap.elapsed_ms}ms，恢复事件流 {len(snap.events)} 个，"
+            f"在途任务 {len(in_flight)} 个，清理过期请求 {removed} 个"
+        )
+
+    @staticmethod
+    def _pending_robot_task(events: list[dict]) -> dict | None:
+        """事件序列中最后一个已下发但尚未结束的机器人任务（started 事件携带 task_no）"""
+        pending = None
+        for ev in events:
+            data = ev.get("data") or {}
+            if ev.get("type") == "started" and "task_no" in data:
+                pending = data
+            elif ev.get("type") in ("step_done", "completed", "failed"):
+                pending = None
+        return pending
+
+    def _reattach(self, request_id: str, job: dict, events: list[dict], plan_record: dict | None) -> None:
+        session_id = job.get("session_id") or str(uuid.uuid4())
+        plan_id = None
+        if plan_record:
+            plan_id = plan_record["plan_id"]
+            PLANS[plan_id] = plan_record["plan"]
+        self.event_bus.ensure_stream(request_id)
+        emit = self._event_emitter(request_id)
+
+        pending = self._pending_robot_task(events)
+        robot_id = self.fleet.robot_id_for(pending.get("robot", "")) if pending else None
+        if pending is None or robot_id is None:
+            # 没有可接管的机器人任务：LLM 规划无法从中途继续，明确告知语音端
+            logger.warning(f"⚠️ 重启前的任务无法接管，标记为中断: {request_id}")
+            emit("failed", {"text": "服务已重启，之前的任务已中断，请重新下达指令。", "recovered": True})
+            self.event_bus.mark_done(request_id, True)
+            self.journal.append("job", request_id, {
+                "status": "failed", "session_id": session_id, "error": "服务重启，任务中断",
+            })
+            return
+
+        session = self.sessions.get_or_create(session_id)
+        session.active_request_id = request_id
+        task_kind, task_no = pending["task_kind"], int(pending["task_no"])
+        logger.info(f"🔁 接管重启前的机器人任务: {request_id} -> {robot_id} {task_kind}#{task_no}")
+
+        def _finish_plan_step(status: str, result: str) -> None:
+            plan = PLANS.get(plan_id) if plan_id else None
+            if not plan:
+                return
+            statuses = plan.get("step_statuses", [])
+            for i, st in enumerate(statuses):
+                if st == "in_progress":
+                    statuses[i] = status
+                    if i < len(plan.get("step_results", [])):
+                        plan["step_results"][i] = result
+            save_plan(plan_id)
+
+        def _runner(stop_event: threading.Event) -> str | None:
+            with request_context(trace_id=str(uuid.uuid4()), session_id=session_id, request_id=request_id):
+                emit("info", {"text": "服务已重启，正在继续跟踪机器人当前任务。", "recovered": True})
+                try:
+                    with self.fleet.lease(robot_id) as robot:
+                        robot.wait_for_task(
+                            task_kind, task_no,
+                            timeout_s=120 if task_kind == "move" else 60,
+                            emit=emit, stop_event=stop_event,
+                        )
+                except Exception as e:
+                    _finish_plan_step("failed", str(e))
+                    emit("failed", {"text": f"任务未能完成：{e}", "recovered": True})
+                    self.voice_pusher.push_failed(f"任务未能完成：{e}", request_id=request_id, session_id=session_id)
+                    raise
+                result = "服务重启后已接管并完成当前步骤，剩余计划步骤未继续执行，如需继续请重新下达指令。"
+                _finish_plan_step("completed", result)
+                emit("completed", {"text": result, "recovered": True})
+                self.voice_pusher.push_completed(result, request_id=request_id, session_id=session_id)
+                return result
+
+        def _cleanup() -> None:
+            if session.active_request_id == request_id:
+                session.active_request_id = None
+
+        self.job_manager.start(
+            request_id=request_id,
+            session_id=session_id,
+            runner=_runner,
+            on_cleanup=_cleanup,
+            priority=PRIORITY_LONG,
+        )
+
+    def stats(self) -> dict:
+        """运行状态（事件流/会话内存占用 / 任务队列 / 机器人连接池 / 语音推送）"""
+        return {
+            "sessions": self.sessions.stats(),
+            "event_bus": self.event_bus.stats(),
+            "jobs": self.job_manager.stats(),
+            "fleet": self.fleet.stats(),
+            "voice_push": self.voice_pusher.stats(),
+            "tracing": get_tracer().stats(),
+            "llm": self.llm.stats(),
+            "plan_cache": self.plan_cache.stats(),
+        }
+
+    def _collect_metrics(self) -> list:
+        """stats() -> Prometheus 指标族 (名称, 类型, 说明, [(标签, 值), ...])"""
+        jobs = self.job_manager.stats()
+        executor = jobs["executor"]
+        bus = self.event_bus.stats()
+        sessions = self.sessions.stats()
+        push = self.voice_pusher.stats()
+        fleet = self.fleet.stats()
+        llm = self.llm.stats()
+        plan_cache = self.plan_cache.stats()
+        families = [
+            ("jobs", "gauge", "按状态统计的任务数（内存中保留的任务）",
+             [({"status": status}, n) for status, n in jobs["jobs"].items()]),
+            ("job_queue_depth", "gauge", "执行器排队中的任务数",
+             [({"priority": p}, n) for p, n in executor["queue_by_priority"].items()]),
+            ("job_workers", "gauge", "执行器工作线程数",
+             [({"state": "busy"}, executor["busy"]), ({"state": "idle"}, executor["idle"]),
+              ({"state": "reserve"}, executor["reserve_running"])]),
+            ("event_streams", "gauge", "事件流数量",
+             [({"state": "active"}, bus["active_streams"]), ({"state": "done"}, bus["done_streams"])]),
+            ("event_bus_events_retained", "gauge", "事件流中保留的事件数", [({}, bus["events_retained"])]),
+            ("event_bus_approx_bytes", "gauge", "事件流内存估算（字节）", [({}, bus["approx_bytes"])]),
+            ("event_bus_waiters", "gauge", "长轮询/SSE 等待者数量", [({}, bus["waiters"])]),
+            ("event_bus_events_total", "counter", "事件数（emitted: 产生, dropped: 超出保留上限被覆盖）",
+             [({"result": "emitted"}, bus["events_emitted"]), ({"result": "dropped"}, bus["events_dropped"])]),
+            ("event_streams_evicted_total", "counter", "被回收的事件流数量",
+             [({"reason": "ttl"}, bus["evicted_ttl"]), ({"reason": "lru"}, bus["evicted_lru"])]),
+            ("sessions", "gauge", "会话数量（busy: 有进行中任务）",
+             [({"state": "all"}, sessions["sessions"]), ({"state": "busy"}, sessions["busy_sessions"])]),
+            ("session_approx_bytes", "gauge", "会话内存估算（字节）", [({}, sessions["approx_bytes"])]),
+            ("sessions_evicted_total", "counter", "被回收的会话数量",
+             [({"reason": "ttl"}, sessions["evicted_ttl"]), ({"reason": "lru"}, sessions["evicted_lru"])]),
+            ("voice_push_queue_depth", "gauge", "语音推送待发送队列深度",
+             [({"target": url}, t["queue_depth"]) for url, t in push["targets"].items()]),
+            ("voice_push_total", "counter", "语音推送结果计数",
+             [({"target": url, "result": r}, t[r]) for url, t in push["targets"].items()
+              for r in ("sent", "failed", "dropped", "coalesced", "retries")]),
+            ("robot_connected", "gauge", "机器人 Modbus 连接是否建立",
+             [({"robot": rid}, 1 if r["connected"] else 0) for rid, r in fleet["robots"].items()]),
+            ("robot_link_up", "gauge", "Modbus 链路熔断器是否闭合（1 表示链路正常）",
+             [({"robot": rid}, 1 if (r["link"] or {}).get("state") == "closed" else 0)
+              for rid, r in fleet["robots"].items() if r["link"] is not None]),
+            ("llm_http_requests_total", "counter", "DashScope HTTP 请求数（connection=new: 新建连接，reused: 复用长连接）",
+             [({"api": api, "connection": "new"}, llm[api]["connections"]) for api in ("sync", "async")]
+             + [({"api": api, "connection": "reused"}, llm[api]["reused"]) for api in ("sync", "async")]),
+            ("plan_cache_lookups_total", "counter", "计划缓存查找结果（rejected: 命中模板但站点不在当前地图中）",
+             [({"result": r}, plan_cache[k]) for r, k in (("hit", "hits"), ("miss", "misses"), ("rejected", "rejected"))]),
+            ("plan_cache_entries", "gauge", "计划缓存中的意图模板数", [({}, plan_cache["entries"])]),
+            ("plan_cache_replay_failed_total", "counter", "回放的缓存计划执行失败次数（该条目随即删除）",
+             [({}, plan_cache["replay_failed"])]),
+        ]
+        if self.journal is not None:
+            journal = self.journal.stats()
+            families += [
+                ("journal_queue_depth", "gauge", "持久化日志待写入记录数", [({}, journal["queue_depth"])]),
+                ("journal_records_total", "counter", "持久化日志记录数",
+                 [({"result": "written"}, journal["written"]), ({"result": "dropped"}, journal["dropped"])]),
+            ]
+        return families
+
+    def reload_maps(self) -> dict:
+        """重新加载地图资源；地图内容有变化时计划缓存随之清空"""
+        from core.resource_manager import resource_manager
+        map_version = resource_manager.reload()
+        return {"map_version": map_version, "stations": len(resource_manager.get_stations()),
+                "plan_cache": self.plan_cache.stats()}
+
+    def trace(self, request_id: str) -> dict | None:
+        """某个请求的耗时瀑布图（handle_query → 任务 → LLM/工具/Modbus/语音推送）"""
+        return get_tracer().waterfall(request_id)
+
     def handle_query(self, req: VoiceQueryRequest) -> tuple[int, VoiceQueryResponse]:
         trace_id = str(uuid.uuid4())
         session_id = req.session_id or str(uuid.uuid4())
@@ -92,7 +404,8 @@ class Orchestrator:
         # 清洗 query：移除常见的 ASR 模型标识符（如 <|en|>, <|zh|> 等）
         query = re.sub(r"<\|.*?\|>", "", req.query).strip()
 
-        with request_context(trace_id=trace_id, session_id=session_id, request_id=request_id):
+        with request_context(trace_id=trace_id, session_id=session_id, request_id=request_id), \
+                span("handle_query", session_id=session_id) as root_span:
             logger.info(f"🎤 收到语音请求: \"{query}\" (原始: \"{req.query}\", session_id: {session_id}, request_id: {request_id})")
             
             # 确认上下文变量已生效
@@ -103,29 +416,41 @@ class Orchestrator:
             lang = req.lang or self.lang_service.detect(query).lang
             session = self.sessions.get_or_create(session_id, lang=lang)
             session.lang = lang
+            # 过载拒绝时恢复：不丢失该会话正在执行的任务，也不在对话里留下未执行的指令
+            previous_request_id = session.active_request_id
             session.active_request_id = request_id
-            
-            # 确保 session 引用 job_manager (用于自愈)
-            session._job_manager = self.job_manager
 
             # 记录对话
-            session.push_message("user", query)
+            user_msg = session.push_message("user", query)
 
-            # 创建 Planning Flow
-            flow = FlowFactory.create_flow("planning", self.llm, session, self.voice_pusher)
+            # 简单指令（"去3号站" / "顶升" / "电量多少"）直接编译成工具调用，其余交给 Planning Flow
+            command = None
+            if self.settings.fast_path_enabled:
+                from core.resource_manager import resource_manager
+                command = parse_command(query, stations=resource_manager.get_stations())
+            flow = FlowFactory.create_flow(
+                "fast_path" if command else "planning", self.llm, session, self.voice_pusher,
+                emit=self._event_emitter(request_id), plan_cache=self.plan_cache, command=command,
+                max_parallel_steps=self.settings.plan_max_parallel_steps,
+            )
             
             # 202 立即响应，告知用户正在处理
             # 注意：对于查询类任务，最好能同步返回。但 PlanningFlow 架构统一为异步/流式更自然。
             # 这里我们统一走 JobManager 托管。
             
             self.event_bus.ensure_stream(request_id)
+            root_span_id = root_span.span_id if root_span is not None else None
             
             def _flow_runner(stop_event: threading.Event) -> str | None:
                 # 在新线程中必须重新建立上下文，否则 contextvars 会丢失
-                with request_context(trace_id=trace_id, session_id=session_id, request_id=request_id):
+                with request_context(trace_id=trace_id, session_id=session_id, request_id=request_id), \
+                        span("job.run", parent_id=root_span_id):
                     logger.info(f"DEBUG: 线程内上下文已重建 - req_id={request_id}")
                     # 在同步线程中运行异步 Flow
-                    # JobManager 在线程中运行此函数
+                    # JobManager 在执行器工作线程中运行此函数，复用该线程的事件循环
+                    loop = worker_event_loop()
+                    if loop is not None:
+                        return loop.run_until_complete(flow.execute(query, stop_event))
                     loop = asyncio.new_event_loop()
                     asyncio.set_event_loop(loop)
                     try:
@@ -139,15 +464,39 @@ class Orchestrator:
                     session.active_request_id = None
                 logger.info(f"🧹 Flow 任务清理完成: {request_id}")
 
-            self.job_manager.start(
-                request_id=request_id,
-                session_id=session_id,
-                runner=_flow_runner,
-                on_cleanup=_cleanup
-            )
+            priority = _classify_priority(query)
+            try:
+                job = self.job_manager.start(
+                    request_id=request_id,
+                    session_id=session_id,
+                    runner=_flow_runner,
+                    on_cleanup=_cleanup,
+                    priority=priority,
+                )
+            except QueueFullError as e:
+                # 过载：立即拒绝，不打断该会话已有的任务
+                if session.active_request_id == request_id:
+                    previous = self.job_manager.get(previous_request_id) if previous_request_id else None
+                    session.active_request_id = previous_request_id if previous is not None and previous.is_active else None
+                session.discard_message(user_msg)
+                self.event_bus.mark_done(request_id, True)
+                logger.warning(f"🚦 请求被拒绝（过载）: {request_id}, 优先级={PRIORITY_NAMES.get(priority)}, {e}")
+                resp = VoiceQueryResponse(
+                    resultCode=429,
+                    resultMsg="当前任务较多，请稍后再试",
+                    session_id=session_id,
+                    request_id=request_id,
+                    status="rejected",
+                    lang=lang,
+                    queue_position=e.queue_depth + 1,
+                    retry_after_s=round(e.retry_after_s, 1),
+                )
+                return 429, resp
             
             # 初始反馈语
-            first_response = "收到，正在思考中"
+            first_response = command.ack if command else "收到，正在思考中"
+            if job.queue_position:
+                first_response = f"收到，前面还有{job.queue_position}个任务，请稍候"
             
             resp = VoiceQueryResponse(
                 resultCode=202,
@@ -156,5 +505,6 @@ class Orchestrator:
                 request_id=request_id,
                 status="accepted",
                 lang=lang,
+                queue_position=job.queue_position,
             )
             return 202, resp
@@ -0,0 +1,16 @@
+"""
+仿真 Modbus TCP 机器人：在没有实车（ssh -L 1502:localhost:502）的情况下驱动 SRModbusSdk / RobotClient / PlanningFlow。
+"""
+
+from .robot import SimRobotConfig, SimulatedRobot
+from .server import LinkProfile, ModbusSlaveServer
+from .fleet import SimFleet, load_stations
+
+__all__ = [
+    "SimRobotConfig",
+    "SimulatedRobot",
+    "LinkProfile",
+    "ModbusSlaveServer",
+    "SimFleet",
+    "load_stations",
+]
@@ -0,0 +1,78 @@
+"""
+启动仿真机器人（在 functional_call 目录下运行）：
+
+    python -m sim --robots 3 --base-port 1502 --latency-ms 15 --jitter-ms 5 --loss 0.01 \
+        --map resources/maps/test-yh4.json
+
+启动后打印 ROBOT_FLEET 配置串，写入 .env 即可让语音服务连接仿真车队。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+import log_config  # noqa: F401
+from sim.fleet import SimFleet, load_stations
+from sim.robot import SimRobotConfig
+from sim.server import LinkProfile
+
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m sim", description="仿真 Modbus TCP 机器人从站")
+    parser.add_argument("--robots", type=int, default=1, help="仿真机器人数量")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=1502, help="第 i 台监听 base-port + i")
+    parser.add_argument("--map", dest="map_path", default=None, help="地图文件，用于站点坐标")
+    parser.add_argument("--strict-stations", action="store_true", help="前往地图中不存在的站点时任务报错")
+    parser.add_argument("--speed", type=float, default=800.0, help="行驶速度 mm/s")
+    parser.add_argument("--action-s", type=float, default=3.0, help="动作默认耗时（秒）")
+    parser.add_argument("--battery", type=float, default=80.0, help="初始电量 %%")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="仿真时间倍速")
+    parser.add_argument("--task-error-rate", type=float, default=0.0, help="任务以错误结束的概率")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="响应延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="响应延迟抖动（±）")
+    parser.add_argument("--loss", type=float, default=0.0, help="丢弃响应的概率")
+    parser.add_argument("--disconnect", type=float, default=0.0, help="收到请求后断开连接的概率")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子（复现丢包/任务错误）")
+    return parser.parse_args()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    robot_config = SimRobotConfig(
+        stations=load_stations(args.map_path) if args.map_path else {},
+        strict_stations=args.strict_stations,
+        speed_mm_s=args.speed,
+        action_s=args.action_s,
+        battery_pct=args.battery,
+        time_scale=args.time_scale,
+        task_error_rate=args.task_error_rate,
+        seed=args.seed,
+    )
+    link = LinkProfile(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, loss=args.loss,
+                       disconnect=args.disconnect, seed=args.seed)
+    fleet = SimFleet.build(args.robots, host=args.host, base_port=args.base_port, link=link,
+                           robot_config=robot_config)
+    await fleet.start()
+    logger.info(f"✅ 仿真车队已启动: ROBOT_FLEET={fleet.fleet_spec()}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fleet.stop_async()
+        logger.info(f"📊 仿真从站统计: {fleet.stats()}")
+
+
+def main() -> None:
+    args = _parse_args()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
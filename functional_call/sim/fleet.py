@@ -0,0 +1,123 @@
+"""
+多台仿真机器人：每台一个端口，可在后台线程运行（供基准测试、集成测试在同一进程内使用）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from pathlib import Path
+
+from sim.robot import SimRobotConfig, SimulatedRobot
+from sim.server import LinkProfile, ModbusSlaveServer
+
+
+logger = logging.getLogger(__name__)
+
+
+def load_stations(map_path: str | Path) -> dict[int, tuple[int, int, int]]:
+    """从地图文件（resources/maps/*.json）读取站点坐标：data.node[].{id, x, y, yaw}"""
+    data = json.loads(Path(map_path).read_text(encoding="utf-8"))
+    nodes = data.get("data", {}).get("node", [])
+    return {int(n["id"]): (int(n.get("x", 0)), int(n.get("y", 0)), int(n.get("yaw", 0))) for n in nodes}
+
+
+class SimFleet:
+    """
+    用法：
+        fleet = SimFleet.build(3, base_port=1502)
+        fleet.start_in_thread()
+        ...  # ROBOT_FLEET=fleet.fleet_spec()
+        fleet.stop()
+    """
+
+    def __init__(self, servers: list[ModbusSlaveServer]) -> None:
+        self.servers = servers
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def build(
+        cls,
+        count: int,
+        *,
+        host: str = "127.0.0.1",
+        base_port: int = 1502,
+        link: LinkProfile | None = None,
+        robot_config: SimRobotConfig | None = None,
+    ) -> "SimFleet":
+        """
+        :param base_port: 第 i 台机器人监听 base_port + i；为 0 时全部由系统分配端口
+        :param robot_config: 模板配置，robot_id / seed 按序号改写
+        """
+        template = robot_config or SimRobotConfig()
+        link = link or LinkProfile()
+        servers = []
+        for i in range(count):
+            config = SimRobotConfig(**{**template.__dict__, "robot_id": f"sim{i + 1}",
+                                       "seed": None if template.seed is None else template.seed + i})
+            server_link = LinkProfile(**{**link.__dict__, "seed": None if link.seed is None else link.seed + i})
+            servers.append(ModbusSlaveServer(SimulatedRobot(config), host=host,
+                                             port=base_port + i if base_port else 0, link=server_link))
+        return cls(servers)
+
+    def fleet_spec(self) -> str:
+        """ROBOT_FLEET 配置串"""
+        return ",".join(f"{s.robot.config.robot_id}={s.host}:{s.port}" for s in self.servers)
+
+    async def start(self) -> None:
+        for server in self.servers:
+            await server.start()
+
+    async def stop_async(self) -> None:
+        for server in self.servers:
+            await server.stop()
+
+    def start_in_thread(self) -> "SimFleet":
+        """在后台线程的事件循环里启动全部从站，返回时端口已就绪"""
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        error: list[BaseException] = []
+
+        def _run() -> None:
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.start())
+            except BaseException as e:
+                error.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, name="sim-fleet", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if error:
+            raise error[0]
+        return self
+
+    def call(self, func):
+        """在从站事件循环里执行 func()（例如修改机器人状态、断开连接）"""
+        if self._loop is None:
+            return func()
+        future: asyncio.Future = asyncio.run_coroutine_threadsafe(self._call(func), self._loop)
+        return future.result()
+
+    @staticmethod
+    async def _call(func):
+        return func()
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop_async(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
+
+    def stats(self) -> dict:
+        return {s.robot.config.robot_id: {"address": s.address, **s.stats} for s in self.servers}
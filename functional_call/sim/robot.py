@@ -0,0 +1,414 @@
+"""
+仿真机器人：按 SRModbusSdk 使用的寄存器地图维护状态。
+
+- 移动/动作任务状态机：WAIT_FOR_START → RUNNING → FINISHED（支持暂停、继续、取消、急停）
+- 电量随时间和行驶消耗，充电时回升；电量耗尽时移动任务以错误结束
+- 状态按需推进：每次 Modbus 请求前调用 advance()，无需后台线程
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import struct
+import time
+from dataclasses import dataclass, field
+
+from src.sr_modbus_model import (
+    ActionResult,
+    ActionState,
+    BatteryState,
+    LocationState,
+    MovementResult,
+    MovementState,
+    OperationState,
+    SystemState,
+)
+
+
+# 任务错误结果值（仿真自定义）
+ERROR_UNKNOWN_STATION = 1001
+ERROR_BATTERY_EMPTY = 1002
+ERROR_INJECTED = 1999
+
+
+@dataclass
+class SimRobotConfig:
+    robot_id: str = "sim1"
+    ip: str = "127.0.0.1"
+    # 站点号 -> (x, y, yaw)，单位 mm / (1/1000) rad；未知站点按 unknown_station_spacing_mm 沿 x 轴排布
+    stations: dict[int, tuple[int, int, int]] = field(default_factory=dict)
+    strict_stations: bool = False  # True 时前往未知站点以错误结束
+    unknown_station_spacing_mm: int = 3000
+    start_station: int = 1
+    speed_mm_s: float = 800.0
+    start_delay_s: float = 0.3  # 指令下发到开始执行的延迟（WAIT_FOR_START）
+    action_s: float = 3.0  # 动作默认耗时
+    action_durations: dict[int, float] = field(default_factory=dict)  # 动作 ID -> 耗时
+    battery_pct: float = 80.0
+    idle_drain_pct_min: float = 0.05
+    move_drain_pct_min: float = 0.5
+    charge_pct_min: float = 2.0
+    charge_delay_s: float = 1.0  # 充电指令到充电继电器闭合的延迟
+    task_error_rate: float = 0.0  # 任务以错误结束的概率（用于演练失败路径）
+    time_scale: float = 1.0  # 仿真时间倍速（>1 加速任务与电量变化）
+    seed: int | None = None
+
+
+def _u32(value: int) -> list[int]:
+    hi, lo = struct.unpack(">HH", struct.pack(">I", int(value) & 0xFFFFFFFF))
+    return [hi, lo]
+
+
+def _i32(value: int) -> list[int]:
+    hi, lo = struct.unpack(">HH", struct.pack(">i", int(value)))
+    return [hi, lo]
+
+
+def _i16(value: int) -> int:
+    return struct.unpack(">H", struct.pack(">h", int(value)))[0]
+
+
+def _from_u32(hi: int, lo: int) -> int:
+    return struct.unpack(">i", struct.pack(">HH", hi, lo))[0]
+
+
+class SimulatedRobot:
+    """
+    一台仿真机器人的全部寄存器状态（非线程安全，由所属的 Modbus 从站在事件循环内访问）。
+    """
+
+    def __init__(self, config: SimRobotConfig | None = None) -> None:
+        self.config = config or SimRobotConfig()
+        self._rng = random.Random(self.config.seed)
+        self._last_advance = time.monotonic()
+        self._boot_wall = time.time()
+        self._sim_elapsed_s = 0.0
+
+        x, y, yaw = self.station_pose(self.config.start_station)
+        self.x, self.y, self.yaw = float(x), float(y), yaw
+        self.station_no = self.config.start_station
+        self.velocity = 0.0
+        self.mileage_m = 0.0
+        self.battery_pct = float(self.config.battery_pct)
+        self.use_cycles = 12
+        self.charging = False
+        self.charge_requested_at: float | None = None  # 仿真时间
+        self.emergency = False
+        self.paused = False
+        self.low_power = False
+        self.scheduling_mode = False
+        self.volume = 50
+        self.map_byte_code = 0x7465  # "te"
+        self.holding: dict[int, int] = {}
+
+        # 移动任务
+        self.mt_state = MovementState.MT_NA
+        self.mt_no = 0
+        self.mt_target_station = 0
+        self.mt_target: tuple[float, float, int] | None = None
+        self.mt_result = MovementResult.MT_TASK_NA
+        self.mt_result_value = 0
+        self.mt_start_at = 0.0  # 仿真时间
+        self.mt_fail = False
+
+        # 动作任务
+        self.at_state = ActionState.AT_NA
+        self.at_no = 0
+        self.at_id = 0
+        self.at_param0 = 0
+        self.at_param1 = 0
+        self.at_result = ActionResult.AT_TASK_NA
+        self.at_result_value = 0
+        self.at_start_at = 0.0
+        self.at_remaining_s = 0.0
+        self.at_fail = False
+
+    # ------------------ 地图 ------------------
+    def station_pose(self, station_no: int) -> tuple[int, int, int]:
+        pose = self.config.stations.get(station_no)
+        if pose is not None:
+            return pose
+        return (station_no * self.config.unknown_station_spacing_mm, 0, 0)
+
+    def _known_station(self, station_no: int) -> bool:
+        return not self.config.strict_stations or station_no in self.config.stations
+
+    # ------------------ 时间推进 ------------------
+    def advance(self, now: float | None = None) -> None:
+        """把仿真状态推进到 now（time.monotonic()）"""
+        now = time.monotonic() if now is None else now
+        dt = max(0.0, now - self._last_advance) * self.config.time_scale
+        self._last_advance = now
+        if dt <= 0:
+            return
+        self._sim_elapsed_s += dt
+        self._advance_battery(dt)
+        self._advance_movement(dt)
+        self._advance_action(dt)
+
+    def _advance_battery(self, dt: float) -> None:
+        cfg = self.config
+        if self.charge_requested_at is not None and self._sim_elapsed_s - self.charge_requested_at >= cfg.charge_delay_s:
+            self.charge_requested_at = None
+            self.charging = True
+        if self.charging:
+            before = self.battery_pct
+            self.battery_pct = min(100.0, self.battery_pct + cfg.charge_pct_min * dt / 60)
+            if before < 100.0 <= self.battery_pct:
+                self.use_cycles += 1
+            return
+        rate = cfg.move_drain_pct_min if self.mt_state == MovementState.MT_RUNNING and not self._halted() else cfg.idle_drain_pct_min
+        self.battery_pct = max(0.0, self.battery_pct - rate * dt / 60)
+
+    def _halted(self) -> bool:
+        return self.emergency or self.paused
+
+    def _advance_movement(self, dt: float) -> None:
+        now = self._sim_elapsed_s
+        if self.mt_state == MovementState.MT_WAIT_FOR_START and not self._halted():
+            if now - self.mt_start_at >= self.config.start_delay_s:
+                self.mt_state = MovementState.MT_RUNNING
+                self.station_no = 0
+        if self.mt_state == MovementState.MT_IN_CANCEL:
+            self._finish_movement(MovementResult.MT_TASK_CANCEL)
+            return
+        if self.mt_state != MovementState.MT_RUNNING:
+            self.velocity = 0.0
+            return
+        if self._halted():
+            self.velocity = 0.0
+            return
+        if self.battery_pct <= 0:
+            self._finish_movement(MovementResult.MT_TASK_ERROR, ERROR_BATTERY_EMPTY)
+            return
+
+        tx, ty, tyaw = self.mt_target
+        dx, dy = tx - self.x, ty - self.y
+        dist = math.hypot(dx, dy)
+        step = self.config.speed_mm_s * dt
+        if dist > 1e-6:
+            self.yaw = int(math.atan2(dy, dx) * 1000)
+        if step >= dist:
+            self.x, self.y, self.yaw = float(tx), float(ty), tyaw
+            self.mileage_m += dist / 1000
+            if self.mt_fail:
+                self._finish_movement(MovementResult.MT_TASK_ERROR, ERROR_INJECTED)
+                return
+            self.station_no = self.mt_target_station
+            self._finish_movement(MovementResult.MT_TASK_FINISHED)
+            return
+        self.x += dx / dist * step
+        self.y += dy / dist * step
+        self.mileage_m += step / 1000
+        self.velocity = self.config.speed_mm_s
+
+    def _finish_movement(self, result: MovementResult, result_value: int = 0) -> None:
+        self.mt_state = MovementState.MT_FINISHED
+        self.mt_result = result
+        self.mt_result_value = result_value
+        self.velocity = 0.0
+
+    def _advance_action(self, dt: float) -> None:
+        if self.at_state == ActionState.AT_WAIT_FOR_START and not self._halted():
+            if self._sim_elapsed_s - self.at_start_at >= self.config.start_delay_s:
+                self.at_state = ActionState.AT_RUNNING
+            return
+        if self.at_state == ActionState.AT_IN_CANCEL:
+            self._finish_action(ActionResult.AT_TASK_CANCEL)
+            return
+        if self.at_state != ActionState.AT_RUNNING or self._halted():
+            return
+        self.at_remaining_s -= dt
+        if self.at_remaining_s <= 0:
+            if self.at_fail:
+                self._finish_action(ActionResult.AT_TASK_ERROR, ERROR_INJECTED)
+            else:
+                self._finish_action(ActionResult.AT_TASK_FINISHED)
+
+    def _finish_action(self, result: ActionResult, result_value: int = 0) -> None:
+        self.at_state = ActionState.AT_FINISHED
+        self.at_result = result
+        self.at_result_value = result_value
+
+    # ------------------ 指令 ------------------
+    def _task_running(self) -> bool:
+        return self.mt_state in (MovementState.MT_WAIT_FOR_START, MovementState.MT_RUNNING, MovementState.MT_PAUSED)
+
+    def start_movement(self, no: int, target: tuple[float, float, int], station_no: int = 0) -> None:
+        self.charging = False
+        self.charge_requested_at = None
+        self.paused = False
+        self.mt_no = no
+        self.mt_target_station = station_no
+        self.mt_target = target
+        self.mt_result = MovementResult.MT_TASK_NA
+        self.mt_result_value = 0
+        self.mt_start_at = self._sim_elapsed_s
+        self.mt_fail = self._rng.random() < self.config.task_error_rate
+        if station_no and not self._known_station(station_no):
+            self._finish_movement(MovementResult.MT_TASK_ERROR, ERROR_UNKNOWN_STATION)
+            return
+        self.mt_state = MovementState.MT_WAIT_FOR_START
+
+    def start_action(self, no: int, action_id: int, param0: int, param1: int) -> None:
+        self.at_state = ActionState.AT_WAIT_FOR_START
+        self.at_no = no
+        self.at_id = action_id
+        self.at_param0 = param0
+        self.at_param1 = param1
+        self.at_result = ActionResult.AT_TASK_NA
+        self.at_result_value = 0
+        self.at_start_at = self._sim_elapsed_s
+        self.at_remaining_s = self.config.action_durations.get(action_id, self.config.action_s)
+        self.at_fail = self._rng.random() < self.config.task_error_rate
+
+    def cancel(self) -> None:
+        self.paused = False
+        if self._task_running():
+            self.mt_state = MovementState.MT_IN_CANCEL
+        if self.at_state in (ActionState.AT_WAIT_FOR_START, ActionState.AT_RUNNING, ActionState.AT_PAUSED):
+            self.at_state = ActionState.AT_IN_CANCEL
+
+    def pause(self) -> None:
+        self.paused = True
+        if self.mt_state == MovementState.MT_RUNNING:
+            self.mt_state = MovementState.MT_PAUSED
+        if self.at_state == ActionState.AT_RUNNING:
+            self.at_state = ActionState.AT_PAUSED
+
+    def resume(self) -> None:
+        self.paused = False
+        if self.mt_state == MovementState.MT_PAUSED:
+            self.mt_state = MovementState.MT_RUNNING
+        if self.at_state == ActionState.AT_PAUSED:
+            self.at_state = ActionState.AT_RUNNING
+
+    def restart(self) -> None:
+        """系统复位：清空任务与急停"""
+        self.emergency = False
+        self.paused = False
+        self.charging = False
+        self.charge_requested_at = None
+        self.mt_state = MovementState.MT_NA
+        self.at_state = ActionState.AT_NA
+        self.velocity = 0.0
+
+    def write_coil(self, address: int, value: bool) -> None:
+        self.advance()
+        if not value and address not in (51,):
+            return
+        if address == 1:
+            self.pause()
+        elif address == 2:
+            self.resume()
+        elif address == 3:
+            self.cancel()
+        elif address == 7:
+            self.emergency = True
+        elif address == 8:
+            self.emergency = False
+        elif address == 9:
+            if not self._task_running() and not self.charging:
+                self.charge_requested_at = self._sim_elapsed_s
+        elif address == 10:
+            self.charging = False
+            self.charge_requested_at = None
+        elif address == 11:
+            self.low_power = True
+        elif address == 12:
+            self.low_power = False
+        elif address == 14:
+            self.restart()
+        elif address == 51:
+            self.scheduling_mode = bool(value)
+
+    def write_registers(self, address: int, values: list[int]) -> None:
+        self.advance()
+        for offset, value in enumerate(values):
+            self.holding[address + offset] = value
+        if address == 40066 and len(values) >= 3:
+            no = _from_u32(values[0], values[1])
+            station = values[2]
+            x, y, yaw = self.station_pose(station)
+            self.start_movement(no, (x, y, yaw), station)
+        elif address == 40057 and len(values) >= 8:
+            no, x, y, yaw = (_from_u32(values[i], values[i + 1]) for i in range(0, 8, 2))
+            self.start_movement(no, (x, y, yaw))
+        elif address == 40070 and len(values) >= 8:
+            no, action_id, p0, p1 = (_from_u32(values[i], values[i + 1]) for i in range(0, 8, 2))
+            self.start_action(no, action_id, p0, p1)
+        elif address == 40028 and values:
+            self.volume = values[0]
+        elif address == 40029 and values:
+            self.map_byte_code = values[0]
+        elif address == 40007 and values:
+            self.station_no = values[0]
+            x, y, yaw = self.station_pose(values[0])
+            self.x, self.y, self.yaw = float(x), float(y), yaw
+        elif address == 40001 and len(values) >= 6:
+            x, y, yaw = (_from_u32(values[i], values[i + 1]) for i in range(0, 6, 2))
+            self.x, self.y, self.yaw = float(x), float(y), yaw
+
+    # ------------------ 寄存器视图 ------------------
+    def _system_state(self) -> SystemState:
+        if self.emergency:
+            return SystemState.SYS_STATE_ERROR
+        if self.mt_state == MovementState.MT_WAIT_FOR_START:
+            return SystemState.SYS_STATE_TASK_NAV_INITIALING
+        if self.mt_state == MovementState.MT_RUNNING and not self.paused:
+            return SystemState.SYS_STATE_TASK_NAV_WAITING_FINISH
+        return SystemState.SYS_STATE_IDLE
+
+    def input_registers(self) -> dict[int, int]:
+        """输入寄存器地址 -> 值（只包含 SDK 使用的地址，其余读为 0）"""
+        pct = int(round(self.battery_pct))
+        current = -15000 if self.charging else (3000 if self.velocity else 800)
+        regs: dict[int, int] = {}
+
+        def put(address: int, values: list[int]) -> None:
+            for offset, value in enumerate(values):
+                regs[address + offset] = value & 0xFFFF
+
+        put(30001, [self._system_state().value])
+        put(30002, [LocationState.LOCATION_STATE_RUNNING.value])
+        put(30003, _i32(self.x) + _i32(self.y) + _i32(self.yaw))
+        put(30009, [9800])
+        put(30015, [self.station_no])
+        put(30016, [OperationState.OPERATION_AUTO.value])
+        put(30017, [_i16(self.velocity), 0, 0])
+        put(30033, [
+            46000 + pct * 60,  # 电压 mV
+            _i16(current),
+            30,  # 温度
+            int(self.battery_pct * 3),  # 剩余工作时间 min
+            pct,
+            (BatteryState.BATTERY_CHARGING if self.charging else BatteryState.BATTERY_NO_CHARGING).value,
+        ])
+        put(30039, [self.use_cycles, 40000])
+        put(30041, _u32(self.mileage_m) + _u32(self._sim_elapsed_s) + _u32(42))
+        put(30047, _u32(self._boot_wall + self._sim_elapsed_s))
+        octets = self.config.ip.split(".")
+        put(30049, [int(o) for o in octets] if len(octets) == 4 and all(o.isdigit() for o in octets) else [127, 0, 0, 1])
+        put(30053, [1, 13, 0])
+        put(30065, [self.map_byte_code])
+        put(30070, [self.volume])
+        put(30113, [self.mt_state.value] + _i32(self.mt_no) + [self.mt_target_station, 1 if self.mt_state == MovementState.MT_RUNNING else 0])
+        put(30122, [self.mt_result.value] + _u32(self.mt_result_value))
+        put(30129, [self.at_state.value] + _i32(self.at_no) + _i32(self.at_id) + _i32(self.at_param0)
+            + _i32(self.at_param1) + [self.at_result.value] + _i32(self.at_result_value))
+        return regs
+
+    def discrete_inputs(self) -> dict[int, bool]:
+        return {
+            10001: self.emergency,
+            10002: self.emergency,
+            10003: False,
+            10004: self.charging,
+            10005: self.low_power,
+            10006: False,
+            10007: False,
+            10009: not self.emergency and not self.low_power and not self._task_running(),
+            10049: False,
+            10051: self.scheduling_mode,
+        }
@@ -0,0 +1,176 @@
+"""
+仿真 Modbus TCP 从站（asyncio）。
+
+- 支持 SDK 用到的功能码：01/02 读线圈/离散量，03/04 读保持/输入寄存器，05 写单线圈，06/16 写保持寄存器
+- 每个请求独立处理，响应按 latency ± jitter 延迟发送，可同时在途（与真实隧道上的流水线行为一致）
+- loss 概率丢弃响应（客户端只能等超时），disconnect 概率直接断开连接
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import struct
+from dataclasses import dataclass
+
+from sim.robot import SimulatedRobot
+
+
+logger = logging.getLogger(__name__)
+
+_MBAP = struct.Struct(">HHHB")
+
+FC_READ_COILS = 0x01
+FC_READ_DISCRETE_INPUTS = 0x02
+FC_READ_HOLDING_REGISTERS = 0x03
+FC_READ_INPUT_REGISTERS = 0x04
+FC_WRITE_SINGLE_COIL = 0x05
+FC_WRITE_SINGLE_REGISTER = 0x06
+FC_WRITE_MULTIPLE_REGISTERS = 0x10
+
+EXC_ILLEGAL_FUNCTION = 0x01
+EXC_ILLEGAL_DATA_VALUE = 0x03
+
+MAX_READ_REGISTERS = 125
+MAX_READ_BITS = 2000
+
+
+@dataclass
+class LinkProfile:
+    """链路特性（模拟 SSH 隧道 / 无线网络）"""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    loss: float = 0.0  # 丢弃响应的概率
+    disconnect: float = 0.0  # 收到请求后直接断开连接的概率
+    seed: int | None = None
+
+
+class ModbusSlaveServer:
+    """一台仿真机器人对应一个从站端口"""
+
+    def __init__(self, robot: SimulatedRobot, *, host: str = "127.0.0.1", port: int = 1502,
+                 link: LinkProfile | None = None) -> None:
+        self.robot = robot
+        self.host = host
+        self.port = port
+        self.link = link or LinkProfile()
+        self._rng = random.Random(self.link.seed)
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+        self.stats = {"connections": 0, "requests": 0, "dropped": 0, "disconnects": 0, "exceptions": 0}
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # port=0 时取系统分配的端口
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"🤖 仿真机器人 {self.robot.config.robot_id} 监听 {self.address}")
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._connections):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    def drop_connections(self) -> int:
+        """断开当前所有客户端连接（演练断线重连），返回断开数"""
+        writers = list(self._connections)
+        for writer in writers:
+            writer.close()
+        return len(writers)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+        self._connections.add(writer)
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                tid, pid, length, unit = _MBAP.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                self.stats["requests"] += 1
+                if self._rng.random() < self.link.disconnect:
+                    self.stats["disconnects"] += 1
+                    break
+                # 请求到达时刻处理（状态以此刻为准），响应延迟后发送
+                response = self._process(pdu)
+                if self._rng.random() < self.link.loss:
+                    self.stats["dropped"] += 1
+                    continue
+                task = asyncio.ensure_future(self._respond(writer, tid, pid, unit, response))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, tid: int, pid: int, unit: int, response: bytes) -> None:
+        delay_ms = self.link.latency_ms + self._rng.uniform(-self.link.jitter_ms, self.link.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if writer.is_closing():
+            return
+        writer.write(_MBAP.pack(tid, pid, len(response) + 1, unit) + response)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    # ------------------ PDU 处理 ------------------
+    def _exception(self, fc: int, code: int) -> bytes:
+        self.stats["exceptions"] += 1
+        return bytes([fc | 0x80, code])
+
+    def _process(self, pdu: bytes) -> bytes:
+        fc = pdu[0]
+        robot = self.robot
+        robot.advance()
+        try:
+            if fc in (FC_READ_INPUT_REGISTERS, FC_READ_HOLDING_REGISTERS):
+                address, count = struct.unpack(">HH", pdu[1:5])
+                if not 1 <= count <= MAX_READ_REGISTERS:
+                    return self._exception(fc, EXC_ILLEGAL_DATA_VALUE)
+                source = robot.input_registers() if fc == FC_READ_INPUT_REGISTERS else robot.holding
+                values = [source.get(a, 0) for a in range(address, address + count)]
+                return struct.pack(f">BB{count}H", fc, count * 2, *values)
+            if fc in (FC_READ_DISCRETE_INPUTS, FC_READ_COILS):
+                address, count = struct.unpack(">HH", pdu[1:5])
+                if not 1 <= count <= MAX_READ_BITS:
+                    return self._exception(fc, EXC_ILLEGAL_DATA_VALUE)
+                bits = robot.discrete_inputs() if fc == FC_READ_DISCRETE_INPUTS else {}
+                data = bytearray((count + 7) // 8)
+                for i in range(count):
+                    if bits.get(address + i):
+                        data[i // 8] |= 1 << (i % 8)
+                return bytes([fc, len(data)]) + bytes(data)
+            if fc == FC_WRITE_SINGLE_COIL:
+                address, value = struct.unpack(">HH", pdu[1:5])
+                if value not in (0xFF00, 0x0000):
+                    return self._exception(fc, EXC_ILLEGAL_DATA_VALUE)
+                robot.write_coil(address, value == 0xFF00)
+                return pdu[:5]
+            if fc == FC_WRITE_SINGLE_REGISTER:
+                address, value = struct.unpack(">HH", pdu[1:5])
+                robot.write_registers(address, [value])
+                return pdu[:5]
+            if fc == FC_WRITE_MULTIPLE_REGISTERS:
+                address, count, byte_count = struct.unpack(">HHB", pdu[1:6])
+                if byte_count != count * 2 or len(pdu) < 6 + byte_count:
+                    return self._exception(fc, EXC_ILLEGAL_DATA_VALUE)
+                robot.write_registers(address, list(struct.unpack(f">{count}H", pdu[6:6 + byte_count])))
+                return pdu[:5]
+        except struct.error:
+            return self._exception(fc, EXC_ILLEGAL_DATA_VALUE)
+        return self._exception(fc, EXC_ILLEGAL_FUNCTION)
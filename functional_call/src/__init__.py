@@ -4,24 +4,36 @@ SR Modbus SDK - 斯坦德机器人 Modbus 通信 SDK
 提供 Modbus TCP/RTU 通信功能，用于控制 AGV 设备
 """
 
-from .sr_modbus_sdk import SRModbusSdk
+from .sr_modbus_sdk import SRModbusSdk, plan_block_reads
+from .sr_modbus_async import AsyncSRModbusSdk, AsyncModbusTcpTransport
+from .sr_modbus_cache import CachePolicy
+from .sr_modbus_link import LinkDownError
+from .sr_modbus_scheduler import PipelinedModbusClient
 from .sr_modbus_model import (
     MovementState,
     MovementResult,
     ActionState,
     ActionResult,
     LocationState,
-    BatteryInfo
+    BatteryInfo,
+    RobotSnapshot
 )
 
 __all__ = [
     'SRModbusSdk',
+    'plan_block_reads',
+    'AsyncSRModbusSdk',
+    'AsyncModbusTcpTransport',
+    'CachePolicy',
+    'LinkDownError',
+    'PipelinedModbusClient',
     'MovementState',
     'MovementResult',
     'ActionState',
     'ActionResult',
     'LocationState',
-    'BatteryInfo'
+    'BatteryInfo',
+    'RobotSnapshot'
 ]
 
 __version__ = '1.0.0'
@@ -0,0 +1,560 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# @File: sr_modbus_async.py
+# @Describe: 基于 asyncio 的 Modbus TCP 传输层与异步 SDK（与 SRModbusSdk 共用寄存器地图与数据模型）
+
+import asyncio
+import itertools
+import logging
+import struct
+import time
+
+from pymodbus.constants import Endian
+from pymodbus.payload import BinaryPayloadBuilder
+
+from .sr_modbus_model import *
+from .sr_modbus_cache import RegisterCache
+from .sr_modbus_link import CircuitBreaker, LinkDownError
+from .sr_modbus_sdk import (
+    INPUT_REGISTER_RANGES,
+    INPUT_REGISTER_CACHE_POLICY,
+    COIL_CACHE_INVALIDATION,
+    HOLDING_CACHE_INVALIDATION,
+    SNAPSHOT_FIELDS,
+    MAX_READ_REGISTERS,
+    DEFAULT_MAX_GAP,
+    _decoder_from_registers,
+    _decode_snapshot,
+    _plan_snapshot,
+)
+from .sr_modbus_wait import AdaptivePollInterval
+
+logger = logging.getLogger(__name__)
+
+# Modbus 功能码
+FC_READ_DISCRETE_INPUTS = 0x02
+FC_READ_HOLDING_REGISTERS = 0x03
+FC_READ_INPUT_REGISTERS = 0x04
+FC_WRITE_SINGLE_COIL = 0x05
+FC_WRITE_MULTIPLE_REGISTERS = 0x10
+
+# Modbus 异常码 -> 名称（与 pymodbus 的异常响应文本保持一致，便于上层按关键字识别）
+EXCEPTION_NAMES = {
+    0x01: "IllegalFunction",
+    0x02: "IllegalAddress",
+    0x03: "IllegalValue",
+    0x04: "SlaveFailure",
+    0x05: "Acknowledge",
+    0x06: "SlaveBusy",
+    0x0A: "GatewayPathUnavailable",
+    0x0B: "GatewayNoResponse",
+}
+
+_MBAP = struct.Struct(">HHHB")  # 事务号, 协议号, 长度, 单元号
+
+
+class ModbusExceptionResponse(RuntimeError):
+    """从站返回的 Modbus 异常响应"""
+
+    def __init__(self, function_code, exception_code):
+        self.function_code = function_code
+        self.exception_code = exception_code
+        name = EXCEPTION_NAMES.get(exception_code, "Unknown")
+        super().__init__(f"Modbus Error: [Input/Output] Exception Response({function_code}, {exception_code}, {name})")
+
+
+class AsyncModbusTcpTransport:
+    """
+    Modbus TCP 异步传输层
+
+    - 每个请求分配独立事务号，响应按事务号分发，多个请求可同时在途
+    - 连接断开时所有在途请求以 ConnectionError 失败
+    - 熔断器跟踪链路状态：断开后请求快速失败（LinkDownError），退避到期后的第一个请求负责重连探测
+    """
+
+    def __init__(self, host, port=502, unit_id=17, timeout_s=3.0):
+        self._host = host
+        self._port = port
+        self._unit_id = unit_id
+        self._timeout_s = timeout_s
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._pending = {}
+        self._tids = itertools.cycle(range(1, 0x10000))
+        self._connect_lock = None
+        self._breaker = CircuitBreaker(name=f"{host}:{port}")
+
+    @property
+    def address(self):
+        return f"{self._host}:{self._port}"
+
+    def link_state(self):
+        """链路熔断器状态"""
+        return self._breaker.snapshot()
+
+    def is_connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    def in_flight(self):
+        """当前在途请求数"""
+        return len(self._pending)
+
+    async def connect(self):
+        """
+        建立 TCP 连接
+        :return: True if connected, False otherwise
+        """
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.is_connected():
+                return True
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self._host, self._port), timeout=self._timeout_s)
+            except (OSError, asyncio.TimeoutError) as e:
+                logger.error(f"❌ Modbus TCP(async)连接失败: {self.address}, {e}")
+                return False
+            self._reader_task = asyncio.ensure_future(self._read_loop())
+            logger.info(f"✅ Modbus TCP(async)连接成功: {self.address}")
+            return True
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+        self._fail_pending(ConnectionError(f"Modbus连接已关闭: {self.address}"))
+
+    def _fail_pending(self, error):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                header = await self._reader.readexactly(_MBAP.size)
+                tid, _pid, length, _unit = _MBAP.unpack(header)
+                pdu = await self._reader.readexactly(length - 1)
+                future = self._pending.pop(tid, None)
+                if future is None:
+                    # 超时后才到达的响应，直接丢弃
+                    logger.debug(f"丢弃未知事务号的响应: tid={tid}")
+                    continue
+                if not future.done():
+                    future.set_result(pdu)
+        except asyncio.CancelledError:
+            raise
+        except (asyncio.IncompleteReadError, OSError) as e:
+            logger.warning(f"⚠️ Modbus TCP(async)连接中断: {self.address}, {e}")
+            self._breaker.trip(e)
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._fail_pending(ConnectionError(f"Modbus连接中断: {self.address}"))
+
+    async def execute(self, pdu, timeout_s=None):
+        """
+        发送一个 PDU 并等待对应事务号的响应
+        :param pdu: 请求 PDU（功能码 + 数据）
+        :param timeout_s: 超时时间，缺省使用构造参数
+        :return: 响应 PDU
+        :raises LinkDownError: 链路已知断开（快速失败）
+        :raises ConnectionError: 连接失败或超时
+        :raises ModbusExceptionResponse: 从站返回异常响应
+        """
+        self._breaker.check()
+        try:
+            if not self.is_connected() and not await self.connect():
+                raise ConnectionError(f"Modbus连接失败: {self.address}")
+            response = await self._send(pdu, timeout_s)
+        except ConnectionError as e:
+            if self.is_connected():
+                self._breaker.record_failure(e)
+            else:
+                self._breaker.trip(e)
+            raise
+        except BaseException as e:
+            # 被截止时间取消等：不能让半开探测名额一直被占用
+            self._breaker.record_failure(e)
+            raise
+        self._breaker.record_success()
+        if response[0] & 0x80:
+            raise ModbusExceptionResponse(response[0] & 0x7F, response[1])
+        return response
+
+    async def _send(self, pdu, timeout_s):
+        tid = next(self._tids)
+        while tid in self._pending:
+            tid = next(self._tids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[tid] = future
+        self._writer.write(_MBAP.pack(tid, 0, len(pdu) + 1, self._unit_id) + pdu)
+        try:
+            await self._writer.drain()
+            return await asyncio.wait_for(future, timeout=timeout_s or self._timeout_s)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"Modbus请求超时: {self.address}, 功能码{pdu[0]}")
+        except OSError as e:
+            raise ConnectionError(f"Modbus发送失败: {self.address}, {e}")
+        finally:
+            self._pending.pop(tid, None)
+
+    async def read_input_registers(self, address, count, timeout_s=None):
+        response = await self.execute(struct.pack(">BHH", FC_READ_INPUT_REGISTERS, address, count), timeout_s)
+        return list(struct.unpack(f">{response[1] // 2}H", response[2:2 + response[1]]))
+
+    async def read_holding_registers(self, address, count, timeout_s=None):
+        response = await self.execute(struct.pack(">BHH", FC_READ_HOLDING_REGISTERS, address, count), timeout_s)
+        return list(struct.unpack(f">{response[1] // 2}H", response[2:2 + response[1]]))
+
+    async def read_discrete_inputs(self, address, count=1, timeout_s=None):
+        response = await self.execute(struct.pack(">BHH", FC_READ_DISCRETE_INPUTS, address, count), timeout_s)
+        data = response[2:2 + response[1]]
+        return [bool(data[i // 8] >> (i % 8) & 1) for i in range(count)]
+
+    async def write_coil(self, address, value, timeout_s=None):
+        await self.execute(struct.pack(">BHH", FC_WRITE_SINGLE_COIL, address, 0xFF00 if value else 0x0000), timeout_s)
+
+    async def write_registers(self, address, values, timeout_s=None):
+        values = list(values)
+        pdu = struct.pack(f">BHHB{len(values)}H", FC_WRITE_MULTIPLE_REGISTERS, address, len(values),
+                          len(values) * 2, *values)
+        await self.execute(pdu, timeout_s)
+
+
+class AsyncSRModbusSdk:
+    """
+    SRModbusSdk 的 asyncio 版本：相同的寄存器地图与数据模型，等待类接口可 await 且可取消
+    """
+
+    def __init__(self, unit_id=17, timeout_s=3.0):
+        self._unit_id = unit_id
+        self._timeout_s = timeout_s
+        self._transport = None
+        self._cache = RegisterCache(INPUT_REGISTER_RANGES, INPUT_REGISTER_CACHE_POLICY)
+
+    @property
+    def transport(self):
+        return self._transport
+
+    async def connect_tcp(self, ip, port=502):
+        """
+        用modbus-TCP连车辆
+        :param ip: 车辆ip
+        :param port: 车辆端口号
+        :return: 是否连接成功
+        """
+        self._cache.invalidate()
+        self._transport = AsyncModbusTcpTransport(ip, port, unit_id=self._unit_id, timeout_s=self._timeout_s)
+        return await self._transport.connect()
+
+    async def close(self):
+        if self._transport is not None:
+            await self._transport.close()
+
+    def cache_stats(self):
+        """读缓存命中统计"""
+        return self._cache.stats()
+
+    def link_state(self):
+        """链路熔断器状态（未连接时为 None）"""
+        return self._transport.link_state() if self._transport is not None else None
+
+    # ------------------ 读 ------------------
+    async def read_input_registers_raw(self, address, register_num):
+        """
+        读取输入寄存器原始值
+        :raises ConnectionError: 连接失败或读取失败
+        """
+        return await self._transport.read_input_registers(address, register_num)
+
+    async def read_registers_function(self, address, register_num):
+        """读取输入寄存器（按 INPUT_REGISTER_CACHE_POLICY 命中读缓存），返回解码器"""
+        generation = self._cache.generation()
+        registers = self._cache.get(address, register_num)
+        if registers is None:
+            registers = await self.read_input_registers_raw(address, register_num)
+            self._cache.put(address, registers, generation)
+        return _decoder_from_registers(registers)
+
+    async def read_discrete_function(self, address):
+        """读取离散输入状态"""
+        return (await self._transport.read_discrete_inputs(address, 1))[0]
+
+    async def _read_field(self, name):
+        range_names, decode = SNAPSHOT_FIELDS[name]
+        decoders = await asyncio.gather(
+            *(self.read_registers_function(*INPUT_REGISTER_RANGES[r]) for r in range_names))
+        return decode(*decoders)
+
+    async def read_snapshot(self, fields=None, max_registers=MAX_READ_REGISTERS, max_gap=DEFAULT_MAX_GAP):
+        """
+        合并块读输入寄存器并解码（各块读请求并发在途）
+        :param fields: 需要的字段名列表（见 SNAPSHOT_FIELDS），None 表示全部
+        :return: RobotSnapshot
+        """
+        generation = self._cache.generation()
+        names, registers, blocks = _plan_snapshot(fields, self._cache, max_registers, max_gap)
+        results = await asyncio.gather(*(self.read_input_registers_raw(a, n) for a, n in blocks))
+        for (address, register_num), values in zip(blocks, results):
+            self._cache.put(address, values, generation)
+            registers.update(zip(range(address, address + register_num), values))
+        return _decode_snapshot(names, registers, len(blocks))
+
+    async def get_cur_system_state(self) -> SystemState:
+        """系统状态"""
+        return await self._read_field("system_state")
+
+    async def get_cur_locate_state(self) -> LocationState:
+        """定位状态"""
+        return await self._read_field("locate_state")
+
+    async def get_cur_pose(self) -> Pose:
+        """位姿，x(毫米)、y(毫米)、yaw(弧度*1000)"""
+        return await self._read_field("pose")
+
+    async def get_cur_station_no(self) -> int:
+        """当前站点编号"""
+        return await self._read_field("station_no")
+
+    async def get_battery_info(self) -> BatteryInfo:
+        """电池状态信息"""
+        return await self._read_field("battery_info")
+
+    async def get_movement_task_info(self) -> MovementTask:
+        """移动任务状态信息"""
+        return await self._read_field("movement_task")
+
+    async def get_action_task_info(self) -> ActionTask:
+        """动作任务状态信息"""
+        return await self._read_field("action_task")
+
+    async def is_trigger_emergency(self) -> bool:
+        """急停是否触发"""
+        return await self.read_discrete_function(10001)
+
+    async def is_charge(self) -> bool:
+        """是否正在充电"""
+        return await self.read_discrete_function(10004)
+
+    async def is_ready_for_new_movement_task(self) -> bool:
+        """当前是否可以运行移动任务"""
+        return await self.read_discrete_function(10009)
+
+    # ------------------ 写 ------------------
+    async def write_coils_function(self, address, value=True):
+        """
+        写入线圈
+        :raises RuntimeError: 从站返回异常响应
+        """
+        logger.info(f"正在写线圈(async): 地址={address}, 值={value}")
+        await self._transport.write_coil(address, value)
+        if address in COIL_CACHE_INVALIDATION:
+            self._cache.invalidate(COIL_CACHE_INVALIDATION[address])
+        logger.info(f"✅ 写线圈成功(async): 地址={address}")
+
+    async def _write_registers(self, address, values):
+        """写保持寄存器，并使受影响的读缓存区段失效"""
+        await self._transport.write_registers(address, values)
+        if address in HOLDING_CACHE_INVALIDATION:
+            self._cache.invalidate(HOLDING_CACHE_INVALIDATION[address])
+
+    async def pause_task(self):
+        """暂停运动"""
+        await self.write_coils_function(1)
+
+    async def continue_task(self):
+        """继续运动"""
+        await self.write_coils_function(2)
+
+    async def cancel_task(self):
+        """停止运动"""
+        await self.write_coils_function(3)
+
+    async def trigger_emergency(self):
+        """触发急停"""
+        await self.write_coils_function(7)
+
+    async def cancel_emergency(self):
+        """解除急停"""
+        await self.write_coils_function(8)
+
+    async def charge(self):
+        """启动充电"""
+        await self.write_coils_function(9)
+
+    async def stop_charge(self):
+        """停止充电"""
+        await self.write_coils_function(10)
+
+    async def move_to_station_no(self, station_id, no=0):
+        """
+        自主导航移动到站点
+        :param station_id: 站点id
+        :param no: 任务编号
+        """
+        builder = BinaryPayloadBuilder(byteorder=Endian.Big)
+        builder.add_32bit_int(no)
+        builder.add_16bit_uint(station_id)
+        await self._write_registers(40066, builder.to_registers())
+
+    async def move_to_pose_no(self, x, y, yaw, no=0):
+        """
+        自主导航移动到位置
+        :param x: 单位（毫米）
+        :param y:单位（毫米）
+        :param yaw:单位(1/1000)rad
+        :param no: 任务编号
+        """
+        builder = BinaryPayloadBuilder(byteorder=Endian.Big)
+        builder.add_32bit_int(no)
+        builder.add_32bit_int(x)
+        builder.add_32bit_int(y)
+        builder.add_32bit_int(yaw)
+        await self._write_registers(40057, builder.to_registers())
+
+    async def start_action_task_no(self, action_id, param1, param2, no=0):
+        """
+        执行动作任务
+        :param action_id: 动作任务id
+        :param param1: 参数1
+        :param param2: 参数2
+        :param no: 任务编号
+        """
+        builder = BinaryPayloadBuilder(byteorder=Endian.Big)
+        builder.add_32bit_int(no)
+        builder.add_32bit_int(action_id)
+        builder.add_32bit_int(param1)
+        builder.add_32bit_int(param2)
+        await self._write_registers(40070, builder.to_registers())
+
+    # ------------------ 等待 ------------------
+    async def wait_movement_task_finish(self, no=0, timeout=120, poll_interval_s=None, expected_s=None):
+        """
+        等待移动任务结束（可 await、可取消；取消时会向车辆下发停止运动）
+        :param no: 任务编号
+        :param timeout: 超时时间（秒）
+        :param poll_interval_s: 固定轮询间隔（秒），None 表示自适应
+        :param expected_s: 预计耗时（秒），自适应轮询时在预计完成前后加快
+        :return: [移动任务结果, 移动任务结果值]
+        :raises TimeoutError: 任务超时
+        :raises RuntimeError: 任务错误
+        """
+        try:
+            return await asyncio.wait_for(self._wait_movement(no, self._pacer(poll_interval_s, expected_s)), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"❌ 移动任务超时 - 任务编号: {no}")
+            await self._cancel_quietly()
+            raise TimeoutError(f"移动任务超时: 任务编号{no}, 已等待{timeout}秒")
+        except asyncio.CancelledError:
+            logger.warning(f"⚠️ 等待移动任务被取消，下发停止运动 - 任务编号: {no}")
+            await self._cancel_quietly()
+            raise
+
+    @staticmethod
+    def _pacer(poll_interval_s, expected_s=None):
+        if poll_interval_s is not None:
+            return AdaptivePollInterval(fast_s=poll_interval_s, slow_s=poll_interval_s)
+        return AdaptivePollInterval(expected_s=expected_s)
+
+    async def _poll_until(self, query, pacer, max_consecutive_errors=10):
+        """
+        按 pacer 节奏调用 query 直到其返回非 None；连续通信失败超过阈值时抛出 ConnectionError
+        """
+        start = time.monotonic()
+        consecutive_errors = 0
+        while True:
+            try:
+                result = await query()
+                consecutive_errors = 0
+                if result is not None:
+                    return result
+            except ConnectionError as e:
+                consecutive_errors += 1
+                if consecutive_errors >= max_consecutive_errors:
+                    raise ConnectionError(f"Modbus连接长时间中断，已连续失败{consecutive_errors}次: {e}")
+                logger.warning(f"⚠️ 读取失败 ({consecutive_errors}/{max_consecutive_errors}): {e}，继续尝试...")
+                # 链路熔断时按退避倒计时等待，而不是反复撞上快速失败
+                retry_after = getattr(e, "retry_after_s", None) if isinstance(e, LinkDownError) else None
+                await asyncio.sleep(max(retry_after or 1.0, 0.1))
+                continue
+            await asyncio.sleep(pacer.next_delay(time.monotonic() - start))
+
+    async def _wait_movement(self, no, pacer):
+        async def _query():
+            task = await self.get_movement_task_info()
+            if task.state == MovementState.MT_FINISHED and (no == 0 or task.no == no):
+                if task.result == MovementResult.MT_TASK_ERROR:
+                    raise RuntimeError(f"移动任务执行错误 - 任务编号: {no}, 错误码: {task.result_value}")
+                return [task.result, task.result_value]
+            return None
+        return await self._poll_until(_query, pacer)
+
+    async def wait_action_task_finish(self, no=0, timeout=60, poll_interval_s=None, expected_s=None):
+        """
+        等待动作任务结束（可 await、可取消）
+        :param no: 任务编号, 编号为0时会等待当前任务ID
+        :param timeout: 超时时间（秒）
+        :param poll_interval_s: 固定轮询间隔（秒），None 表示自适应
+        :param expected_s: 预计耗时（秒），自适应轮询时在预计完成前后加快
+        :return: [动作任务结果, 动作任务结果值]
+        :raises TimeoutError: 任务超时
+        :raises RuntimeError: 任务错误
+        """
+        try:
+            return await asyncio.wait_for(self._wait_action(no, self._pacer(poll_interval_s, expected_s)), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"❌ 动作任务超时 - 任务编号: {no}")
+            raise TimeoutError(f"动作任务超时: 任务编号{no}, 已等待{timeout}秒")
+        except asyncio.CancelledError:
+            logger.warning(f"⚠️ 等待动作任务被取消，下发停止运动 - 任务编号: {no}")
+            await self._cancel_quietly()
+            raise
+
+    async def _wait_action(self, no, pacer):
+        async def _query():
+            task = await self.get_action_task_info()
+            if task.state == ActionState.AT_FINISHED and (no == 0 or task.no == no):
+                if task.result == ActionResult.AT_TASK_ERROR:
+                    raise RuntimeError(f"动作任务执行错误 - 任务编号: {no}, 错误码: {task.result_value}")
+                return [task.result, task.result_value]
+            return None
+        return await self._poll_until(_query, pacer)
+
+    async def wait_locate_task_finish(self, timeout=99, poll_interval_s=None):
+        """
+        等待定位完成
+        :return: 定位状态；超时返回 None
+        """
+        pacer = self._pacer(poll_interval_s)
+        start = time.monotonic()
+        seen_locating = False
+        while time.monotonic() - start < timeout:
+            await asyncio.sleep(pacer.next_delay(time.monotonic() - start))
+            state = await self.get_cur_locate_state()
+            # 与同步版一致：未观察到定位过程时至少等待 1 秒再认定“定位正常”
+            if state in (LocationState.LOCATION_STATE_INITIALING, LocationState.LOCATION_STATE_RELOCATING):
+                seen_locating = True
+            elif state == LocationState.LOCATION_STATE_ERROR:
+                return state
+            elif state == LocationState.LOCATION_STATE_RUNNING and (seen_locating or time.monotonic() - start >= 1):
+                return state
+        return None
+
+    async def _cancel_quietly(self):
+        try:
+            # 取消当前协程后仍需把停止指令发出去
+            await asyncio.shield(self.cancel_task())
+        except Exception as e:
+            logger.error(f"❌ 取消任务失败: {e}")
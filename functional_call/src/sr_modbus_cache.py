@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# @File: sr_modbus_cache.py
+# @Describe: 输入寄存器读缓存（按区段声明缓存策略，写线圈/保持寄存器时按影响范围失效）
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    区段读缓存策略
+    ttl_s: 缓存有效期（秒）；math.inf 表示静态（仅写操作/重连时失效），0 表示实时（不缓存）
+    """
+
+    ttl_s: float
+
+    @property
+    def cacheable(self):
+        return self.ttl_s > 0
+
+
+# 静态：版本号、IP 等，只在写操作或重连后失效
+STATIC = CachePolicy(math.inf)
+# 实时：状态、位姿、任务等，每次都读设备
+LIVE = CachePolicy(0.0)
+
+
+def SLOW(ttl_s):
+    """慢变化：缓存 ttl_s 秒"""
+    return CachePolicy(float(ttl_s))
+
+
+class RegisterCache:
+    """
+    输入寄存器缓存，按寄存器地址保存原始值（解码器有状态，每次命中都基于原始值重新构造）。
+    只有请求范围内的每个地址都属于可缓存区段且未过期时才算命中。线程安全。
+
+    读请求与写操作可能并发：写之前发出、失效之后才返回的读结果是旧值，不能写回缓存。
+    读请求发出前用 generation() 取失效代数，put() 时带上，期间被失效过的地址不写入。
+    """
+
+    def __init__(self, ranges, policies):
+        """
+        :param ranges: 区段名 -> (起始地址, 寄存器数量)
+        :param policies: 区段名 -> CachePolicy，未列出的区段视为 LIVE
+        """
+        self._ranges = dict(ranges)
+        self._ttl_by_address = {}
+        for name, policy in policies.items():
+            if not policy.cacheable:
+                continue
+            start, count = self._ranges[name]
+            for address in range(start, start + count):
+                self._ttl_by_address[address] = policy.ttl_s
+        self._values = {}  # 地址 -> (值, 过期时间 time.monotonic())
+        self._generation = 0  # 每次失效加一
+        self._invalidated_at = {}  # 地址 -> 最近一次失效后的代数
+        self._cleared_at = 0  # 最近一次全部清空后的代数
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bypass = 0
+        self._invalidations = 0
+        self._stale_puts = 0
+
+    def cacheable(self, address, count):
+        return all(a in self._ttl_by_address for a in range(address, address + count))
+
+    def get(self, address, count):
+        """
+        :return: 命中时返回寄存器值列表，否则 None（同时计入命中/未命中/直读统计）
+        """
+        if not self.cacheable(address, count):
+            with self._lock:
+                self._bypass += 1
+            return None
+        now = time.monotonic()
+        with self._lock:
+            values = []
+            for a in range(address, address + count):
+                entry = self._values.get(a)
+                if entry is None or entry[1] <= now:
+                    self._misses += 1
+                    return None
+                values.append(entry[0])
+            self._hits += 1
+            return values
+
+    def generation(self):
+        """当前失效代数（读请求发出前获取，传给 put）"""
+        with self._lock:
+            return self._generation
+
+    def put(self, address, values, generation=None):
+        """
+        写入一次读请求的结果，只保留可缓存地址
+        :param generation: 读请求发出前的 generation()；读请求在途期间被失效过的地址不写入。None 表示不检查
+        """
+        now = time.monotonic()
+        with self._lock:
+            stale = False
+            for a, value in zip(range(address, address + len(values)), values):
+                ttl = self._ttl_by_address.get(a)
+                if ttl is None:
+                    continue
+                if generation is not None and max(self._cleared_at, self._invalidated_at.get(a, 0)) > generation:
+                    stale = True
+                    continue
+                self._values[a] = (value, now + ttl)
+            if stale:
+                self._stale_puts += 1
+
+    def invalidate(self, range_names=None):
+        """
+        失效指定区段；range_names 为 None 时清空全部
+        """
+        with self._lock:
+            self._invalidations += 1
+            self._generation += 1
+            if range_names is None:
+                self._values.clear()
+                self._invalidated_at.clear()
+                self._cleared_at = self._generation
+                return
+            for name in range_names:
+                start, count = self._ranges[name]
+                for a in range(start, start + count):
+                    self._values.pop(a, None)
+                    if a in self._ttl_by_address:
+                        self._invalidated_at[a] = self._generation
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "bypass": self._bypass,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "stale_puts": self._stale_puts,
+                "cached_registers": len(self._values),
+            }
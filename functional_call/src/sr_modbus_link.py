@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# @File: sr_modbus_link.py
+# @Describe: Modbus 链路熔断器与后台重连监督线程（链路已知断开时快速失败，重连按指数退避进行）
+
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LINK_CLOSED = "closed"  # 链路正常，请求直接发送
+LINK_OPEN = "open"  # 链路断开，请求快速失败，等待重连
+LINK_HALF_OPEN = "half_open"  # 已重新建立连接，放行一个探测请求
+
+
+class LinkDownError(ConnectionError):
+    """链路已知断开（熔断打开），请求未发送即失败"""
+
+    def __init__(self, message, retry_after_s=None):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+class CircuitBreaker:
+    """
+    连接熔断器（线程安全）
+
+    - closed: 连续失败达到 failure_threshold 次，或调用 trip() 时打开
+    - open: 请求快速失败；退避时间到期后转为 half_open（auto_half_open=True 时由下一个请求触发，
+      否则由外部监督线程重连成功后调用 half_open()）
+    - half_open: 只放行一个探测请求，成功则关闭，失败则重新打开并加倍退避
+    """
+
+    def __init__(self, *, failure_threshold=3, base_backoff_s=0.5, max_backoff_s=30.0, auto_half_open=True, name="modbus"):
+        self._failure_threshold = max(1, int(failure_threshold))
+        self._base_backoff_s = float(base_backoff_s)
+        self._max_backoff_s = float(max_backoff_s)
+        self._auto_half_open = auto_half_open
+        self.name = name
+        self._cond = threading.Condition()
+        self._state = LINK_CLOSED
+        self._consecutive_failures = 0
+        self._open_count = 0  # 本次断开以来的重连尝试次数，决定退避时长
+        self._retry_at = 0.0  # time.monotonic()
+        self._probe_in_flight = False
+        self._last_error = None
+        self._opened_at = None
+        self._trips = 0
+        self._recoveries = 0
+        self._fast_failures = 0
+
+    @property
+    def state(self):
+        return self._state
+
+    def _backoff_s(self):
+        backoff = min(self._max_backoff_s, self._base_backoff_s * (2 ** max(self._open_count - 1, 0)))
+        # 加一点抖动，避免整个车队同时重连
+        return backoff * random.uniform(0.8, 1.2)
+
+    def _open(self, error):
+        """调用方需持有 self._cond"""
+        if self._state != LINK_OPEN:
+            self._trips += 1 if self._state == LINK_CLOSED else 0
+            if self._opened_at is None:
+                self._opened_at = time.time()
+            logger.warning(f"⚠️ Modbus链路熔断打开: {self.name}, 原因: {error}")
+        self._state = LINK_OPEN
+        self._open_count += 1
+        self._probe_in_flight = False
+        self._retry_at = time.monotonic() + self._backoff_s()
+        self._cond.notify_all()
+
+    def check(self):
+        """
+        请求发送前调用
+        :raises LinkDownError: 熔断打开（或半开且已有探测请求在途）
+        """
+        with self._cond:
+            if self._state == LINK_CLOSED:
+                return
+            now = time.monotonic()
+            if self._state == LINK_OPEN and self._auto_half_open and now >= self._retry_at:
+                self._state = LINK_HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == LINK_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self._fast_failures += 1
+            retry_after = max(0.0, self._retry_at - now) if self._state == LINK_OPEN else None
+            raise LinkDownError(
+                f"Modbus链路不可用({self._state}): {self.name}, 上次错误: {self._last_error}",
+                retry_after_s=retry_after,
+            )
+
+    def record_success(self):
+        with self._cond:
+            if self._state != LINK_CLOSED:
+                logger.info(f"✅ Modbus链路恢复: {self.name}")
+                self._recoveries += 1
+            self._state = LINK_CLOSED
+            self._consecutive_failures = 0
+            self._open_count = 0
+            self._probe_in_flight = False
+            self._opened_at = None
+            self._cond.notify_all()
+
+    def record_failure(self, error):
+        """记录一次链路层失败（超时、断开、无响应；从站异常响应不算）"""
+        with self._cond:
+            self._last_error = str(error)
+            self._consecutive_failures += 1
+            if self._state == LINK_HALF_OPEN or self._consecutive_failures >= self._failure_threshold:
+                self._open(error)
+
+    def trip(self, error):
+        """链路确定断开（连接被拒绝、socket 已关闭），立即打开"""
+        with self._cond:
+            self._last_error = str(error)
+            self._consecutive_failures += 1
+            self._open(error)
+
+    def half_open(self):
+        """外部重连成功后调用：放行一个探测请求"""
+        with self._cond:
+            if self._state == LINK_OPEN:
+                self._state = LINK_HALF_OPEN
+                self._probe_in_flight = False
+                self._cond.notify_all()
+
+    def seconds_until_retry(self):
+        with self._cond:
+            if self._state != LINK_OPEN:
+                return 0.0
+            return max(0.0, self._retry_at - time.monotonic())
+
+    def wait_for_state(self, states, timeout_s):
+        """
+        阻塞等待熔断器进入 states 之一
+        :return: 是否在超时前进入
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._state in states, timeout=timeout_s)
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in_s": round(max(0.0, self._retry_at - time.monotonic()), 2) if self._state == LINK_OPEN else 0.0,
+                "down_since": self._opened_at,
+                "last_error": self._last_error,
+                "trips": self._trips,
+                "recoveries": self._recoveries,
+                "fast_failures": self._fast_failures,
+            }
+
+
+class ModbusLinkSupervisor:
+    """
+    后台重连线程：熔断打开后按退避时间调用 reconnect_func，成功则把熔断器置为 half_open。
+    调用方线程从不执行重连，只会快速失败。
+    """
+
+    def __init__(self, breaker, reconnect_func):
+        self._breaker = breaker
+        self._reconnect_func = reconnect_func
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"modbus-link-{self._breaker.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s=2.0):
+        self._stop.set()
+        # 唤醒可能在等待状态变化的线程
+        self._breaker.half_open()
+        if self._thread:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._breaker.wait_for_state((LINK_OPEN,), timeout_s=1.0):
+                continue
+            delay = self._breaker.seconds_until_retry()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            if self._breaker.state != LINK_OPEN:
+                continue
+            try:
+                ok = self._reconnect_func()
+            except Exception as e:
+                ok = False
+                logger.debug(f"重连异常: {self._breaker.name}, {e}")
+            if ok:
+                logger.info(f"🔌 Modbus重连成功，等待探测请求确认: {self._breaker.name}")
+                self._breaker.half_open()
+            else:
+                self._breaker.trip("重连失败")
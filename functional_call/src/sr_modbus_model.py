@@ -5,7 +5,8 @@
 # @Date: 2021/1/20
 # @Describe:
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict, Optional
 
 from enum import Enum
 
@@ -206,3 +207,34 @@ class MissionRegisters:
     register5: int = 0  # uint
     register6: int = 0  # uint
     register7: int = 0  # uint
+
+
+@dataclass()
+class RobotSnapshot:
+    """一次合并块读得到的状态快照（未请求的字段为 None）"""
+    timestamp: float = 0.0  # 读取完成时的系统时间戳
+    read_count: int = 0  # 本次快照实际发出的读请求数
+    system_state: Optional[SystemState] = None  # 系统状态
+    locate_state: Optional[LocationState] = None  # 定位状态
+    pose: Optional[Pose] = None  # 位姿
+    pose_confidence: Optional[int] = None  # 位姿置信度，单位：0.01%
+    station_no: Optional[int] = None  # 当前站点编号
+    operation_state: Optional[OperationState] = None  # 操作状态
+    velocity: Optional[Speed] = None  # 速度
+    DI_state: Optional[int] = None  # DI状态
+    DO_state: Optional[int] = None  # DO状态
+    hardware_error_code: Optional[int] = None  # 硬件错误码
+    last_system_error: Optional[int] = None  # 系统上一次错误
+    battery_info: Optional[BatteryInfo] = None  # 电池信息
+    total_service: Optional[TotalService] = None  # 服务周期
+    system_cur_time: Optional[int] = None  # 系统当前时间，Linux时间戳
+    communication_ip: Optional[str] = None  # 对外通信ip地址
+    system_version: Optional[str] = None  # 系统版本号
+    pgv_scan: Optional[PGVScanDmcode] = None  # PGV扫描二维码
+    map_byte_code: Optional[int] = None  # 当前地图名前两个字节编码
+    volume: Optional[int] = None  # 当前系统音量
+    hardware_error_codes: Optional[HardwareErrorCode] = None  # 硬件错误码1-5
+    mission_task: Optional[MissionTask] = None  # mission运行状态
+    movement_task: Optional[MovementTask] = None  # 移动任务
+    action_task: Optional[ActionTask] = None  # 动作任务
+    decode_errors: Dict[str, str] = field(default_factory=dict)  # 解码失败的字段 -> 错误信息
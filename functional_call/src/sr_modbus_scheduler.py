@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# @File: sr_modbus_scheduler.py
+# @Describe: Modbus 请求调度器：在后台事件循环上流水线化读请求，控制指令优先，每个请求带截止时间
+
+import asyncio
+import concurrent.futures
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from .sr_modbus_async import AsyncSRModbusSdk
+
+logger = logging.getLogger(__name__)
+
+# 请求优先级（数值越小越优先）
+PRIORITY_CONTROL = 0  # 停止运动 / 急停：不排队，走独立控制连接
+PRIORITY_COMMAND = 1  # 下发导航、动作、充电等指令
+PRIORITY_QUERY = 2  # 语音 / 工具的实时查询
+PRIORITY_POLL = 3  # 后台状态轮询
+
+PRIORITY_NAMES = {
+    PRIORITY_CONTROL: "control",
+    PRIORITY_COMMAND: "command",
+    PRIORITY_QUERY: "query",
+    PRIORITY_POLL: "poll",
+}
+
+# 各优先级默认截止时间（秒），None 表示不限（已下发的指令不能半途放弃）
+DEFAULT_DEADLINES = {
+    PRIORITY_CONTROL: None,
+    PRIORITY_COMMAND: None,
+    PRIORITY_QUERY: 3.0,
+    PRIORITY_POLL: 2.0,
+}
+
+
+class RequestDeadlineExceeded(TimeoutError):
+    """请求在截止时间前未完成（排队过久或从站响应过慢）"""
+
+
+@dataclass(order=True)
+class _Request:
+    priority: int
+    seq: int
+    func: object = field(compare=False)
+    deadline: float = field(compare=False, default=None)  # time.monotonic()
+    enqueued_at: float = field(compare=False, default=0.0)
+    future: concurrent.futures.Future = field(compare=False, default=None)
+
+
+class PipelinedModbusClient:
+    """
+    基于 AsyncSRModbusSdk 的同步调用接口（线程安全，调用方无需加锁）。
+
+    - 后台线程运行事件循环，同时在途的读请求最多 max_in_flight 个（按事务号复用同一 TCP 连接）
+    - 排队请求按优先级出队：指令 > 实时查询 > 后台轮询
+    - 停止运动 / 急停不进入队列，经独立的控制连接立即发送，不受数据连接上的重连或慢读影响
+    - 每个请求带截止时间，排队超时的请求不再发送
+    """
+
+    def __init__(self, *, unit_id=17, timeout_s=3.0, max_in_flight=4, deadlines=None, control_channel=True):
+        self._unit_id = unit_id
+        self._timeout_s = timeout_s
+        self._max_in_flight = max(1, int(max_in_flight))
+        self._deadlines = dict(DEFAULT_DEADLINES, **(deadlines or {}))
+        self._control_channel = control_channel
+        self._sdk = AsyncSRModbusSdk(unit_id=unit_id, timeout_s=timeout_s)
+        self._control_sdk = None
+        self._loop = None
+        self._thread = None
+        self._queue = None
+        self._window = None
+        self._dispatcher = None
+        self._seq = itertools.count()
+        self._stats_lock = threading.Lock()
+        self._stats = {name: {"submitted": 0, "completed": 0, "failed": 0, "expired": 0, "max_wait_ms": 0.0}
+                       for name in PRIORITY_NAMES.values()}
+
+    # ------------------ 生命周期 ------------------
+    def _ensure_loop(self):
+        if self._loop is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def _run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.call_soon(started.set)
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, name="modbus-scheduler", daemon=True)
+        self._thread.start()
+        started.wait()
+        asyncio.run_coroutine_threadsafe(self._start_dispatcher(), self._loop).result()
+
+    async def _start_dispatcher(self):
+        self._queue = asyncio.PriorityQueue()
+        self._window = asyncio.Semaphore(self._max_in_flight)
+        self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    def connect_tcp(self, ip, port=502):
+        """
+        连接车辆（数据连接 + 可选的控制连接）
+        :return: 数据连接是否成功
+        """
+        self._ensure_loop()
+        ok = asyncio.run_coroutine_threadsafe(self._sdk.connect_tcp(ip, port), self._loop).result()
+        if self._control_channel:
+            control = AsyncSRModbusSdk(unit_id=self._unit_id, timeout_s=self._timeout_s)
+            if asyncio.run_coroutine_threadsafe(control.connect_tcp(ip, port), self._loop).result():
+                self._control_sdk = control
+            else:
+                logger.warning("⚠️ 控制连接建立失败，停止/急停指令将复用数据连接（仍不排队）")
+        return ok
+
+    def close(self):
+        if self._loop is None:
+            return
+
+        async def _shutdown():
+            if self._dispatcher is not None:
+                self._dispatcher.cancel()
+            while not self._queue.empty():
+                request = self._queue.get_nowait()
+                if request.future.set_running_or_notify_cancel():
+                    request.future.set_exception(ConnectionError("Modbus调度器已关闭"))
+            await self._sdk.close()
+            if self._control_sdk is not None:
+                await self._control_sdk.close()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), self._loop).result(timeout=5)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop.close()
+            self._loop = None
+
+    # ------------------ 调度 ------------------
+    def submit(self, func, *, priority=PRIORITY_QUERY, deadline_s=None):
+        """
+        提交请求
+        :param func: 协程函数 func(sdk: AsyncSRModbusSdk) -> 结果
+        :param priority: PRIORITY_*
+        :param deadline_s: 截止时间（秒，从提交时算起），缺省按优先级取 DEFAULT_DEADLINES
+        :return: concurrent.futures.Future
+        """
+        self._ensure_loop()
+        if deadline_s is None:
+            deadline_s = self._deadlines.get(priority)
+        now = time.monotonic()
+        request = _Request(
+            priority=priority,
+            seq=next(self._seq),
+            func=func,
+            deadline=now + deadline_s if deadline_s is not None else None,
+            enqueued_at=now,
+            future=concurrent.futures.Future(),
+        )
+        self._count(priority, "submitted")
+        if priority == PRIORITY_CONTROL:
+            asyncio.run_coroutine_threadsafe(self._run_control(request), self._loop)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, request)
+        return request.future
+
+    def call(self, func, *, priority=PRIORITY_QUERY, deadline_s=None):
+        """同步提交并等待结果"""
+        future = self.submit(func, priority=priority, deadline_s=deadline_s)
+        if deadline_s is None:
+            deadline_s = self._deadlines.get(priority)
+        try:
+            # 截止时间由事件循环一侧强制执行，这里多留一点余量
+            return future.result(timeout=deadline_s + 1.0 if deadline_s is not None else None)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise RequestDeadlineExceeded(f"Modbus请求超过截止时间 ({deadline_s}s)")
+
+    async def _dispatch(self):
+        while True:
+            # 先占用在途窗口再出队，保证出队时总是取当前优先级最高的请求
+            await self._window.acquire()
+            request = await self._queue.get()
+            asyncio.ensure_future(self._run(request, self._sdk, release_window=True))
+
+    async def _run_control(self, request):
+        control = self._control_sdk
+        if control is not None:
+            func = request.func
+
+            async def _with_fallback(sdk):
+                # 控制连接不可用（熔断或断开）时改走数据连接（仍不排队）；停止/急停写线圈可安全重发
+                try:
+                    return await func(control)
+                except ConnectionError as e:
+                    logger.warning(f"⚠️ 控制连接不可用，改走数据连接: {e}")
+                    return await func(sdk)
+            request.func = _with_fallback
+        await self._run(request, self._sdk, release_window=False)
+
+    async def _run(self, request, sdk, release_window):
+        name = PRIORITY_NAMES.get(request.priority, str(request.priority))
+        try:
+            if not request.future.set_running_or_notify_cancel():
+                return
+            wait_ms = (time.monotonic() - request.enqueued_at) * 1000
+            with self._stats_lock:
+                stats = self._stats[name]
+                stats["max_wait_ms"] = max(stats["max_wait_ms"], round(wait_ms, 1))
+            try:
+                if request.deadline is None:
+                    result = await request.func(sdk)
+                else:
+                    remaining = request.deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RequestDeadlineExceeded(f"Modbus请求排队超时 ({name}, 等待 {wait_ms:.0f}ms)")
+                    result = await asyncio.wait_for(request.func(sdk), timeout=remaining)
+            except RequestDeadlineExceeded as e:
+                self._count(request.priority, "expired")
+                request.future.set_exception(e)
+            except asyncio.TimeoutError:
+                self._count(request.priority, "expired")
+                request.future.set_exception(RequestDeadlineExceeded(f"Modbus请求超过截止时间 ({name})"))
+            except Exception as e:
+                self._count(request.priority, "failed")
+                request.future.set_exception(e)
+            else:
+                self._count(request.priority, "completed")
+                request.future.set_result(result)
+        finally:
+            if release_window:
+                self._window.release()
+
+    def _count(self, priority, key):
+        with self._stats_lock:
+            self._stats[PRIORITY_NAMES.get(priority, str(priority))][key] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            stats = {name: dict(v) for name, v in self._stats.items()}
+        return {
+            "max_in_flight": self._max_in_flight,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": self._sdk.transport.in_flight() if self._sdk.transport else 0,
+            "control_channel": self._control_sdk is not None,
+            "by_priority": stats,
+        }
+
+    def link_state(self):
+        """数据连接的熔断器状态，附带控制连接状态"""
+        state = self._sdk.link_state() or {}
+        if self._control_sdk is not None:
+            state = dict(state, control=self._control_sdk.link_state())
+        return state
+
+    # ------------------ 与 SRModbusSdk 对齐的同步接口 ------------------
+    def read_snapshot(self, fields=None, *, priority=PRIORITY_QUERY):
+        return self.call(lambda sdk: sdk.read_snapshot(fields), priority=priority)
+
+    def read_state(self, fields, *, priority=PRIORITY_QUERY):
+        """
+        快照块读与充电离散量并发在途，一个往返内返回
+        :return: (RobotSnapshot, 是否充电)
+        """
+        async def _read(sdk):
+            snapshot, charging = await asyncio.gather(sdk.read_snapshot(fields), sdk.is_charge())
+            return snapshot, bool(charging)
+        return self.call(_read, priority=priority)
+
+    def is_charge(self, *, priority=PRIORITY_QUERY):
+        return self.call(lambda sdk: sdk.is_charge(), priority=priority)
+
+    def cache_stats(self):
+        return self._sdk.cache_stats()
+
+    def cancel_task(self):
+        """停止运动（控制优先级）"""
+        return self.call(lambda sdk: sdk.cancel_task(), priority=PRIORITY_CONTROL)
+
+    def pause_task(self):
+        return self.call(lambda sdk: sdk.pause_task(), priority=PRIORITY_CONTROL)
+
+    def continue_task(self):
+        return self.call(lambda sdk: sdk.continue_task(), priority=PRIORITY_CONTROL)
+
+    def trigger_emergency(self):
+        """触发急停（控制优先级）"""
+        return self.call(lambda sdk: sdk.trigger_emergency(), priority=PRIORITY_CONTROL)
+
+    def cancel_emergency(self):
+        return self.call(lambda sdk: sdk.cancel_emergency(), priority=PRIORITY_CONTROL)
+
+    def charge(self):
+        return self.call(lambda sdk: sdk.charge(), priority=PRIORITY_COMMAND)
+
+    def stop_charge(self):
+        return self.call(lambda sdk: sdk.stop_charge(), priority=PRIORITY_COMMAND)
+
+    def move_to_station_no(self, station_id, no=0):
+        return self.call(lambda sdk: sdk.move_to_station_no(station_id, no), priority=PRIORITY_COMMAND)
+
+    def move_to_pose_no(self, x, y, yaw, no=0):
+        return self.call(lambda sdk: sdk.move_to_pose_no(x, y, yaw, no), priority=PRIORITY_COMMAND)
+
+    def start_action_task_no(self, action_id, param1, param2, no=0):
+        return self.call(lambda sdk: sdk.start_action_task_no(action_id, param1, param2, no),
+                         priority=PRIORITY_COMMAND)
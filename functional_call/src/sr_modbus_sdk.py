@@ -12,76 +12,417 @@ import time
 import binascii
 import logging
 from .sr_modbus_model import *
+from .sr_modbus_wait import AdaptivePollInterval
+from .sr_modbus_cache import RegisterCache, STATIC, SLOW
+from .sr_modbus_link import CircuitBreaker, LinkDownError, ModbusLinkSupervisor
+from core.metrics import counter, histogram
 
 # 创建logger
 logger = logging.getLogger(__name__)
 
+# 指标：按连接地址打标签，子指标在连接时取好，请求路径上只做累加
+_MODBUS_SECONDS = histogram("modbus_request_seconds", "Modbus 单次请求（含重试）耗时", ("robot",))
+_MODBUS_ERRORS = counter("modbus_request_errors_total", "Modbus 请求失败次数（link: 链路故障, slave: 从站异常响应, down: 熔断快速失败）", ("robot", "kind"))
+_MODBUS_RECONNECTS = counter("modbus_reconnects_total", "Modbus 后台重连次数", ("robot", "result"))
+
+# 单次读输入寄存器的最大数量（Modbus 协议上限）
+MAX_READ_REGISTERS = 125
+# 合并块读时允许跨越的最大空洞寄存器数
+DEFAULT_MAX_GAP = 16
+# 异常响应中表示链路层故障（而非从站拒绝）的关键字
+_LINK_ERROR_KEYWORDS = ("Incomplete message", "0 received", "No response", "Connection")
+
+# 输入寄存器区段：区段名 -> (起始地址, 寄存器数量)
+INPUT_REGISTER_RANGES = {
+    "system_state": (30001, 1),
+    "locate_state": (30002, 1),
+    "pose": (30003, 6),
+    "pose_confidence": (30009, 1),
+    "station_no": (30015, 1),
+    "operation_state": (30016, 1),
+    "velocity": (30017, 3),
+    "DI_state": (30021, 1),
+    "DO_state": (30022, 1),
+    "hardware_error_code": (30025, 2),
+    "last_system_error": (30027, 2),
+    "battery_info": (30033, 6),
+    "battery_static": (30039, 2),  # 循环次数、标称容量
+    "total_service": (30041, 6),
+    "system_cur_time": (30047, 2),
+    "communication_ip": (30049, 4),
+    "system_version": (30053, 3),
+    "pgv_scan": (30057, 8),
+    "map_byte_code": (30065, 1),
+    "volume": (30070, 1),
+    "hardware_error_codes": (30081, 10),
+    "mission_task": (30097, 6),
+    "movement_task": (30113, 5),
+    "movement_result": (30122, 3),
+    "action_task": (30129, 12),
+}
+
+# 区段读缓存策略，未列出的区段为 LIVE（每次实时读取）
+INPUT_REGISTER_CACHE_POLICY = {
+    "communication_ip": STATIC,
+    "system_version": STATIC,
+    # 其它客户端（如车载界面）也可能修改，因此不是永久缓存
+    "map_byte_code": SLOW(30),
+    "volume": SLOW(30),
+    "battery_static": SLOW(300),
+    "total_service": SLOW(60),
+}
+
+# 写操作影响的缓存区段：地址 -> 区段名元组，None 表示清空全部缓存
+COIL_CACHE_INVALIDATION = {
+    14: None,  # 系统复位
+}
+HOLDING_CACHE_INVALIDATION = {
+    40028: ("volume",),
+    40029: ("map_byte_code",),
+}
+
+
+def _decoder_from_registers(registers):
+    return BinaryPayloadDecoder.fromRegisters(registers, byteorder=Endian.Big, wordorder=Endian.Big)
+
+
+def _decode_pose(decoder):
+    pose = Pose()
+    pose.x = decoder.decode_32bit_int()
+    pose.y = decoder.decode_32bit_int()
+    pose.yaw = decoder.decode_32bit_int()
+    return pose
+
+
+def _decode_velocity(decoder):
+    speed = Speed()
+    speed.x_dir_linear_velocity = decoder.decode_16bit_int()
+    speed.y_dir_linear_velocity = decoder.decode_16bit_int()
+    speed.rotate_velocity = decoder.decode_16bit_int()
+    return speed
+
+
+def _decode_battery_info(decoder, static_decoder):
+    battery_info = BatteryInfo()
+    battery_info.voltage = decoder.decode_16bit_uint()
+    battery_info.current = decoder.decode_16bit_int()
+    battery_info.temperature = decoder.decode_16bit_int()
+    battery_info.remain_time = decoder.decode_16bit_uint()
+    battery_info.percentage_electricity = decoder.decode_16bit_uint()
+    battery_info.state = BatteryState(decoder.decode_16bit_uint())
+    battery_info.use_cycles = static_decoder.decode_16bit_uint()
+    battery_info.nominal_capacity = static_decoder.decode_16bit_uint()
+    return battery_info
+
+
+def _decode_total_service(decoder):
+    total_service = TotalService()
+    total_service.total_mileage = decoder.decode_32bit_uint()
+    total_service.total_startup_time = decoder.decode_32bit_uint()
+    total_service.total_startup_times = decoder.decode_32bit_uint()
+    return total_service
+
+
+def _decode_dotted(count):
+    def _decode(decoder):
+        return ".".join(str(decoder.decode_16bit_uint()) for _ in range(count))
+    return _decode
+
+
+def _decode_pgv_scan(decoder):
+    pvg_scan_dmcode = PGVScanDmcode()
+    pvg_scan_dmcode.dmcode_id = decoder.decode_32bit_int()
+    pvg_scan_dmcode.x = decoder.decode_32bit_int()
+    pvg_scan_dmcode.y = decoder.decode_32bit_int()
+    pvg_scan_dmcode.yaw = decoder.decode_32bit_int()
+    return pvg_scan_dmcode
+
+
+def _decode_hardware_error_codes(decoder):
+    hardware_error_code = HardwareErrorCode()
+    hardware_error_code.error_code1 = decoder.decode_32bit_uint()
+    hardware_error_code.error_code2 = decoder.decode_32bit_uint()
+    hardware_error_code.error_code3 = decoder.decode_32bit_uint()
+    hardware_error_code.error_code4 = decoder.decode_32bit_uint()
+    hardware_error_code.error_code5 = decoder.decode_32bit_uint()
+    return hardware_error_code
+
+
+def _decode_mission_task(decoder):
+    mission_task = MissionTask()
+    mission_task.mission_id = decoder.decode_32bit_uint()
+    mission_task.mission_state = MissionStatus(decoder.decode_16bit_uint())
+    mission_task.mission_result = MissionResult(decoder.decode_16bit_uint())
+    mission_task.mission_error_code = decoder.decode_32bit_uint()
+    return mission_task
+
+
+def _decode_movement_task(decoder, result_decoder):
+    movement_task = MovementTask()
+    movement_task.state = MovementState(decoder.decode_16bit_uint())
+    movement_task.no = decoder.decode_32bit_int()
+    movement_task.target_station = decoder.decode_16bit_uint()
+    movement_task.path_no = decoder.decode_16bit_uint()
+    movement_task.result = MovementResult(result_decoder.decode_16bit_uint())
+    movement_task.result_value = result_decoder.decode_32bit_uint()
+    return movement_task
+
+
+def _decode_action_task(decoder):
+    action_task = ActionTask()
+    action_task.state = ActionState(decoder.decode_16bit_uint())
+    action_task.no = decoder.decode_32bit_int()
+    action_task.id = decoder.decode_32bit_int()
+    action_task.param0 = decoder.decode_32bit_int()
+    action_task.param1 = decoder.decode_32bit_int()
+    action_task.result = ActionResult(decoder.decode_16bit_uint())
+    action_task.result_value = decoder.decode_32bit_int()
+    return action_task
+
+
+# 快照字段：字段名（与 RobotSnapshot 属性同名） -> (依赖的寄存器区段, 解码函数)
+SNAPSHOT_FIELDS = {
+    "system_state": (("system_state",), lambda d: SystemState(d.decode_16bit_uint())),
+    "locate_state": (("locate_state",), lambda d: LocationState(d.decode_16bit_uint())),
+    "pose": (("pose",), _decode_pose),
+    "pose_confidence": (("pose_confidence",), lambda d: d.decode_16bit_uint()),
+    "station_no": (("station_no",), lambda d: d.decode_16bit_uint()),
+    "operation_state": (("operation_state",), lambda d: OperationState(d.decode_16bit_uint())),
+    "velocity": (("velocity",), _decode_velocity),
+    "DI_state": (("DI_state",), lambda d: d.decode_16bit_uint()),
+    "DO_state": (("DO_state",), lambda d: d.decode_16bit_uint()),
+    "hardware_error_code": (("hardware_error_code",), lambda d: d.decode_32bit_uint()),
+    "last_system_error": (("last_system_error",), lambda d: d.decode_32bit_uint()),
+    "battery_info": (("battery_info", "battery_static"), _decode_battery_info),
+    "total_service": (("total_service",), _decode_total_service),
+    "system_cur_time": (("system_cur_time",), lambda d: d.decode_32bit_uint()),
+    "communication_ip": (("communication_ip",), _decode_dotted(4)),
+    "system_version": (("system_version",), _decode_dotted(3)),
+    "pgv_scan": (("pgv_scan",), _decode_pgv_scan),
+    "map_byte_code": (("map_byte_code",), lambda d: d.decode_16bit_uint()),
+    "volume": (("volume",), lambda d: d.decode_16bit_uint()),
+    "hardware_error_codes": (("hardware_error_codes",), _decode_hardware_error_codes),
+    "mission_task": (("mission_task",), _decode_mission_task),
+    "movement_task": (("movement_task", "movement_result"), _decode_movement_task),
+    "action_task": (("action_task",), _decode_action_task),
+}
+
+
+def plan_block_reads(ranges, max_registers=MAX_READ_REGISTERS, max_gap=DEFAULT_MAX_GAP):
+    """
+    把若干寄存器区段合并为尽量少的连续块读请求
+    :param ranges: [(起始地址, 寄存器数量), ...]
+    :param max_registers: 单次读取的最大寄存器数
+    :param max_gap: 允许跨越的最大空洞寄存器数（空洞部分会被读回但不解码）
+    :return: [(起始地址, 寄存器数量), ...]，按地址升序
+    """
+    blocks = []
+    for start, count in sorted(set(ranges)):
+        if count > max_registers:
+            raise ValueError(f"寄存器区段过长: 地址{start}, 数量{count} > {max_registers}")
+        end = start + count
+        if blocks:
+            block_start, block_end = blocks[-1]
+            if start - block_end <= max_gap and max(end, block_end) - block_start <= max_registers:
+                blocks[-1] = (block_start, max(end, block_end))
+                continue
+        blocks.append((start, end))
+    return [(start, end - start) for start, end in blocks]
+
+
+def _plan_snapshot(fields, cache=None, max_registers=MAX_READ_REGISTERS, max_gap=DEFAULT_MAX_GAP):
+    """
+    规划快照读取：缓存命中的区段直接取值，其余区段合并为块读
+    :return: (字段名列表, 已从缓存取得的寄存器 {地址: 值}, 需要读取的块 [(地址, 数量), ...])
+    """
+    names = list(SNAPSHOT_FIELDS) if fields is None else list(fields)
+    unknown = [n for n in names if n not in SNAPSHOT_FIELDS]
+    if unknown:
+        raise ValueError(f"未知的快照字段: {unknown}")
+
+    registers = {}
+    to_read = []
+    for r in sorted({r for n in names for r in SNAPSHOT_FIELDS[n][0]}):
+        address, register_num = INPUT_REGISTER_RANGES[r]
+        cached = cache.get(address, register_num) if cache is not None else None
+        if cached is None:
+            to_read.append((address, register_num))
+        else:
+            registers.update(zip(range(address, address + register_num), cached))
+    blocks = plan_block_reads(to_read, max_registers=max_registers, max_gap=max_gap)
+    return names, registers, blocks
+
+
+def _decode_snapshot(names, registers, read_count):
+    """
+    从 {地址: 值} 解码快照字段，单个字段出现未定义的枚举值时不影响整个快照
+    """
+    snapshot = RobotSnapshot(timestamp=time.time(), read_count=read_count)
+    for name in names:
+        field_ranges, decode = SNAPSHOT_FIELDS[name]
+        decoders = []
+        for r in field_ranges:
+            address, register_num = INPUT_REGISTER_RANGES[r]
+            decoders.append(_decoder_from_registers(
+                [registers[a] for a in range(address, address + register_num)]))
+        try:
+            setattr(snapshot, name, decode(*decoders))
+        except ValueError as e:
+            logger.warning(f"⚠️ 快照字段解码失败: {name}, 错误: {e}")
+            snapshot.decode_errors[name] = str(e)
+    return snapshot
+
 
 class SRModbusSdk:
-    def __init__(self):
+    def __init__(self, retry_count=3, failure_threshold=3, max_backoff_s=30.0):
+        """
+        :param retry_count: 单次请求的尝试次数（唯一的重试预算；链路断开时不再重试）
+        :param failure_threshold: 连续链路失败多少次后熔断
+        :param max_backoff_s: 后台重连的最大退避时间（秒）
+        """
         self._client = None
         self._ip = None
         self._port = None
+        self._retry_count = max(1, int(retry_count))
+        self._cache = RegisterCache(INPUT_REGISTER_RANGES, INPUT_REGISTER_CACHE_POLICY)
+        self._breaker = CircuitBreaker(failure_threshold=failure_threshold, max_backoff_s=max_backoff_s,
+                                       auto_half_open=False)
+        self._supervisor = ModbusLinkSupervisor(self._breaker, self._reconnect)
+        # 连接建立前的占位，不导出
+        self._m_seconds = _MODBUS_SECONDS.unbound()
+        self._m_errors = {kind: _MODBUS_ERRORS.unbound() for kind in ("link", "slave", "down")}
+        self._m_reconnects = {result: _MODBUS_RECONNECTS.unbound() for result in ("ok", "failed")}
+
+    def _bind_metrics(self, robot):
+        self._m_seconds = _MODBUS_SECONDS.labels(robot)
+        self._m_errors = {kind: _MODBUS_ERRORS.labels(robot, kind) for kind in ("link", "slave", "down")}
+        self._m_reconnects = {result: _MODBUS_RECONNECTS.labels(robot, result) for result in ("ok", "failed")}
 
     def connect_tcp(self, ip, port=502):
         """
-        用modbus-TCP连车辆
+        用modbus-TCP连车辆；连接失败时由后台线程按退避重连
         :param ip: 车辆ip
         :param port: 车辆端口号
-        :return:
+        :return: 是否连接成功
         """
         self._ip = ip
         self._port = port
+        # 可能连到了另一台车，静态缓存不再可信
+        self._cache.invalidate()
         self._client = ModbusTcpClient(host=ip, port=port)
         ret = self._client.connect()
+        self._breaker.name = f"{ip}:{port}"
+        self._bind_metrics(f"{ip}:{port}")
+        self._supervisor.start()
         if ret:
             logger.info(f"✅ Modbus TCP连接成功: {ip}:{port}")
+            self._breaker.record_success()
         else:
-            logger.error(f"❌ Modbus TCP连接失败: {ip}:{port}")
-            return
+            logger.error(f"❌ Modbus TCP连接失败: {ip}:{port}，后台重连中")
+            self._breaker.trip("连接失败")
+        return bool(ret)
     
-    def _check_and_reconnect(self, max_retries=3):
+    def close(self):
+        """停止后台重连并断开连接"""
+        self._supervisor.stop()
+        if self._client is not None and hasattr(self._client, 'close'):
+            self._client.close()
+
+    def cache_stats(self):
+        """读缓存命中统计：hits/misses 只统计可缓存区段，bypass 为实时区段的直读次数"""
+        return self._cache.stats()
+
+    def clear_cache(self):
+        self._cache.invalidate()
+
+    def link_state(self):
+        """链路熔断器状态：closed / open / half_open，以及连续失败次数、下次重连倒计时等"""
+        return self._breaker.snapshot()
+
+    def _reconnect(self):
+        """后台重连线程调用：新建连接成功后再替换，避免调用方拿到半初始化的客户端"""
+        if self._ip is None or self._port is None:
+            # RTU：重新打开串口
+            ok = bool(self._client is not None and self._client.connect())
+            self._m_reconnects["ok" if ok else "failed"].inc()
+            return ok
+        client = ModbusTcpClient(host=self._ip, port=self._port)
+        if not client.connect():
+            client.close()
+            self._m_reconnects["failed"].inc()
+            return False
+        self._m_reconnects["ok"].inc()
+        old, self._client = self._client, client
+        if old is not None and hasattr(old, 'close'):
+            old.close()
+        # 可能是车辆重启，静态缓存不再可信
+        self._cache.invalidate()
+        return True
+
+    def _check_link(self):
         """
-        检查连接状态，如果断开则尝试重连
-        :param max_retries: 最大重试次数
-        :return: True if connected, False otherwise
+        请求前检查链路：熔断打开或 socket 已断开时快速失败，交给后台线程重连
+        （pymodbus 在 socket 断开时会在调用方线程里同步重连，这里必须拦住）
+        :raises LinkDownError:
         """
         if self._client is None:
-            logger.error("❌ Modbus客户端未初始化")
-            return False
-        
-        # 检查连接状态
-        if hasattr(self._client, 'is_socket_open') and self._client.is_socket_open():
-            return True
-        
-        # 连接已断开，尝试重连
-        if self._ip is None or self._port is None:
-            logger.error("❌ 无法重连：未保存连接信息")
-            return False
-        
-        logger.warning(f"⚠️ Modbus连接已断开，尝试重连... ({self._ip}:{self._port})")
-        for i in range(max_retries):
+            raise ConnectionError("Modbus客户端未初始化")
+        self._breaker.check()
+        if hasattr(self._client, 'is_socket_open') and not self._client.is_socket_open():
+            self._breaker.trip("socket已断开")
+            raise LinkDownError(f"Modbus连接已断开，后台重连中: {self._ip}:{self._port}")
+
+    def _execute(self, request, desc, retry_count=None):
+        """
+        经熔断器发送一次 Modbus 请求（读写共用）
+        - 链路已知断开时立即抛出 LinkDownError，调用方线程不做重连、不睡眠等待
+        - 从站异常响应（如 SlaveFailure）说明链路正常，在 retry_count 预算内重试
+        - 链路层错误（超时、断开）计入熔断器；熔断打开后剩余预算直接放弃
+        :param request: func(client) -> pymodbus 响应
+        :param desc: 日志/异常中的请求描述
+        :return: pymodbus 响应
+        """
+        attempts = self._retry_count if retry_count is None else max(1, int(retry_count))
+        start = time.perf_counter()
+        try:
+            return self._execute_attempts(request, desc, attempts)
+        finally:
+            self._m_seconds.observe(time.perf_counter() - start)
+
+    def _execute_attempts(self, request, desc, attempts):
+        last_error = None
+        for attempt in range(attempts):
             try:
-                # 关闭旧连接
-                if hasattr(self._client, 'close'):
-                    self._client.close()
-                
-                # 创建新连接
-                self._client = ModbusTcpClient(host=self._ip, port=self._port)
-                ret = self._client.connect()
-                
-                if ret:
-                    logger.info(f"✅ Modbus重连成功 ({i+1}/{max_retries})")
-                    return True
+                self._check_link()
+            except LinkDownError:
+                self._m_errors["down"].inc()
+                raise
+            if attempt:
+                time.sleep(0.2 * attempt)
+            try:
+                ret = request(self._client)
+            except BaseException as e:
+                self._breaker.record_failure(e)
+                self._m_errors["link"].inc()
+                if not isinstance(e, Exception):
+                    raise
+                last_error = ConnectionError(f"Modbus通信异常: {desc}, 错误: {e}")
+                logger.warning(f"⚠️ {last_error} ({attempt + 1}/{attempts})")
+                continue
+            if hasattr(ret, 'isError') and ret.isError():
+                error_msg = str(ret)
+                if any(kw in error_msg for kw in _LINK_ERROR_KEYWORDS):
+                    self._breaker.record_failure(error_msg)
+                    self._m_errors["link"].inc()
                 else:
-                    logger.warning(f"⚠️ Modbus重连失败 ({i+1}/{max_retries})")
-                    time.sleep(1)  # 等待1秒后重试
-            except Exception as e:
-                logger.warning(f"⚠️ Modbus重连异常 ({i+1}/{max_retries}): {e}")
-                time.sleep(1)
-        
-        logger.error(f"❌ Modbus重连失败，已尝试{max_retries}次")
-        return False
+                    self._breaker.record_success()
+                    self._m_errors["slave"].inc()
+                last_error = ConnectionError(f"Modbus请求失败: {desc}, 错误: {ret}")
+                logger.warning(f"⚠️ {last_error} ({attempt + 1}/{attempts})")
+                continue
+            self._breaker.record_success()
+            return ret
+        raise last_error
 
     def connect_rtu(self, port, baudrate=115200, parity="N"):
         """
@@ -94,30 +435,38 @@ class SRModbusSdk:
         self._client = ModbusSerialClient(method="rtu", port=port, stopbits=1, bytesize=8,
                                           parity=parity, baudrate=baudrate)
         ret = self._client.connect()
+        self._breaker.name = port
+        self._bind_metrics(port)
+        self._supervisor.start()
         if ret:
             logger.info(f"✅ Modbus RTU连接成功: {port}, 波特率: {baudrate}")
+            self._breaker.record_success()
         else:
-            logger.error(f"❌ Modbus RTU连接失败: {port}, 波特率: {baudrate}")
-            return
+            logger.error(f"❌ Modbus RTU连接失败: {port}, 波特率: {baudrate}，后台重连中")
+            self._breaker.trip("连接失败")
+        return bool(ret)
 
-    def wait_movement_task_finish(self, no=0, timeout=120):
+    def wait_movement_task_finish(self, no=0, timeout=120, expected_s=None):
         """
         阻塞等待任务结束，适用于站点移动、位置移动
         :param no: 任务编号
         :param timeout: 超时时间（秒），默认120秒
+        :param expected_s: 预计耗时（秒），用于在预计完成前后加快轮询
         :return: [移动任务结果, 移动任务结果值]
         :raises TimeoutError: 任务超时
         :raises RuntimeError: 任务错误或失败
         """
-        start_time = time.time()
-        i = 0
+        start_time = time.monotonic()
+        pacer = AdaptivePollInterval(expected_s=expected_s)
+        last_log_time = 0.0
         consecutive_errors = 0  # 连续错误计数
-        max_consecutive_errors = 10  # 最大连续错误次数（10秒）
+        max_consecutive_errors = 10  # 最大连续错误次数
         last_success_time = start_time
         
         while True:
             # 检查超时
-            elapsed = int(time.time() - start_time)
+            elapsed_f = time.monotonic() - start_time
+            elapsed = int(elapsed_f)
             if elapsed >= timeout:
                 logger.error(f"❌ 移动任务超时 - 任务编号: {no}, 已等待: {elapsed}s")
                 # 尝试取消任务
@@ -135,22 +484,24 @@ class SRModbusSdk:
                 
                 # 读取成功，重置错误计数
                 consecutive_errors = 0
-                last_success_time = time.time()
+                last_success_time = time.monotonic()
                 
                 # 每秒记录日志，便于实时监控任务状态
-                logger.info(f"⏳ 等待移动任务完成 {elapsed}s - 状态: {cur_move_state}, 任务编号: {cur_move_no}")
+                if time.monotonic() - last_log_time >= 1:
+                    last_log_time = time.monotonic()
+                    logger.info(f"⏳ 等待移动任务完成 {elapsed}s - 状态: {cur_move_state}, 任务编号: {cur_move_no}")
                 
-                # 检查任务编号是否匹配（如果指定了编号）
-                if no != 0 and cur_move_no != no:
-                    # 任务编号不匹配，可能是旧任务或新任务
-                    if elapsed > 5:  # 等待5秒后如果还不匹配，记录警告
-                        logger.warning(f"⚠️ 任务编号不匹配 - 期望: {no}, 实际: {cur_move_no}")
-                
-                # 检查暂停状态
-                if cur_move_state == MovementState.MT_PAUSED:
-                    logger.warning(f"⚠️ 移动任务已暂停 - 任务编号: {cur_move_no}")
-                    # 可以尝试继续任务或取消
-                    # self.continue_task()  # 如果需要自动继续
+                    # 检查任务编号是否匹配（如果指定了编号）
+                    if no != 0 and cur_move_no != no:
+                        # 任务编号不匹配，可能是旧任务或新任务
+                        if elapsed > 5:  # 等待5秒后如果还不匹配，记录警告
+                            logger.warning(f"⚠️ 任务编号不匹配 - 期望: {no}, 实际: {cur_move_no}")
+                    
+                    # 检查暂停状态
+                    if cur_move_state == MovementState.MT_PAUSED:
+                        logger.warning(f"⚠️ 移动任务已暂停 - 任务编号: {cur_move_no}")
+                        # 可以尝试继续任务或取消
+                        # self.continue_task()  # 如果需要自动继续
                 
                 # 检查完成状态
                 if cur_move_state == MovementState.MT_FINISHED:
@@ -165,12 +516,12 @@ class SRModbusSdk:
                             logger.error(f"❌ {error_msg}")
                             raise RuntimeError(error_msg)
                         
-                        logger.info(f"✅ 移动任务完成 - 任务编号: {no if no != 0 else cur_move_no}, 结果: {result}, 耗时: {elapsed}s")
+                        logger.info(f"✅ 移动任务完成 - 任务编号: {no if no != 0 else cur_move_no}, 结果: {result}, 耗时: {time.monotonic() - start_time:.2f}s")
                         return [result, result_value]
                     
             except ConnectionError as e:
                 consecutive_errors += 1
-                error_duration = int(time.time() - last_success_time)
+                error_duration = int(time.monotonic() - last_success_time)
                 
                 # 如果连续错误超过阈值，认为连接长时间中断
                 if consecutive_errors >= max_consecutive_errors:
@@ -182,30 +533,32 @@ class SRModbusSdk:
                 
                 # 记录警告，但继续尝试
                 logger.warning(f"⚠️ 读取失败 ({consecutive_errors}/{max_consecutive_errors}): {e}，继续尝试...")
-                time.sleep(1)  # 等待1秒后重试
+                time.sleep(1)  # 通信异常时固定等待1秒后重试
                 continue
             
-            time.sleep(1)
-            i += 1
+            time.sleep(pacer.next_delay(elapsed_f))
 
-    def wait_action_task_finish(self, no=0, timeout=60):
+    def wait_action_task_finish(self, no=0, timeout=60, expected_s=None):
         """
         阻塞等待任务结束，适用于动作任务
         :param no: 任务编号, 编号为0时会等待当前任务ID
         :param timeout: 超时时间（秒），默认60秒
+        :param expected_s: 预计耗时（秒），用于在预计完成前后加快轮询
         :return: [动作任务结果, 动作任务结果值]
         :raises TimeoutError: 任务超时
         :raises RuntimeError: 任务错误或失败
         """
-        start_time = time.time()
-        i = 0
+        start_time = time.monotonic()
+        pacer = AdaptivePollInterval(expected_s=expected_s)
+        last_log_time = 0.0
         consecutive_errors = 0  # 连续错误计数
-        max_consecutive_errors = 10  # 最大连续错误次数（10秒）
+        max_consecutive_errors = 10  # 最大连续错误次数
         last_success_time = start_time
         
         while True:
             # 检查超时
-            elapsed = int(time.time() - start_time)
+            elapsed_f = time.monotonic() - start_time
+            elapsed = int(elapsed_f)
             if elapsed >= timeout:
                 logger.error(f"❌ 动作任务超时 - 任务编号: {no}, 已等待: {elapsed}s")
                 raise TimeoutError(f"动作任务超时: 任务编号{no}, 已等待{timeout}秒")
@@ -217,20 +570,18 @@ class SRModbusSdk:
                 
                 # 读取成功，重置错误计数
                 consecutive_errors = 0
-                last_success_time = time.time()
+                last_success_time = time.monotonic()
                 
                 # 每秒记录日志，便于实时监控任务状态
-                logger.info(f"⏳ 等待动作任务完成 {elapsed}s - 状态: {cur_action_state}, 任务编号: {cur_action_no}")
+                if time.monotonic() - last_log_time >= 1:
+                    last_log_time = time.monotonic()
+                    logger.info(f"⏳ 等待动作任务完成 {elapsed}s - 状态: {cur_action_state}, 任务编号: {cur_action_no}")
                 
-                # 检查暂停状态
-                if cur_action_state == ActionState.AT_PAUSED:
-                    logger.warning(f"⚠️ 动作任务已暂停 - 任务编号: {cur_action_no}")
+                    # 检查暂停状态
+                    if cur_action_state == ActionState.AT_PAUSED:
+                        logger.warning(f"⚠️ 动作任务已暂停 - 任务编号: {cur_action_no}")
                 
-                if cur_action_state == ActionState.AT_FINISHED:
-                    if no != 0 and cur_action_no != no:
-                        time.sleep(1)
-                        i += 1
-                        continue
+                if cur_action_state == ActionState.AT_FINISHED and (no == 0 or cur_action_no == no):
                     decoder = self.read_registers_function(30138, 3)
                     result = ActionResult(decoder.decode_16bit_uint())
                     result_value = decoder.decode_32bit_int()
@@ -241,12 +592,12 @@ class SRModbusSdk:
                         logger.error(f"❌ {error_msg}")
                         raise RuntimeError(error_msg)
                     
-                    logger.info(f"✅ 动作任务完成 - 任务编号: {no if no != 0 else cur_action_no}, 结果: {result}, 耗时: {elapsed}s")
+                    logger.info(f"✅ 动作任务完成 - 任务编号: {no if no != 0 else cur_action_no}, 结果: {result}, 耗时: {time.monotonic() - start_time:.2f}s")
                     return [result, result_value]
                 
             except ConnectionError as e:
                 consecutive_errors += 1
-                error_duration = int(time.time() - last_success_time)
+                error_duration = int(time.monotonic() - last_success_time)
                 
                 # 如果连续错误超过阈值，认为连接长时间中断
                 if consecutive_errors >= max_consecutive_errors:
@@ -258,26 +609,40 @@ class SRModbusSdk:
                 
                 # 记录警告，但继续尝试
                 logger.warning(f"⚠️ 读取失败 ({consecutive_errors}/{max_consecutive_errors}): {e}，继续尝试...")
-                time.sleep(1)  # 等待1秒后重试
+                time.sleep(1)  # 通信异常时固定等待1秒后重试
                 continue
             
-            time.sleep(1)
-            i += 1
+            time.sleep(pacer.next_delay(elapsed_f))
 
-    def wait_locate_task_finish(self):
+    def wait_locate_task_finish(self, timeout=99):
         """
         等待定位完成，适用于位置定位、站点定位、强制定位
-        :return: 定位状态
+        :param timeout: 超时时间（秒），默认99秒
+        :return: 定位状态；超时返回 None
         """
-        for i in range(99):
-            time.sleep(1)
-            logger.info(f"⏳ 等待定位完成 {i}s")
-            if self.get_cur_locate_state() == LocationState.LOCATION_STATE_RUNNING:
+        start_time = time.monotonic()
+        pacer = AdaptivePollInterval()
+        last_log_time = 0.0
+        seen_locating = False
+        while True:
+            elapsed_f = time.monotonic() - start_time
+            if elapsed_f >= timeout:
+                logger.error(f"❌ 等待定位超时 ({timeout}s)")
+                return None
+            time.sleep(pacer.next_delay(elapsed_f))
+            state = self.get_cur_locate_state()
+            # 定位状态没有任务编号：观察到定位过程后立即判定；否则至少等待 1 秒，避免读到指令生效前的旧状态
+            if state in (LocationState.LOCATION_STATE_INITIALING, LocationState.LOCATION_STATE_RELOCATING):
+                seen_locating = True
+            elif state == LocationState.LOCATION_STATE_RUNNING and (seen_locating or time.monotonic() - start_time >= 1):
                 logger.info("✅ 定位完成")
                 return LocationState.LOCATION_STATE_RUNNING
-            elif self.get_cur_locate_state() == LocationState.LOCATION_STATE_ERROR:
+            elif state == LocationState.LOCATION_STATE_ERROR:
                 logger.error("❌ 定位错误")
                 return LocationState.LOCATION_STATE_ERROR
+            if time.monotonic() - last_log_time >= 1:
+                last_log_time = time.monotonic()
+                logger.info(f"⏳ 等待定位完成 {int(elapsed_f)}s")
 
     def write_coils_function(self, address, value=True):
         """
@@ -294,11 +659,10 @@ class SRModbusSdk:
             else:
                 builder.add_16bit_uint(0x0000)
             
-            ret = self._client.write_coil(address, builder.to_coils(), slave=17)
-            
-            if hasattr(ret, "isError") and ret.isError():
-                logger.error(f"❌ 写线圈失败: 地址={address}, 错误={ret}")
-                raise RuntimeError(f"Modbus写操作失败: {ret}")
+            self._execute(lambda client: client.write_coil(address, builder.to_coils(), slave=17),
+                          f"写线圈 地址{address}")
+            if address in COIL_CACHE_INVALIDATION:
+                self._cache.invalidate(COIL_CACHE_INVALIDATION[address])
             logger.info(f"✅ 写线圈成功: 地址={address}")
         except Exception as e:
             logger.error(f"❌ 写线圈发生异常: 地址={address}, 异常={e}")
@@ -483,31 +847,33 @@ class SRModbusSdk:
         """取消mission任务"""
         self.write_coils_function(99)
 
+    def _write_registers(self, address, values):
+        """
+        写保持寄存器，并使受影响的读缓存区段失效
+        :param address: 起始地址
+        :param values: 寄存器值列表
+        """
+        ret = self._execute(lambda client: client.write_registers(address, values, slave=17),
+                            f"写保持寄存器 地址{address}")
+        if address in HOLDING_CACHE_INVALIDATION:
+            self._cache.invalidate(HOLDING_CACHE_INVALIDATION[address])
+        return ret
+
     def read_discrete_function(self, address):
         """
         读取离散输入状态
         :param address: 寄存器地址
         :return:
+        :raises LinkDownError: 链路已知断开（快速失败）
+        :raises ConnectionError: 读取失败
         """
-        for i in range(3):  # 增加重试机制
-            try:
-                ret = self._client.read_discrete_inputs(address, slave=17)
-                if hasattr(ret, "isError") and ret.isError():
-                    logger.warning(f"⚠️ 读取离散量失败 (地址 {address}), 错误: {ret}, 正在重试 ({i+1}/3)")
-                    time.sleep(0.5)
-                    continue
-                if not hasattr(ret, "getBit"):
-                    logger.warning(f"⚠️ 读取结果异常 (类型 {type(ret)}), 正在重试 ({i+1}/3)")
-                    time.sleep(0.5)
-                    continue
-                val = ret.getBit(0)
-                logger.debug(f"读取寄存器 {address} -> 结果: {val}")
-                return val
-            except Exception as e:
-                logger.warning(f"⚠️ 读取离散量抛出异常 (地址 {address}): {e}, 正在重试 ({i+1}/3)")
-                time.sleep(0.5)
-        
-        raise RuntimeError(f"❌ 无法读取离散量 (地址 {address}): Modbus 通信异常")
+        ret = self._execute(lambda client: client.read_discrete_inputs(address, slave=17), f"读离散量 地址{address}")
+        if not hasattr(ret, "getBit"):
+            raise ConnectionError(f"Modbus读取失败: 离散量结果异常, 响应类型: {type(ret).__name__}")
+        val = ret.getBit(0)
+        logger.debug(f"读取寄存器 {address} -> 结果: {val}")
+        return val
+
     def is_trigger_emergency(self) -> bool:
         """急停是否触发"""
         return self.read_discrete_function(10001)
@@ -556,164 +922,67 @@ class SRModbusSdk:
         """是否处于调度模式"""
         return self.read_discrete_function(10051)
 
-    def read_registers_function(self, address, register_num, retry_count=3):
+    def read_registers_function(self, address, register_num, retry_count=None):
         """
-        读取输入寄存器功能（带重试和自动重连）
+        读取输入寄存器功能，按 INPUT_REGISTER_CACHE_POLICY 命中读缓存
         :param address: 寄存器地址
         :param register_num: 寄存器数量
-        :param retry_count: 重试次数
+        :param retry_count: 尝试次数，缺省使用构造参数 retry_count
         :return:
-        :raises ConnectionError: 连接失败或读取失败
+        :raises LinkDownError: 链路已知断开（快速失败）
+        :raises ConnectionError: 读取失败
         """
-        last_error = None
-        
-        for attempt in range(retry_count):
-            try:
-                # 检查并恢复连接
-                if not self._check_and_reconnect():
-                    if attempt < retry_count - 1:
-                        logger.debug(f"连接检查失败，等待重试 ({attempt+1}/{retry_count})")
-                        time.sleep(0.5)
-                        continue
-                    else:
-                        raise ConnectionError(f"Modbus连接失败，无法读取寄存器: 地址{address}")
-                
-                ret = self._client.read_input_registers(address, count=register_num, slave=17)
-                
-                # 检查是否为异常响应
-                if hasattr(ret, 'isError') and ret.isError():
-                    error_msg = str(ret)
-                    # 检查是否是连接错误
-                    if "Incomplete message" in error_msg or "0 received" in error_msg:
-                        logger.warning(f"⚠️ 检测到连接中断: {error_msg}")
-                        if attempt < retry_count - 1:
-                            # 强制重连
-                            if hasattr(self._client, 'close'):
-                                self._client.close()
-                            time.sleep(0.5)
-                            continue
-                    raise ConnectionError(f"Modbus读取失败: 地址{address}, 数量{register_num}, 错误: {ret}")
-                
-                if not hasattr(ret, 'registers'):
-                    raise ConnectionError(f"Modbus读取失败: 未返回有效数据, 响应类型: {type(ret).__name__}")
-                
-                decoder = BinaryPayloadDecoder.fromRegisters(ret.registers, byteorder=Endian.Big,
-                                                             wordorder=Endian.Big)
-                return decoder
-                
-            except ConnectionError as e:
-                last_error = e
-                if attempt < retry_count - 1:
-                    logger.debug(f"读取失败，重试 ({attempt+1}/{retry_count}): {e}")
-                    time.sleep(0.5)
-                else:
-                    raise
-            except Exception as e:
-                last_error = e
-                error_msg = str(e)
-                # 检查是否是网络相关错误
-                if "Incomplete message" in error_msg or "0 received" in error_msg or "Connection" in error_msg:
-                    if attempt < retry_count - 1:
-                        logger.warning(f"⚠️ 网络错误，尝试重连 ({attempt+1}/{retry_count}): {e}")
-                        if hasattr(self._client, 'close'):
-                            self._client.close()
-                        time.sleep(0.5)
-                        continue
-                raise ConnectionError(f"Modbus读取异常: 地址{address}, 错误: {e}")
-        
-        # 所有重试都失败
-        raise ConnectionError(f"Modbus读取失败，已重试{retry_count}次: {last_error}")
+        generation = self._cache.generation()
+        registers = self._cache.get(address, register_num)
+        if registers is None:
+            registers = self.read_input_registers_raw(address, register_num, retry_count)
+            self._cache.put(address, registers, generation)
+        return _decoder_from_registers(registers)
+
+    def read_input_registers_raw(self, address, register_num, retry_count=None):
+        """
+        读取输入寄存器原始值
+        :param address: 寄存器地址
+        :param register_num: 寄存器数量，单次不超过 MAX_READ_REGISTERS
+        :param retry_count: 尝试次数，缺省使用构造参数 retry_count
+        :return: 寄存器值列表
+        :raises LinkDownError: 链路已知断开（快速失败）
+        :raises ConnectionError: 读取失败
+        """
+        ret = self._execute(lambda client: client.read_input_registers(address, count=register_num, slave=17),
+                            f"读输入寄存器 地址{address}, 数量{register_num}", retry_count)
+        if not hasattr(ret, 'registers'):
+            raise ConnectionError(f"Modbus读取失败: 未返回有效数据, 响应类型: {type(ret).__name__}")
+        return list(ret.registers)
 
-    def read_holding_registers_function(self, address, register_num, retry_count=3):
+    def read_holding_registers_function(self, address, register_num, retry_count=None):
         """
-        读取保持寄存器功能（带重试和自动重连）
+        读取保持寄存器功能
         :param address: 寄存器地址
         :param register_num: 寄存器数量
-        :param retry_count: 重试次数
+        :param retry_count: 尝试次数，缺省使用构造参数 retry_count
         :return:
-        :raises ConnectionError: 连接失败或读取失败
+        :raises LinkDownError: 链路已知断开（快速失败）
+        :raises ConnectionError: 读取失败
         """
-        last_error = None
-        
-        for attempt in range(retry_count):
-            try:
-                # 检查并恢复连接
-                if not self._check_and_reconnect():
-                    if attempt < retry_count - 1:
-                        logger.debug(f"连接检查失败，等待重试 ({attempt+1}/{retry_count})")
-                        time.sleep(0.5)
-                        continue
-                    else:
-                        raise ConnectionError(f"Modbus连接失败，无法读取寄存器: 地址{address}")
-                
-                logger.debug(f"正在读取寄存器: 地址={address}, 数量={register_num}")
-                ret = self._client.read_holding_registers(address, count=register_num, slave=17)
-                
-                # 检查是否为异常响应
-                if hasattr(ret, 'isError') and ret.isError():
-                    error_msg = str(ret)
-                    logger.warning(f"⚠️ 读取寄存器失败: 地址={address}, 错误={error_msg}")
-                    # 检查是否是连接错误
-                    if "Incomplete message" in error_msg or "0 received" in error_msg:
-                        logger.warning(f"⚠️ 检测到连接中断: {error_msg}")
-                        if attempt < retry_count - 1:
-                            # 强制重连
-                            if hasattr(self._client, 'close'):
-                                self._client.close()
-                            time.sleep(0.5)
-                            continue
-                    raise ConnectionError(f"Modbus读取失败: 地址{address}, 数量{register_num}, 错误: {ret}")
-                
-                if not hasattr(ret, 'registers'):
-                    raise ConnectionError(f"Modbus读取失败: 未返回有效数据, 响应类型: {type(ret).__name__}")
-                
-                decoder = BinaryPayloadDecoder.fromRegisters(ret.registers, byteorder=Endian.Big,
-                                                             wordorder=Endian.Big)
-                return decoder
-                
-            except ConnectionError as e:
-                last_error = e
-                if attempt < retry_count - 1:
-                    logger.debug(f"读取失败，重试 ({attempt+1}/{retry_count}): {e}")
-                    time.sleep(0.5)
-                else:
-                    raise
-            except Exception as e:
-                last_error = e
-                error_msg = str(e)
-                # 检查是否是网络相关错误
-                if "Incomplete message" in error_msg or "0 received" in error_msg or "Connection" in error_msg:
-                    if attempt < retry_count - 1:
-                        logger.warning(f"⚠️ 网络错误，尝试重连 ({attempt+1}/{retry_count}): {e}")
-                        if hasattr(self._client, 'close'):
-                            self._client.close()
-                        time.sleep(0.5)
-                        continue
-                raise ConnectionError(f"Modbus读取异常: 地址{address}, 错误: {e}")
-        
-        # 所有重试都失败
-        raise ConnectionError(f"Modbus读取失败，已重试{retry_count}次: {last_error}")
-    
+        logger.debug(f"正在读取寄存器: 地址={address}, 数量={register_num}")
+        ret = self._execute(lambda client: client.read_holding_registers(address, count=register_num, slave=17),
+                            f"读保持寄存器 地址{address}, 数量{register_num}", retry_count)
+        if not hasattr(ret, 'registers'):
+            raise ConnectionError(f"Modbus读取失败: 未返回有效数据, 响应类型: {type(ret).__name__}")
+        return BinaryPayloadDecoder.fromRegisters(ret.registers, byteorder=Endian.Big, wordorder=Endian.Big)
+
     def get_cur_system_state(self) -> SystemState:
         """系统状态"""
-        decoder = self.read_registers_function(30001, 1)
-        dat = SystemState(decoder.decode_16bit_uint())
-        return dat
+        return self._read_field("system_state")
 
     def get_cur_locate_state(self) -> LocationState:
         """定位状态"""
-        decoder = self.read_registers_function(30002, 1)
-        dat = LocationState(decoder.decode_16bit_uint())
-        return dat
+        return self._read_field("locate_state")
 
     def get_cur_pose(self) -> Pose:
         """位姿，x(毫米)、y(毫米)、yaw(弧度*1000)"""
-        pose = Pose()
-        decoder = self.read_registers_function(30003, 6)
-        pose.x = decoder.decode_32bit_int()
-        pose.y = decoder.decode_32bit_int()
-        pose.yaw = decoder.decode_32bit_int()
-        return pose
+        return self._read_field("pose")
 
     def get_pose_confidence(self) -> int:
         """
@@ -721,176 +990,123 @@ class SRModbusSdk:
         取值范围: [0,10000]，单位：0.01%
         :return:
         """
-        decoder = self.read_registers_function(30009, 1)
-        dat = decoder.decode_16bit_uint()
-        return dat
+        return self._read_field("pose_confidence")
 
     def get_cur_station_no(self) -> int:
         """
         当前站点编号
         :return: 返回无符号整数
         """
-        decoder = self.read_registers_function(30015, 1)
-        dat = decoder.decode_16bit_uint()
-        return dat
+        return self._read_field("station_no")
 
     def get_operation_state(self) -> OperationState:
         """操作状态"""
-        decoder = self.read_registers_function(30016, 1)
-        dat = OperationState(decoder.decode_16bit_uint())
-        return dat
+        return self._read_field("operation_state")
 
     def get_velocity(self) -> Speed:
         """x、y方向线速度，单位mm/s，角速度，单位(1/1000)rad/s"""
-        speed = Speed()
-        decoder = self.read_registers_function(30017, 3)
-        speed.x_dir_linear_velocity = decoder.decode_16bit_int()
-        speed.y_dir_linear_velocity = decoder.decode_16bit_int()
-        speed.rotate_velocity = decoder.decode_16bit_int()
-        return speed
+        return self._read_field("velocity")
 
     def get_DI_state(self):
         """DI状态"""
-        decoder = self.read_registers_function(30021, 1)
-        dat = decoder.decode_16bit_uint()
-        return dat
+        return self._read_field("DI_state")
 
     def get_DO_state(self):
         """DO状态"""
-        decoder = self.read_registers_function(30022, 1)
-        dat = decoder.decode_16bit_uint()
-        return dat
+        return self._read_field("DO_state")
 
     def get_hardware_error_code(self) -> int:
         """硬件错误码"""
-        decoder = self.read_registers_function(30025, 2)
-        dat = decoder.decode_32bit_uint()
-        return dat
+        return self._read_field("hardware_error_code")
 
     def get_last_system_error(self) -> int:
         """系统上一次错误"""
-        decoder = self.read_registers_function(30027, 2)
-        dat = decoder.decode_32bit_uint()
-        return dat
+        return self._read_field("last_system_error")
 
     def get_battery_info(self) -> BatteryInfo:
         """电池状态信息"""
-        battery_info = BatteryInfo()
-        decoder = self.read_registers_function(30033, 8)
-        battery_info.voltage = decoder.decode_16bit_uint()
-        battery_info.current = decoder.decode_16bit_int()
-        battery_info.temperature = decoder.decode_16bit_int()
-        battery_info.remain_time = decoder.decode_16bit_uint()
-        battery_info.percentage_electricity = decoder.decode_16bit_uint()
-        battery_info.state = BatteryState(decoder.decode_16bit_uint())
-        battery_info.use_cycles = decoder.decode_16bit_uint()
-        battery_info.nominal_capacity = decoder.decode_16bit_uint()
-        return battery_info
+        return self._read_field("battery_info")
 
     def get_total_service(self) -> TotalService:
         """服务周期"""
-        total_service = TotalService()
-        decoder = self.read_registers_function(30041, 6)
-        total_service.total_mileage = decoder.decode_32bit_uint()
-        total_service.total_startup_time = decoder.decode_32bit_uint()
-        total_service.total_startup_times = decoder.decode_32bit_uint()
-        return total_service
+        return self._read_field("total_service")
 
     def get_system_cur_time(self) -> time:
         """系统当前时间，Linux时间戳"""
-        decoder = self.read_registers_function(30047, 2)
-        dat = decoder.decode_32bit_uint()
-        return dat
+        return self._read_field("system_cur_time")
 
     def get_communication_ip(self) -> str:
         """
         对外通信ip地址
         :return:
         """
-        decoder = self.read_registers_function(30049, 4)
-        ip = [decoder.decode_16bit_uint(), decoder.decode_16bit_uint(), decoder.decode_16bit_uint(),
-              decoder.decode_16bit_uint()]
-        dat = ".".join(str(i) for i in ip)
-        return dat
+        return self._read_field("communication_ip")
 
     def get_system_version(self) -> str:
         """系统版本号"""
-        decoder = self.read_registers_function(30053, 3)
-        version = [decoder.decode_16bit_uint(), decoder.decode_16bit_uint(), decoder.decode_16bit_uint()]
-        dat = ".".join(str(i) for i in version)
-        return dat
+        return self._read_field("system_version")
 
     def get_pgv_scan(self) -> PGVScanDmcode:
         """下视PGV扫描到的二维码信息: 二维码ID,坐标x,y,yaw"""
-        pvg_scan_dmcode = PGVScanDmcode()
-        decoder = self.read_registers_function(30057, 8)
-        pvg_scan_dmcode.dmcode_id = decoder.decode_32bit_int()
-        pvg_scan_dmcode.x = decoder.decode_32bit_int()
-        pvg_scan_dmcode.y = decoder.decode_32bit_int()
-        pvg_scan_dmcode.yaw = decoder.decode_32bit_int()
-        return pvg_scan_dmcode
+        return self._read_field("pgv_scan")
 
     def get_cur_map_byte_code(self) -> int:
         """
         获取当前地图名的前两个字节编码
         比如当前地图名为:“1aa”,那么此寄存器的值为:0x3161
         """
-        decoder = self.read_registers_function(30065, 1)
-        dat = decoder.decode_16bit_uint()
-        return dat
+        return self._read_field("map_byte_code")
 
     def get_cur_volume(self) -> int:
         """当前系统音量"""
-        decoder = self.read_registers_function(30070, 1)
-        dat = decoder.decode_16bit_uint()
-        return dat
+        return self._read_field("volume")
 
     def get_hardware_error_codes(self) -> HardwareErrorCode:
         """硬件错误码1、2、3、4、5"""
-        hardware_error_code = HardwareErrorCode()
-        decoder = self.read_registers_function(30081, 10)
-        hardware_error_code.error_code1 = decoder.decode_32bit_uint()
-        hardware_error_code.error_code2 = decoder.decode_32bit_uint()
-        hardware_error_code.error_code3 = decoder.decode_32bit_uint()
-        hardware_error_code.error_code4 = decoder.decode_32bit_uint()
-        hardware_error_code.error_code5 = decoder.decode_32bit_uint()
-        return hardware_error_code
+        return self._read_field("hardware_error_codes")
 
     def get_mission_task_info(self) -> MissionTask:
         """mission任务状态信息"""
-        mission_task = MissionTask()
-        decoder = self.read_registers_function(30097, 6)
-        mission_task.mission_id = decoder.decode_32bit_uint()
-        mission_task.mission_state = MissionStatus(decoder.decode_16bit_uint())
-        mission_task.mission_result = MissionResult(decoder.decode_16bit_uint())
-        mission_task.mission_error_code = decoder.decode_32bit_uint()
-        return mission_task
+        return self._read_field("mission_task")
 
     def get_movement_task_info(self) -> MovementTask:
         """移动任务状态信息"""
-        movement_task = MovementTask()
-        decoder = self.read_registers_function(30113, 5)
-        movement_task.state = MovementState(decoder.decode_16bit_uint())
-        movement_task.no = decoder.decode_32bit_int()
-        movement_task.target_station = decoder.decode_16bit_uint()
-        movement_task.path_no = decoder.decode_16bit_uint()
-        decoder = self.read_registers_function(30122, 3)
-        movement_task.result = MovementResult(decoder.decode_16bit_uint())
-        movement_task.result_value = decoder.decode_32bit_uint()
-        return movement_task
+        return self._read_field("movement_task")
 
     def get_action_task_info(self) -> ActionTask:
         """动作任务状态信息"""
-        action_task = ActionTask()
-        decoder = self.read_registers_function(30129, 12)
-        action_task.state = ActionState(decoder.decode_16bit_uint())
-        action_task.no = decoder.decode_32bit_int()
-        action_task.id = decoder.decode_32bit_int()
-        action_task.param0 = decoder.decode_32bit_int()
-        action_task.param1 = decoder.decode_32bit_int()
-        action_task.result = ActionResult(decoder.decode_16bit_uint())
-        action_task.result_value = decoder.decode_32bit_int()
-        return action_task
+        return self._read_field("action_task")
+
+    def _read_field(self, name):
+        """
+        按寄存器地图读取并解码单个字段（每个区段一次读请求）
+        :param name: SNAPSHOT_FIELDS 中的字段名
+        :return: 解码后的值
+        """
+        range_names, decode = SNAPSHOT_FIELDS[name]
+        decoders = [self.read_registers_function(*INPUT_REGISTER_RANGES[r]) for r in range_names]
+        return decode(*decoders)
+
+    def read_snapshot(self, fields=None, max_registers=MAX_READ_REGISTERS, max_gap=DEFAULT_MAX_GAP) -> RobotSnapshot:
+        """
+        合并块读输入寄存器，一次性解码多个状态字段
+        30001-30140 全量快照只需 2 次读请求，而逐个调用 get_xxx 需要十几次；命中读缓存的区段不再读取
+        :param fields: 需要的字段名列表（见 SNAPSHOT_FIELDS），None 表示全部
+        :param max_registers: 单次读取的最大寄存器数
+        :param max_gap: 合并时允许跨越的最大空洞寄存器数，从站不允许读未定义寄存器时设为0
+        :return: RobotSnapshot，未请求的字段为 None
+        :raises ConnectionError: 连接失败或读取失败
+        """
+        generation = self._cache.generation()
+        names, registers, blocks = _plan_snapshot(fields, self._cache, max_registers, max_gap)
+        for address, register_num in blocks:
+            values = self.read_input_registers_raw(address, register_num)
+            self._cache.put(address, values, generation)
+            registers.update(zip(range(address, address + register_num), values))
+
+        snapshot = _decode_snapshot(names, registers, len(blocks))
+        logger.debug(f"读取寄存器快照: {len(names)}个字段, {len(blocks)}次读请求 {blocks}")
+        return snapshot
 
     def pose_locate(self, x, y, angle):
         """
@@ -904,7 +1120,7 @@ class SRModbusSdk:
         builder.add_32bit_int(x)
         builder.add_32bit_int(y)
         builder.add_32bit_int(angle)
-        self._client.write_registers(40001, builder.to_registers(), slave=17)
+        self._write_registers(40001, builder.to_registers())
 
     def station_locate(self, station):
         """
@@ -914,7 +1130,7 @@ class SRModbusSdk:
         """
         builder = BinaryPayloadBuilder(byteorder=Endian.Big)
         builder.add_16bit_uint(station)
-        self._client.write_registers(40007, builder.to_registers(), slave=17)
+        self._write_registers(40007, builder.to_registers())
 
     def manual_control(self, x_speed, y_speed, yaw_speed):
         """
@@ -929,7 +1145,7 @@ class SRModbusSdk:
         builder.add_16bit_int(x_speed)
         builder.add_16bit_int(y_speed)
         builder.add_16bit_int(yaw_speed)
-        self._client.write_registers(40022, builder.to_registers(), slave=17)
+        self._write_registers(40022, builder.to_registers())
 
     def set_speed_level(self, speed_level):
         """
@@ -939,7 +1155,7 @@ class SRModbusSdk:
         """
         builder = BinaryPayloadBuilder(byteorder=Endian.Big)
         builder.add_16bit_uint(speed_level)
-        self._client.write_registers(40026, builder.to_registers(), slave=17)
+        self._write_registers(40026, builder.to_registers())
 
     def set_volume(self, volume):
         """
@@ -949,7 +1165,7 @@ class SRModbusSdk:
         """
         builder = BinaryPayloadBuilder(byteorder=Endian.Big)
         builder.add_16bit_uint(volume)
-        self._client.write_registers(40028, builder.to_registers(), slave=17)
+        self._write_registers(40028, builder.to_registers())
 
     def switch_map(self, map_name):
         """
@@ -972,7 +1188,7 @@ class SRModbusSdk:
             map_code += b'00'
             data = int(map_code, 16)
         builder.add_16bit_uint(data)
-        self._client.write_registers(40029, builder.to_registers(), slave=17)
+        self._write_registers(40029, builder.to_registers())
 
     def set_gpio_output(self, value, mask=0xFFFF):
         """
@@ -984,7 +1200,7 @@ class SRModbusSdk:
         builder = BinaryPayloadBuilder(byteorder=Endian.Big)
         builder.add_16bit_uint(value)
         builder.add_16bit_uint(mask)
-        self._client.write_registers(40030, builder.to_registers(), slave=17)
+        self._write_registers(40030, builder.to_registers())
 
     def mission_registers(self, mission_registers):
         """
@@ -1001,7 +1217,7 @@ class SRModbusSdk:
         builder.add_16bit_uint(mission_registers.register5)
         builder.add_16bit_uint(mission_registers.register6)
         builder.add_16bit_uint(mission_registers.register7)
-        self._client.write_registers(40033, builder.to_registers(), slave=17)
+        self._write_registers(40033, builder.to_registers())
 
     def force_pose_locate(self, x, y, angle):
         """
@@ -1015,7 +1231,7 @@ class SRModbusSdk:
         builder.add_32bit_int(x)
         builder.add_32bit_int(y)
         builder.add_32bit_int(angle)
-        self._client.write_registers(40049, builder.to_registers(), slave=17)
+        self._write_registers(40049, builder.to_registers())
 
     def move_to_pose_no(self, x, y, yaw, no=0):
         """
@@ -1031,8 +1247,8 @@ class SRModbusSdk:
         builder.add_32bit_int(x)
         builder.add_32bit_int(y)
         builder.add_32bit_int(yaw)
-        self._client.write_registers(
-            40057, builder.to_registers(), slave=17)
+        self._write_registers(
+            40057, builder.to_registers())
 
     def move_to_station_no(self, station_id, no=0):
         """
@@ -1044,7 +1260,7 @@ class SRModbusSdk:
         builder = BinaryPayloadBuilder(byteorder=Endian.Big)
         builder.add_32bit_int(no)
         builder.add_16bit_uint(station_id)
-        self._client.write_registers(40066, builder.to_registers(), slave=17)
+        self._write_registers(40066, builder.to_registers())
 
     def start_action_task_no(self, action_id, param1, param2, no=0):
         """
@@ -1060,7 +1276,7 @@ class SRModbusSdk:
         builder.add_32bit_int(action_id)
         builder.add_32bit_int(param1)
         builder.add_32bit_int(param2)
-        self._client.write_registers(40070, builder.to_registers(), slave=17)
+        self._write_registers(40070, builder.to_registers())
 
     def mission_task(self, mission_id):
         """
@@ -1070,7 +1286,7 @@ class SRModbusSdk:
         """
         builder = BinaryPayloadBuilder(byteorder=Endian.Big)
         builder.add_32bit_uint(mission_id)
-        self._client.write_registers(40097, builder.to_registers(), slave=17)
+        self._write_registers(40097, builder.to_registers())
 
     def set_custom_funcs_comm_data(self, data):
         """
@@ -1079,7 +1295,7 @@ class SRModbusSdk:
         :return:
         """
         assert len(data) == 100, '请一次写100个寄存器'
-        self._client.write_registers(40501, data, slave=17)
+        self._write_registers(40501, data)
     
     def get_custom_funcs_comm_data(self, reg_nb):
         """自定义功能通信，如获取riot与plc数据透传通信，使用100个寄存器"""
@@ -0,0 +1,202 @@
+"""
+任务完成等待的自适应轮询节奏。
+
+- 指令下发后的短窗口内快速轮询（PLC 可能很快就完成，例如原地动作、已在目标站点）
+- 长时间巡航期间逐步放慢，减少无效读取
+- 接近历史耗时（EMA）时重新加速，尽快发现状态寄存器翻转
+
+以及长任务的进度播报策略（ProgressPolicy）：只在状态跳变、行驶距离/ETA 明显变化或静默过久时播报。
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Hashable
+
+
+class AdaptivePollInterval:
+    """
+    根据已等待时间给出下一次轮询间隔。
+
+    用法：
+        pacer = AdaptivePollInterval(expected_s=estimator.expected(key))
+        while ...:
+            time.sleep(pacer.next_delay(time.monotonic() - start))
+    """
+
+    def __init__(
+        self,
+        *,
+        fast_s: float = 0.1,
+        slow_s: float = 1.0,
+        fast_window_s: float = 2.0,
+        expected_s: float | None = None,
+        near_ratio: float = 0.2,
+        near_min_s: float = 2.0,
+        growth: float = 1.5,
+    ) -> None:
+        """
+        :param fast_s: 快速轮询间隔（秒）
+        :param slow_s: 巡航期最大轮询间隔（秒）
+        :param fast_window_s: 指令下发后保持快速轮询的时长（秒）
+        :param expected_s: 预计耗时（秒），None 表示未知
+        :param near_ratio / near_min_s: 距预计完成还剩 max(expected_s*near_ratio, near_min_s) 秒时重新加速
+        :param growth: 巡航期每次轮询间隔的增长倍数
+        """
+        self.fast_s = max(0.02, float(fast_s))
+        self.slow_s = max(self.fast_s, float(slow_s))
+        self.fast_window_s = float(fast_window_s)
+        self.expected_s = expected_s
+        self.near_ratio = float(near_ratio)
+        self.near_min_s = float(near_min_s)
+        self.growth = max(1.0, float(growth))
+        self._cruise_delay = self.fast_s
+
+    def _near_expected(self, elapsed_s: float) -> bool:
+        if not self.expected_s:
+            return False
+        window = max(self.expected_s * self.near_ratio, self.near_min_s)
+        # 超过预计耗时后仍保持快速：此时随时可能完成
+        return elapsed_s >= self.expected_s - window
+
+    def next_delay(self, elapsed_s: float) -> float:
+        """
+        :param elapsed_s: 指令下发后已等待时间（秒）
+        :return: 距下一次轮询的间隔（秒）
+        """
+        if elapsed_s < self.fast_window_s or self._near_expected(elapsed_s):
+            self._cruise_delay = self.fast_s
+            return self.fast_s
+        self._cruise_delay = min(self.slow_s, self._cruise_delay * self.growth)
+        if self.expected_s:
+            # 不要睡过“重新加速”的时间点
+            wake_at = self.expected_s - max(self.expected_s * self.near_ratio, self.near_min_s)
+            return max(self.fast_s, min(self._cruise_delay, wake_at - elapsed_s))
+        return self._cruise_delay
+
+
+class TaskDurationEstimator:
+    """
+    按任务键（如 ("move", 站点号)）记录历史耗时的指数滑动平均，线程安全。
+    """
+
+    def __init__(self, *, alpha: float = 0.3, max_keys: int = 512) -> None:
+        self._alpha = float(alpha)
+        self._max_keys = max_keys
+        self._ema: dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def expected(self, key: Hashable) -> float | None:
+        with self._lock:
+            return self._ema.get(key)
+
+    def record(self, key: Hashable, duration_s: float) -> None:
+        with self._lock:
+            prev = self._ema.pop(key, None)
+            self._ema[key] = duration_s if prev is None else prev + self._alpha * (duration_s - prev)
+            # 简单限制容量：淘汰最早插入的键
+            while len(self._ema) > self._max_keys:
+                self._ema.pop(next(iter(self._ema)))
+
+
+@dataclass(frozen=True)
+class ProgressThresholds:
+    """进度播报阈值（所有时间单位为秒）"""
+    max_silence_s: float = 15.0  # 超过该时长没有任何播报时补发一次
+    min_interval_s: float = 5.0  # 两次播报的最小间隔（状态跳变除外）
+    settle_s: float = 1.0  # 新状态需持续该时长才播报，期间来回抖动的状态被合并
+    min_distance_m: float = 10.0  # 距上次播报行驶超过该距离时播报
+    eta_delta_s: float = 10.0  # 剩余时间偏离上次播报的预估超过该值时播报
+
+
+class ProgressPolicy:
+    """
+    长任务进度播报策略：决定某次轮询结果是否值得生成一条 progress 事件。
+
+    - 状态跳变（如 MT_WAIT_FOR_START → MT_RUNNING）：新状态稳定 settle_s 后播报；
+      稳定前又变回已播报状态或变成其它状态的，计为合并，不播报
+    - 行驶距离：距上次播报的位置超过 min_distance_m
+    - ETA：剩余时间与“上次播报的 ETA 按时间推算的值”相差超过 eta_delta_s（例如已超出历史耗时）
+    - 心跳：超过 max_silence_s 没有播报
+
+    用法：
+        policy = ProgressPolicy(thresholds)
+        reason = policy.observe(elapsed_s, state=str(task.state), pose=(x_m, y_m), eta_s=eta)
+        if reason:
+            emit("progress", {...})
+
+    非线程安全：每个等待中的任务各自持有一个实例。
+    """
+
+    def __init__(self, thresholds: ProgressThresholds | None = None) -> None:
+        self.thresholds = thresholds or ProgressThresholds()
+        self._last_state: str | None = None
+        self._last_emit_s: float | None = None
+        self._last_pose: tuple[float, float] | None = None
+        self._last_eta_s: float | None = None
+        self._pending_state: str | None = None
+        self._pending_since_s = 0.0
+        self.counters = {"observed": 0, "emitted": 0, "suppressed": 0, "coalesced": 0}
+
+    def observe(
+        self,
+        elapsed_s: float,
+        *,
+        state: str,
+        pose: tuple[float, float] | None = None,
+        eta_s: float | None = None,
+    ) -> str | None:
+        """
+        :param elapsed_s: 任务开始后已等待时间
+        :param state: 当前任务状态（字符串即可）
+        :param pose: 当前位置 (x, y)，单位米；未知时为 None
+        :param eta_s: 预计剩余时间；未知时为 None
+        :return: 需要播报时返回原因（"start" / "state" / "distance" / "eta" / "heartbeat"），否则 None
+        """
+        self.counters["observed"] += 1
+        reason = self._decide(elapsed_s, state, pose, eta_s)
+        if reason is None:
+            self.counters["suppressed"] += 1
+            return None
+        self.counters["emitted"] += 1
+        self._last_state = state
+        self._pending_state = None
+        self._last_emit_s = elapsed_s
+        if pose is not None:
+            self._last_pose = pose
+        self._last_eta_s = eta_s
+        return reason
+
+    def _decide(self, elapsed_s: float, state: str, pose, eta_s) -> str | None:
+        t = self.thresholds
+        if self._last_emit_s is None:
+            return "start"
+
+        if state != self._last_state:
+            if state != self._pending_state:
+                if self._pending_state is not None:
+                    self.counters["coalesced"] += 1
+                self._pending_state = state
+                self._pending_since_s = elapsed_s
+            if elapsed_s - self._pending_since_s >= t.settle_s:
+                return "state"
+        elif self._pending_state is not None:
+            # 抖动后回到已播报状态
+            self.counters["coalesced"] += 1
+            self._pending_state = None
+
+        since_emit = elapsed_s - self._last_emit_s
+        if since_emit >= t.max_silence_s:
+            return "heartbeat"
+        if since_emit < t.min_interval_s:
+            return None
+        if pose is not None and self._last_pose is not None:
+            if math.hypot(pose[0] - self._last_pose[0], pose[1] - self._last_pose[1]) >= t.min_distance_m:
+                return "distance"
+        if eta_s is not None and self._last_eta_s is not None:
+            projected = max(0.0, self._last_eta_s - since_emit)
+            if abs(eta_s - projected) >= t.eta_delta_s:
+                return "eta"
+        return None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 与 voice_server.py 一致：以 functional_call 目录为导入根
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
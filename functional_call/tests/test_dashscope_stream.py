@@ -0,0 +1,166 @@
+import json
+
+import pytest
+
+from llm.dashscope_provider import DashScopeError, _JsonObjectScanner, _StreamAssembler
+
+
+def _line(delta=None, **extra):
+    chunk = {"choices": [{"delta": delta or {}}], **extra}
+    return "data: " + json.dumps(chunk, ensure_ascii=False)
+
+
+def _tool_delta(index, arguments="", name=None, call_id=None):
+    function = {"arguments": arguments}
+    if name:
+        function["name"] = name
+    part = {"index": index, "function": function}
+    if call_id:
+        part["id"] = call_id
+        part["type"] = "function"
+    return {"tool_calls": [part]}
+
+
+def test_scanner_closes_on_outer_brace_only():
+    scanner = _JsonObjectScanner()
+    pieces = ['  {"a": {"b"', ': "x}"}', ', "c": "\\"{"', "}"]
+    assert [scanner.feed(p) for p in pieces] == [False, False, False, True]
+
+
+def test_scanner_rejects_non_object():
+    scanner = _JsonObjectScanner()
+    assert not scanner.feed('["a"]')
+    assert scanner.invalid
+    assert not scanner.feed("}")
+
+
+def test_tool_call_dispatched_when_arguments_close_across_chunks():
+    started = []
+    asm = _StreamAssembler(on_tool_call=started.append)
+    asm.feed_line(_line(_tool_delta(0, name="move_to_station", call_id="c1")))
+    for piece in ['{"station', '_no": ', "3", ', "note": "a}b"', "}"]:
+        assert not started
+        asm.feed_line(_line(_tool_delta(0, piece)))
+    assert len(started) == 1
+    assert started[0]["id"] == "c1"
+    assert json.loads(started[0]["function"]["arguments"]) == {"station_no": 3, "note": "a}b"}
+    assert asm.feed_line("data: [DONE]") is False
+
+    message = asm.finish()
+    assert message["tool_calls"][0]["function"]["name"] == "move_to_station"
+    assert asm.dispatched == 1  # finish 不重复回调
+
+
+def test_multiple_tool_calls_each_dispatched_once_in_order():
+    started = []
+    asm = _StreamAssembler(on_tool_call=lambda call: started.append(call["function"]["name"]))
+    asm.feed_line(_line(_tool_delta(0, '{"height": ', name="lift_up", call_id="a")))
+    asm.feed_line(_line(_tool_delta(0, "50}")))
+    asm.feed_line(_line(_tool_delta(1, "", name="get_robot_status", call_id="b")))
+    # 参数为空的调用在流结束时补发
+    assert started == ["lift_up"]
+    message = asm.finish()
+    assert started == ["lift_up", "get_robot_status"]
+    assert [c["id"] for c in message["tool_calls"]] == ["a", "b"]
+
+
+def test_next_call_flushes_previous_call_with_unscannable_arguments():
+    started = []
+    asm = _StreamAssembler(on_tool_call=started.append)
+    asm.feed_line(_line(_tool_delta(0, "  {}", name="stop_charge", call_id="a")))
+    assert len(started) == 1
+    asm.feed_line(_line(_tool_delta(1, '{"station_no": 1', name="move_to_station", call_id="b")))
+    # 第二个调用参数不完整：流结束后随完整消息返回，不提前执行
+    message = asm.finish()
+    assert len(started) == 1
+    assert message["tool_calls"][1]["function"]["arguments"] == '{"station_no": 1'
+
+
+def test_arguments_after_dispatch_are_ignored():
+    asm = _StreamAssembler()
+    asm.feed_line(_line(_tool_delta(0, "{}", name="put_down", call_id="a")))
+    asm.feed_line(_line(_tool_delta(0, "garbage")))
+    assert asm.finish()["tool_calls"][0]["function"]["arguments"] == "{}"
+
+
+def _stop_line():
+    return "data: " + json.dumps({"choices": [{"delta": {}, "finish_reason": "stop"}]})
+
+
+def test_text_answer_first_sentence_previewed_when_stream_stops():
+    sentences, actions = [], []
+    asm = _StreamAssembler(on_first_sentence=sentences.append, on_first_action=actions.append)
+    for piece in ["好的", "，马上去", "。然后", "顶升。"]:
+        asm.feed_line(_line({"content": piece}))
+    assert sentences == []  # 流结束前不播报
+    asm.feed_line("")
+    asm.feed_line(": keep-alive")
+    asm.feed_line(_stop_line())
+    asm.feed_line("data: " + json.dumps({"choices": [], "usage": {"total_tokens": 12}}))
+    assert asm.finish() == {"content": "好的，马上去。然后顶升。", "tool_calls": None}
+    assert sentences == ["好的，马上去。"]
+    assert actions == ["sentence"]
+    assert asm.usage == {"total_tokens": 12}
+
+
+def test_preamble_before_tool_calls_is_not_previewed():
+    sentences, started = [], []
+    asm = _StreamAssembler(on_tool_call=started.append, on_first_sentence=sentences.append)
+    asm.feed_line(_line({"content": "好的，我先帮你规划一下。"}))
+    asm.feed_line(_line(_tool_delta(0, '{"steps": ["前往站点3"]}', name="planning", call_id="p1")))
+    asm.feed_line("data: " + json.dumps({"choices": [{"delta": {}, "finish_reason": "tool_calls"}]}))
+    message = asm.finish()
+    assert message["content"] == "好的，我先帮你规划一下。"
+    assert len(started) == 1
+    assert sentences == []
+
+
+def test_interrupted_text_stream_is_not_previewed():
+    sentences = []
+    asm = _StreamAssembler(on_first_sentence=sentences.append)
+    asm.feed_line(_line({"content": "请问要去哪个站点？"}))
+    asm.finish()  # 没有 finish_reason（流被截断）
+    assert sentences == []
+
+
+def test_error_chunk_is_retryable_only_before_any_dispatch():
+    asm = _StreamAssembler()
+    with pytest.raises(DashScopeError) as exc:
+        asm.feed_line('data: {"error": {"message": "busy"}}')
+    assert exc.value.retryable
+
+    asm = _StreamAssembler()
+    asm.feed_line(_line(_tool_delta(0, "{}", name="put_down", call_id="a")))
+    with pytest.raises(DashScopeError) as exc:
+        asm.feed_line('data: {"error": {"message": "busy"}}')
+    assert not exc.value.retryable
+
+
+def test_retried_stream_previews_once(monkeypatch):
+    import asyncio
+
+    from llm import dashscope_provider
+
+    monkeypatch.setattr(dashscope_provider.asyncio, "sleep", _no_sleep)
+    provider = dashscope_provider.DashScopeLLMProvider(api_key="test")
+    attempts = []
+
+    async def _lines(payload):
+        attempts.append(payload)
+        yield _line({"content": "请问要去哪个站点？"})
+        if len(attempts) == 1:
+            raise OSError("connection reset")
+        yield _stop_line()
+        yield "data: [DONE]"
+
+    monkeypatch.setattr(provider, "_stream_lines", _lines)
+    sentences = []
+    message = asyncio.run(provider.astream_with_tools([{"role": "user", "content": "走"}],
+                                                      on_first_sentence=sentences.append))
+    assert len(attempts) == 2
+    assert message["content"] == "请问要去哪个站点？"
+    assert sentences == ["请问要去哪个站点？"]
+
+
+async def _no_sleep(_delay):
+    return None
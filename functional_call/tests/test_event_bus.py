@@ -0,0 +1,33 @@
+import time
+
+from core.event_bus import EventBus
+
+
+def test_mark_done_on_ttl_evicted_stream_does_not_recreate_it():
+    bus = EventBus(done_ttl_s=0.01, stripes=1)
+    bus.emit("r1", type="status", speak_text="开始", data={})
+    bus.mark_done("r1")
+    time.sleep(0.02)
+    assert bus.sweep() == 1
+    assert bus.stats()["streams"] == 0
+
+    bus.mark_done("r1")
+
+    assert bus.stats()["streams"] == 0
+    events, done, _ = bus.get_events("r1")
+    assert events == [] and done is True
+
+
+def test_mark_done_on_lru_evicted_stream_does_not_recreate_it():
+    bus = EventBus(max_streams=1, done_ttl_s=0, stripes=1)
+    bus.emit("r1", type="status", speak_text="一", data={})
+    bus.mark_done("r1")
+    bus.emit("r2", type="status", speak_text="二", data={})
+    assert bus.stats()["evicted_lru"] == 1
+
+    bus.mark_done("r1")
+
+    stats = bus.stats()
+    assert stats["streams"] == 1 and stats["active_streams"] == 1
+    events, done, _ = bus.get_events("r1")
+    assert events == [] and done is True
@@ -0,0 +1,89 @@
+import pytest
+
+from app.flows.fast_path import parse_command
+
+STATIONS = {"1": "站点1", "3": "站点3", "9": "充电桩"}
+
+
+def _parse(text):
+    return parse_command(text, stations=STATIONS)
+
+
+@pytest.mark.parametrize("text", ["去3号站", "前往站点3", "请帮我去三号站", "导航到3号站点"])
+def test_move(text):
+    command = _parse(text)
+    assert (command.tool, command.arguments) == ("move_to_station", {"station_no": 3})
+
+
+def test_move_by_station_name():
+    assert _parse("去充电桩").arguments == {"station_no": 9}
+
+
+@pytest.mark.parametrize("text", ["去7号站", "去仓库"])
+def test_unknown_station_goes_to_planning(text):
+    assert _parse(text) is None
+
+
+@pytest.mark.parametrize("text, height", [
+    ("顶升", 50),
+    ("顶升5毫米", 5),
+    ("顶升高度80", 80),
+    ("顶升80mm", 80),
+    ("顶升5厘米", 50),
+    ("顶升到高度12cm", 120),
+])
+def test_lift_up_height_in_mm(text, height):
+    command = _parse(text)
+    assert (command.tool, command.arguments) == ("lift_up", {"height": height})
+
+
+@pytest.mark.parametrize("text", ["顶升300毫米", "顶升30厘米", "顶升0毫米", "顶升5厘米50毫米"])
+def test_lift_up_out_of_range_or_ambiguous(text):
+    assert _parse(text) is None
+
+
+@pytest.mark.parametrize("text, tool", [
+    ("放下", "put_down"),
+    ("把货架放下", "put_down"),
+    ("开始充电", "start_charge"),
+    ("停止充电", "stop_charge"),
+])
+def test_simple_actions(text, tool):
+    assert _parse(text).tool == tool
+
+
+@pytest.mark.parametrize("text, intent", [("电量多少", "battery"), ("查询机器人状态", "status")])
+def test_queries_read_status_without_tool(text, intent):
+    command = _parse(text)
+    assert (command.intent, command.tool) == (intent, None)
+
+
+@pytest.mark.parametrize("text", ["不要顶升", "别去3号站", "先别充电", "不要放下"])
+def test_negation_goes_to_planning(text):
+    assert _parse(text) is None
+
+
+@pytest.mark.parametrize("text", ["去3号站然后顶升", "去3号站再去1号站", "去站点1和站点3", "顶升后放下"])
+def test_compound_commands_go_to_planning(text):
+    assert _parse(text) is None
+
+
+def test_status_query_reads_robot_off_the_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    from app.flows.fast_path import FastPathFlow
+    from app.tools import wrappers
+    from memory.session_store import SessionState
+
+    threads = []
+
+    def _status_data(fresh=False, robot_id=""):
+        threads.append(threading.current_thread())
+        return {"battery": {"percentage_electricity": 80}, "is_charging": False}
+
+    monkeypatch.setattr(wrappers, "get_robot_status_data", _status_data)
+    flow = FastPathFlow(_parse("电量多少"), SessionState("fast-path-test"))
+    reply = asyncio.run(flow.execute("电量多少"))
+    assert "80" in reply
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,42 @@
+import threading
+
+from core.journal import Journal
+
+
+def test_replay_rebuilds_jobs_events_and_plans(tmp_path):
+    journal = Journal(str(tmp_path / "journal.db"))
+    journal.append("job", "r1", {"status": "running", "session_id": "s1"})
+    journal.append("event", "r1", {"type": "started", "data": {"task_no": 3}})
+    journal.append("plan", "r1", {"plan_id": "p1", "plan": {"steps": ["前往站点3"]}})
+    journal.append("job", "r2", {"status": "completed", "session_id": "s2"})
+    journal.append("stream_done", "r2", {})
+    assert journal.flush()
+    journal.close()
+
+    snap = Journal(str(tmp_path / "journal.db")).replay()
+    assert snap.records == 5
+    assert list(snap.in_flight()) == ["r1"]
+    assert snap.events["r1"][0]["data"]["task_no"] == 3
+    assert snap.plans["r1"]["plan_id"] == "p1"
+    assert snap.done == {"r2"}
+
+
+def test_concurrent_appends_are_all_on_disk_after_flush(tmp_path):
+    journal = Journal(str(tmp_path / "journal.db"), flush_interval_s=0.01)
+    threads, per_thread = 8, 200
+    start = threading.Barrier(threads)
+
+    def _append(i):
+        start.wait()
+        for n in range(per_thread):
+            journal.append("event", f"r{i}", {"n": n})
+
+    workers = [threading.Thread(target=_append, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert journal.stats()["appended"] == threads * per_thread
+    assert journal.flush()
+    assert journal.stats()["written"] == threads * per_thread
+    journal.close()
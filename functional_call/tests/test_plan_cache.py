@@ -0,0 +1,97 @@
+from core.plan_cache import PlanCache, extract_intent, normalize_text
+
+
+class _FakeMap:
+    """提供 PlanCache 需要的地图接口"""
+
+    def __init__(self, stations):
+        self.stations = dict(stations)
+        self.version = "v1"
+        self._listeners = []
+
+    def get_stations(self):
+        return self.stations
+
+    def get_map_version(self):
+        return self.version
+
+    def add_reload_listener(self, listener):
+        self._listeners.append(listener)
+
+    def reload(self, version, stations=None):
+        self.version = version
+        if stations is not None:
+            self.stations = dict(stations)
+        for listener in self._listeners:
+            listener(version)
+
+
+def test_normalize_text():
+    assert normalize_text("请帮我去 三号站，好吗？") == "去3号站"
+    assert normalize_text("顶升二十五ＭＭ") == "顶升25mm"
+
+
+def test_extract_intent_station_spellings_share_template():
+    assert extract_intent("去5号站") == ("去站点{station}", [("station", "5")])
+    assert extract_intent("去站点5") == ("去站点{station}", [("station", "5")])
+    assert extract_intent("去充电桩", {"充电桩": "9"}) == ("去站点{station}", [("station_name", "充电桩")])
+
+
+def test_extract_intent_keeps_height_unit():
+    mm = extract_intent("顶升5毫米")
+    cm = extract_intent("顶升5厘米")
+    assert mm == ("顶升高度{height}", [("height", "5")])
+    assert cm == ("顶升高度{height}厘米", [("height_cm", "5")])
+    assert extract_intent("顶升高度50mm") == extract_intent("顶升50毫米") == extract_intent("顶升高度50")
+    assert extract_intent("顶升5cm") == cm
+
+
+def _plan(*steps, title="搬运"):
+    return {"steps": list(steps), "title": title}
+
+
+def test_store_and_lookup_fill_new_slot_values():
+    cache = PlanCache(resources=_FakeMap({"3": "站点3", "5": "站点5"}))
+    assert cache.store("去3号站取货", _plan("前往站点3", "执行顶升动作"))
+    match = cache.lookup("去站点5取货")
+    assert match is not None
+    assert match.steps == ["前往站点5", "执行顶升动作"]
+    assert cache.lookup("去站点7取货") is None  # 站点不在地图中
+    assert cache.stats()["hits"] == 1 and cache.stats()["rejected"] == 1
+
+
+def test_mm_and_cm_plans_do_not_share_entries():
+    cache = PlanCache(resources=_FakeMap({}))
+    assert cache.store("顶升5厘米", _plan("顶升货架到5厘米"))
+    assert cache.lookup("顶升8毫米") is None
+    assert cache.lookup("顶升8厘米").steps == ["顶升货架到8厘米"]
+
+
+def test_store_rejects_plans_without_the_slot():
+    cache = PlanCache(resources=_FakeMap({"3": "站点3"}))
+    assert not cache.store("去3号站", _plan("前往目标站点"))
+    assert cache.lookup("去3号站") is None
+
+
+def test_invalidate_and_map_reload():
+    resources = _FakeMap({"3": "站点3", "5": "站点5"})
+    cache = PlanCache(resources=resources)
+    cache.store("去3号站", _plan("前往站点3"))
+    match = cache.lookup("去5号站")
+    cache.invalidate(match.key, replay_failed=True)
+    assert cache.lookup("去5号站") is None
+    assert cache.stats()["replay_failed"] == 1
+
+    cache.store("去3号站", _plan("前往站点3"))
+    resources.reload("v2")
+    assert cache.stats()["entries"] == 0
+    assert cache.lookup("去5号站") is None
+    # 新版本地图下重新缓存，旧版本的键不会再命中
+    cache.store("去3号站", _plan("前往站点3"))
+    assert cache.lookup("去5号站").steps == ["前往站点5"]
+
+
+def test_disabled_cache():
+    cache = PlanCache(resources=_FakeMap({}), enabled=False)
+    assert not cache.store("顶升5厘米", _plan("顶升5厘米"))
+    assert cache.lookup("顶升5厘米") is None
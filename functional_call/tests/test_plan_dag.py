@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from app.flows.plan_dag import (
+    CHARGE, LIFT, MOTION, OTHER, READ, VERIFY, CommitBarrier, build_dag, classify_step, is_read_only_tool,
+)
+
+
+def test_classify_step():
+    assert classify_step("前往2号站点") == MOTION
+    assert classify_step("顶升货架") == LIFT
+    assert classify_step("开始充电") == CHARGE
+    assert classify_step("确认是否到达") == VERIFY
+    assert classify_step("查询电量") == READ
+    assert classify_step("整理一下") == OTHER
+
+
+def test_tool_resources():
+    assert is_read_only_tool("get_robot_status")
+    assert not is_read_only_tool("move_to_station")
+    assert not is_read_only_tool("planning")
+
+
+def test_reads_before_actuation_run_in_parallel():
+    dag = build_dag(["查询电量", "查询位置", "前往2号站点"])
+    assert [s.deps for s in dag] == [(), (), (0, 1)]
+    assert dag[0].read_only and dag[1].read_only and not dag[2].read_only
+
+
+def test_read_after_actuation_depends_on_it():
+    dag = build_dag(["查询电量", "前往2号站点", "查询位置", "确认是否到达"])
+    assert dag[2].resource == READ
+    assert dag[2].deps == (1,)
+    assert dag[3].deps == (1,)
+
+
+def test_actuation_depends_on_all_previous_steps():
+    dag = build_dag(["前往1号站点", "顶升", "查询状态", "开始充电"])
+    assert dag[1].deps == (0,)
+    assert dag[2].deps == (0, 1)
+    assert dag[3].deps == (0, 1, 2)
+
+
+def test_other_step_conflicts_with_everything():
+    dag = build_dag(["查询电量", "整理一下", "查询状态"])
+    assert dag[1].deps == (0,)
+    assert dag[2].deps == (1,)
+
+
+def test_barrier_wait_returns_when_frontier_reached():
+    async def main():
+        barrier = CommitBarrier()
+        await barrier.wait(0)
+        order = []
+
+        async def waiter(k):
+            await barrier.wait(k)
+            order.append(k)
+
+        tasks = [asyncio.ensure_future(waiter(k)) for k in (3, 1, 2)]
+        await asyncio.sleep(0)
+        assert order == []
+        barrier.advance(1)
+        await asyncio.sleep(0)
+        assert order == [1]
+        barrier.advance(3)
+        await asyncio.gather(*tasks)
+        assert sorted(order[1:]) == [2, 3]
+        await barrier.wait(2)
+
+    asyncio.run(main())
+
+
+def test_barrier_frontier_never_moves_back():
+    async def main():
+        barrier = CommitBarrier()
+        barrier.advance(2)
+        barrier.advance(1)
+        assert barrier.frontier == 2
+        await asyncio.wait_for(barrier.wait(2), timeout=1)
+
+    asyncio.run(main())
+
+
+def test_barrier_abort_cancels_waiters():
+    async def main():
+        barrier = CommitBarrier()
+        done = asyncio.ensure_future(barrier.wait(1))
+        pending = asyncio.ensure_future(barrier.wait(2))
+        await asyncio.sleep(0)
+        barrier.advance(1)
+        barrier.abort()
+        await done
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        # abort 之后推进不再影响已取消的等待者
+        barrier.advance(5)
+        assert barrier.frontier == 5
+
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+from app.flows.planning_flow import describe_load
+from core.plan_cache import PlanCache
+
+
+def _status(state="ActionState.AT_FINISHED", result="ActionResult.AT_TASK_FINISHED", action_id=4, param0=11, param1=50):
+    return {"action": {"state": state, "no": 1, "id": action_id, "param0": param0, "param1": param1,
+                       "result": result, "result_value": 0}}
+
+
+def test_describe_load_from_finished_lift_action():
+    assert describe_load(_status(param1=50)) == "已载货 (顶升高度 50)"
+    assert describe_load(_status(param1=0)) == "空载 (高度 0)"
+
+
+def test_describe_load_unknown():
+    assert describe_load(None) is None
+    assert describe_load({"action": None}) is None
+    assert describe_load(_status(state="ActionState.AT_RUNNING")) is None
+    assert describe_load(_status(result="ActionResult.AT_TASK_ERROR")) is None
+    assert describe_load(_status(action_id=7)) is None
+
+
+class _Map:
+    def get_stations(self):
+        return {"3": "站点3", "5": "站点5"}
+
+    def get_map_version(self):
+        return "v1"
+
+
+def test_load_states_use_separate_cache_keys():
+    cache = PlanCache(resources=_Map())
+    loaded, empty = describe_load(_status(param1=50)), describe_load(_status(param1=0))
+    assert cache.store("去3号站", {"steps": ["前往站点3", "执行下降放货动作"]}, state=loaded)
+    assert cache.store("去3号站", {"steps": ["前往站点3", "执行顶升动作"]}, state=empty)
+
+    hit_loaded = cache.lookup("去5号站", state=loaded)
+    hit_empty = cache.lookup("去5号站", state=empty)
+    assert hit_loaded.key != hit_empty.key
+    assert hit_loaded.steps == ["前往站点5", "执行下降放货动作"]
+    assert hit_empty.steps == ["前往站点5", "执行顶升动作"]
+    assert cache.stats()["entries"] == 2
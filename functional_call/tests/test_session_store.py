@@ -0,0 +1,53 @@
+from memory.session_store import SessionState
+
+
+def _contents(session):
+    return [m.content for m in session.conversation]
+
+
+def test_fork_starts_from_current_history():
+    session = SessionState("s1", max_conversation=5)
+    session.push_message("user", "去2号站")
+    child = session.fork()
+    assert _contents(child) == ["去2号站"]
+    child.push_message("assistant", "好的")
+    assert _contents(session) == ["去2号站"]
+
+
+def test_merge_fork_appends_only_new_messages_in_commit_order():
+    session = SessionState("s1")
+    session.push_message("user", "q")
+    first, second = session.fork(), session.fork()
+    second.push_message("assistant", "b1")
+    first.push_message("assistant", "a1")
+    first.push_message("tool", "a2")
+    session.merge_fork(first)
+    session.merge_fork(second)
+    assert _contents(session) == ["q", "a1", "a2", "b1"]
+
+
+def test_fork_is_not_truncated_and_merge_respects_parent_limit():
+    session = SessionState("s1", max_conversation=3)
+    for i in range(3):
+        session.push_message("user", str(i))
+    child = session.fork()
+    for i in range(3, 6):
+        child.push_message("assistant", str(i))
+    assert len(child.conversation) == 6
+    session.merge_fork(child)
+    assert _contents(session) == ["3", "4", "5"]
+
+
+def test_discard_message_removes_only_that_message():
+    session = SessionState("s1", max_conversation=2)
+    session.push_message("user", "a")
+    msg = session.push_message("user", "b")
+    session.push_message("assistant", "c")
+    session.discard_message(msg)
+    assert _contents(session) == ["c"]
+    # 已被 maxlen 挤出的消息：忽略
+    old = session.push_message("user", "d")
+    session.push_message("user", "e")
+    session.push_message("user", "f")
+    session.discard_message(old)
+    assert _contents(session) == ["e", "f"]
@@ -0,0 +1,61 @@
+import math
+
+from src.sr_modbus_cache import LIVE, SLOW, STATIC, RegisterCache
+
+RANGES = {"version": (0, 2), "battery": (10, 2), "pose": (20, 2)}
+
+
+def _cache():
+    return RegisterCache(RANGES, {"version": STATIC, "battery": SLOW(60), "pose": LIVE})
+
+
+def test_policies():
+    assert STATIC.ttl_s == math.inf and STATIC.cacheable
+    assert not LIVE.cacheable
+    cache = _cache()
+    assert cache.cacheable(0, 2) and cache.cacheable(10, 2)
+    assert not cache.cacheable(20, 2) and not cache.cacheable(0, 11)
+
+
+def test_get_put_and_invalidate():
+    cache = _cache()
+    assert cache.get(10, 2) is None
+    cache.put(10, [7, 8])
+    assert cache.get(10, 2) == [7, 8]
+    assert cache.get(20, 2) is None  # 实时区段不缓存
+    cache.invalidate(["battery"])
+    assert cache.get(10, 2) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bypass"], stats["invalidations"]) == (1, 2, 1, 1)
+
+
+def test_read_issued_before_invalidation_is_not_stored():
+    cache = _cache()
+    generation = cache.generation()  # 读请求发出
+    cache.invalidate(["battery"])  # 读请求在途时写操作失效了该区段
+    cache.put(10, [1, 1], generation)  # 旧值返回
+    assert cache.get(10, 2) is None
+    assert cache.stats()["stale_puts"] == 1
+
+    # 失效之后发出的读请求正常写入
+    cache.put(10, [2, 2], cache.generation())
+    assert cache.get(10, 2) == [2, 2]
+
+
+def test_invalidation_of_other_ranges_does_not_drop_put():
+    cache = _cache()
+    generation = cache.generation()
+    cache.invalidate(["version"])
+    cache.put(10, [3, 3], generation)
+    assert cache.get(10, 2) == [3, 3]
+
+
+def test_full_clear_drops_in_flight_puts():
+    cache = _cache()
+    generation = cache.generation()
+    cache.invalidate()
+    cache.put(0, [1, 2], generation)
+    cache.put(10, [3, 4], generation)
+    assert cache.get(0, 2) is None and cache.get(10, 2) is None
+    cache.put(0, [1, 2], cache.generation())
+    assert cache.get(0, 2) == [1, 2]
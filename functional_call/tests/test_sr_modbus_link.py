@@ -0,0 +1,154 @@
+import pytest
+
+from src import sr_modbus_link, sr_modbus_sdk
+from src.sr_modbus_link import LINK_CLOSED, LINK_HALF_OPEN, LINK_OPEN, CircuitBreaker, LinkDownError
+from src.sr_modbus_sdk import SRModbusSdk
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(sr_modbus_link.time, "monotonic", clock)
+    monkeypatch.setattr(sr_modbus_link.random, "uniform", lambda a, b: 1.0)  # 去掉退避抖动
+    return clock
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, base_backoff_s=1.0)
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    breaker.record_success()  # 成功清零连续失败计数
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    assert breaker.state == LINK_CLOSED
+    breaker.record_failure("timeout")
+    assert breaker.state == LINK_OPEN
+
+    with pytest.raises(LinkDownError) as exc:
+        breaker.check()
+    assert exc.value.retry_after_s == pytest.approx(1.0)
+    assert breaker.snapshot()["trips"] == 1
+
+
+def test_half_open_lets_one_probe_through_then_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, base_backoff_s=1.0)
+    breaker.record_failure("timeout")
+    clock.now += 1.0
+    breaker.check()  # 退避到期：转为半开，放行探测请求
+    assert breaker.state == LINK_HALF_OPEN
+    with pytest.raises(LinkDownError):
+        breaker.check()  # 探测在途，其他请求仍快速失败
+    breaker.record_success()
+    assert breaker.state == LINK_CLOSED
+    breaker.check()
+    assert breaker.snapshot()["recoveries"] == 1
+
+
+def test_failed_probe_reopens_with_doubled_backoff(clock):
+    breaker = CircuitBreaker(failure_threshold=1, base_backoff_s=1.0, max_backoff_s=3.0)
+    breaker.record_failure("timeout")
+    for expected in (2.0, 3.0):
+        clock.now += 10
+        breaker.check()
+        breaker.record_failure("probe timeout")  # 半开时一次失败即重新打开
+        assert breaker.state == LINK_OPEN
+        assert breaker.seconds_until_retry() == pytest.approx(expected)
+    assert breaker.snapshot()["trips"] == 1
+
+
+def test_manual_half_open_waits_for_supervisor(clock):
+    breaker = CircuitBreaker(failure_threshold=1, base_backoff_s=1.0, auto_half_open=False)
+    breaker.trip("connection refused")
+    clock.now += 10
+    with pytest.raises(LinkDownError):
+        breaker.check()  # 没有重连成功前不放行
+    breaker.half_open()
+    breaker.check()
+    assert breaker.state == LINK_HALF_OPEN
+
+
+class _Response:
+    def __init__(self, error=None):
+        self._error = error
+
+    def isError(self):
+        return self._error is not None
+
+    def __str__(self):
+        return self._error or "ok"
+
+
+class _Client:
+    def is_socket_open(self):
+        return True
+
+
+@pytest.fixture
+def sdk(monkeypatch, clock):
+    monkeypatch.setattr(sr_modbus_sdk.time, "sleep", lambda s: None)
+    sdk = SRModbusSdk(retry_count=3, failure_threshold=2)
+    sdk._client = _Client()
+    return sdk
+
+
+def _request(outcomes, calls):
+    def request(client):
+        calls.append(client)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return request
+
+
+def test_link_failures_stop_retrying_once_breaker_opens(sdk):
+    calls = []
+    request = _request([TimeoutError("t1"), TimeoutError("t2"), _Response()], calls)
+    with pytest.raises(LinkDownError):
+        sdk._execute(request, "读")
+    # 第 2 次失败打开熔断，剩余的 1 次预算直接放弃
+    assert len(calls) == 2
+    assert sdk.link_state()["state"] == LINK_OPEN
+    with pytest.raises(LinkDownError):
+        sdk._execute(_request([_Response()], calls), "读")
+    assert len(calls) == 2  # 熔断打开时请求不发送
+
+
+def test_slave_errors_use_the_whole_budget_without_tripping(sdk):
+    calls = []
+    request = _request([_Response("SlaveFailure"), _Response("SlaveFailure"), _Response("SlaveFailure")], calls)
+    with pytest.raises(ConnectionError) as exc:
+        sdk._execute(request, "写")
+    assert not isinstance(exc.value, LinkDownError)
+    assert len(calls) == 3
+    assert sdk.link_state()["state"] == LINK_CLOSED
+
+
+def test_link_error_response_counts_toward_breaker_and_retry_recovers(sdk):
+    calls = []
+    request = _request([_Response("No response received"), _Response()], calls)
+    assert str(sdk._execute(request, "读")) == "ok"
+    assert len(calls) == 2
+    assert sdk.link_state()["consecutive_failures"] == 0
+
+
+def test_probe_after_reconnect_closes_the_link(sdk):
+    sdk._breaker.trip("connection refused")
+    sdk._breaker.half_open()  # 后台线程重连成功
+    calls = []
+    assert str(sdk._execute(_request([_Response()], calls), "读")) == "ok"
+    assert sdk.link_state()["state"] == LINK_CLOSED
+
+    sdk._breaker.trip("connection refused")
+    sdk._breaker.half_open()
+    with pytest.raises(LinkDownError):
+        sdk._execute(_request([TimeoutError("probe")], calls), "读")  # 探测失败：重新打开，不消耗剩余预算
+    assert sdk.link_state()["state"] == LINK_OPEN
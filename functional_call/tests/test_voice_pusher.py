@@ -0,0 +1,30 @@
+import threading
+
+from core.voice_pusher import VoicePushNotifier
+
+
+def test_disabled_pusher_stats():
+    pusher = VoicePushNotifier(push_url=None)
+    stats = pusher.stats()
+    assert stats["enabled"] is False and stats["targets"] == {}
+
+
+def test_stats_snapshot_taken_on_delivery_thread():
+    pusher = VoicePushNotifier(push_url="http://127.0.0.1:9/a,http://127.0.0.1:9/b", max_retries=1)
+    try:
+        seen = []
+        original = pusher._target_stats
+
+        def _recording():
+            seen.append(threading.current_thread())
+            return original()
+
+        pusher._target_stats = _recording
+        stats = pusher.stats()
+        assert set(stats["targets"]) == {"http://127.0.0.1:9/a", "http://127.0.0.1:9/b"}
+        assert stats["targets"]["http://127.0.0.1:9/a"]["queue_depth"] == 0
+        assert seen == [pusher._thread]
+    finally:
+        pusher.close()
+    # 投递线程停止后直接读取
+    assert pusher.stats()["targets"]["http://127.0.0.1:9/b"]["enqueued"] == 0
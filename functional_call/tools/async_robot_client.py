@@ -0,0 +1,309 @@
+"""
+RobotClient 的 asyncio 版本。
+
+- 基于 AsyncSRModbusSdk（asyncio Modbus TCP 传输），不占用线程、不阻塞事件循环
+- 与 RobotClient 相同的查询/指令接口与返回结构，长任务可 await 且可取消
+- 多台机器人、多个任务可以跑在同一个事件循环上
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from src.sr_modbus_async import AsyncSRModbusSdk
+from src.sr_modbus_wait import AdaptivePollInterval, ProgressPolicy, ProgressThresholds, TaskDurationEstimator
+from src.sr_modbus_model import MovementState, MovementResult, ActionState, ActionResult, RobotSnapshot
+from tools.robot_client import (
+    EventEmitter, RobotClient, action_to_dict, battery_to_dict, movement_to_dict, progress_event, state_to_status,
+)
+from tools.state_poller import RobotState
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRobotClient:
+    """
+    单机器人异步客户端。
+
+    用法：
+        robot = AsyncRobotClient(host, port)
+        await robot.connect()
+        await robot.move_to_station(3, emit=emit)
+    """
+
+    STATE_FIELDS = RobotClient.STATE_FIELDS
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        *,
+        state_max_age_s: float = 2.0,
+        poll_interval_s: float | None = None,
+        progress: ProgressThresholds | None = None,
+    ) -> None:
+        self._sdk = AsyncSRModbusSdk()
+        self._host = host
+        self._port = port
+        self._state_max_age_s = state_max_age_s
+        self._poll_interval_s = poll_interval_s
+        self._latest: RobotState | None = None
+        self._task_no = random.randint(1, 10000)
+        # 历史任务耗时，用于在预计完成前后加快轮询
+        self._durations = TaskDurationEstimator()
+        self._progress = progress or ProgressThresholds()
+
+    @property
+    def sdk(self) -> AsyncSRModbusSdk:
+        return self._sdk
+
+    async def connect(self) -> bool:
+        return await self._sdk.connect_tcp(self._host, self._port)
+
+    async def close(self) -> None:
+        await self._sdk.close()
+
+    def _next_task_no(self) -> int:
+        self._task_no += 1
+        return self._task_no
+
+    # ------------------ 查询类 ------------------
+    async def get_state(self, *, fresh: bool = False, max_age_s: float | None = None) -> RobotState:
+        """
+        读取机器人状态：缓存未过期时直接返回，否则并发块读（快照 + 充电离散量）。
+        """
+        max_age = self._state_max_age_s if max_age_s is None else max_age_s
+        if not fresh and self._latest is not None and self._latest.age_s() <= max_age:
+            return self._latest
+        snapshot, charging = await asyncio.gather(
+            self._sdk.read_snapshot(self.STATE_FIELDS),
+            self._sdk.is_charge(),
+        )
+        self._latest = RobotState(
+            snapshot=snapshot,
+            is_charging=bool(charging),
+            monotonic_ts=time.monotonic(),
+            wall_ts=snapshot.timestamp,
+        )
+        return self._latest
+
+    async def _state_field(self, name: str, *, fresh: bool = False, max_age_s: float | None = None) -> Any:
+        snapshot = (await self.get_state(fresh=fresh, max_age_s=max_age_s)).snapshot
+        value = getattr(snapshot, name)
+        if value is None:
+            raise ValueError(f"状态字段 {name} 解码失败: {snapshot.decode_errors.get(name)}")
+        return value
+
+    async def get_snapshot(self, fields: list[str] | None = None) -> RobotSnapshot:
+        return await self._sdk.read_snapshot(fields)
+
+    async def get_battery_info(self, *, fresh: bool = False) -> dict:
+        return battery_to_dict(await self._state_field("battery_info", fresh=fresh))
+
+    async def get_movement_task_info(self, *, fresh: bool = False) -> dict:
+        return movement_to_dict(await self._state_field("movement_task", fresh=fresh))
+
+    async def get_action_task_info(self, *, fresh: bool = False) -> dict:
+        return action_to_dict(await self._state_field("action_task", fresh=fresh))
+
+    async def is_charging(self, *, fresh: bool = False) -> bool:
+        return (await self.get_state(fresh=fresh)).is_charging
+
+    async def get_status(self, *, fresh: bool = False) -> dict:
+        return state_to_status(await self.get_state(fresh=fresh))
+
+    # ------------------ 内部工具 ------------------
+    async def _poll_task_status(
+        self,
+        query_func: Callable[[], Awaitable[Any]],
+        check_done_func: Callable[[Any], bool],
+        *,
+        timeout_s: int,
+        emit: EventEmitter,
+        task_name: str,
+        duration_key: Hashable | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> Any:
+        """
+        异步状态轮询：超时抛 TimeoutError；协程被取消或 stop_event 置位时下发停止运动。
+        poll_interval_s 为 None 时轮询节奏自适应（指令下发后与接近历史耗时时加快）。
+        progress 事件由 ProgressPolicy 决定（状态跳变、ETA 偏离或静默过久时才播报）。
+        """
+        expected_s = self._durations.expected(duration_key) if duration_key is not None else None
+        if self._poll_interval_s is not None:
+            pacer = AdaptivePollInterval(fast_s=self._poll_interval_s, slow_s=self._poll_interval_s)
+        else:
+            pacer = AdaptivePollInterval(expected_s=expected_s)
+        policy = ProgressPolicy(self._progress)
+        start = time.monotonic()
+        try:
+            while True:
+                if stop_event and stop_event.is_set():
+                    logger.info(f"⏹️ {task_name}任务收到中断信号")
+                    await self.cancel_current_task()
+                    raise InterruptedError(f"{task_name}任务已被取消")
+
+                elapsed_f = time.monotonic() - start
+                elapsed = int(elapsed_f)
+                if elapsed >= timeout_s:
+                    raise TimeoutError(f"{task_name}超时（已等待{timeout_s}秒）")
+
+                try:
+                    status = await query_func()
+                    eta_s = max(0.0, expected_s - elapsed_f) if expected_s else None
+                    reason = policy.observe(elapsed_f, state=str(getattr(status, "state", status)), eta_s=eta_s)
+                    if reason:
+                        emit("progress", progress_event(task_name, status, elapsed, reason, eta_s))
+                    if check_done_func(status):
+                        if duration_key is not None:
+                            self._durations.record(duration_key, time.monotonic() - start)
+                        return status
+                except ConnectionError as e:
+                    logger.warning(f"⚠️ {task_name}轮询中通信异常（已忽略）: {e}")
+
+                await asyncio.sleep(pacer.next_delay(elapsed_f))
+        except asyncio.CancelledError:
+            logger.warning(f"⏹️ {task_name}等待被取消，下发停止运动")
+            await asyncio.shield(self._cancel_quietly())
+            raise
+
+    async def _cancel_quietly(self) -> None:
+        try:
+            await self.cancel_current_task()
+        except Exception as e:
+            logger.error(f"❌ 取消任务失败: {e}")
+
+    # ------------------ 指令类 ------------------
+    async def cancel_current_task(self) -> None:
+        await self._sdk.cancel_task()
+
+    async def trigger_emergency(self) -> None:
+        await self._sdk.trigger_emergency()
+
+    async def move_to_station(
+        self,
+        station_no: int,
+        *,
+        timeout_s: int = 120,
+        emit: EventEmitter | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> None:
+        emit = emit or (lambda _t, _d=None: None)
+
+        try:
+            info = await self.get_movement_task_info(fresh=True)
+            if "MT_RUNNING" in info["state"]:
+                await self.cancel_current_task()
+        except Exception:
+            pass
+
+        task_no = self._next_task_no()
+        await self._sdk.move_to_station_no(station_no, task_no)
+        emit("started", {"text": f"开始导航到站点 {station_no}（任务号 {task_no}）。"})
+
+        def check_done(t):
+            if t.state == MovementState.MT_FINISHED and t.no == task_no:
+                if t.result == MovementResult.MT_TASK_ERROR:
+                    raise RuntimeError(f"导航失败：错误码 {t.result_value}")
+                return True
+            return False
+
+        await self._poll_task_status(
+            query_func=lambda: self._state_field("movement_task", fresh=True),
+            check_done_func=check_done,
+            timeout_s=timeout_s,
+            emit=emit,
+            task_name="导航",
+            duration_key=("move", station_no),
+            stop_event=stop_event,
+        )
+        emit("step_done", {"text": f"已到达站点 {station_no}。"})
+
+    async def execute_action(
+        self,
+        action_id: int,
+        param1: int,
+        param2: int,
+        *,
+        timeout_s: int = 60,
+        emit: EventEmitter | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> None:
+        emit = emit or (lambda _t, _d=None: None)
+        task_no = self._next_task_no()
+        await self._sdk.start_action_task_no(action_id, param1, param2, task_no)
+        emit("started", {"text": f"开始执行动作 {action_id}（任务号 {task_no}）。"})
+
+        def check_done(t):
+            if t.state == ActionState.AT_FINISHED and t.no == task_no:
+                if t.result == ActionResult.AT_TASK_ERROR:
+                    raise RuntimeError(f"动作失败：错误码 {t.result_value}")
+                return True
+            return False
+
+        await self._poll_task_status(
+            query_func=lambda: self._state_field("action_task", fresh=True),
+            check_done_func=check_done,
+            timeout_s=timeout_s,
+            emit=emit,
+            task_name="动作执行",
+            duration_key=("action", action_id, param1, param2),
+            stop_event=stop_event,
+        )
+        emit("step_done", {"text": f"动作 {action_id} 执行完成。"})
+
+    async def start_charge(
+        self,
+        *,
+        timeout_s: int = 40,
+        emit: EventEmitter | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> None:
+        emit = emit or (lambda _t, _d=None: None)
+        if await self.is_charging(fresh=True):
+            emit("step_done", {"text": "机器人已在充电中。"})
+            return
+
+        emit("started", {"text": "开始启动充电。"})
+        await self._sdk.charge()
+        await self._poll_task_status(
+            query_func=self._sdk.is_charge,
+            check_done_func=lambda is_charging: bool(is_charging),
+            timeout_s=timeout_s,
+            emit=emit,
+            task_name="充电启动",
+            duration_key=("charge", True),
+            stop_event=stop_event,
+        )
+        emit("step_done", {"text": "充电已启动。"})
+
+    async def stop_charge(
+        self,
+        *,
+        timeout_s: int = 40,
+        emit: EventEmitter | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> None:
+        emit = emit or (lambda _t, _d=None: None)
+        if not await self.is_charging(fresh=True):
+            emit("step_done", {"text": "机器人当前未在充电。"})
+            return
+
+        emit("started", {"text": "开始停止充电。"})
+        await self._sdk.stop_charge()
+        await self._poll_task_status(
+            query_func=self._sdk.is_charge,
+            check_done_func=lambda is_charging: not bool(is_charging),
+            timeout_s=timeout_s,
+            emit=emit,
+            task_name="充电停止",
+            duration_key=("charge", False),
+            stop_event=stop_event,
+        )
+        emit("step_done", {"text": "充电已停止。"})
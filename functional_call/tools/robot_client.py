@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import contextlib
 import logging
 import random
 import threading
 import time
-from typing import Callable, Optional
+from typing import Any, Callable, Hashable, Optional
 
+from src.sr_modbus_link import LinkDownError
 from src.sr_modbus_sdk import SRModbusSdk
-from src.sr_modbus_model import MovementState, MovementResult, ActionState, ActionResult
+from src.sr_modbus_scheduler import PRIORITY_POLL, PRIORITY_QUERY, PipelinedModbusClient
+from src.sr_modbus_wait import AdaptivePollInterval, ProgressPolicy, ProgressThresholds, TaskDurationEstimator
+from src.sr_modbus_model import MovementState, MovementResult, ActionState, ActionResult, RobotSnapshot
+from core.tracing import span
+from tools.state_poller import RobotState, RobotStatePoller
 
 
 logger = logging.getLogger(__name__)
@@ -16,22 +22,167 @@ logger = logging.getLogger(__name__)
 EventEmitter = Callable[[str, dict | None], None]
 
 
+def battery_to_dict(b) -> dict:
+    return {
+        "percentage_electricity": b.percentage_electricity,
+        "temperature": b.temperature,
+        "state": str(b.state),
+        "voltage": b.voltage,
+        "current": b.current,
+        "nominal_capacity": b.nominal_capacity,
+        "use_cycles": b.use_cycles,
+    }
+
+
+def movement_to_dict(t) -> dict:
+    return {
+        "state": str(t.state),
+        "no": t.no,
+        "target_station": t.target_station,
+        "path_no": t.path_no,
+        "result": str(t.result),
+        "result_value": t.result_value,
+    }
+
+
+def action_to_dict(t) -> dict:
+    return {
+        "state": str(t.state),
+        "no": t.no,
+        "id": t.id,
+        "param0": t.param0,
+        "param1": t.param1,
+        "result": str(t.result),
+        "result_value": t.result_value,
+    }
+
+
+def progress_event(task_name: str, status: Any, elapsed: int, reason: str, eta_s: float | None) -> dict:
+    """ProgressPolicy 放行的一次进度 -> progress 事件数据"""
+    text = f"{task_name}进行中，已等待 {elapsed} 秒，状态：{getattr(status, 'state', 'N/A')}"
+    if eta_s is not None:
+        text += f"，预计还需 {int(eta_s)} 秒" if eta_s > 0 else "，已超过以往耗时"
+    return {
+        "text": text + "。",
+        "elapsed_s": elapsed,
+        "status": str(status),
+        "reason": reason,
+        "eta_s": None if eta_s is None else round(eta_s, 1),
+    }
+
+
+def state_to_status(state: RobotState) -> dict:
+    """RobotState -> 状态工具/会话缓存使用的字典"""
+    snap = state.snapshot
+    return {
+        "system_state": str(snap.system_state),
+        "locate_state": str(snap.locate_state),
+        "station_no": snap.station_no,
+        "pose": {"x": snap.pose.x, "y": snap.pose.y, "yaw": snap.pose.yaw} if snap.pose else None,
+        "battery": battery_to_dict(snap.battery_info) if snap.battery_info else None,
+        "is_charging": state.is_charging,
+        "movement": movement_to_dict(snap.movement_task) if snap.movement_task else None,
+        "action": action_to_dict(snap.action_task) if snap.action_task else None,
+        "age_s": round(state.age_s(), 3),
+    }
+
+
 class RobotClient:
     """
     单机器人客户端（线程安全：每次Modbus交互用锁保护）。
 
     说明：
     - 只实现当前语音控制必需的指令/查询
-    - 进度播报通过 emit(type, data) 由上层转成 VoiceEvent
+    - 进度播报通过 emit(type, data) 由上层转成 VoiceEvent；progress 事件由 ProgressPolicy 节流
+      （状态跳变 / 行驶距离 / ETA 变化 / 静默过久才播报）
     """
 
-    def __init__(self, host: str, port: int) -> None:
-        self._lock = threading.RLock()
-        self._sdk = SRModbusSdk()
+    # 后台轮询的快照字段（合并后为 2 次块读）
+    STATE_FIELDS = ["system_state", "locate_state", "pose", "station_no", "battery_info", "movement_task", "action_task"]
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        *,
+        state_poll_interval_s: float = 0.0,
+        state_max_age_s: float = 2.0,
+        pipelined: bool = False,
+        max_in_flight: int = 4,
+        progress: ProgressThresholds | None = None,
+    ) -> None:
+        # pipelined=True 时经请求调度器访问 Modbus：读请求流水线化、停止/急停不排队，调用方无需互斥
+        self._pipelined = pipelined
+        if pipelined:
+            self._sdk = PipelinedModbusClient(max_in_flight=max_in_flight)
+            self._lock = contextlib.nullcontext()
+        else:
+            # 重试预算统一由 _retry_on_modbus_error 掌握，SDK 层只尝试一次
+            self._sdk = SRModbusSdk(retry_count=1)
+            self._lock = threading.RLock()
         self._host = host
         self._port = port
         self._sdk.connect_tcp(host, port)
         self._task_no = random.randint(1, 10000)
+        # 历史任务耗时，用于在预计完成前后加快轮询
+        self._durations = TaskDurationEstimator()
+        # 长任务进度播报阈值与累计计数（被放行/抑制/合并的次数）
+        self._progress = progress or ProgressThresholds()
+        self._progress_counters = {"observed": 0, "emitted": 0, "suppressed": 0, "coalesced": 0}
+        self._progress_lock = threading.Lock()
+
+        # 共享状态缓存：state_poll_interval_s > 0 时由后台线程持续刷新
+        self._state_max_age_s = state_max_age_s
+        self._poller = RobotStatePoller(
+            lambda: self._read_state(priority=PRIORITY_POLL),
+            interval_s=state_poll_interval_s or 0.5,
+            name=f"{host}:{port}",
+        )
+        if state_poll_interval_s > 0:
+            self._poller.start()
+
+    @property
+    def address(self) -> str:
+        return f"{self._host}:{self._port}"
+
+    def close(self) -> None:
+        """停止状态轮询并断开 Modbus 连接"""
+        self._poller.stop()
+        with self._lock:
+            self._sdk.close()
+
+    def cache_stats(self) -> dict:
+        """SDK 寄存器读缓存命中统计"""
+        return self._sdk.cache_stats()
+
+    def scheduler_stats(self) -> dict | None:
+        """请求调度器统计（未启用流水线时为 None）"""
+        return self._sdk.stats() if self._pipelined else None
+
+    def link_state(self) -> dict:
+        """Modbus 链路熔断器状态（closed / open / half_open）"""
+        return self._sdk.link_state()
+
+    def progress_stats(self) -> dict:
+        """长任务进度播报统计（ProgressPolicy 的累计计数）"""
+        with self._progress_lock:
+            return dict(self._progress_counters)
+
+    def _merge_progress_counters(self, policy: ProgressPolicy) -> None:
+        with self._progress_lock:
+            for k, v in policy.counters.items():
+                self._progress_counters[k] += v
+
+    def health_check(self, max_age_s: float | None = None) -> bool:
+        """
+        健康检查：缓存足够新视为健康，否则同步读取一次。
+        """
+        try:
+            self.get_state(max_age_s=max_age_s)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ 机器人健康检查失败: {self.address}, {e}")
+            return False
 
     def _next_task_no(self) -> int:
         self._task_no += 1
@@ -39,13 +190,16 @@ class RobotClient:
 
     def _retry_on_modbus_error(self, func: Callable, *args, max_retries: int = 3, **kwargs):
         """
-        Modbus 通信容错重试装饰器逻辑。
-        针对 'Invalid Message'、'No response' 或 'SlaveFailure' 等临时性错误进行重试。
+        Modbus 通信容错重试（整条调用链上唯一的重试预算，SDK 层不再重试）。
+        针对 'Invalid Message'、'No response' 或 'SlaveFailure' 等临时性错误进行重试；
+        链路已熔断（LinkDownError）时立即失败，重连由 SDK 的后台线程负责。
         """
         last_exception = None
         for i in range(max_retries):
             try:
                 return func(*args, **kwargs)
+            except LinkDownError:
+                raise
             except Exception as e:
                 err_msg = str(e)
                 # 识别常见的 Modbus 通信错误及从站忙碌错误 (SlaveFailure)
@@ -62,109 +216,185 @@ class RobotClient:
             raise last_exception
 
     # ------------------ 查询类 ------------------
-    def get_battery_info(self) -> dict:
-        def _inner():
-            with self._lock:
-                b = self._sdk.get_battery_info()
-            return {
-                "percentage_electricity": b.percentage_electricity,
-                "temperature": b.temperature,
-                "state": str(b.state),
-                "voltage": b.voltage,
-                "current": b.current,
-                "nominal_capacity": b.nominal_capacity,
-                "use_cycles": b.use_cycles,
-            }
-        return self._retry_on_modbus_error(_inner)
+    def _read_state(self, *, priority: int = PRIORITY_QUERY) -> RobotState:
+        # 后台轮询线程没有请求上下文，span 为空操作；只记录请求路径上的同步读取
+        with span("modbus.read", robot=self.address), self._lock:
+            # 取读取发起时刻：时间戳晚于某条指令完成时刻的状态，一定是在该指令之后读到的
+            monotonic_ts = time.monotonic()
+            if self._pipelined:
+                snapshot, charging = self._sdk.read_state(self.STATE_FIELDS, priority=priority)
+            else:
+                snapshot = self._sdk.read_snapshot(self.STATE_FIELDS)
+                charging = bool(self._sdk.is_charge())
+        return RobotState(
+            snapshot=snapshot,
+            is_charging=charging,
+            monotonic_ts=monotonic_ts,
+            wall_ts=snapshot.timestamp,
+        )
 
-    def get_movement_task_info(self) -> dict:
+    def get_state(self, *, fresh: bool = False, max_age_s: float | None = None) -> RobotState:
+        """
+        读取机器人状态：默认命中共享缓存，缓存过期或 fresh=True 时同步读取并发布到缓存。
+        :param fresh: 强制读取最新数据
+        :param max_age_s: 可接受的缓存最大年龄（秒），缺省使用 state_max_age_s
+        """
+        max_age = self._state_max_age_s if max_age_s is None else max_age_s
+        if not fresh:
+            latest = self._poller.latest()
+            if latest is not None and latest.age_s() <= max_age:
+                return latest
+        state = self._retry_on_modbus_error(self._read_state)
+        self._poller.publish(state)
+        return state
+
+    def get_snapshot(self, fields: list[str] | None = None) -> RobotSnapshot:
+        """
+        合并块读获取状态快照（全量只需 2 次 Modbus 读请求）。
+        :param fields: 需要的字段名（见 SNAPSHOT_FIELDS），None 表示全部
+        """
         def _inner():
             with self._lock:
-                t = self._sdk.get_movement_task_info()
-            return {
-                "state": str(t.state),
-                "no": t.no,
-                "target_station": t.target_station,
-                "path_no": t.path_no,
-                "result": str(t.result),
-                "result_value": t.result_value,
-            }
+                return self._sdk.read_snapshot(fields)
         return self._retry_on_modbus_error(_inner)
 
-    def get_action_task_info(self) -> dict:
-        def _inner():
-            with self._lock:
-                t = self._sdk.get_action_task_info()
-            return {
-                "state": str(t.state),
-                "no": t.no,
-                "id": t.id,
-                "param0": t.param0,
-                "param1": t.param1,
-                "result": str(t.result),
-                "result_value": t.result_value,
-            }
-        return self._retry_on_modbus_error(_inner)
+    def _state_field(self, name: str, *, fresh: bool = False, max_age_s: float | None = None) -> Any:
+        snapshot = self.get_state(fresh=fresh, max_age_s=max_age_s).snapshot
+        value = getattr(snapshot, name)
+        if value is None:
+            raise ValueError(f"状态字段 {name} 解码失败: {snapshot.decode_errors.get(name)}")
+        return value
 
-    def is_charging(self) -> bool:
-        def _inner():
-            with self._lock:
-                return bool(self._sdk.is_charge())
-        return self._retry_on_modbus_error(_inner)
+    def get_battery_info(self, *, fresh: bool = False) -> dict:
+        return battery_to_dict(self._state_field("battery_info", fresh=fresh))
+
+    def get_movement_task_info(self, *, fresh: bool = False) -> dict:
+        return movement_to_dict(self._state_field("movement_task", fresh=fresh))
+
+    def get_action_task_info(self, *, fresh: bool = False) -> dict:
+        return action_to_dict(self._state_field("action_task", fresh=fresh))
+
+    def is_charging(self, *, fresh: bool = False) -> bool:
+        return self.get_state(fresh=fresh).is_charging
+
+    def get_status(self, *, fresh: bool = False) -> dict:
+        """
+        一次状态读取得到的完整状态字典（供状态工具、会话缓存、规划器使用）。
+        """
+        return state_to_status(self.get_state(fresh=fresh))
 
     # ------------------ 内部工具 ------------------
+    def _command(self, func: Callable[[], Any]) -> Any:
+        """下发指令：与状态读取共用连接锁，并对通信抖动重试"""
+        def _locked():
+            with self._lock:
+                return func()
+        with span("modbus.command", robot=self.address):
+            return self._retry_on_modbus_error(_locked)
+
+    def _next_state(
+        self,
+        after_ts: float,
+        delay_s: float,
+        token: object,
+        stop_event: threading.Event | None = None,
+    ) -> RobotState:
+        """
+        等待一份比 after_ts 更新的状态。
+        后台轮询运行时按 delay_s 请求轮询节奏，新状态发布时立即被唤醒；否则睡眠 delay_s 后同步读取。
+        """
+        if self._poller.is_running():
+            self._poller.request_interval(token, delay_s)
+            state = self._poller.wait_for_update(after_ts, timeout_s=delay_s * 2 + 0.2)
+            if state is not None and state.monotonic_ts > after_ts:
+                return state
+            # 轮询线程未按时发布（例如持续通信失败），退化为同步读取
+        elif stop_event is not None:
+            stop_event.wait(delay_s)
+        else:
+            time.sleep(delay_s)
+        return self.get_state(fresh=True)
+
     def _poll_task_status(
         self,
-        query_func: Callable,
+        extract_func: Callable[[RobotState], Any],
         check_done_func: Callable[[Any], bool],
         *,
         timeout_s: int,
         emit: EventEmitter,
         task_name: str,
         task_no: int = 0,
+        duration_key: Hashable | None = None,
         stop_event: threading.Event | None = None
     ) -> Any:
         """
-        通用的状态轮询器：解耦业务逻辑与容错机制。
-        """
-        # 核心改进：在开始轮询前，先给 PLC 留出物理动作执行的“冷却期”
-        time.sleep(0.8)
-        
-        start = time.time()
-        last_progress_emit = 0.0
-        
-        while True:
-            if stop_event and stop_event.is_set():
-                logger.info(f"⏹️ {task_name}任务收到中断信号")
-                self.cancel_current_task()
-                raise InterruptedError(f"{task_name}任务已被取消")
+        通用的任务完成等待：解耦业务逻辑与容错机制。
 
-            elapsed = int(time.time() - start)
-            if elapsed >= timeout_s:
-                raise TimeoutError(f"{task_name}超时（已等待{timeout_s}秒）")
+        - 轮询节奏自适应：指令下发后与接近历史耗时（按 duration_key 统计）时快速轮询，长时间巡航时放慢
+        - 只接受指令下发之后读到的状态，因此无需在首次轮询前等待 PLC
+        - progress 事件由 ProgressPolicy 决定：状态跳变、行驶距离、ETA 偏离或静默过久时才播报
+        """
+        expected_s = self._durations.expected(duration_key) if duration_key is not None else None
+        pacer = AdaptivePollInterval(expected_s=expected_s)
+        policy = ProgressPolicy(self._progress)
+        token = object()
+        start = time.monotonic()
+        after_ts = start
 
-            try:
-                # 核心改进：在轮询内部增加即时重试，且支持 SlaveFailure 容错
-                status = self._retry_on_modbus_error(query_func, max_retries=3)
-                
-                # 节流播报
-                if time.time() - last_progress_emit >= 5:
-                    last_progress_emit = time.time()
-                    emit("progress", {
-                        "text": f"{task_name}进行中，已等待 {elapsed} 秒，状态：{getattr(status, 'state', 'N/A')}。",
-                        "elapsed_s": elapsed,
-                        "status": str(status)
-                    })
-
-                # 检查是否完成
+        try:
+            while True:
+                if stop_event and stop_event.is_set():
+                    logger.info(f"⏹️ {task_name}任务收到中断信号")
+                    self.cancel_current_task()
+                    raise InterruptedError(f"{task_name}任务已被取消")
+
+                elapsed_f = time.monotonic() - start
+                elapsed = int(elapsed_f)
+                if elapsed >= timeout_s:
+                    raise TimeoutError(f"{task_name}超时（已等待{timeout_s}秒）")
+
+                try:
+                    # get_state 内部对 'SlaveFailure' 等临时性错误即时重试
+                    state = self._next_state(after_ts, pacer.next_delay(elapsed_f), token, stop_event)
+                    after_ts = state.monotonic_ts
+                    status = extract_func(state)
+                    if status is None:
+                        raise ValueError(f"状态解码失败: {state.snapshot.decode_errors}")
+                except LinkDownError as e:
+                    # 链路熔断：等到后台重连的下一个时间点再读，不空转
+                    wait_s = min(max(e.retry_after_s or 1.0, 0.1), max(timeout_s - elapsed_f, 0.1))
+                    logger.warning(f"⚠️ {task_name}等待中链路断开，{wait_s:.1f}s 后重试: {e}")
+                    if stop_event is not None:
+                        stop_event.wait(wait_s)
+                    else:
+                        time.sleep(wait_s)
+                    continue
+                except Exception as e:
+                    # 只有在多次重试都失败后才记录警告
+                    logger.warning(f"⚠️ {task_name}轮询中通信持续异常（已忽略）: {e}")
+                    continue
+
+                # 按策略播报（位姿单位毫米 -> 米）
+                pose = state.snapshot.pose
+                eta_s = max(0.0, expected_s - elapsed_f) if expected_s else None
+                reason = policy.observe(
+                    elapsed_f,
+                    state=str(getattr(status, "state", status)),
+                    pose=(pose.x / 1000.0, pose.y / 1000.0) if pose else None,
+                    eta_s=eta_s,
+                )
+                if reason:
+                    emit("progress", progress_event(task_name, status, elapsed, reason, eta_s))
+
+                # 检查是否完成（任务报错时 check_done_func 抛出异常，直接上抛）
                 if check_done_func(status):
+                    if duration_key is not None:
+                        self._durations.record(duration_key, time.monotonic() - start)
+                    logger.info(f"✅ {task_name}完成，耗时 {time.monotonic() - start:.2f}s")
                     return status
-
-            except Exception as e:
-                # 只有在多次重试都失败后才记录警告
-                logger.warning(f"⚠️ {task_name}轮询中通信持续异常（已忽略）: {e}")
-
-            time.sleep(1)
+        finally:
+            self._poller.release_interval(token)
+            self._merge_progress_counters(policy)
 
     # ------------------ 指令类（长耗时） ------------------
     def cancel_current_task(self) -> None:
@@ -183,15 +413,17 @@ class RobotClient:
         
         # 1. 预检查与取消旧任务
         try:
-            info = self.get_movement_task_info()
+            info = self.get_movement_task_info(fresh=True)
             if "MT_RUNNING" in info["state"]:
                 self.cancel_current_task()
         except Exception: pass
 
         # 2. 下发指令
         task_no = self._next_task_no()
-        emit("started", {"text": f"开始导航到站点 {station_no}（任务号 {task_no}）。"})
-        self._retry_on_modbus_error(lambda: self._sdk.move_to_station_no(station_no, task_no))
+        self._command(lambda: self._sdk.move_to_station_no(station_no, task_no))
+        # 指令被接受后再记录任务号：重启接管只会等待真正下发过的任务
+        emit("started", {"text": f"开始导航到站点 {station_no}（任务号 {task_no}）。",
+                         "task_kind": "move", "task_no": task_no, "station_no": station_no, "robot": self.address})
 
         # 3. 使用通用轮询器
         def check_done(t):
@@ -202,16 +434,60 @@ class RobotClient:
             return False
 
         self._poll_task_status(
-            query_func=lambda: self._sdk.get_movement_task_info(),
+            extract_func=lambda state: state.snapshot.movement_task,
             check_done_func=check_done,
             timeout_s=timeout_s,
             emit=emit,
             task_name="导航",
             task_no=task_no,
+            duration_key=("move", station_no),
             stop_event=stop_event
         )
         emit("step_done", {"text": f"已到达站点 {station_no}。"})
 
+    def wait_for_task(
+        self,
+        task_kind: str,
+        task_no: int,
+        *,
+        timeout_s: int = 120,
+        emit: EventEmitter | None = None,
+        stop_event: threading.Event | None = None
+    ) -> None:
+        """
+        接管已下发的任务（服务重启后）：不重新下发指令，按任务号等待机器人完成。
+        :param task_kind: "move" / "action"
+        :raises RuntimeError: 机器人当前任务号已不是 task_no（任务被其他指令替换），或任务报错
+        """
+        emit = emit or (lambda _t, _d=None: None)
+        if task_kind == "move":
+            name, finished, error = "导航", MovementState.MT_FINISHED, MovementResult.MT_TASK_ERROR
+            extract = lambda state: state.snapshot.movement_task
+        elif task_kind == "action":
+            name, finished, error = "动作执行", ActionState.AT_FINISHED, ActionResult.AT_TASK_ERROR
+            extract = lambda state: state.snapshot.action_task
+        else:
+            raise ValueError(f"未知任务类型: {task_kind}")
+
+        def check_done(t):
+            if t.no != task_no:
+                raise RuntimeError(f"机器人当前{name}任务号为 {t.no}，原任务 {task_no} 已不在执行")
+            if t.state == finished:
+                if t.result == error:
+                    raise RuntimeError(f"{name}失败：错误码 {t.result_value}")
+                return True
+            return False
+
+        self._poll_task_status(
+            extract_func=extract,
+            check_done_func=check_done,
+            timeout_s=timeout_s,
+            emit=emit,
+            task_name=name,
+            task_no=task_no,
+            stop_event=stop_event
+        )
+
     def execute_action(
         self,
         action_id: int,
@@ -224,8 +500,9 @@ class RobotClient:
     ) -> None:
         emit = emit or (lambda _t, _d=None: None)
         task_no = self._next_task_no()
-        emit("started", {"text": f"开始执行动作 {action_id}（任务号 {task_no}）。"})
-        self._retry_on_modbus_error(lambda: self._sdk.start_action_task_no(action_id, param1, param2, task_no))
+        self._command(lambda: self._sdk.start_action_task_no(action_id, param1, param2, task_no))
+        emit("started", {"text": f"开始执行动作 {action_id}（任务号 {task_no}）。",
+                         "task_kind": "action", "task_no": task_no, "action_id": action_id, "robot": self.address})
 
         def check_done(t):
             if t.state == ActionState.AT_FINISHED and (t.no == task_no or task_no == 0):
@@ -235,12 +512,13 @@ class RobotClient:
             return False
 
         self._poll_task_status(
-            query_func=lambda: self._sdk.get_action_task_info(),
+            extract_func=lambda state: state.snapshot.action_task,
             check_done_func=check_done,
             timeout_s=timeout_s,
             emit=emit,
             task_name="动作执行",
             task_no=task_no,
+            duration_key=("action", action_id, param1, param2),
             stop_event=stop_event
         )
         emit("step_done", {"text": f"动作 {action_id} 执行完成。"})
@@ -254,19 +532,20 @@ class RobotClient:
     ) -> None:
         emit = emit or (lambda _t, _d=None: None)
         
-        if self.is_charging():
+        if self.is_charging(fresh=True):
             emit("step_done", {"text": "机器人已在充电中。"})
             return
             
         emit("started", {"text": "开始启动充电。"})
-        self._retry_on_modbus_error(lambda: self._sdk.charge())
+        self._command(self._sdk.charge)
         
         self._poll_task_status(
-            query_func=lambda: self._sdk.is_charge(),
+            extract_func=lambda state: state.is_charging,
             check_done_func=lambda is_charging: bool(is_charging),
             timeout_s=timeout_s,
             emit=emit,
             task_name="充电启动",
+            duration_key=("charge", True),
             stop_event=stop_event
         )
         emit("step_done", {"text": "充电已启动。"})
@@ -279,19 +558,20 @@ class RobotClient:
         stop_event: threading.Event | None = None
     ) -> None:
         emit = emit or (lambda _t, _d=None: None)
-        if not self.is_charging():
+        if not self.is_charging(fresh=True):
             emit("step_done", {"text": "机器人当前未在充电。"})
             return
 
         emit("started", {"text": "开始停止充电。"})
-        self._retry_on_modbus_error(lambda: self._sdk.stop_charge())
+        self._command(self._sdk.stop_charge)
         
         self._poll_task_status(
-            query_func=lambda: self._sdk.is_charge(),
+            extract_func=lambda state: state.is_charging,
             check_done_func=lambda is_charging: not bool(is_charging),
             timeout_s=timeout_s,
             emit=emit,
             task_name="充电停止",
+            duration_key=("charge", False),
             stop_event=stop_event
         )
         emit("step_done", {"text": "充电已停止。"})
@@ -0,0 +1,298 @@
+"""
+机器人车队连接池：robot_id → 懒连接、带健康检查的 RobotClient。
+
+- 车队配置来自 ROBOT_FLEET（"amr1=10.0.0.11:1502,amr2=10.0.0.12:1502"），未配置时退化为单机器人
+- 首次使用才建立连接（含后台状态轮询），空闲超时或健康检查失败时断开，下次使用自动重连
+- max_connections 限制同时保持的连接数，超出时淘汰最久未使用且未被租用的连接
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+from src.sr_modbus_link import LINK_CLOSED, LinkDownError
+from tools.robot_client import RobotClient
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROBOT_ID = "default"
+
+
+@dataclass(frozen=True)
+class RobotEndpoint:
+    robot_id: str
+    host: str
+    port: int
+
+
+def parse_fleet_spec(spec: str | None, *, default_host: str, default_port: int) -> list[RobotEndpoint]:
+    """
+    解析车队配置。
+    :param spec: "id=host:port,id2=host2:port2"，端口可省略（使用 default_port）
+    :return: 端点列表；spec 为空时返回单个 DEFAULT_ROBOT_ID 端点
+    """
+    if not spec or not spec.strip():
+        return [RobotEndpoint(DEFAULT_ROBOT_ID, default_host, default_port)]
+
+    endpoints: list[RobotEndpoint] = []
+    seen: set[str] = set()
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        robot_id, sep, addr = item.partition("=")
+        robot_id, addr = robot_id.strip(), addr.strip()
+        if not sep or not robot_id or not addr:
+            raise ValueError(f"车队配置格式错误: {item!r}（应为 id=host:port）")
+        host, _, port = addr.rpartition(":") if ":" in addr else (addr, "", "")
+        try:
+            port_no = int(port) if port else default_port
+        except ValueError:
+            raise ValueError(f"车队配置端口无效: {item!r}")
+        if robot_id in seen:
+            raise ValueError(f"车队配置中机器人 ID 重复: {robot_id}")
+        seen.add(robot_id)
+        endpoints.append(RobotEndpoint(robot_id, host, port_no))
+    if not endpoints:
+        raise ValueError("车队配置为空")
+    return endpoints
+
+
+@dataclass
+class _FleetEntry:
+    endpoint: RobotEndpoint
+    client: RobotClient | None = None
+    in_use: int = 0
+    last_used: float = 0.0  # time.monotonic()
+    last_health_check: float = 0.0
+    connects: int = 0
+    failures: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class RobotFleet:
+    """
+    车队注册表。
+
+    用法：
+        with fleet.lease("amr2") as robot:
+            robot.move_to_station(3)
+
+    租用期间连接不会被空闲回收或 LRU 淘汰；租用中抛出 ConnectionError 时连接被标记失效，
+    下一次租用重新建立（LinkDownError 除外：客户端正在后台重连）。
+    """
+
+    def __init__(
+        self,
+        endpoints: list[RobotEndpoint],
+        *,
+        default_robot_id: str | None = None,
+        client_factory: Callable[[RobotEndpoint], RobotClient] | None = None,
+        max_connections: int = 0,
+        idle_evict_s: float = 300.0,
+        health_check_interval_s: float = 10.0,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("车队至少需要一台机器人")
+        self._entries: dict[str, _FleetEntry] = {ep.robot_id: _FleetEntry(ep) for ep in endpoints}
+        self._default_robot_id = default_robot_id or endpoints[0].robot_id
+        if self._default_robot_id not in self._entries:
+            raise ValueError(f"默认机器人不在车队中: {self._default_robot_id}")
+        self._client_factory = client_factory or (lambda ep: RobotClient(ep.host, ep.port))
+        self._max_connections = max(0, int(max_connections))
+        self._idle_evict_s = float(idle_evict_s)
+        self._health_check_interval_s = float(health_check_interval_s)
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._sweeper: threading.Thread | None = None
+
+    @property
+    def default_robot_id(self) -> str:
+        return self._default_robot_id
+
+    def robot_ids(self) -> list[str]:
+        return list(self._entries)
+
+    def robot_id_for(self, address: str) -> str | None:
+        """按 host:port 反查机器人 ID"""
+        for rid, entry in self._entries.items():
+            if f"{entry.endpoint.host}:{entry.endpoint.port}" == address:
+                return rid
+        return None
+
+    def _entry(self, robot_id: str | None) -> _FleetEntry:
+        rid = robot_id or self._default_robot_id
+        entry = self._entries.get(rid)
+        if entry is None:
+            raise ValueError(f"未知机器人 ID: {rid}（可选: {', '.join(self._entries)}）")
+        return entry
+
+    # ------------------ 租用 ------------------
+    @contextmanager
+    def lease(self, robot_id: str | None = None) -> Iterator[RobotClient]:
+        """租用机器人连接（空 robot_id 表示默认机器人）"""
+        entry = self._entry(robot_id)
+        client = self._acquire(entry, lease=True)
+        try:
+            yield client
+        except LinkDownError:
+            # 链路熔断由客户端自己的后台线程重连，重建连接只会打断退避
+            raise
+        except ConnectionError:
+            self.mark_failed(entry.endpoint.robot_id, client)
+            raise
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def get(self, robot_id: str | None = None) -> RobotClient:
+        """
+        获取机器人连接（不计租用，可能被空闲回收）。适合一次性状态查询。
+        """
+        return self._acquire(self._entry(robot_id), lease=False)
+
+    def _acquire(self, entry: _FleetEntry, *, lease: bool) -> RobotClient:
+        # 同一台机器人的建连/健康检查串行，不同机器人之间互不阻塞
+        with entry.lock:
+            with self._lock:
+                # 先占位，避免建连期间被回收
+                entry.in_use += 1
+                entry.last_used = time.monotonic()
+            try:
+                client = self._ensure_client(entry)
+            except BaseException:
+                with self._lock:
+                    entry.in_use -= 1
+                raise
+            if not lease:
+                with self._lock:
+                    entry.in_use -= 1
+            return client
+
+    def _ensure_client(self, entry: _FleetEntry) -> RobotClient:
+        """调用方需持有 entry.lock"""
+        now = time.monotonic()
+        client = entry.client
+        if client is not None and now - entry.last_health_check >= self._health_check_interval_s:
+            entry.last_health_check = now
+            if not client.health_check() and client.link_state().get("state") == LINK_CLOSED:
+                # 链路熔断时客户端在后台重连，保留连接；链路正常却读失败才重建
+                logger.warning(f"⚠️ 机器人 {entry.endpoint.robot_id} 健康检查失败，重建连接")
+                with self._lock:
+                    entry.failures += 1
+                    self._disconnect(entry)
+                client = None
+
+        if client is None:
+            with self._lock:
+                self._make_room()
+            ep = entry.endpoint
+            logger.info(f"🔌 连接机器人 {ep.robot_id}: {ep.host}:{ep.port}")
+            client = self._client_factory(ep)
+            with self._lock:
+                entry.client = client
+                entry.connects += 1
+                entry.last_health_check = time.monotonic()
+        return client
+
+    def _make_room(self) -> None:
+        """连接数达到上限时淘汰最久未使用且未被租用的连接"""
+        if not self._max_connections:
+            return
+        connected = [e for e in self._entries.values() if e.client is not None]
+        if len(connected) < self._max_connections:
+            return
+        idle = sorted((e for e in connected if e.in_use == 0), key=lambda e: e.last_used)
+        if not idle:
+            raise ConnectionError(f"机器人连接数已达上限 {self._max_connections}，且全部在使用中")
+        victim = idle[0]
+        logger.info(f"♻️ 连接数达到上限，淘汰机器人 {victim.endpoint.robot_id} 的连接")
+        self._disconnect(victim)
+
+    def _disconnect(self, entry: _FleetEntry) -> None:
+        client, entry.client = entry.client, None
+        if client is None:
+            return
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"⚠️ 关闭机器人 {entry.endpoint.robot_id} 连接失败: {e}")
+
+    def mark_failed(self, robot_id: str, client: RobotClient | None = None) -> None:
+        """
+        标记连接失效。未被其他调用方租用时立即断开，否则只让下一次租用先做健康检查。
+        """
+        entry = self._entry(robot_id)
+        with self._lock:
+            if client is not None and entry.client is not client:
+                return
+            entry.failures += 1
+            entry.last_health_check = 0.0
+            if entry.in_use <= 1:
+                logger.warning(f"⚠️ 机器人 {robot_id} 通信失败，断开连接等待重连")
+                self._disconnect(entry)
+
+    # ------------------ 回收 ------------------
+    def evict_idle(self) -> list[str]:
+        """断开空闲超时且未被租用的连接，返回被回收的机器人 ID"""
+        if self._idle_evict_s <= 0:
+            return []
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.client is not None and entry.in_use == 0 and now - entry.last_used >= self._idle_evict_s:
+                    self._disconnect(entry)
+                    evicted.append(entry.endpoint.robot_id)
+        if evicted:
+            logger.info(f"♻️ 回收空闲机器人连接: {', '.join(evicted)}")
+        return evicted
+
+    def start_sweeper(self, interval_s: float = 30.0) -> None:
+        if self._idle_evict_s <= 0 or (self._sweeper and self._sweeper.is_alive()):
+            return
+        self._stop.clear()
+
+        def _run() -> None:
+            while not self._stop.wait(interval_s):
+                try:
+                    self.evict_idle()
+                except Exception as e:
+                    logger.error(f"❌ 回收空闲连接失败: {e}")
+
+        self._sweeper = threading.Thread(target=_run, name="robot-fleet-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock:
+            for entry in self._entries.values():
+                self._disconnect(entry)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "default_robot_id": self._default_robot_id,
+                "max_connections": self._max_connections,
+                "connected": sum(1 for e in self._entries.values() if e.client is not None),
+                "robots": {
+                    rid: {
+                        "address": f"{e.endpoint.host}:{e.endpoint.port}",
+                        "connected": e.client is not None,
+                        "in_use": e.in_use,
+                        "connects": e.connects,
+                        "failures": e.failures,
+                        "register_cache": e.client.cache_stats() if e.client is not None else None,
+                        "link": e.client.link_state() if e.client is not None else None,
+                        "progress": e.client.progress_stats() if e.client is not None else None,
+                    }
+                    for rid, e in self._entries.items()
+                },
+            }
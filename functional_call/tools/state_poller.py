@@ -0,0 +1,143 @@
+"""
+机器人状态轮询器（每台机器人一个后台线程）。
+
+- 以固定频率合并块读寄存器，发布带单调时钟时间戳的类型化快照
+- 工具 / 会话缓存 / 规划器读取缓存，不再各自轮询 Modbus
+- 调用方显式要求时才同步读取最新数据
+- 等待任务完成的调用方可临时请求更短的轮询间隔，并通过条件变量在新状态发布时立即被唤醒
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from src.sr_modbus_model import RobotSnapshot
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RobotState:
+    """一次轮询得到的机器人状态"""
+
+    snapshot: RobotSnapshot
+    is_charging: bool
+    monotonic_ts: float  # time.monotonic()，用于计算新鲜度
+    wall_ts: float  # time.time()，用于展示/日志
+
+    def age_s(self) -> float:
+        return time.monotonic() - self.monotonic_ts
+
+
+class RobotStatePoller:
+    """
+    后台轮询线程：按 interval_s 调用 read_func 并发布最新状态。
+
+    read_func 由 RobotClient 提供（内部自行加锁），失败时保留上一次成功的状态。
+    """
+
+    def __init__(self, read_func: Callable[[], RobotState], *, interval_s: float = 0.5, name: str = "robot") -> None:
+        self._read_func = read_func
+        self._interval_s = max(0.05, float(interval_s))
+        self._name = name
+        self._cond = threading.Condition()
+        self._latest: RobotState | None = None
+        self._last_error: str | None = None
+        self._consecutive_errors = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        # 临时轮询间隔请求：token -> interval_s，生效间隔取所有请求与基础间隔的最小值
+        self._demands: dict[object, float] = {}
+
+    @property
+    def interval_s(self) -> float:
+        return self._interval_s
+
+    def effective_interval_s(self) -> float:
+        with self._cond:
+            return min([self._interval_s, *self._demands.values()])
+
+    def request_interval(self, token: object, interval_s: float) -> None:
+        """
+        临时请求更短的轮询间隔（如任务等待期间），需配对调用 release_interval。
+        """
+        interval_s = max(0.05, float(interval_s))
+        with self._cond:
+            before = min([self._interval_s, *self._demands.values()])
+            self._demands[token] = interval_s
+        if interval_s < before:
+            # 打断当前的长间隔等待，立即按新节奏轮询
+            self._wake.set()
+
+    def release_interval(self, token: object) -> None:
+        with self._cond:
+            self._demands.pop(token, None)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"state-poller-{self._name}", daemon=True)
+        self._thread.start()
+        logger.info(f"✅ 机器人状态轮询已启动: {self._name}, 间隔 {self._interval_s}s")
+
+    def stop(self, timeout_s: float = 2.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def latest(self) -> RobotState | None:
+        return self._latest
+
+    def last_error(self) -> str | None:
+        return self._last_error
+
+    def publish(self, state: RobotState) -> None:
+        """发布新状态（轮询线程与同步刷新共用），并唤醒等待者"""
+        with self._cond:
+            if self._latest is None or state.monotonic_ts >= self._latest.monotonic_ts:
+                self._latest = state
+            self._last_error = None
+            self._consecutive_errors = 0
+            self._cond.notify_all()
+
+    def wait_for_update(self, after_ts: float, timeout_s: float) -> RobotState | None:
+        """
+        阻塞等待比 after_ts 更新的状态。
+        :return: 新状态；超时返回当前最新状态（可能为 None）
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._latest is not None and self._latest.monotonic_ts > after_ts,
+                timeout=timeout_s,
+            )
+            return self._latest
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.publish(self._read_func())
+            except Exception as e:
+                self._consecutive_errors += 1
+                self._last_error = str(e)
+                # 连续失败只记录第一次，避免刷屏
+                if self._consecutive_errors == 1:
+                    logger.warning(f"⚠️ 状态轮询失败（保留上次状态）: {self._name}, {e}")
+            # 连续失败时放慢节奏，最多放慢到 8 倍间隔
+            backoff = min(2 ** max(self._consecutive_errors - 1, 0), 8) if self._consecutive_errors else 1
+            delay = self.effective_interval_s() * backoff - (time.monotonic() - started)
+            if delay > 0:
+                self._wake.wait(delay)
+            self._wake.clear()
@@ -15,17 +15,21 @@ class StatusToolbox(BaseToolbox):
     def __init__(self, robot: RobotClient) -> None:
         super().__init__(robot)
 
-    def get_battery_info(self) -> dict:
-        return self.robot.get_battery_info()
+    def get_battery_info(self, *, fresh: bool = False) -> dict:
+        return self.robot.get_battery_info(fresh=fresh)
 
-    def get_movement_task_info(self) -> dict:
-        return self.robot.get_movement_task_info()
+    def get_movement_task_info(self, *, fresh: bool = False) -> dict:
+        return self.robot.get_movement_task_info(fresh=fresh)
 
-    def get_action_task_info(self) -> dict:
-        return self.robot.get_action_task_info()
+    def get_action_task_info(self, *, fresh: bool = False) -> dict:
+        return self.robot.get_action_task_info(fresh=fresh)
 
-    def is_charging(self) -> bool:
-        return self.robot.is_charging()
+    def is_charging(self, *, fresh: bool = False) -> bool:
+        return self.robot.is_charging(fresh=fresh)
+
+    def get_status(self, *, fresh: bool = False) -> dict:
+        """完整状态字典（默认读取后台轮询缓存）"""
+        return self.robot.get_status(fresh=fresh)
 
     def get_prompt_fragment(self) -> str:
         return (
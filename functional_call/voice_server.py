@@ -8,22 +8,38 @@
   - 短任务：200 + resultMsg（可直接播报）
   - 长任务：202 + request_id + 第一条 resultMsg（开始执行…），随后用事件流播报
 
-- GET /v1/voice/events/{request_id}?after=0&limit=200
+- GET /v1/voice/events/{request_id}?after=0&limit=200[&wait_s=20]
   - 返回增量事件（每条事件包含 speak_text）
+  - wait_s>0 为长轮询：没有新事件时挂起，直到有新事件/任务结束/超时
+
+- GET /v1/voice/events/{request_id}/stream?after=0
+  - SSE 事件流（text/event-stream），每条事件一帧，任务结束时发送 event: done 后关闭
+
+- GET /debug/stats
+  - 事件流数量/内存估算、任务队列深度与排队等待时间、机器人连接池状态
+
+- GET /metrics
+  - Prometheus 文本格式指标：任务/队列、事件流、会话、LLM 与 Modbus 耗时/错误/重连、语音推送
+
+- GET /debug/traces/{request_id}
+  - 该请求的耗时瀑布图：handle_query / 任务执行 / LLM 思考 / 工具 / Modbus 读写 / 语音推送
 """
 
+import json
 import logging
 import os
 import requests
+from typing import Optional
 from pydantic import BaseModel
 
 # 统一日志（自动配置 + 行号 + trace字段）
 import log_config  # noqa: F401
 
-from fastapi import FastAPI, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, BackgroundTasks, Header, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import uvicorn
 
+from core import metrics
 from core.config import load_settings
 from core.models import VoiceEventsResponse, VoiceQueryRequest
 from orchestrator.orchestrator import Orchestrator
@@ -83,6 +99,11 @@ async def startup_event():
     orchestrator.warm_up()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    orchestrator.shutdown()
+
+
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
@@ -91,11 +112,18 @@ async def health():
 @app.post("/v1/voice/query")
 async def voice_query(req: VoiceQueryRequest):
     status_code, resp = orchestrator.handle_query(req)
-    return JSONResponse(status_code=status_code, content=resp.model_dump())
+    headers = None
+    if status_code == 429 and resp.retry_after_s:
+        headers = {"Retry-After": str(max(1, round(resp.retry_after_s)))}
+    return JSONResponse(status_code=status_code, content=resp.model_dump(), headers=headers)
 
 
 @app.get("/v1/voice/events/{request_id}")
-async def voice_events(request_id: str, after: int = 0, limit: int = 200):
+async def voice_events(request_id: str, after: int = 0, limit: int = 200, wait_s: float = 0.0):
+    if wait_s > 0:
+        await orchestrator.event_bus.wait_for_events(
+            request_id, after=after, timeout_s=min(wait_s, settings.event_long_poll_max_s)
+        )
     events, done, next_after = orchestrator.event_bus.get_events(request_id, after=after, limit=limit)
     resp = VoiceEventsResponse(
         request_id=request_id,
@@ -106,6 +134,67 @@ async def voice_events(request_id: str, after: int = 0, limit: int = 200):
     return JSONResponse(status_code=200, content=resp.model_dump())
 
 
+def _sse_frame(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get("/v1/voice/events/{request_id}/stream")
+async def voice_events_stream(
+    request_id: str,
+    request: Request,
+    after: int = 0,
+    last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+):
+    # 断线重连时浏览器/客户端会带上 Last-Event-ID，优先于 after
+    if last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+    bus = orchestrator.event_bus
+
+    async def _gen():
+        cursor = after
+        while True:
+            events, done, cursor = bus.get_events(request_id, after=cursor, limit=0)
+            for ev in events:
+                yield _sse_frame(ev.type, ev.model_dump(), ev.event_id)
+            if done:
+                yield _sse_frame("done", {"request_id": request_id, "next_after": cursor})
+                return
+            if await request.is_disconnected():
+                return
+            if not await bus.wait_for_events(request_id, after=cursor, timeout_s=settings.event_sse_keepalive_s):
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        _gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/debug/stats")
+async def debug_stats():
+    return orchestrator.stats()
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.post("/debug/maps/reload")
+async def debug_reload_maps():
+    return orchestrator.reload_maps()
+
+
+@app.get("/debug/traces/{request_id}")
+async def debug_trace(request_id: str):
+    trace = orchestrator.trace(request_id)
+    if trace is None:
+        return JSONResponse(status_code=404, content={"detail": f"没有该请求的追踪记录: {request_id}"})
+    return trace
+
+
 if __name__ == "__main__":
     host = os.getenv("FC_SERVER_HOST", "0.0.0.0")
     port = int(os.getenv("FC_SERVER_PORT", "8766"))
@@ -20,6 +20,9 @@ except ImportError as e:
     print("请确保在项目根目录下运行此脚本。")
     sys.exit(1)
 
+# 每行监控需要的快照字段
+MONITOR_FIELDS = ["system_state", "locate_state", "battery_info", "pose", "movement_task", "action_task"]
+
 def monitor_modbus():
     settings = load_settings()
     host = settings.modbus_host
@@ -45,23 +48,22 @@ def monitor_modbus():
                     time.sleep(3)
                     continue
 
-            sdk = robot._sdk
-            
             try:
-                # 获取各项状态
-                sys_state = sdk.get_cur_system_state()
-                loc_state = sdk.get_cur_locate_state()
-                battery = sdk.get_battery_info()
+                # 合并块读：一行状态只需 2 次 Modbus 读请求
+                snap = robot.get_snapshot(MONITOR_FIELDS)
+                sys_state = snap.system_state
+                loc_state = snap.locate_state
+                battery = snap.battery_info
                 
                 # 格式化输出
                 timestamp = time.strftime("%H:%M:%S")
                 sys_state_name = sys_state.name if hasattr(sys_state, 'name') else str(sys_state)
                 loc_state_name = loc_state.name if hasattr(loc_state, 'name') else str(loc_state)
-                battery_pct = f"{battery.percentage_electricity}%"
+                battery_pct = f"{battery.percentage_electricity}%" if battery else "N/A"
                 
                 # 获取位姿信息
-                pose = sdk.get_cur_pose()
-                pose_str = f"x:{pose.x:.2f}, y:{pose.y:.2f}, yaw:{pose.yaw:.2f}"
+                pose = snap.pose
+                pose_str = f"x:{pose.x:.2f}, y:{pose.y:.2f}, yaw:{pose.yaw:.2f}" if pose else "N/A"
                 
                 # 检查连接状态 (假定能读取到数据即为 Connected)
                 conn_status = "🟢 OK"
@@ -69,12 +71,12 @@ def monitor_modbus():
                 print(f"{timestamp:<10} | {sys_state_name:<15} | {loc_state_name:<15} | {battery_pct:<5} | {pose_str:<30} | {conn_status}")
                 
                 # 如果有任务在运行，也可以显示
-                move_info = sdk.get_movement_task_info()
-                if move_info.state.value not in [0, 5]: # MT_NA or MT_FINISHED
+                move_info = snap.movement_task
+                if move_info and move_info.state.value not in [0, 5]: # MT_NA or MT_FINISHED
                     print(f"  └─ 🚀 移动任务: {move_info.state.name}, 目标: {move_info.target_station}, 编号: {move_info.no}")
                 
-                action_info = sdk.get_action_task_info()
-                if action_info.state.value not in [0, 5]: # AT_NA or AT_FINISHED
+                action_info = snap.action_task
+                if action_info and action_info.state.value not in [0, 5]: # AT_NA or AT_FINISHED
                     print(f"  └─ 🛠️ 动作任务: {action_info.state.name}, ID: {action_info.id}, 编号: {action_info.no}")
 
             except Exception as e: